@@ -0,0 +1,78 @@
+"""
+Compare AST throughput (files/sec) of one `node` spawn per rule group per file
+against the pooled workers that evaluate every group in one round trip.
+
+    python benchmarks/bench_ast_pool.py [--repeat 5]
+"""
+import argparse
+import glob
+import os
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core import detectors  # noqa: E402
+from secure_code_analyzer.core.ast_pool import shutdown_pools  # noqa: E402
+
+GROUPS = ("ast", "context-ast", "taint-ast")
+
+
+def load_corpus(repeat):
+    root = pathlib.Path(__file__).resolve().parents[1] / "samples"
+    files = sorted(glob.glob(str(root / "**" / "*.js"), recursive=True) +
+                   glob.glob(str(root / "**" / "*.php"), recursive=True))
+    corpus = []
+    for path in files:
+        with open(path, "r", encoding="utf-8") as f:
+            corpus.append((path, f.read()))
+    return corpus * repeat
+
+
+def rule_groups(path):
+    lang = "javascript" if path.endswith(".js") else "php"
+    runner = detectors.JS_AST_RUNNER if lang == "javascript" else detectors.PHP_AST_RUNNER
+    groups = {g: detectors.DEFAULT_RULESET.get(lang, g) for g in GROUPS}
+    return runner, {g: rules for g, rules in groups.items() if rules}
+
+
+def bench_spawn(corpus):
+    for path, code in corpus:
+        runner, groups = rule_groups(path)
+        for rules in groups.values():
+            detectors.run_node_ast_runner(runner, code, rules)
+
+
+def bench_pool(corpus):
+    for path, code in corpus:
+        runner, groups = rule_groups(path)
+        detectors.run_ast_groups(runner, code, groups)
+
+
+def timed(fn, corpus):
+    start = time.perf_counter()
+    fn(corpus)
+    elapsed = time.perf_counter() - start
+    return len(corpus) / elapsed if elapsed else float("inf")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Copies of the samples corpus")
+    args = parser.parse_args()
+
+    corpus = load_corpus(args.repeat)
+    spawn_fps = timed(bench_spawn, corpus)
+    bench_pool([corpus[0], corpus[-1]])  # warm one worker per runner so startup is not billed
+    pool_fps = timed(bench_pool, corpus)
+    shutdown_pools()
+
+    print(f"files:            {len(corpus)} (cpus: {os.cpu_count()})")
+    print(f"spawn per group:  {spawn_fps:8.1f} files/sec")
+    print(f"worker pool:      {pool_fps:8.1f} files/sec")
+    print(f"speedup:          {pool_fps / spawn_fps:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
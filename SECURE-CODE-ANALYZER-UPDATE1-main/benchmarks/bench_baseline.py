@@ -0,0 +1,74 @@
+"""
+Baseline index at scale: write a baseline of N synthetic findings, load
+it and match a scan in which 1% of them are fixed and as many are new,
+then list the fixed ones; against reading the same findings back from a
+pretty-printed report.json into a set of fingerprints.
+
+    python benchmarks/bench_baseline.py [--issues 300000]
+"""
+import argparse
+import json
+import os
+import pathlib
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core.baseline import Baseline, issue_fingerprint, write_baseline  # noqa: E402
+from secure_code_analyzer.core.findings import Finding, rule_info_of  # noqa: E402
+
+
+def synthetic_issues(n, changed=0):
+    """N findings; the last `changed` of them on other lines of code than in the unchanged scan."""
+    rules = [rule_info_of(f"JS-{k:03d}", "HIGH", "Injection", "Use of eval() can lead to code execution.",
+                          "Avoid eval(); parse input explicitly.", "A03:2021", "CWE-95") for k in range(40)]
+    for k in range(n):
+        code = f"const value_{k} = eval(request.query.input_{k});"
+        if k >= n - changed:
+            code = code.replace("eval", "evil")
+        yield Finding(rules[k % 40], f"src/module_{k // 50}/file_{k % 50}.js", k % 900 + 1, code, "Regex",
+                      function=f"handler_{k % 300}").as_dict()
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--issues", type=int, default=300_000, help="Findings in the baseline (default: %(default)s)")
+    args = parser.parse_args()
+    n, changed = args.issues, args.issues // 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index_path = os.path.join(tmp, "baseline.idx")
+        report_path = os.path.join(tmp, "report.json")
+        issues = list(synthetic_issues(n))
+        current = list(synthetic_issues(n, changed))
+        _, write_s = timed(write_baseline, issues, index_path)
+        with open(report_path, "w", encoding="utf-8") as f:
+            json.dump(issues, f, indent=2)
+        del issues
+
+        baseline, load_s = timed(Baseline, index_path)
+        new, match_s = timed(lambda: sum(1 for _ in baseline.new(current)))
+        fixed, fixed_s = timed(lambda: sum(1 for _ in baseline.fixed()))
+        assert new == fixed == changed, (new, fixed)
+
+        def from_report():
+            with open(report_path, encoding="utf-8") as f:
+                return {issue_fingerprint(issue) for issue in json.load(f)}
+        _, report_s = timed(from_report)
+
+        print(f"{n} findings, {changed} fixed and {changed} new")
+        print(f"  index   {os.path.getsize(index_path) / 1e6:6.1f} MB  write {write_s:.2f}s  load {load_s:.2f}s"
+              f"  match {match_s:.2f}s  list fixed {fixed_s:.2f}s")
+        print(f"  report  {os.path.getsize(report_path) / 1e6:6.1f} MB  json.load into a set {report_s:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
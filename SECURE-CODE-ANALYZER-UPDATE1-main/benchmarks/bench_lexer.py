@@ -0,0 +1,86 @@
+"""
+Lexer throughput on large files: mask() MB/s for str and bytes text at
+doubling sizes (the seconds per MB stay flat if it is linear), and the
+regex stage with the shipped rules, which build one masked view per file,
+against the same rules all run on the raw text.
+
+    python benchmarks/bench_lexer.py [--size-mb 1] [--doublings 4] [--rounds 3]
+"""
+import argparse
+import json
+import pathlib
+import random
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import corpus  # noqa: E402
+from secure_code_analyzer.core.lexer import mask  # noqa: E402
+from secure_code_analyzer.core.rules import RULES_PATH, RuleSet  # noqa: E402
+
+LANGUAGES = {"js": "javascript", "php": "php"}
+SAMPLES = {"js": sorted((ROOT / "samples").rglob("*.js")), "php": sorted((ROOT / "samples").rglob("*.php"))}
+
+
+def large_file(language, size_bytes):
+    """Generated handlers interleaved with the (comment and string heavy) samples, to `size_bytes`."""
+    rng = random.Random(1)
+    samples = [p.read_text(encoding="utf-8") for p in SAMPLES[language]]
+    parts, size = [], 0
+    while size < size_bytes:
+        source, _ = corpus.generate_file(rng, language, 64 * 1024, corpus.DEFAULT_LINE_LENGTH, 0.05)
+        if language == "php" and parts:
+            source = source.replace("<?php\n", "", 1)
+        parts.append(source)
+        parts.append(samples[len(parts) % len(samples)].replace("<?php", "").replace("?>", ""))
+        size += len(parts[-2]) + len(parts[-1])
+    text = "".join(parts)
+    return "<?php\n" + text if language == "php" and not text.startswith("<?php") else text
+
+
+def best(rounds, fn, *args):
+    seconds = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn(*args)
+        spent = time.perf_counter() - start
+        seconds = spent if seconds is None else min(seconds, spent)
+    return seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0, help="Smallest file size (default: %(default)s)")
+    parser.add_argument("--doublings", type=int, default=4, help="Sizes to try (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=3, help="Best of this many passes (default: %(default)s)")
+    args = parser.parse_args()
+
+    with open(RULES_PATH, encoding="utf-8") as f:
+        rules = json.load(f)
+    with tempfile.TemporaryDirectory() as tmp:
+        raw_path = pathlib.Path(tmp) / "rules.json"
+        raw_path.write_text(json.dumps([{k: v for k, v in rule.items() if k != "text"} for rule in rules]),
+                            encoding="utf-8")
+        raw_rules, shipped = RuleSet(str(raw_path)), RuleSet()
+
+    for short, language in LANGUAGES.items():
+        print(f"{language}:")
+        for step in range(args.doublings):
+            text = large_file(short, int(args.size_mb * 2 ** step * 1024 * 1024))
+            data = text.encode("utf-8")
+            mb = len(data) / (1024 * 1024)
+            as_str, as_bytes = best(args.rounds, mask, text, language), best(args.rounds, mask, data, language)
+            print(f"  {mb:6.1f} MB  mask str {mb / as_str:6.1f} MB/s ({as_str / mb:.3f} s/MB)"
+                  f"  bytes {mb / as_bytes:6.1f} MB/s ({as_bytes / mb:.3f} s/MB)")
+        raw = best(args.rounds, raw_rules.pattern_starts, language, data)
+        masked = best(args.rounds, shipped.pattern_starts, language, data)
+        print(f"  regex stage, {mb:.1f} MB: all raw {mb / raw:6.1f} MB/s"
+              f"  shipped (masked view) {mb / masked:6.1f} MB/s  ({raw / masked:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""
+Line lookup cost on a large synthetic bundle: slicing and counting from
+offset 0 plus code.splitlines() per match, versus one shared LineIndex.
+
+    python benchmarks/bench_lines.py [--size-mb 1] [--hits 2000]
+"""
+import argparse
+import pathlib
+import re
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core.lines import LineIndex  # noqa: E402
+
+PATTERN = re.compile(r"console\.log\s*\(", re.IGNORECASE)
+
+
+def synthetic_bundle(size_mb, hits):
+    filler = "var a=function(b){return b*2};"
+    target = int(size_mb * 1024 * 1024)
+    every = max(1, target // (hits * len(filler)))
+    parts, size, n = [], 0, 0
+    while size < target:
+        chunk = filler + ('console.log("x");' if n % every == 0 else "")
+        chunk += "\n" if n % 50 == 0 else ""
+        parts.append(chunk)
+        size += len(chunk)
+        n += 1
+    return "".join(parts)
+
+
+def legacy(code):
+    out = []
+    for match in PATTERN.finditer(code):
+        line_no = code[:match.start()].count("\n") + 1
+        out.append((line_no, code.splitlines()[line_no - 1].strip()))
+    return out
+
+
+def indexed(code):
+    lines = LineIndex(code)
+    out = []
+    for match in PATTERN.finditer(code):
+        line_no = lines.line_of(match.start())
+        out.append((line_no, lines.snippet(line_no)))
+    return out
+
+
+def timed(fn, code):
+    start = time.perf_counter()
+    result = fn(code)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=1.0, help="Synthetic file size")
+    parser.add_argument("--hits", type=int, default=2000, help="Approximate console.log hits")
+    args = parser.parse_args()
+
+    code = synthetic_bundle(args.size_mb, args.hits)
+    new_time, new = timed(indexed, code)
+    old_time, old = timed(legacy, code)
+    assert old == new
+
+    print(f"file:          {len(code) / 1024 / 1024:.1f} MB, {code.count(chr(10)) + 1} lines, {len(new)} hits")
+    print(f"legacy:        {old_time:8.3f} s")
+    print(f"LineIndex:     {new_time:8.3f} s")
+    print(f"speedup:       {old_time / new_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+PHP AST stage time on large synthetic files (10k+ lines of nested calls,
+interpolated superglobals and include chains), per file size. Pass
+--runner to time another copy of php_ast_runner.js, e.g. one checked out
+from an older commit into the repo root.
+
+    python benchmarks/bench_php_ast.py [--lines 10000 20000] [--runner php_ast_runner.js]
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from secure_code_analyzer.core.ast_pool import NodeWorker  # noqa: E402
+from secure_code_analyzer.core.rules import RuleSet  # noqa: E402
+
+BLOCK = [
+    '$v{n} = trim(strtolower(htmlspecialchars(substr(str_replace("a", "b", "$_GET[x{n}]"), 0, 10))));',
+    '$w{n} = array(array(array("k" => array("$_POST[y{n}]", $v{n}))));',
+    'if ($a{n}) {{ if ($b{n}) {{ exec("run " . $v{n}); }} }}',
+    'system(implode(",", array_map("trim", explode(",", $w{n}[0][0]["k"][0]))));',
+    'include "views/{n}.php";',
+    '$t{n} = $v{n};',
+    'mysqli_query($conn, "SELECT * FROM t WHERE id = $t{n}");',
+    'echo htmlspecialchars($t{n});',
+]
+
+
+def synthetic_php(lines):
+    body = ["<?php"]
+    n = 0
+    while len(body) < lines:
+        body.extend(line.format(n=n) for line in BLOCK)
+        n += 1
+    return "\n".join(body[:lines]) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[10000, 20000, 40000])
+    parser.add_argument("--runner", default=str(ROOT / "php_ast_runner.js"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    ruleset = RuleSet()
+    groups = {t: ruleset.get("php", t) for t in ("ast", "context-ast", "taint-ast")}
+    worker = NodeWorker(str(pathlib.Path(args.runner).resolve()), timeout=600)
+    worker.request("<?php\n", groups)  # warm up: start node, load the parser
+
+    print(f"runner: {args.runner}")
+    try:
+        for lines in args.lines:
+            code = synthetic_php(lines)
+            best = None
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                response = worker.request(code, groups)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            if "error" in response:
+                print(f"  {lines:>6} lines: error {response['error']}")
+                continue
+            found = sum(
+                len(lines_) for result in response["results"].values() if "error" not in result
+                for lines_ in result.values()
+            )
+            print(f"  {lines:>6} lines  {len(code) / 1024:8.0f} KB  {best:7.3f}s  ({found} raw findings)")
+    finally:
+        worker.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Per-file detector throughput with and without the literal prefilter, on a
+mixed corpus: mostly clean handlers, some with vulnerable statements, plus
+the samples. Both must report the same findings; the AST round trips each
+makes are counted. "scan" runs as an uncached scan does; "scan+summary" as
+a cached one, which always asks for the taint summary of the cross-file pass.
+
+    python benchmarks/bench_prefilter.py [--files 200] [--vulnerable 0.2] [--rounds 3]
+"""
+import argparse
+import pathlib
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import corpus  # noqa: E402
+from secure_code_analyzer.core import detectors  # noqa: E402
+from secure_code_analyzer.core.rules import RuleSet  # noqa: E402
+from secure_code_analyzer.core.source import SourceFile  # noqa: E402
+
+
+def mixed_corpus(out_dir, files, vulnerable):
+    """Paths of `files` generated files, a `vulnerable` share of them with findings, and the samples."""
+    dirty = max(1, int(files * vulnerable))
+    paths = [entry["path"] for entry in corpus.generate(str(out_dir / "clean"), files=files - dirty, density=0.0,
+                                                         seed=1)["files"]]
+    paths += [entry["path"] for entry in corpus.generate(str(out_dir / "dirty"), files=dirty, seed=2)["files"]]
+    paths += sorted(str(p) for p in (ROOT / "samples").rglob("*") if p.suffix in (".js", ".php"))
+    return paths
+
+
+def scan(paths, ruleset, summary):
+    """(findings per file, AST round trips, seconds)."""
+    trips = [0]
+    run = detectors.run_ast_groups
+
+    def counted(*args):
+        trips[0] += 1
+        return run(*args)
+
+    detectors.run_ast_groups = counted
+    try:
+        start = time.perf_counter()
+        findings = []
+        for path in paths:
+            with SourceFile(path) as source:
+                findings.append(list(detectors.run_detectors(source, path, ruleset,
+                                                             summary={} if summary else None)))
+        return findings, trips[0], time.perf_counter() - start
+    finally:
+        detectors.run_ast_groups = run
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=200, help="Generated files (default: %(default)s)")
+    parser.add_argument("--vulnerable", type=float, default=0.2,
+                        help="Share of generated files with vulnerable statements (default: %(default)s)")
+    parser.add_argument("--rounds", type=int, default=3, help="Best of this many passes (default: %(default)s)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = mixed_corpus(pathlib.Path(tmp), args.files, args.vulnerable)
+        plain, filtered = RuleSet(prefilter=False), RuleSet()
+        scan(paths, plain, False)   # start the AST workers
+        print(f"{len(paths)} files")
+        for label, summary in (("scan", False), ("scan+summary", True)):
+            results = {}
+            for ruleset in (plain, filtered):
+                best = None
+                for _ in range(args.rounds):
+                    findings, trips, seconds = scan(paths, ruleset, summary)
+                    best = seconds if best is None else min(best, seconds)
+                results[ruleset.prefilter] = (findings, trips, best)
+            assert results[True][0] == results[False][0], "prefilter changed the findings"
+            (_, old_trips, old), (_, new_trips, new) = results[False], results[True]
+            print(f"{label}:")
+            print(f"  no prefilter: {len(paths) / old:8.1f} files/s  {old_trips} AST round trips")
+            print(f"  prefilter:    {len(paths) / new:8.1f} files/s  {new_trips} AST round trips  ({old / new:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
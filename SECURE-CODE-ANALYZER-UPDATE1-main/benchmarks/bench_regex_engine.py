@@ -0,0 +1,57 @@
+"""
+Regex/heuristic stage throughput (MB/s): one finditer per rule versus the
+combined per-language automaton. Both engines must report the same hits.
+
+    python benchmarks/bench_regex_engine.py [--size-mb 2]
+"""
+import argparse
+import pathlib
+import sys
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core.rules import RuleSet  # noqa: E402
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+
+
+def corpus(language, size_mb):
+    ext = ".js" if language == "javascript" else ".php"
+    seed = "".join(p.read_text(encoding="utf-8") for p in sorted((ROOT / "samples").rglob("*" + ext)))
+    filler = "\n".join(f"var value{n} = compute({n}) + offset;" for n in range(200))
+    unit = seed + "\n" + filler + "\n"
+    return unit * max(1, int(size_mb * 1024 * 1024 / len(unit)))
+
+
+def throughput(ruleset, language, text, rounds=3):
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        hits = [(rule["id"], starts) for rule, _, starts in ruleset.pattern_hits(language, text)]
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return len(text) / 1024 / 1024 / best, hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=2.0, help="Text size per language")
+    args = parser.parse_args()
+
+    per_rule = RuleSet(regex_engine="per-rule")
+    combined = RuleSet(regex_engine="combined")
+    for language in ("javascript", "php"):
+        text = corpus(language, args.size_mb)
+        old, old_hits = throughput(per_rule, language, text)
+        new, new_hits = throughput(combined, language, text)
+        assert old_hits == new_hits, "engines disagree"
+        n_rules = len(old_hits)
+        n_hits = sum(len(s) for _, s in new_hits)
+        print(f"{language:<11} {len(text) / 1024 / 1024:5.1f} MB  {n_rules} rules  {n_hits} hits")
+        print(f"  per-rule:  {old:8.2f} MB/s")
+        print(f"  combined:  {new:8.2f} MB/s  ({new / old:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Peak RSS of report generation on a large synthetic result set: every
+finding held in a list and each report built as one string (the old
+writers), versus issues streamed through JSON Lines into the JSON and
+HTML writers. Each mode runs in its own child process.
+
+    python benchmarks/bench_reporters.py [--issues 300000]
+"""
+import argparse
+import json
+import os
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core import reporters  # noqa: E402
+
+
+def synthetic_issues(n):
+    for k in range(n):
+        yield {
+            "id": f"JS-{k % 40:03d}",
+            "file": f"src/module_{k // 50}/file_{k % 50}.js",
+            "line": k % 900 + 1,
+            "severity": ("CRITICAL", "HIGH", "MEDIUM", "LOW")[k % 4],
+            "category": "Injection",
+            "message": "Use of eval() can lead to code execution.",
+            "suggestion": "Avoid eval(); parse input explicitly.",
+            "owasp": f"A{k % 10 + 1:02d}:2021",
+            "cwe": f"CWE-{k % 97 + 1}",
+            "snippet": f"const value_{k} = eval(request.query.input_{k});",
+            "detected_by": "Regex",
+        }
+
+
+def in_memory(n, out_dir):
+    # What the writers used to do: one list, one string per report.
+    issues = list(synthetic_issues(n))
+    content = json.dumps(issues, indent=2)
+    with open(os.path.join(out_dir, "report.json"), "w", encoding="utf-8") as f:
+        f.write(content)
+    seen, deduped, owasp, cwe = set(), [], set(), set()
+    for i in issues:
+        key = (i["file"], i["line"], i["severity"], reporters.dedup_text(i["message"]),
+               reporters.dedup_text(i["suggestion"]))
+        if key not in seen:
+            seen.add(key)
+            deduped.append(i)
+            owasp |= reporters._owasp_tags(i["owasp"])
+            cwe |= reporters._cwe_tags(i["cwe"])
+    rows = [reporters._render_row(i) for i in deduped]
+    embedded = json.dumps(deduped, indent=2).replace("\\", "\\\\").replace("`", "\\`")
+    html = reporters._html_head("now", "", "", "report.json") + "".join(rows) + embedded
+    with open(os.path.join(out_dir, "report.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+
+def streaming(n, out_dir):
+    jsonl = os.path.join(out_dir, "report.jsonl")
+    reporters.generate_jsonl_report(synthetic_issues(n), jsonl)
+    reporters.generate_json_report(reporters.iter_jsonl(jsonl), os.path.join(out_dir, "report.json"))
+    reporters.generate_html_report(reporters.iter_jsonl(jsonl), os.path.join(out_dir, "report.html"))
+
+
+MODES = {"in-memory": in_memory, "streaming": streaming}
+
+
+def child(mode, n):
+    with tempfile.TemporaryDirectory() as out_dir:
+        reporters.FRONTEND_REPORTS_DIR = os.path.join(out_dir, "frontend")
+        start = time.perf_counter()
+        sys.stdout = open(os.devnull, "w")
+        MODES[mode](n, out_dir)
+        sys.stdout = sys.__stdout__
+        elapsed = time.perf_counter() - start
+    peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(json.dumps({"mode": mode, "seconds": elapsed, "peak_mb": peak_kb / 1024}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--issues", type=int, default=300000)
+    parser.add_argument("--mode", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        child(args.mode, args.issues)
+        return
+
+    print(f"{args.issues} synthetic findings")
+    for mode in MODES:
+        out = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--issues", str(args.issues)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        result = json.loads(out.strip().splitlines()[-1])
+        print(f"  {mode:<10} peak RSS {result['peak_mb']:8.1f} MB   {result['seconds']:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Per-file rule overhead: re-filtering the raw rule list and handing pattern
+strings to re.finditer on every file, versus a RuleSet built once.
+
+    python benchmarks/bench_rules.py [--files 2000] [--scale 4]
+
+--scale N multiplies the rule pack (each copy gets distinct patterns) to show
+what happens once the pack outgrows the `re` module's pattern cache.
+"""
+import argparse
+import copy
+import json
+import os
+import pathlib
+import re
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from secure_code_analyzer.core.rules import RULES_PATH, RuleSet  # noqa: E402
+
+SAMPLE = """
+const q = new URLSearchParams(location.search).get("q");
+document.getElementById("out").innerHTML = q;
+console.log("debug", q);
+eval(q);
+"""
+
+
+def scaled_rules(scale):
+    with open(RULES_PATH, "r", encoding="utf-8") as f:
+        rules = json.load(f)
+    out = []
+    for n in range(scale):
+        for rule in rules:
+            rule = copy.deepcopy(rule)
+            if n and "pattern" in rule:
+                rule["pattern"] = f"(?:{rule['pattern']})(?!__scale{n}__)"
+            out.append(rule)
+    return out
+
+
+def per_file_legacy(rules, code, lang):
+    regex_rules = [r for r in rules if r["language"] == lang and r["type"] == "regex"]
+    heuristic_rules = [r for r in rules if r["language"] == lang and r["type"] == "heuristic"]
+    [r for r in rules if r["language"] == lang and r["type"] == "ast"]
+    [r for r in rules if r["language"] == lang and r["type"] == "context-ast"]
+    [r for r in rules if r["language"] == lang and r["type"] == "taint-ast"]
+    hits = 0
+    for rule in regex_rules + heuristic_rules:
+        for _ in re.finditer(rule["pattern"], code, flags=re.IGNORECASE):
+            hits += 1
+    return hits
+
+
+def per_file_ruleset(ruleset, code, lang):
+    ruleset.get(lang, "ast")
+    ruleset.get(lang, "context-ast")
+    ruleset.get(lang, "taint-ast")
+    hits = 0
+    for rule_type in ("regex", "heuristic"):
+        for _, pattern in ruleset.compiled(lang, rule_type):
+            for _ in pattern.finditer(code):
+                hits += 1
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=2000, help="Simulated files per language")
+    parser.add_argument("--scale", type=int, default=4, help="Copies of the rule pack")
+    args = parser.parse_args()
+
+    rules = scaled_rules(args.scale)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(rules, f)
+    build_start = time.perf_counter()
+    ruleset = RuleSet(f.name)
+    build = time.perf_counter() - build_start
+    os.unlink(f.name)
+
+    results = {}
+    for name, fn, arg in (("legacy", per_file_legacy, rules), ("ruleset", per_file_ruleset, ruleset)):
+        re.purge()
+        start = time.perf_counter()
+        for _ in range(args.files):
+            for lang in ("javascript", "php"):
+                fn(arg, SAMPLE, lang)
+        results[name] = (time.perf_counter() - start) / (args.files * 2) * 1e6
+    assert per_file_legacy(rules, SAMPLE, "javascript") == per_file_ruleset(ruleset, SAMPLE, "javascript")
+
+    print(f"rules:                {len(rules)} (scale {args.scale})")
+    print(f"RuleSet build:        {build * 1000:8.1f} ms (once)")
+    print(f"legacy per file:      {results['legacy']:8.1f} us")
+    print(f"RuleSet per file:     {results['ruleset']:8.1f} us")
+    print(f"speedup:              {results['legacy'] / results['ruleset']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Regex stage over a large synthetic bundle: reading the file as text and
+scanning the str, versus scanning the memory-mapped bytes (SourceFile).
+Each mode runs in its own process so peak RSS is comparable.
+
+    python benchmarks/bench_source.py [--size-mb 16] [--repeat 3]
+"""
+import argparse
+import pathlib
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from secure_code_analyzer.core.lines import LineIndex  # noqa: E402
+from secure_code_analyzer.core.rules import RuleSet  # noqa: E402
+from secure_code_analyzer.core.source import SourceFile  # noqa: E402
+
+MODES = ("text", "mmap")
+FILLER = "var a=function(b){return b*2};\n"
+HIT = 'document.write(location.hash); eval(x);\n'
+
+
+def synthetic_bundle(path, size_mb):
+    line = FILLER * 200 + HIT
+    with open(path, "w", encoding="utf-8") as f:
+        for _ in range(int(size_mb * 1024 * 1024) // len(line) + 1):
+            f.write(line)
+
+
+def scan(path, mode, ruleset):
+    """Regex findings (line, snippet) the way run_detectors collects them."""
+    if mode == "text":
+        with open(path, "r", encoding="utf-8") as f:
+            text = f.read()
+        lines = LineIndex(text)
+        return [(lines.line_of(s), lines.snippet(lines.line_of(s)))
+                for _, _, starts in ruleset.pattern_hits("javascript", text) for s in starts]
+    with SourceFile(path) as source:
+        lines = LineIndex(source.data, source.decode)
+        return [(lines.line_of(s), lines.snippet(lines.line_of(s)))
+                for _, _, starts in ruleset.pattern_hits("javascript", source.data) for s in starts]
+
+
+def child(path, mode, repeat):
+    ruleset = RuleSet()
+    ruleset.scans_bytes("javascript")   # compile outside the timing
+    base = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    best, hits = None, 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        hits = len(scan(path, mode, ruleset))
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{best} {hits} {(peak - base) / 1024}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size-mb", type=float, default=16)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], args.child[1], args.repeat)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = pathlib.Path(tmp) / "bundle.js"
+        synthetic_bundle(path, args.size_mb)
+        size_mb = path.stat().st_size / 1024 / 1024
+        for mode in MODES:
+            out = subprocess.run(
+                [sys.executable, __file__, "--child", str(path), mode, "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True,
+            ).stdout.splitlines()[-1].split()
+            elapsed, hits, rss = float(out[0]), int(out[1]), float(out[2])
+            print(f"  {mode:<5} {size_mb:6.1f} MB  {elapsed:7.3f}s  {size_mb / elapsed:7.1f} MB/s  "
+                  f"peak RSS +{rss:6.1f} MB  ({hits} hits)")
+
+
+if __name__ == "__main__":
+    main()
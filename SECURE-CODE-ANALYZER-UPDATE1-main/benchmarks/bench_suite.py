@@ -0,0 +1,237 @@
+"""
+Benchmark suite: scan a deterministic synthetic corpus (see corpus.py)
+with the full pipeline and with each detector stage on its own, and
+record files/sec, MB/s, p50/p99 per-file latency and peak RSS.
+
+    python benchmarks/bench_suite.py [--save baseline.json] [--baseline baseline.json] [--threshold 0.25]
+
+Every stage runs in a fresh process so peak RSS is per stage; the best of
+--repeat passes is kept. With --baseline the run fails (exit 1) when a
+metric is more than --threshold worse than the baseline recorded on the
+same corpus. Baselines are machine-specific: record one per machine.
+Needs nothing beyond the repo and `node`; no network access.
+"""
+import argparse
+import json
+import os
+import pathlib
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import corpus  # noqa: E402
+
+STAGES = ("pipeline", "regex", "ast", "taint", "cli")
+AST_GROUPS = {"ast": ("ast", "context-ast"), "taint": ("taint-ast",)}
+DEFAULT_REPEAT = 3
+DEFAULT_THRESHOLD = 0.25
+# Metric -> True if higher is better.
+METRICS = {
+    "files_per_sec": True,
+    "mb_per_sec": True,
+    "p50_ms": False,
+    "p99_ms": False,
+    "peak_rss_mb": False,
+    "child_rss_mb": False,
+}
+
+
+# ========================
+# Stages (run in a child process)
+# ========================
+def _pipeline(ruleset):
+    from secure_code_analyzer.core.budget import Budget
+    from secure_code_analyzer.core.scanner import scan_file
+    budget = Budget()    # the CLI default: regex in a worker process
+    return lambda path: scan_file(path, ruleset, budget=budget)
+
+
+def _regex(ruleset):
+    from secure_code_analyzer.core.source import SourceFile
+
+    def run(path):
+        language = "javascript" if path.endswith(".js") else "php"
+        with SourceFile(path) as source:
+            view = source.view() if ruleset.scans_bytes(language) else source.text()
+            return ruleset.pattern_starts(language, view)
+    return run
+
+
+def _ast(ruleset, group_types):
+    from secure_code_analyzer.core import detectors
+    from secure_code_analyzer.core.source import SourceFile
+
+    def run(path):
+        language = "javascript" if path.endswith(".js") else "php"
+        groups = {g: ruleset.get(language, g) for g in group_types}
+        with SourceFile(path) as source:
+            code = source.text()
+        response = detectors.run_ast_groups(detectors.runner_for(language), code,
+                                            {g: rules for g, rules in groups.items() if rules})
+        if "error" in response:
+            raise SystemExit(f"{path}: {response['error']}")
+        return response
+    return run
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered)) - 1))]
+
+
+def _rss_mb(who):
+    # ru_maxrss is in KiB on Linux.
+    return resource.getrusage(who).ru_maxrss / 1024
+
+
+def child(stage, corpus_dir, repeat):
+    """Time `stage` over the corpus; print its metrics as JSON on the last line."""
+    from secure_code_analyzer.core.ast_pool import shutdown_pools
+    from secure_code_analyzer.core.regex_worker import shutdown_workers
+    from secure_code_analyzer.core.rules import RuleSet
+
+    files = sorted(str(p) for p in pathlib.Path(corpus_dir).iterdir() if p.suffix in (".js", ".php"))
+    size = sum(os.path.getsize(p) for p in files)
+    if stage == "cli":
+        env = dict(os.environ, PYTHONPATH=str(ROOT / "src"))
+        best = None
+        with tempfile.TemporaryDirectory() as cwd:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable, "-m", "secure_code_analyzer.cli", corpus_dir, "--no-cache",
+                                "--jobs", "1"], cwd=cwd, env=env, check=True, stdout=subprocess.DEVNULL)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+        latencies = []
+    else:
+        ruleset = RuleSet()
+        scan = _ast(ruleset, AST_GROUPS[stage]) if stage in AST_GROUPS else \
+            {"pipeline": _pipeline, "regex": _regex}[stage](ruleset)
+        # Warm up once per language so rule compilation and worker start-up are not billed.
+        for suffix in (".js", ".php"):
+            for path in files:
+                if path.endswith(suffix):
+                    scan(path)
+                    break
+        # Throughput from the fastest pass, latency from each file's fastest run:
+        # a single slow pass then moves neither.
+        best, latencies = None, [None] * len(files)
+        for _ in range(repeat):
+            run = 0.0
+            for i, path in enumerate(files):
+                start = time.perf_counter()
+                scan(path)
+                elapsed = time.perf_counter() - start
+                run += elapsed
+                latencies[i] = elapsed if latencies[i] is None else min(latencies[i], elapsed)
+            best = run if best is None else min(best, run)
+        shutdown_pools()
+        shutdown_workers()
+
+    metrics = {
+        "files_per_sec": len(files) / best,
+        "mb_per_sec": size / 1024 / 1024 / best,
+        "p50_ms": _percentile(latencies, 0.50) * 1000 if latencies else None,
+        "p99_ms": _percentile(latencies, 0.99) * 1000 if latencies else None,
+        "peak_rss_mb": _rss_mb(resource.RUSAGE_SELF),
+        "child_rss_mb": _rss_mb(resource.RUSAGE_CHILDREN),
+    }
+    print(json.dumps(metrics))
+
+
+# ========================
+# Driver
+# ========================
+def run_stage(stage, corpus_dir, repeat):
+    out = subprocess.run(
+        [sys.executable, __file__, "--child", stage, corpus_dir, "--repeat", str(repeat)],
+        capture_output=True, text=True,
+    )
+    if out.returncode:
+        raise SystemExit(f"{stage} stage failed:\n{out.stderr or out.stdout}")
+    return json.loads(out.stdout.splitlines()[-1])
+
+
+def compare(results, baseline, threshold):
+    """[(stage, metric, baseline value, new value)] for every metric worse than `threshold` allows."""
+    regressions = []
+    for stage, metrics in results["stages"].items():
+        before = baseline["stages"].get(stage, {})
+        for metric, higher_is_better in METRICS.items():
+            old, new = before.get(metric), metrics.get(metric)
+            if not old or new is None:
+                continue
+            change = (old - new) / old if higher_is_better else (new - old) / old
+            if change > threshold:
+                regressions.append((stage, metric, old, new))
+    return regressions
+
+
+def _fmt(value):
+    return f"{value:10.1f}" if value is not None else f"{'-':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    corpus.add_arguments(parser)
+    parser.add_argument("--stages", default=",".join(STAGES), help="Comma-separated stages (default: %(default)s)")
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT, help="Passes per stage, best kept")
+    parser.add_argument("--save", metavar="PATH", help="Write the results (a new baseline) here")
+    parser.add_argument("--baseline", metavar="PATH", help="Fail if results regress against this baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Allowed relative regression per metric (default: %(default)s)")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        return child(args.child[0], args.child[1], args.repeat)
+
+    stages = args.stages.split(",")
+    unknown = set(stages) - set(STAGES)
+    if unknown:
+        parser.error(f"unknown stage(s): {', '.join(sorted(unknown))}")
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        manifest = corpus.generate(tmp, **corpus.corpus_options(args))
+        if baseline and baseline["corpus"]["digest"] != manifest["digest"]:
+            raise SystemExit("Baseline was recorded on a different corpus; use the same corpus options.")
+        results = {
+            "corpus": {key: manifest[key] for key in ("settings", "digest", "bytes")},
+            "machine": {"python": platform.python_version(), "platform": platform.platform(),
+                        "cpus": os.cpu_count()},
+            "repeat": args.repeat,
+            "stages": {},
+        }
+        print(f"corpus: {args.files} files, {manifest['bytes'] / 1024 / 1024:.1f} MB ({manifest['digest'][:12]})")
+        print(f"{'stage':<10} {'files/s':>10} {'MB/s':>10} {'p50 ms':>10} {'p99 ms':>10} "
+              f"{'RSS MB':>10} {'child MB':>10}")
+        for stage in stages:
+            metrics = run_stage(stage, tmp, args.repeat)
+            results["stages"][stage] = metrics
+            print(f"{stage:<10}" + "".join(f" {_fmt(metrics[m])}" for m in METRICS))
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"[+] Results saved to {args.save}")
+    if baseline:
+        regressions = compare(results, baseline, args.threshold)
+        for stage, metric, old, new in regressions:
+            print(f"REGRESSION {stage} {metric}: {old:.2f} -> {new:.2f}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.threshold:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
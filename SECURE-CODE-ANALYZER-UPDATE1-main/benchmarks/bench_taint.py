@@ -0,0 +1,112 @@
+"""
+Taint analysis precision / recall per rule on the annotated fixtures in
+tests/fixtures/taint, and taint-stage time on large synthetic files. Pass
+--php-runner / --js-runner to measure other copies of the runners, e.g.
+ones checked out from an older commit into the repo root.
+
+    python benchmarks/bench_taint.py [--lines 5000 20000] [--php-runner php_ast_runner.js]
+"""
+import argparse
+import collections
+import pathlib
+import re
+import sys
+import time
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT / "src"))
+
+from secure_code_analyzer.core.ast_pool import NodeWorker  # noqa: E402
+from secure_code_analyzer.core.rules import RuleSet  # noqa: E402
+
+FIXTURES = ROOT / "tests" / "fixtures" / "taint"
+EXPECT = re.compile(r"//\s*expect:\s*(.+)$")
+
+PHP_BLOCK = [
+    "function f{n}($a, $b) {{ $c = $a . $b; if ($b) {{ $c = trim($c); }} return $c; }}",
+    "$v{n} = f{n}($_GET['x{n}'], 'k');",
+    "foreach ($_POST['l{n}'] as $i) {{ $w{n} .= $i; }}",
+    "system('ls ' . escapeshellarg($v{n}));",
+    "mysqli_query($conn, \"SELECT * FROM t WHERE a = '$w{n}'\");",
+]
+JS_BLOCK = [
+    "function f{n}(a, b) {{ let c = a + b; if (b) {{ c = c.trim(); }} return c; }}",
+    "const v{n} = f{n}(req.query.x{n}, 'k');",
+    "let w{n} = ''; for (const i of req.body.l{n}) {{ w{n} += i; }}",
+    "el.innerHTML = encodeURIComponent(v{n});",
+    "fs.readFile('/srv/' + w{n}, cb);",
+]
+
+
+def synthetic(block, header, lines):
+    body = [header] if header else []
+    n = 0
+    while len(body) < lines:
+        body.extend(line.format(n=n) for line in block)
+        n += 1
+    return "\n".join(body[:lines]) + "\n"
+
+
+def precision_recall(worker, lang, suffix):
+    rules = RuleSet().get(lang, "taint-ast")
+    counts = collections.defaultdict(lambda: [0, 0, 0])  # tp, fp, fn
+    for path in sorted(FIXTURES.rglob(f"*{suffix}")):
+        code = path.read_text(encoding="utf-8")
+        want = {(n, r) for n, line in enumerate(code.splitlines(), 1)
+                for m in [EXPECT.search(line)] if m for r in m.group(1).split()}
+        response = worker.request(code, {"taint-ast": rules})
+        results = response.get("results", {}).get("taint-ast", {})
+        if "error" in response or "error" in results:
+            raise SystemExit(f"{path}: {response.get('error') or results['error']}")
+        found = {(n, r) for r, lines in results.items() for n in lines}
+        for n, r in found | want:
+            counts[r][0 if (n, r) in found and (n, r) in want else 1 if (n, r) in found else 2] += 1
+    return counts
+
+
+def ratio(a, b):
+    return f"{a / b:6.2f}" if b else "     -"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lines", type=int, nargs="+", default=[5000, 20000])
+    parser.add_argument("--php-runner", default=str(ROOT / "php_ast_runner.js"))
+    parser.add_argument("--js-runner", default=str(ROOT / "js_ast_runner.js"))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    setups = [
+        ("php", ".php", args.php_runner, PHP_BLOCK, "<?php"),
+        ("javascript", ".js", args.js_runner, JS_BLOCK, None),
+    ]
+    for lang, suffix, runner, block, header in setups:
+        worker = NodeWorker(str(pathlib.Path(runner).resolve()), timeout=600)
+        try:
+            print(f"{lang}: {runner}")
+            total = [0, 0, 0]
+            for rule_id, (tp, fp, fn) in sorted(precision_recall(worker, lang, suffix).items()):
+                total = [total[0] + tp, total[1] + fp, total[2] + fn]
+                print(f"  {rule_id:<24} tp {tp:3}  fp {fp:3}  fn {fn:3}  "
+                      f"precision {ratio(tp, tp + fp)}  recall {ratio(tp, tp + fn)}")
+            tp, fp, fn = total
+            print(f"  {'all':<24} tp {tp:3}  fp {fp:3}  fn {fn:3}  "
+                  f"precision {ratio(tp, tp + fp)}  recall {ratio(tp, tp + fn)}")
+
+            groups = {"taint-ast": RuleSet().get(lang, "taint-ast")}
+            for lines in args.lines:
+                code = synthetic(block, header, lines)
+                best = None
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    response = worker.request(code, groups)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                status = response.get("error") or f"{sum(map(len, response['results']['taint-ast'].values()))} findings"
+                print(f"  {lines:>6} lines  {best:7.3f}s  ({status})")
+        finally:
+            worker.close()
+
+
+if __name__ == "__main__":
+    main()
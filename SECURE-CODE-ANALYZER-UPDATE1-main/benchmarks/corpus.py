@@ -0,0 +1,182 @@
+"""
+Deterministic synthetic JS/PHP corpus for the benchmark suite.
+
+The same settings always produce byte-identical files, so runs on
+different days (or machines) scan the same input. Files are handlers made
+of benign statements with a share (`density`) of vulnerable ones that the
+default rules flag, packed into lines of about `line_length` characters.
+
+    python benchmarks/corpus.py OUT_DIR [--files 200] [--size-kb 8] [--line-length 80] [--density 0.05]
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+
+# ========================
+# Corpus Defaults
+# ========================
+DEFAULT_FILES = 200
+DEFAULT_SIZE_KB = 8
+DEFAULT_LINE_LENGTH = 80
+DEFAULT_DENSITY = 0.05        # share of statements that are vulnerable
+DEFAULT_SEED = 1
+LANGUAGES = ("js", "php")
+STATEMENTS_PER_FUNCTION = 12
+
+# ========================
+# Statement Templates
+# ========================
+# Every template is one complete statement (or block) with no line
+# comments, so any number of them can share a line and still parse.
+JS = {
+    "header": [
+        "const express = require('express');",
+        "const crypto = require('crypto');",
+        "const child_process = require('child_process');",
+        "const db = require('./db');",
+        "const app = express();",
+    ],
+    "open": "app.get('/route{n}', (req, res) => {{",
+    "close": "}});",
+    "benign": [
+        "const items{n} = [1, 2, 3, {k}].map((x) => x * {k}).filter(Boolean);",
+        "let total{n} = 0; for (let i = 0; i < {k}; i++) {{ total{n} += i; }}",
+        "if (req.query.page{n} > {k}) {{ res.status(400); }}",
+        "const label{n} = 'item-' + String({k}).padStart(4, '0');",
+        "console.info('handled route {n} in', Date.now() % {k}, 'ms');",
+        "const cfg{n} = {{ retries: {k}, timeout: {k} * 100, name: 'svc{n}' }};",
+    ],
+    "vulnerable": [
+        "eval(req.query.code{n});",
+        "child_process.exec('ls ' + req.query.dir{n});",
+        "db.query(\"SELECT * FROM users WHERE name = '\" + req.query.name{n} + \"'\");",
+        "document.body.innerHTML = req.query.html{n};",
+        "const h{n} = crypto.createHash('md5').update(req.query.q{n}).digest('hex');",
+    ],
+}
+
+PHP = {
+    "header": [
+        "<?php",
+        "$mysqli = new mysqli('localhost', 'app', '', 'db');",
+        "$items = array(1, 2, 3);",
+    ],
+    "open": "function handler{n}($request) {{",
+    "close": "}}",
+    "benign": [
+        "$scaled{n} = array_map(function ($x) {{ return $x * {k}; }}, $items);",
+        "$total{n} = 0; for ($i = 0; $i < {k}; $i++) {{ $total{n} += $i; }}",
+        "if (count($items) > {k}) {{ http_response_code(400); }}",
+        "$label{n} = 'item-' . str_pad((string) {k}, 4, '0', STR_PAD_LEFT);",
+        "error_log('handled request {n} after ' . ({k} % 7) . ' ms');",
+        "$cfg{n} = array('retries' => {k}, 'timeout' => {k} * 100);",
+    ],
+    "vulnerable": [
+        "eval($_GET['code{n}']);",
+        "system('ls ' . $_GET['cmd{n}']);",
+        "$mysqli->query(\"SELECT * FROM users WHERE name = '\" . $_GET['name{n}'] . \"'\");",
+        "echo $_GET['html{n}'];",
+        "$h{n} = md5($_POST['p{n}']);",
+    ],
+}
+
+TEMPLATES = {"js": JS, "php": PHP}
+
+
+def _pack(units, line_length):
+    """Join statements into lines of at most `line_length` characters (longer statements stand alone)."""
+    lines, line = [], ""
+    for unit in units:
+        if line and len(line) + 1 + len(unit) > line_length:
+            lines.append(line)
+            line = unit
+        else:
+            line = f"{line} {unit}" if line else unit
+    if line:
+        lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+def generate_file(rng, language, size_bytes, line_length, density):
+    """(source, vulnerable statement count) for one file of at least `size_bytes`."""
+    templates = TEMPLATES[language]
+    units = list(templates["header"])
+    size = sum(len(unit) + 1 for unit in units)
+    vulnerable = 0
+    n = 0
+    while size < size_bytes:
+        body = [templates["open"].format(n=n)]
+        for _ in range(STATEMENTS_PER_FUNCTION):
+            n += 1
+            if rng.random() < density:
+                template = rng.choice(templates["vulnerable"])
+                vulnerable += 1
+            else:
+                template = rng.choice(templates["benign"])
+            body.append(template.format(n=n, k=rng.randint(2, 999)))
+        body.append(templates["close"].format(n=n))
+        units += body
+        size += sum(len(unit) + 1 for unit in body)
+    return _pack(units, line_length), vulnerable
+
+
+def generate(out_dir, files=DEFAULT_FILES, size_kb=DEFAULT_SIZE_KB, line_length=DEFAULT_LINE_LENGTH,
+             density=DEFAULT_DENSITY, seed=DEFAULT_SEED, languages=LANGUAGES):
+    """
+    Write the corpus to `out_dir` and return its manifest: the settings,
+    the files ([{"path", "bytes", "vulnerable"}]) and a digest of their
+    names and contents that identifies the corpus in benchmark baselines.
+    """
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    digest = hashlib.sha256()
+    entries = []
+    for i in range(files):
+        language = languages[i % len(languages)]
+        source, vulnerable = generate_file(rng, language, size_kb * 1024, line_length, density)
+        name = f"file{i:05d}.{language}"
+        data = source.encode("utf-8")
+        with open(os.path.join(out_dir, name), "wb") as f:
+            f.write(data)
+        digest.update(name.encode("utf-8") + b"\0" + data)
+        entries.append({"path": os.path.join(out_dir, name), "bytes": len(data), "vulnerable": vulnerable})
+    return {
+        "settings": {"files": files, "size_kb": size_kb, "line_length": line_length,
+                     "density": density, "seed": seed, "languages": list(languages)},
+        "digest": digest.hexdigest(),
+        "bytes": sum(entry["bytes"] for entry in entries),
+        "files": entries,
+    }
+
+
+def add_arguments(parser):
+    parser.add_argument("--files", type=int, default=DEFAULT_FILES, help="Files to generate (default: %(default)s)")
+    parser.add_argument("--size-kb", type=int, default=DEFAULT_SIZE_KB, help="Size of each file (default: %(default)s)")
+    parser.add_argument("--line-length", type=int, default=DEFAULT_LINE_LENGTH,
+                        help="Target line length; large values give minified-style lines (default: %(default)s)")
+    parser.add_argument("--density", type=float, default=DEFAULT_DENSITY,
+                        help="Share of statements that are vulnerable, 0-1 (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Random seed (default: %(default)s)")
+    parser.add_argument("--languages", default=",".join(LANGUAGES),
+                        help="Comma-separated languages, files alternate between them (default: %(default)s)")
+
+
+def corpus_options(args):
+    """generate() keyword arguments from the options add_arguments() defines."""
+    return {"files": args.files, "size_kb": args.size_kb, "line_length": args.line_length,
+            "density": args.density, "seed": args.seed, "languages": tuple(args.languages.split(","))}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("out_dir")
+    add_arguments(parser)
+    args = parser.parse_args()
+    manifest = generate(args.out_dir, **corpus_options(args))
+    print(json.dumps({key: manifest[key] for key in ("settings", "digest", "bytes")}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,148 +1,559 @@
 // js_ast_runner.js
 // JavaScript AST runner with support for AST, Context-Aware AST, and Taint Analysis.
+//
+// Two modes:
+//   node js_ast_runner.js           one-shot: reads {code, rules} from stdin, writes findings.
+//   node js_ast_runner.js --serve   worker: newline-delimited JSON requests
+//                                   {id, code, groups: {name: rules}, options?} answered with
+//                                   {id, results: {name: findings | {error}}, truncated?, summaries?}
+//                                   or {id, error}.
+//
+// options.taintBudgetMs caps the taint analysis time per function; functions
+// that hit it are listed in `truncated` ({group: [{unit, line}]}).
+// options.summary adds the file's open taint flows for the project-wide pass
+// (`summaries`: {group: {units, exports}}; see TaintAnalysis.summary()).
+// options.profile adds timings in milliseconds (`profile`: {parse,
+// groups: {group: ms}, rules: {id: ms}}); rules are timed one by one only then.
 
 const esprima = require("esprima");
+const readline = require("readline");
+const { performance } = require("perf_hooks");
+const { Env, TaintAnalysis, TaintRules } = require("./taint_engine");
 
-let input = "";
-process.stdin.on("data", chunk => input += chunk);
-process.stdin.on("end", () => {
-  try {
-    const payload = JSON.parse(input);
-    const code = payload.code;
-    const rules = payload.rules || [];
-    const ast = esprima.parseScript(code, { loc: true, range: true });
-
-    let findings = {};
-    let taintedVars = new Set(); // Track tainted identifiers
-
-    function markFinding(rule, node) {
-      findings[rule.id] = findings[rule.id] || [];
-      findings[rule.id].push(node.loc.start.line);
-    }
-
-    function getIdentifierName(node) {
-      if (!node) return null;
-      if (node.type === "Identifier") return node.name;
-      if (node.type === "MemberExpression") {
-        return (
-          (node.object && getIdentifierName(node.object)) +
-          "." +
-          (node.property && getIdentifierName(node.property))
-        );
+function analyze(code, ast, rules, options = {}, truncated = [], summary = {}, ruleMs = null) {
+  let findings = {};
+  const astRules = rules.filter(rule => rule.type === "ast" || rule.type === "context-ast");
+
+  function walk(node, parent) {
+    if (!node || typeof node !== "object") return;
+
+    // ======================
+    // --- AST / Context ---
+    // ======================
+    for (const rule of astRules) {
+      if (ruleMs) {
+        const start = performance.now();
+        matchRule(rule, node);
+        ruleMs[rule.id] = (ruleMs[rule.id] || 0) + performance.now() - start;
+      } else {
+        matchRule(rule, node);
       }
-      return null;
-    }
-
-    function walk(node, parent) {
-      if (!node || typeof node !== "object") return;
-
-      // ======================
-      // --- Taint Analysis ---
-      // ======================
-      for (const rule of rules) {
-        if (rule.type === "taint-ast") {
-          // Variable declarations: let x = req.query.foo;
-          if (node.type === "VariableDeclarator" && node.init) {
-            const varName = getIdentifierName(node.id);
-            const initCode = code.substring(node.init.range[0], node.init.range[1]);
-            if (rule.sources.some(src => initCode.includes(src))) {
-              taintedVars.add(varName);
-            }
-          }
+    }
 
-          // Assignments: x = userInput;
-          if (node.type === "AssignmentExpression") {
-            const leftName = getIdentifierName(node.left);
-            const rightCode = code.substring(node.right.range[0], node.right.range[1]);
+    // Recurse
+    for (let key in node) {
+      const val = node[key];
+      if (Array.isArray(val)) val.forEach(child => walk(child, node));
+      else if (val && typeof val === "object") walk(val, node);
+    }
+  }
+
+  function matchRule(rule, node) {
+    if (node.type === rule.nodeType) {
+      let matched = false;
+
+      if (node.type === "CallExpression" || node.type === "NewExpression") {
+        if (node.callee) {
+          const calleeName = node.callee.name || (node.callee.property && node.callee.property.name);
+          const objName = node.callee.object && node.callee.object.name;
 
-            if (rule.sources.some(src => rightCode.includes(src))) {
-              taintedVars.add(leftName);
-            }
+          if (rule.calleeName && calleeName === rule.calleeName) matched = true;
+          if (rule.objectName && objName === rule.objectName) matched = true;
 
-            const rightName = getIdentifierName(node.right);
-            if (rightName && taintedVars.has(rightName)) {
-              taintedVars.add(leftName);
-            }
+          if (rule.argIsString && node.arguments.length > 0 &&
+              node.arguments[0].type === "Literal" &&
+              typeof node.arguments[0].value === "string") {
+            matched = true;
           }
 
-          // Function calls: eval(x);
-          if (node.type === "CallExpression" && node.callee) {
-            const calleeName = getIdentifierName(node.callee);
-            if (rule.sinks.includes(calleeName)) {
-              node.arguments.forEach(arg => {
-                const argName = getIdentifierName(arg);
-                if (argName && taintedVars.has(argName)) {
-                  markFinding(rule, node);
-                }
-                if (arg.range) {
-                  const argCode = code.substring(arg.range[0], arg.range[1]);
-                  if (rule.sources.some(src => argCode.includes(src))) {
-                    markFinding(rule, node);
-                  }
-                }
-              });
-            }
+          if (rule.sources && node.arguments.length > 0) {
+            const argCode = code.substring(node.arguments[0].range ? node.arguments[0].range[0] : 0,
+                                           node.arguments[0].range ? node.arguments[0].range[1] : 0);
+            if (rule.sources.some(src => argCode.includes(src))) matched = true;
           }
         }
       }
 
-      // ======================
-      // --- AST / Context ---
-      // ======================
-      for (const rule of rules) {
-        if (rule.type === "ast" || rule.type === "context-ast") {
-          if (node.type === rule.nodeType) {
-            let matched = false;
-
-            if (node.type === "CallExpression" || node.type === "NewExpression") {
-              if (node.callee) {
-                const calleeName = node.callee.name || (node.callee.property && node.callee.property.name);
-                const objName = node.callee.object && node.callee.object.name;
-
-                if (rule.calleeName && calleeName === rule.calleeName) matched = true;
-                if (rule.objectName && objName === rule.objectName) matched = true;
-
-                if (rule.argIsString && node.arguments.length > 0 &&
-                    node.arguments[0].type === "Literal" &&
-                    typeof node.arguments[0].value === "string") {
-                  matched = true;
-                }
-
-                if (rule.sources && node.arguments.length > 0) {
-                  const argCode = code.substring(node.arguments[0].range ? node.arguments[0].range[0] : 0,
-                                                 node.arguments[0].range ? node.arguments[0].range[1] : 0);
-                  if (rule.sources.some(src => argCode.includes(src))) matched = true;
-                }
-              }
-            }
-
-            if (node.type === "AssignmentExpression") {
-              const left = node.left;
-              if (left && left.property && rule.calleeName && left.property.name === rule.calleeName) {
-                matched = true;
-              }
-            }
-
-            if (matched) {
-              findings[rule.id] = findings[rule.id] || [];
-              findings[rule.id].push(node.loc.start.line);
-            }
+      if (node.type === "AssignmentExpression") {
+        const left = node.left;
+        if (left && left.property && rule.calleeName && left.property.name === rule.calleeName) {
+          matched = true;
+        }
+      }
+
+      if (matched) {
+        findings[rule.id] = findings[rule.id] || [];
+        findings[rule.id].push(node.loc.start.line);
+      }
+    }
+  }
+
+  if (astRules.length) walk(ast, null);
+
+  // ======================
+  // --- Taint Analysis ---
+  // ======================
+  const tainted = taint(ast, rules, options);
+  for (const [id, lines] of Object.entries(tainted.findings)) {
+    findings[id] = (findings[id] || []).concat(lines);
+  }
+  truncated.push(...tainted.truncated);
+  if (tainted.summary) Object.assign(summary, tainted.summary);
+  return findings;
+}
+
+// Per-function propagation over the esprima AST; see taint_engine.js.
+
+// Callees whose result carries none of their arguments' taint.
+const JS_SANITIZERS = new Set([
+  "parseInt", "parseFloat", "Number", "Boolean", "isNaN", "encodeURIComponent", "encodeURI",
+  "escape", "DOMPurify.sanitize", "validator.escape", "validator.isInt", "validator.isEmail",
+  "path.basename", "shellescape", "he.encode", "escapeHtml", "crypto.createHash",
+]);
+const JS_CLEAN_BINARY = new Set([
+  "==", "!=", "===", "!==", "<", ">", "<=", ">=", "instanceof", "in",
+  "-", "*", "/", "%", "**", "&", "|", "^", "<<", ">>", ">>>",
+]);
+const JS_FUNCTIONS = new Set(["FunctionExpression", "ArrowFunctionExpression"]);
+
+// Module names bound by `x = require("m")` and `{a, b: c} = require("m")`:
+// aliases maps the local name to "m" / "m.a", imports to [module, member].
+function requireAliases(ast) {
+  const aliases = new Map();
+  const imports = new Map();
+  (function collect(node) {
+    if (!node || typeof node !== "object") return;
+    if (Array.isArray(node)) return node.forEach(collect);
+    if (node.type === "VariableDeclarator" && node.init && node.init.type === "CallExpression" &&
+        node.init.callee.type === "Identifier" && node.init.callee.name === "require" &&
+        node.init.arguments[0] && typeof node.init.arguments[0].value === "string") {
+      const module = node.init.arguments[0].value;
+      if (node.id.type === "Identifier") {
+        aliases.set(node.id.name, module);
+        imports.set(node.id.name, [module, null]);
+      }
+      if (node.id.type === "ObjectPattern") {
+        for (const prop of node.id.properties) {
+          if (prop.type === "Property" && prop.value.type === "Identifier" && !prop.computed) {
+            const member = prop.key.name || prop.key.value;
+            aliases.set(prop.value.name, `${module}.${member}`);
+            imports.set(prop.value.name, [module, member]);
           }
         }
       }
+    }
+    for (const key in node) {
+      if (key !== "loc" && key !== "range" && node[key] && typeof node[key] === "object") collect(node[key]);
+    }
+  })(ast);
+  return { aliases, imports };
+}
+
+// "a.b.c" for a plain identifier chain, else null.
+function dotted(node) {
+  if (node.type === "Identifier") return node.name;
+  if (node.type === "MemberExpression" && !node.computed) {
+    const base = dotted(node.object);
+    return base && `${base}.${node.property.name}`;
+  }
+  return null;
+}
+
+// Named functions: declarations, `const f = function / () => ...` and
+// functions assigned to `exports.f` / `module.exports = {f() {...}}`; plus
+// what the module exports ({name: unit}, "default" for `module.exports = f`).
+function jsUnits(ast) {
+  const units = new Map();
+  const owners = new Set();
+  const exports = {};
+  const add = (name, fn) => {
+    if (!units.has(name)) units.set(name, []);
+    units.get(name).push(fn);
+    owners.add(fn);
+  };
+  (function collect(node) {
+    if (!node || typeof node !== "object") return;
+    if (Array.isArray(node)) return node.forEach(collect);
+    if (node.type === "FunctionDeclaration" && node.id) add(node.id.name, node);
+    if (node.type === "VariableDeclarator" && node.id.type === "Identifier" && node.init &&
+        JS_FUNCTIONS.has(node.init.type)) add(node.id.name, node.init);
+    if (node.type === "AssignmentExpression" && node.operator === "=") exported(dotted(node.left), node.right);
+    for (const key in node) {
+      if (key !== "loc" && key !== "range" && node[key] && typeof node[key] === "object") collect(node[key]);
+    }
+  })(ast);
 
-      // Recurse
-      for (let key in node) {
-        const val = node[key];
-        if (Array.isArray(val)) val.forEach(child => walk(child, node));
-        else if (val && typeof val === "object") walk(val, node);
+  function exported(target, value) {
+    const name = target === "module.exports" ? "default"
+      : /^(module\.)?exports\.[^.]+$/.test(target || "") ? target.split(".").pop() : null;
+    if (!name) return;
+    if (value.type === "Identifier") {
+      exports[name] = value.name;
+    } else if (JS_FUNCTIONS.has(value.type)) {
+      add(target, value);
+      exports[name] = target;
+    } else if (name === "default" && value.type === "ObjectExpression") {
+      for (const prop of value.properties) {
+        if (prop.type !== "Property" || prop.computed) continue;
+        exported(`exports.${prop.key.name || prop.key.value}`, prop.value);
       }
     }
+  }
+  return { units, owners, exports };
+}
+
+function taint(ast, rules, options) {
+  const taintRules = new TaintRules(rules);
+  if (!taintRules.rules.length) return { findings: {}, truncated: [] };
+
+  const { aliases, imports } = requireAliases(ast);
+  const { units: declared, owners, exports } = jsUnits(ast);
+  // "innerHTML" also matches "el.innerHTML", "fetch" matches "window.fetch".
+  const matchSink = (sinks, names) =>
+    names.some(name => sinks.has(name) || [...sinks].some(sink => name.endsWith("." + sink)));
+  const analysis = new TaintAnalysis(taintRules, { budgetMs: options.taintBudgetMs, matchSink });
+  let env = new Env();
+  let closures = 0;
+
+  const sourceCache = new Map();
+  function sourceBits(path) {
+    let bits = sourceCache.get(path);
+    if (bits === undefined) {
+      bits = taintRules.sourceBits(src =>
+        path === src || path.startsWith(src + ".") || path.endsWith("." + src) || path.includes("." + src + "."));
+      sourceCache.set(path, bits);
+    }
+    return bits;
+  }
+
+  const lineOf = node => node.loc.start.line;
+  const union = values => values.reduce((a, b) => a | b, 0);
 
-    walk(ast, null);
+  // Dotted name of an identifier / member chain, with require() aliases
+  // resolved: `cp.exec` -> "child_process.exec".
+  function pathOf(node) {
+    if (!node) return null;
+    if (node.type === "Identifier") return aliases.get(node.name) || node.name;
+    if (node.type === "ThisExpression") return "this";
+    if (node.type === "MemberExpression") {
+      const base = pathOf(node.object);
+      if (!base) return null;
+      if (!node.computed) return `${base}.${node.property.name}`;
+      if (node.property.type === "Literal") return `${base}.${node.property.value}`;
+      return `${base}.*`;
+    }
+    return null;
+  }
 
-    process.stdout.write(JSON.stringify(findings));
+  function assignTo(target, bits) {
+    if (!target) return;
+    switch (target.type) {
+      case "Identifier":
+        env.set(target.name, bits);
+        return;
+      case "MemberExpression": {
+        if (target.computed) visit(target.property);
+        const key = pathOf(target);
+        if (key) env.set(key, bits);
+        const base = pathOf(target.object);
+        if (base) env.add(base, bits);
+        return;
+      }
+      case "ObjectPattern":
+        for (const prop of target.properties) {
+          if (prop.type === "RestElement") assignTo(prop.argument, bits);
+          else assignTo(prop.value, bits);
+        }
+        return;
+      case "ArrayPattern":
+        for (const el of target.elements) assignTo(el, bits);
+        return;
+      case "RestElement":
+        assignTo(target.argument, bits);
+        return;
+      case "AssignmentPattern":
+        assignTo(target.left, bits | visit(target.right));
+        return;
+      default:
+        visit(target);
+    }
+  }
+
+  // Function expressions run with the enclosing scope; their own
+  // assignments are dropped afterwards.
+  function closure(fn) {
+    const mark = env.mark();
+    for (const param of fn.params) assignTo(param, 0);
+    closures++;
+    try {
+      visit(fn.body);
+    } finally {
+      env.undo(mark);
+      closures--;
+    }
+    return 0;
+  }
+
+  function call(node) {
+    const callee = node.callee;
+    const args = node.arguments.map(visit);
+    const path = pathOf(callee);
+    let receiver = 0;
+    if (callee.type === "MemberExpression") {
+      if (callee.computed) visit(callee.property);
+      receiver = visit(callee.object);
+    } else if (!path) {
+      visit(callee);
+    }
+
+    const all = union(args);
+    if (path) analysis.sink([path], all, lineOf(node));
+    if (!path) return all | receiver;
+    if (path === "require" || JS_SANITIZERS.has(path) || path.startsWith("Math.")) return 0;
+    if (callee.type === "Identifier" && declared.has(callee.name)) return analysis.call(callee.name, args);
+    const target = importTarget(callee);
+    if (target) {
+      const line = lineOf(node);
+      return all | analysis.external(`${line}:${node.loc.start.column}`, target, line, args);
+    }
+    return all | receiver;
+  }
+
+  // "./lib#f" for a call of `f` from `{f} = require("./lib")` or of
+  // `lib.f` from `lib = require("./lib")`; other modules are not ours.
+  function importTarget(callee) {
+    const local = callee.type === "Identifier" ? callee
+      : callee.type === "MemberExpression" && !callee.computed && callee.object.type === "Identifier"
+        ? callee.object : null;
+    const [module, member] = (local && imports.get(local.name)) || [];
+    if (!module || !module.startsWith(".")) return null;
+    if (local === callee) return `${module}#${member || "default"}`;
+    return member ? null : `${module}#${callee.property.name}`;
+  }
+
+  function switchStatement(node) {
+    visit(node.discriminant);
+    for (const c of node.cases) {
+      env.maybe(() => {
+        visit(c.test);
+        c.consequent.forEach(visit);
+      });
+    }
+  }
+
+  function tryStatement(node) {
+    env.maybe(() => visit(node.block));
+    if (node.handler) {
+      env.maybe(() => {
+        if (node.handler.param) assignTo(node.handler.param, 0);
+        visit(node.handler.body);
+      });
+    }
+    visit(node.finalizer);
+  }
+
+  function children(node) {
+    let bits = 0;
+    for (const key in node) {
+      if (key === "loc" || key === "range") continue;
+      const val = node[key];
+      if (Array.isArray(val)) {
+        for (const item of val) if (item && typeof item === "object") bits |= visit(item);
+      } else if (val && typeof val === "object") {
+        bits |= visit(val);
+      }
+    }
+    return bits;
+  }
+
+  // Taint bits of an expression; statements are walked for their effect
+  // on env and return 0.
+  function visit(node) {
+    if (!node || typeof node !== "object") return 0;
+    if (Array.isArray(node)) return union(node.map(visit));
+    analysis.tick();
+
+    switch (node.type) {
+      case "Identifier":
+        return env.get(node.name) | (aliases.has(node.name) ? 0 : sourceBits(node.name));
+      case "Literal":
+        return 0;
+      case "MemberExpression": {
+        if (node.computed) visit(node.property);
+        const path = pathOf(node);
+        const own = path ? env.get(path) | sourceBits(path) : 0;
+        return path && path.endsWith(".length") ? 0 : own | visit(node.object);
+      }
+      case "AssignmentExpression": {
+        let bits = visit(node.right);
+        if (node.operator !== "=") bits |= visit(node.left);
+        if (node.left.type === "MemberExpression") {
+          // `el.innerHTML = ...`, also on unnamed objects: `get().innerHTML = ...`
+          const path = pathOf(node.left) || (!node.left.computed && node.left.property.name);
+          if (path) analysis.sink([path], bits, lineOf(node));
+        }
+        assignTo(node.left, bits);
+        return bits;
+      }
+      case "VariableDeclarator":
+        if (node.init && owners.has(node.init)) {
+          assignTo(node.id, 0);
+          return 0;
+        }
+        assignTo(node.id, node.init ? visit(node.init) : 0);
+        return 0;
+      case "CallExpression":
+      case "NewExpression":
+        if (JS_FUNCTIONS.has(node.callee.type)) {
+          node.arguments.forEach(visit);
+          return closure(node.callee);
+        }
+        return call(node);
+      case "BinaryExpression": {
+        const bits = visit(node.left) | visit(node.right);
+        return JS_CLEAN_BINARY.has(node.operator) ? 0 : bits;
+      }
+      case "UnaryExpression":
+      case "UpdateExpression":
+        visit(node.argument);
+        return 0;
+      case "ConditionalExpression":
+        visit(node.test);
+        return visit(node.consequent) | visit(node.alternate);
+      case "SequenceExpression":
+        return node.expressions.map(visit).pop() || 0;
+      case "FunctionDeclaration":
+        return 0;   // analysed as a unit of its own
+      case "FunctionExpression":
+      case "ArrowFunctionExpression":
+        return owners.has(node) ? 0 : closure(node);
+      case "MethodDefinition":
+        return closure(node.value);
+      case "IfStatement":
+        visit(node.test);
+        env.either(() => visit(node.consequent), () => visit(node.alternate));
+        return 0;
+      case "WhileStatement":
+        visit(node.test);
+        env.loop(() => { visit(node.body); visit(node.test); });
+        return 0;
+      case "DoWhileStatement":
+        env.loop(() => { visit(node.body); visit(node.test); });
+        return 0;
+      case "ForStatement":
+        visit(node.init);
+        visit(node.test);
+        env.loop(() => { visit(node.body); visit(node.update); visit(node.test); });
+        return 0;
+      case "ForInStatement":
+      case "ForOfStatement": {
+        const bits = visit(node.right);
+        const target = node.left.type === "VariableDeclaration" ? node.left.declarations[0].id : node.left;
+        env.loop(() => { assignTo(target, bits); visit(node.body); });
+        return 0;
+      }
+      case "SwitchStatement":
+        switchStatement(node);
+        return 0;
+      case "TryStatement":
+        tryStatement(node);
+        return 0;
+      case "ReturnStatement": {
+        const bits = visit(node.argument);
+        if (!closures) analysis.returns(bits);
+        return 0;
+      }
+      default:
+        return children(node);
+    }
+  }
+
+  function walkUnit(fn) {
+    env = new Env();
+    fn.params.forEach((param, i) => assignTo(param, analysis.param(i)));
+    if (fn.body.type === "BlockStatement") visit(fn.body);
+    else analysis.returns(visit(fn.body));
+  }
+
+  const units = [{ key: "<main>", line: 1, analyze: () => { env = new Env(); visit(ast.body); } }];
+  for (const [key, fns] of declared) {
+    units.push({ key, line: lineOf(fns[0]), analyze: () => fns.forEach(walkUnit) });
+  }
+  const findings = analysis.run(units);
+  const result = { findings, truncated: analysis.truncated };
+  if (options.summary) result.summary = { units: analysis.summary(), exports };
+  return result;
+}
+
+function parse(code) {
+  return esprima.parseScript(code, { loc: true, range: true });
+}
+
+// Parse once, then evaluate every rule group against the same tree.
+function handleRequest(request) {
+  try {
+    const code = request.code;
+    const options = request.options || {};
+    const profile = options.profile ? { parse: 0, groups: {}, rules: {} } : null;
+    let start = performance.now();
+    const ast = parse(code);
+    if (profile) profile.parse = performance.now() - start;
+    const results = {};
+    const truncated = {};
+    const summaries = {};
+    for (const [group, rules] of Object.entries(request.groups || {})) {
+      const cut = [];
+      const summary = {};
+      start = performance.now();
+      try {
+        results[group] = analyze(code, ast, rules || [], options, cut, summary, profile && profile.rules);
+      } catch (err) {
+        results[group] = { error: err.message };
+      }
+      if (profile) profile.groups[group] = performance.now() - start;
+      if (cut.length) truncated[group] = cut;
+      if (summary.units) summaries[group] = summary;
+    }
+    const response = { id: request.id, results };
+    if (Object.keys(truncated).length) response.truncated = truncated;
+    if (Object.keys(summaries).length) response.summaries = summaries;
+    if (profile) response.profile = profile;
+    return response;
   } catch (err) {
-    process.stdout.write(JSON.stringify({ error: err.message }));
+    return { id: request.id, error: err.message };
   }
-});
+}
+
+function serve() {
+  const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  rl.on("line", line => {
+    if (!line.trim()) return;
+    let response;
+    try {
+      response = handleRequest(JSON.parse(line));
+    } catch (err) {
+      response = { id: null, error: err.message };
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+  });
+  rl.on("close", () => process.exit(0));
+}
+
+function runOnce() {
+  let input = "";
+  process.stdin.on("data", chunk => input += chunk);
+  process.stdin.on("end", () => {
+    try {
+      const payload = JSON.parse(input);
+      const code = payload.code;
+      const rules = payload.rules || [];
+      const ast = parse(code);
+      process.stdout.write(JSON.stringify(analyze(code, ast, rules)));
+    } catch (err) {
+      process.stdout.write(JSON.stringify({ error: err.message }));
+    }
+  });
+}
+
+if (process.argv.includes("--serve")) serve();
+else runOnce();
@@ -1,124 +1,681 @@
 // php_ast_runner.js
 // PHP AST runner with support for AST, Context-Aware AST, and Taint Analysis.
+//
+// Two modes:
+//   node php_ast_runner.js           one-shot: reads {code, rules} from stdin, writes findings.
+//   node php_ast_runner.js --serve   worker: newline-delimited JSON requests
+//                                    {id, code, groups: {name: rules}, options?} answered with
+//                                    {id, results: {name: findings | {error}}, truncated?, summaries?}
+//                                    or {id, error}.
+//
+// options.taintBudgetMs caps the taint analysis time per function; functions
+// that hit it are listed in `truncated` ({group: [{unit, line}]}).
+// options.summary adds the file's open taint flows for the project-wide pass
+// (`summaries`: {group: {units, functions}}; see TaintAnalysis.summary()).
+// options.profile adds timings in milliseconds (`profile`: {parse,
+// groups: {group: ms}, rules: {id: ms}}); rules are timed one by one only then.
 
 const parser = require("php-parser");
+const readline = require("readline");
+const { performance } = require("perf_hooks");
+const { Env, TaintAnalysis, TaintRules } = require("./taint_engine");
 
 const engine = new parser.Engine({
   parser: { extractDoc: true, php7: true },
   ast: { withPositions: true, withLocations: true }
 });
 
-let input = "";
-process.stdin.on("data", chunk => (input += chunk));
-process.stdin.on("end", () => {
-  try {
-    const payload = JSON.parse(input.trim());
-    const code = payload.code || "";
-    const rules = payload.rules || [];
+const INCLUDE_KINDS = ["include", "includeonce", "require", "requireonce"];
 
-    let ast;
-    try {
-      ast = engine.parseCode(code);
-    } catch (parseErr) {
-      process.stdout.write(JSON.stringify({ error: "PHP parse error: " + parseErr.message }));
+// Rules that can fire on each node kind, in rules order, so a node only
+// looks at the rules that concern it. Taint rules are handled by taint().
+function indexRules(rules) {
+  const byKind = new Map();
+  for (const rule of rules) {
+    if (rule.type !== "ast" && rule.type !== "context-ast") continue;
+    if (!byKind.has(rule.nodeType)) byKind.set(rule.nodeType, []);
+    byKind.get(rule.nodeType).push(rule);
+  }
+  return byKind;
+}
+
+function analyze(ast, rules, options = {}, truncated = [], summary = {}, ruleMs = null) {
+  let findings = {};
+  const byKind = indexRules(rules);
+
+  function markFinding(rule, node) {
+    findings[rule.id] = findings[rule.id] || [];
+    findings[rule.id].push(node.loc?.start?.line || 0);
+  }
+
+  function matchNode(rule, node) {
+    let matched = false;
+
+    if (node.kind === "call" && node.what && node.what.name) {
+      const fn = (node.what.name || "").toLowerCase();
+      // A non-string calleeName throws here and fails the group, as before.
+      if (rule.calleeName && fn === rule.calleeName.toLowerCase()) {
+        matched = true;
+      }
+    }
+
+    if (INCLUDE_KINDS.includes(node.kind) && rule.nodeType === "include") {
+      matched = true;
+    }
+
+    if (matched) markFinding(rule, node);
+  }
+
+  function walk(node) {
+    if (!node || typeof node !== "object") return;
+
+    // --- AST / Context ---
+    const relevant = node.kind !== undefined && byKind.get(node.kind);
+    if (relevant && ruleMs) {
+      for (const rule of relevant) {
+        const start = performance.now();
+        matchNode(rule, node);
+        ruleMs[rule.id] = (ruleMs[rule.id] || 0) + performance.now() - start;
+      }
+    } else if (relevant) {
+      for (const rule of relevant) matchNode(rule, node);
+    }
+
+    for (let key in node) {
+      if (key === "loc") continue;
+      const val = node[key];
+      if (Array.isArray(val)) val.forEach(walk);
+      else if (val && typeof val === "object") walk(val);
+    }
+  }
+
+  if (byKind.size) walk(ast);
+
+  // --- Taint AST ---
+  const tainted = taint(ast, rules, options);
+  for (const [id, lines] of Object.entries(tainted.findings)) {
+    findings[id] = (findings[id] || []).concat(lines);
+  }
+  truncated.push(...tainted.truncated);
+  if (tainted.summary) Object.assign(summary, tainted.summary);
+  return findings;
+}
+
+// ======================
+// --- Taint Analysis ---
+// ======================
+// Per-function propagation over the PHP AST; see taint_engine.js.
+
+// Calls whose result carries none of their arguments' taint: type
+// coercions, hashes, booleans, and the shell / SQL / URL escaping functions
+// of the sink families the rules cover. Labels do not record which context
+// a value was escaped for, so an escaper counts as clean for every sink;
+// HTML escaping is left out since no PHP taint rule has an HTML sink.
+const PHP_SANITIZERS = new Set([
+  "intval", "floatval", "doubleval", "boolval", "abs", "count", "strlen",
+  "md5", "sha1", "crc32", "hash", "password_hash", "is_numeric", "ctype_digit",
+  "ctype_alnum", "in_array", "array_key_exists",
+  "escapeshellarg", "escapeshellcmd",
+  "mysqli_real_escape_string", "mysql_real_escape_string", "addslashes",
+  "pg_escape_string", "urlencode", "rawurlencode", "->quote", "->real_escape_string",
+]);
+const PHP_CLEAN_CASTS = new Set(["int", "integer", "float", "double", "real", "bool", "boolean", "unset"]);
+const PHP_CLEAN_BIN = new Set([
+  "==", "===", "!=", "!==", "<>", "<", ">", "<=", ">=", "<=>", "and", "or", "xor", "&&", "||",
+  "instanceof", "+", "-", "*", "/", "%", "**", "&", "|", "^", "<<", ">>",
+]);
+const PHP_SKIP_KEYS = new Set(["loc", "leadingComments", "trailingComments", "attrGroups"]);
+const PHP_SUPERGLOBALS = new Set([
+  "GLOBALS", "_GET", "_POST", "_REQUEST", "_COOKIE", "_SERVER", "_FILES", "_ENV", "_SESSION", "this",
+  "argv", "argc", "http_response_header",
+]);
+// Core functions that pass their arguments' taint through. Any other call
+// this file does not define may be a function of another project file and is
+// left open for the project-wide pass.
+const PHP_BUILTINS = new Set([
+  "trim", "ltrim", "rtrim", "strtolower", "strtoupper", "ucfirst", "lcfirst", "ucwords", "substr",
+  "str_replace", "str_ireplace", "str_pad", "str_repeat", "strrev", "sprintf", "vsprintf", "implode",
+  "join", "explode", "str_split", "preg_replace", "preg_split", "nl2br", "wordwrap", "strstr", "stristr",
+  "strrchr", "stripslashes", "strip_tags", "html_entity_decode", "htmlspecialchars", "htmlentities",
+  "urldecode", "rawurldecode", "base64_decode", "base64_encode", "json_decode", "json_encode",
+  "serialize", "unserialize", "array_merge", "array_values", "array_keys", "array_map", "array_filter",
+  "array_slice", "array_reverse", "array_unique", "array_pop", "array_shift", "array_combine",
+  "array_fill", "array_column", "compact", "extract", "reset", "end", "current", "next", "iterator_to_array",
+  "file_get_contents", "fgets", "fread", "file", "filter_input", "filter_var", "getenv", "basename",
+  "dirname", "pathinfo", "realpath", "mb_strtolower", "mb_strtoupper", "mb_substr", "number_format",
+  "isset", "empty", "is_array", "is_string", "is_int", "strpos", "stripos", "preg_match", "var_dump",
+  "print_r", "var_export", "printf", "header", "define", "defined", "constant", "func_get_args",
+  "array_push", "array_key_first", "array_key_last", "sort", "ksort", "usort", "time", "date",
+  "session_start", "ob_start", "ob_get_clean", "die", "exit",
+]);
+
+function phpName(node) {
+  if (!node) return null;
+  if (typeof node === "string") return node;
+  if (node.kind === "identifier" || node.kind === "name") return typeof node.name === "string" ? node.name : null;
+  return null;
+}
+
+// "$x", "$this->db", "C::$x" style keys for the values the env tracks.
+function phpPath(node) {
+  if (!node) return null;
+  if (node.kind === "variable") return typeof node.name === "string" ? node.name : null;
+  if (node.kind === "propertylookup" || node.kind === "nullsafepropertylookup") {
+    const base = phpPath(node.what);
+    const prop = phpName(node.offset);
+    return base && prop ? `${base}->${prop}` : null;
+  }
+  if (node.kind === "staticlookup") {
+    const base = phpName(node.what) || phpPath(node.what);
+    const prop = phpName(node.offset) || phpPath(node.offset);
+    return base && prop ? `${base}::${prop}` : null;
+  }
+  if (node.kind === "offsetlookup") return phpPath(node.what);
+  return null;
+}
+
+// Literal target of an include: "x.php", "__DIR__/x.php" for
+// `__DIR__ . '/x.php'` or `dirname(__FILE__) . '/x.php'`, else null.
+function includePath(node) {
+  if (!node) return null;
+  if (node.kind === "string") return node.value;
+  if (node.kind === "magic" && /^__dir__$/i.test(node.raw || node.value || "")) return "__DIR__";
+  if (node.kind === "call" && phpName(node.what)?.toLowerCase() === "dirname" &&
+      node.arguments.length === 1 && node.arguments[0].kind === "magic" &&
+      /^__file__$/i.test(node.arguments[0].raw || node.arguments[0].value || "")) return "__DIR__";
+  if (node.kind === "bin" && node.type === ".") {
+    const left = includePath(node.left);
+    const right = includePath(node.right);
+    return left !== null && right !== null ? left + right : null;
+  }
+  if (node.kind === "parenthesis") return includePath(node.inner);
+  return null;
+}
+
+// Variables the file scope assigns anywhere (function and class bodies
+// aside); every other variable it reads is set by an including file.
+function phpAssigned(nodes) {
+  const names = new Set();
+  const target = node => {
+    if (!node) return;
+    if (node.kind === "variable" && typeof node.name === "string") names.add(node.name);
+    else if (node.kind === "list" || node.kind === "array") {
+      for (const item of node.items || []) target(item && item.kind === "entry" ? item.value : item);
+    } else if (node.kind === "offsetlookup") target(node.what);
+  };
+  (function collect(node) {
+    if (!node || typeof node !== "object") return;
+    if (Array.isArray(node)) return node.forEach(collect);
+    switch (node.kind) {
+      case "function":
+      case "class":
+      case "interface":
+      case "trait":
+      case "closure":
+        return;
+      case "assign":
+        target(node.left);
+        break;
+      case "foreach":
+        target(node.key);
+        target(node.value);
+        break;
+      case "catch":
+        target(node.variable);
+        break;
+      case "arrowfunc":
+        for (const param of node.arguments || []) names.add(phpName(param.name));
+        break;
+      case "static":
+      case "global":
+        for (const item of node.variables || node.items || []) target(item.variable || item);
+        break;
+    }
+    for (const key in node) {
+      if (!PHP_SKIP_KEYS.has(key) && node[key] && typeof node[key] === "object") collect(node[key]);
+    }
+  })(nodes);
+  return names;
+}
+
+// Named functions and methods, grouped by the key calls resolve them with
+// (methods of different classes share "->name").
+function phpUnits(ast) {
+  const units = new Map();
+  const add = (key, node) => {
+    if (!units.has(key)) units.set(key, []);
+    units.get(key).push(node);
+  };
+  (function collect(node) {
+    if (!node || typeof node !== "object") return;
+    if (Array.isArray(node)) return node.forEach(collect);
+    if (node.kind === "function" && phpName(node.name)) add(phpName(node.name).toLowerCase(), node);
+    if (node.kind === "method" && phpName(node.name)) add("->" + phpName(node.name).toLowerCase(), node);
+    for (const key in node) {
+      if (!PHP_SKIP_KEYS.has(key) && node[key] && typeof node[key] === "object") collect(node[key]);
+    }
+  })(ast);
+  return units;
+}
+
+function taint(ast, rules, options) {
+  const taintRules = new TaintRules(rules, s => s.toLowerCase());
+  if (!taintRules.rules.length) return { findings: {}, truncated: [] };
+
+  const sourceCache = new Map();
+  function sourceBits(name) {
+    let bits = sourceCache.get(name);
+    if (bits === undefined) {
+      bits = taintRules.sourceBits(src => src === "$" + name);
+      sourceCache.set(name, bits);
+    }
+    return bits;
+  }
+
+  const declared = phpUnits(ast);
+  const sinkNames = taintRules.sinkNames;
+  // A callee's global read from the file scope sees the variable's value
+  // at the call; in a function it stays an input.
+  const lift = key => (inMain && key.startsWith("global:") ? globalValue(key.slice(7)) : undefined);
+  const analysis = new TaintAnalysis(taintRules, { budgetMs: options.taintBudgetMs, lift });
+  let env = new Env();
+  let closures = 0;
+  let inMain = false;
+  let discard = false;
+  const assigned = phpAssigned(ast.children);
+
+  // A file-scope variable this file never assigns comes from the including
+  // file (or is undefined): an input of the file.
+  function globalValue(name) {
+    if (assigned.has(name) || PHP_SUPERGLOBALS.has(name)) return env.get(name);
+    return analysis.input("global:" + name);
+  }
+
+  const lineOf = node => node.loc?.start?.line || 0;
+  const union = values => values.reduce((a, b) => a | b, 0);
+
+  function assignTo(target, bits, strong) {
+    if (!target) return;
+    if (target.kind === "list" || target.kind === "array") {
+      for (const item of target.items || []) assignTo(item && item.kind === "entry" ? item.value : item, bits, strong);
+      return;
+    }
+    if (target.kind === "offsetlookup") {
+      if (target.offset) visit(target.offset);
+      const key = phpPath(target.what);
+      if (key) env.add(key, bits);
       return;
     }
+    const key = phpPath(target);
+    if (!key) return visit(target);
+    if (target.kind !== "variable") visit(target.what);
+    if (strong) env.set(key, bits);
+    else env.add(key, bits);
+  }
 
-    let findings = {};
-    let taintedVars = new Set();
+  function closure(node) {
+    const params = () => {
+      for (const param of node.arguments || []) {
+        const name = phpName(param.name);
+        if (name) env.set(name, 0);
+      }
+    };
+    closures++;
+    if (node.kind === "arrowfunc") {
+      // Captures the enclosing scope by value.
+      const mark = env.mark();
+      params();
+      try {
+        visit(node.body);
+      } finally {
+        env.undo(mark);
+        closures--;
+      }
+      return 0;
+    }
+    const saved = env;
+    const savedMain = inMain;
+    env = new Env();
+    for (const use of node.uses || []) {
+      const key = phpPath(use);
+      if (key) env.set(key, saved.get(key));
+    }
+    inMain = false;
+    params();
+    try {
+      visit(node.body);
+    } finally {
+      env = saved;
+      inMain = savedMain;
+      closures--;
+    }
+    return 0;
+  }
 
-    function markFinding(rule, node) {
-      findings[rule.id] = findings[rule.id] || [];
-      findings[rule.id].push(node.loc?.start?.line || 0);
+  function call(node) {
+    const used = !discard;
+    discard = false;
+    const args = (node.arguments || []).map(visit);
+    const what = node.what;
+    let names;
+    let unitKey;
+    let receiver = 0;
+    let sanitizer = false;
+    let open = false;
+    if (what && what.kind === "name") {
+      const fn = phpName(what).toLowerCase();
+      names = [fn];
+      unitKey = fn;
+      sanitizer = PHP_SANITIZERS.has(fn);
+      open = !PHP_BUILTINS.has(fn) && !sinkNames.has(fn);
+    } else if (what && (what.kind === "propertylookup" || what.kind === "nullsafepropertylookup" ||
+                        what.kind === "staticlookup")) {
+      const method = (phpName(what.offset) || "").toLowerCase();
+      const sep = what.kind === "staticlookup" ? "::" : "->";
+      const base = (phpName(what.what) || phpPath(what.what) || "").toLowerCase();
+      receiver = what.kind === "staticlookup" ? 0 : visit(what.what);
+      const tail = base.split(/->|::/).pop();
+      names = [...new Set([`${base}${sep}${method}`, `${tail}${sep}${method}`, `${sep}${method}`])];
+      unitKey = "->" + method;
+      sanitizer = PHP_SANITIZERS.has("->" + method);
+    } else {
+      visit(what);
+      names = [];
     }
 
-    function getVarName(node) {
-      if (!node) return null;
-      if (node.kind === "variable") return node.name;
-      if (node.kind === "offsetlookup" && node.what) return getVarName(node.what);
-      return null;
+    const all = union(args);
+    if (names.length) analysis.sink(names, all, lineOf(node));
+    if (sanitizer) return 0;
+    if (unitKey && declared.has(unitKey)) return analysis.call(unitKey, args);
+    if (open && (used || all)) {
+      const line = lineOf(node);
+      const result = analysis.external(`${line}:${node.loc?.start?.column || 0}`, names[0], line, args);
+      return all | (used ? result : 0);
     }
+    return all | receiver;
+  }
 
-    function walk(node) {
-      if (!node || typeof node !== "object") return;
+  function include(node) {
+    const bits = visit(node.target);
+    const line = lineOf(node);
+    analysis.sink([(node.require ? "require" : "include") + (node.once ? "_once" : "")], bits, line);
+    const path = options.summary && includePath(node.target);
+    if (path) {
+      const scope = new Map();
+      for (const [name, value] of env.vars) if (!/->|::/.test(name)) scope.set(name, value);
+      analysis.include(path, line, scope);
+    }
+  }
 
-      for (const rule of rules) {
-        // --- Taint AST ---
-        if (rule.type === "taint-ast") {
-          if (node.kind === "assign") {
-            const lhs = getVarName(node.left);
-            const rhsDump = JSON.stringify(node.right);
+  function switchStatement(node) {
+    visit(node.test);
+    for (const c of node.body?.children || []) {
+      env.maybe(() => {
+        visit(c.test);
+        visit(c.body);
+      });
+    }
+  }
 
-            if (rule.sources.some(src => rhsDump.includes(src))) {
-              taintedVars.add(lhs);
-            }
+  function tryStatement(node) {
+    env.maybe(() => visit(node.body));
+    for (const c of node.catches || []) {
+      env.maybe(() => {
+        if (c.variable) assignTo(c.variable, 0, true);
+        visit(c.body);
+      });
+    }
+    visit(node.always);
+  }
 
-            const rhsVar = getVarName(node.right);
-            if (rhsVar && taintedVars.has(rhsVar)) {
-              taintedVars.add(lhs);
-            }
-          }
+  function children(node) {
+    let bits = 0;
+    for (const key in node) {
+      if (PHP_SKIP_KEYS.has(key)) continue;
+      const val = node[key];
+      if (Array.isArray(val)) {
+        for (const item of val) if (item && typeof item === "object") bits |= visit(item);
+      } else if (val && typeof val === "object") {
+        bits |= visit(val);
+      }
+    }
+    return bits;
+  }
 
-          if (node.kind === "call" && node.what && node.what.name) {
-            const fn = (node.what.name || "").toLowerCase();
-            if (rule.sinks.map(s => s.toLowerCase()).includes(fn)) {
-              if (node.arguments && node.arguments.length > 0) {
-                node.arguments.forEach(arg => {
-                  const argVar = getVarName(arg);
-                  if (argVar && taintedVars.has(argVar)) {
-                    markFinding(rule, node);
-                  }
-                  const argDump = JSON.stringify(arg);
-                  if (rule.sources.some(src => argDump.includes(src))) {
-                    markFinding(rule, node);
-                  }
-                });
-              }
-            }
-          }
+  // Taint bits of an expression; statements are walked for their effect
+  // on env and return 0.
+  function visit(node) {
+    if (!node || typeof node !== "object") return 0;
+    if (Array.isArray(node)) return union(node.map(visit));
+    analysis.tick();
 
-          if (["include", "includeonce", "require", "requireonce"].includes(node.kind)) {
-            const argDump = JSON.stringify(node.target);
-            if (rule.sources.some(src => argDump.includes(src))) {
-              markFinding(rule, node);
-            }
-          }
+    switch (node.kind) {
+      case "variable":
+        if (typeof node.name !== "string") return visit(node.name);
+        return (inMain ? globalValue(node.name) : env.get(node.name)) | sourceBits(node.name);
+      case "offsetlookup":
+        visit(node.offset);
+        return visit(node.what);
+      case "propertylookup":
+      case "nullsafepropertylookup":
+      case "staticlookup": {
+        const key = phpPath(node);
+        return (key ? env.get(key) : 0) | (node.kind === "staticlookup" ? 0 : visit(node.what));
+      }
+      case "assign": {
+        const bits = visit(node.right);
+        if (node.operator === "=") {
+          assignTo(node.left, bits, true);
+          return bits;
         }
-
-        // --- AST / Context ---
-        if (rule.type === "ast" || rule.type === "context-ast") {
-          if (node.kind === rule.nodeType) {
-            let matched = false;
-
-            if (node.kind === "call" && node.what && node.what.name) {
-              const fn = (node.what.name || "").toLowerCase();
-              if (rule.calleeName && fn === rule.calleeName.toLowerCase()) {
-                matched = true;
-              }
-            }
-
-            if (
-              ["include", "includeonce", "require", "requireonce"].includes(node.kind) &&
-              rule.nodeType === "include"
-            ) {
-              matched = true;
-            }
-
-            if (matched) markFinding(rule, node);
+        const combined = visit(node.left) | bits;
+        assignTo(node.left, combined, true);
+        return combined;
+      }
+      case "call":
+        return call(node);
+      case "expressionstatement":
+        discard = node.expression?.kind === "call";
+        visit(node.expression);
+        discard = false;
+        return 0;
+      case "new":
+        visit(node.what);
+        return union((node.arguments || []).map(visit));
+      case "include":
+        include(node);
+        return 0;
+      case "eval":
+        analysis.sink(["eval"], visit(node.source), lineOf(node));
+        return 0;
+      case "encapsed": {
+        const bits = union((node.value || []).map(part => visit(part.expression || part)));
+        if (node.type === "shell") analysis.sink(["shell_exec"], bits, lineOf(node));
+        return bits;
+      }
+      case "bin": {
+        const bits = visit(node.left) | visit(node.right);
+        return PHP_CLEAN_BIN.has(node.type) ? 0 : bits;
+      }
+      case "cast": {
+        const bits = visit(node.expr || node.what);
+        return PHP_CLEAN_CASTS.has(node.type) ? 0 : bits;
+      }
+      case "retif": {
+        const test = visit(node.test);
+        return (node.trueExpr ? visit(node.trueExpr) : test) | visit(node.falseExpr);
+      }
+      case "unary":
+      case "pre":
+      case "post":
+      case "isset":
+      case "empty":
+        children(node);
+        return 0;
+      case "closure":
+      case "arrowfunc":
+        return closure(node);
+      case "function":
+      case "class":
+      case "interface":
+      case "trait":
+        return 0;   // analysed as units of their own
+      case "if":
+        visit(node.test);
+        env.either(() => visit(node.body), () => visit(node.alternate));
+        return 0;
+      case "while":
+        visit(node.test);
+        env.loop(() => { visit(node.body); visit(node.test); });
+        return 0;
+      case "do":
+        env.loop(() => { visit(node.body); visit(node.test); });
+        return 0;
+      case "for":
+        visit(node.init);
+        visit(node.test);
+        env.loop(() => { visit(node.body); visit(node.increment); visit(node.test); });
+        return 0;
+      case "foreach": {
+        const bits = visit(node.source);
+        env.loop(() => {
+          if (node.key) assignTo(node.key, bits, true);
+          assignTo(node.value, bits, true);
+          visit(node.body);
+        });
+        return 0;
+      }
+      case "switch":
+        switchStatement(node);
+        return 0;
+      case "try":
+        tryStatement(node);
+        return 0;
+      case "return": {
+        const bits = visit(node.expr);
+        if (!closures) analysis.returns(bits);
+        return 0;
+      }
+      case "unset":
+        for (const item of node.variables || []) {
+          if (item.kind === "variable" && typeof item.name === "string") env.set(item.name, 0);
+        }
+        return 0;
+      case "global":
+        for (const item of node.items || []) {
+          if (!inMain && item.kind === "variable" && typeof item.name === "string") {
+            env.set(item.name, analysis.input("global:" + item.name));
           }
         }
-      }
+        return 0;
+      default:
+        return children(node);
+    }
+  }
 
-      for (let key in node) {
-        const val = node[key];
-        if (Array.isArray(val)) val.forEach(walk);
-        else if (val && typeof val === "object") walk(val);
+  function walkUnit(node, params, main = false) {
+    env = new Env();
+    inMain = false;
+    (params || []).forEach((param, i) => {
+      const name = phpName(param.name);
+      if (name) env.set(name, analysis.param(i) | (param.value ? visit(param.value) : 0));
+    });
+    inMain = main;
+    visit(node);
+  }
+
+  const units = [{ key: "<main>", line: 1, analyze: () => walkUnit(ast.children, [], true) }];
+  for (const [key, nodes] of declared) {
+    units.push({
+      key,
+      line: lineOf(nodes[0]),
+      analyze: () => nodes.forEach(n => walkUnit(n.body, n.arguments)),
+    });
+  }
+  const findings = analysis.run(units);
+  const result = { findings, truncated: analysis.truncated };
+  if (options.summary) {
+    const functions = [...declared.keys()].filter(key => !key.startsWith("->"));
+    result.summary = { units: analysis.summary(), functions };
+  }
+  return result;
+}
+
+function parse(code) {
+  try {
+    return { ast: engine.parseCode(code) };
+  } catch (parseErr) {
+    return { error: "PHP parse error: " + parseErr.message };
+  }
+}
+
+// Parse once, then evaluate every rule group against the same tree.
+function handleRequest(request) {
+  try {
+    const options = request.options || {};
+    const profile = options.profile ? { parse: 0, groups: {}, rules: {} } : null;
+    let start = performance.now();
+    const parsed = parse(request.code || "");
+    if (parsed.error) return { id: request.id, error: parsed.error };
+    if (profile) profile.parse = performance.now() - start;
+    const results = {};
+    const truncated = {};
+    const summaries = {};
+    for (const [group, rules] of Object.entries(request.groups || {})) {
+      const cut = [];
+      const summary = {};
+      start = performance.now();
+      try {
+        results[group] = analyze(parsed.ast, rules || [], options, cut, summary, profile && profile.rules);
+      } catch (err) {
+        results[group] = { error: err.message };
       }
+      if (profile) profile.groups[group] = performance.now() - start;
+      if (cut.length) truncated[group] = cut;
+      if (summary.units) summaries[group] = summary;
     }
-
-    walk(ast);
-    process.stdout.write(JSON.stringify(findings));
+    const response = { id: request.id, results };
+    if (Object.keys(truncated).length) response.truncated = truncated;
+    if (Object.keys(summaries).length) response.summaries = summaries;
+    if (profile) response.profile = profile;
+    return response;
   } catch (err) {
-    process.stdout.write(JSON.stringify({ error: err.message }));
+    return { id: request.id, error: err.message };
   }
-});
+}
+
+function serve() {
+  const rl = readline.createInterface({ input: process.stdin, crlfDelay: Infinity });
+  rl.on("line", line => {
+    if (!line.trim()) return;
+    let response;
+    try {
+      response = handleRequest(JSON.parse(line));
+    } catch (err) {
+      response = { id: null, error: err.message };
+    }
+    process.stdout.write(JSON.stringify(response) + "\n");
+  });
+  rl.on("close", () => process.exit(0));
+}
+
+function runOnce() {
+  let input = "";
+  process.stdin.on("data", chunk => (input += chunk));
+  process.stdin.on("end", () => {
+    try {
+      const payload = JSON.parse(input.trim());
+      const parsed = parse(payload.code || "");
+      if (parsed.error) {
+        process.stdout.write(JSON.stringify({ error: parsed.error }));
+        return;
+      }
+      process.stdout.write(JSON.stringify(analyze(parsed.ast, payload.rules || [])));
+    } catch (err) {
+      process.stdout.write(JSON.stringify({ error: err.message }));
+    }
+  });
+}
+
+if (process.argv.includes("--serve")) serve();
+else runOnce();
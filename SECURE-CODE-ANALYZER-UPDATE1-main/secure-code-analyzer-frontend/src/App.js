@@ -20,6 +20,7 @@ import {
   InputLabel,
   FormControl,
   CircularProgress,
+  LinearProgress,
   Pagination,
   Button,
   Stack,
@@ -205,9 +206,12 @@ function SeverityChart({ issues }) {
 }
 
 const PAGE_SIZE = 15;
+const JOB_POLL_MS = 1000;
 
 function App() {
-  const [issues, setIssues] = useState([]);
+  const [reportIssues, setReportIssues] = useState([]);
+  const [liveFiles, setLiveFiles] = useState(null); // file -> issues, kept current by a --watch server
+  const [showLive, setShowLive] = useState(false);
   const [loading, setLoading] = useState(true);
   const [filters, setFilters] = useState({
     severity: "ALL",
@@ -218,13 +222,16 @@ function App() {
   const [page, setPage] = useState(1);
   const [cliOpen, setCliOpen] = useState(false);
   const [selectedFile, setSelectedFile] = useState(null);
+  const [reportBase, setReportBase] = useState(`${API_BASE_URL}/reports`);
+  const [job, setJob] = useState(null);
 
-  const loadReport = () => {
+  const loadReport = (base = reportBase) => {
     setLoading(true);
+    setShowLive(false);
     axios
-      .get(`${API_BASE_URL}/reports/report.json`)
+      .get(`${base}/report.json`)
       .then((res) => {
-        setIssues(res.data);
+        setReportIssues(res.data);
         setLoading(false);
       })
       .catch((err) => {
@@ -233,10 +240,78 @@ function App() {
       });
   };
 
+  // A server started with --watch streams the watched files' issues on /events: a
+  // snapshot, then only the files whose issues changed (an empty list: none left).
+  // Without it the stream fails before any snapshot and report.json is loaded instead.
   useEffect(() => {
-    loadReport();
+    const source = new EventSource(`${API_BASE_URL}/events`);
+    let live = false;
+    source.addEventListener("snapshot", (e) => {
+      live = true;
+      setLiveFiles(JSON.parse(e.data).files);
+      setShowLive(true);
+      setLoading(false);
+    });
+    source.addEventListener("delta", (e) => {
+      const { files } = JSON.parse(e.data);
+      setLiveFiles((current) => {
+        const next = { ...current };
+        Object.entries(files).forEach(([file, fileIssues]) => {
+          if (fileIssues.length) next[file] = fileIssues;
+          else delete next[file];
+        });
+        return next;
+      });
+    });
+    source.onerror = () => {
+      if (!live) {
+        source.close();
+        loadReport();
+      }
+    };
+    return () => source.close();
   }, []);
 
+  const issues = useMemo(
+    () => (showLive && liveFiles ? Object.values(liveFiles).flat() : reportIssues),
+    [showLive, liveFiles, reportIssues]
+  );
+
+  // Scans run as background jobs on the server; poll until the report is ready.
+  // `offset` skips findings already reported by earlier polls.
+  const pollJob = (jobId, offset = 0) => {
+    axios
+      .get(`${API_BASE_URL}/jobs/${jobId}`, { params: { offset } })
+      .then((res) => {
+        const status = res.data;
+        setJob(status);
+        if (status.status === "done") {
+          const base = `${API_BASE_URL}/reports/jobs/${jobId}`;
+          setJob(null);
+          setReportBase(base);
+          loadReport(base);
+        } else if (status.status === "failed") {
+          setJob(null);
+          alert(`Scan failed: ${status.error}`);
+        } else {
+          setTimeout(() => pollJob(jobId, status.count), JOB_POLL_MS);
+        }
+      })
+      .catch((err) => {
+        console.error("Failed to poll scan job", err);
+        setJob(null);
+      });
+  };
+
+  const startJob = (request) => {
+    request
+      .then((res) => pollJob(res.data.id))
+      .catch((err) => {
+        console.error("❌ Scan failed", err);
+        alert(err.response?.status === 429 ? "Server busy, try again shortly." : "Scan failed. Check backend logs.");
+      });
+  };
+
   const owaspOptions = useMemo(() => {
     const set = new Set();
     issues.forEach((i) => {
@@ -267,7 +342,7 @@ function App() {
   const pagedIssues = filteredIssues.slice((page - 1) * PAGE_SIZE, page * PAGE_SIZE);
 
   const handleDownload = (format) => {
-    const url = `${API_BASE_URL}/reports/report.${format}`;
+    const url = `${reportBase}/report.${format}`;
     axios
       .get(url, { responseType: format === "html" ? "blob" : "text" })
       .then((res) => {
@@ -297,17 +372,8 @@ function App() {
     const formData = new FormData();
     formData.append("files", selectedFile); // ✅ backend expects "files"
 
-    axios
-      .post(`${API_BASE_URL}/scan`, formData, { headers: { "Content-Type": "multipart/form-data" } })
-      .then(() => {
-        alert("✅ Scan completed. Report updated!");
-        setSelectedFile(null);
-        loadReport();
-      })
-      .catch((err) => {
-        console.error("❌ Scan failed", err);
-        alert("Scan failed. Check backend logs.");
-      });
+    setSelectedFile(null);
+    startJob(axios.post(`${API_BASE_URL}/scan`, formData, { headers: { "Content-Type": "multipart/form-data" } }));
   };
 
   if (loading)
@@ -322,9 +388,17 @@ function App() {
 
   return (
     <Container maxWidth="xl" sx={{ py: 4 }}>
-      <Typography variant="h4" gutterBottom>
-        Secure Code Analyzer Report
-      </Typography>
+      <Stack direction="row" spacing={2} alignItems="center" sx={{ mb: 1 }}>
+        <Typography variant="h4">Secure Code Analyzer Report</Typography>
+        {liveFiles && (
+          <Chip
+            label="Live"
+            color={showLive ? "success" : "default"}
+            variant={showLive ? "filled" : "outlined"}
+            onClick={() => setShowLive(true)}
+          />
+        )}
+      </Stack>
 
       <Stack direction="row" spacing={2} sx={{ mb: 3, flexWrap: "wrap" }}>
         <Button variant="contained" startIcon={<UploadIcon />} component="label">
@@ -336,19 +410,13 @@ function App() {
             Scan {selectedFile.name}
           </Button>
         )}
-        <Button variant="contained" startIcon={<VisibilityIcon />} onClick={loadReport}>
+        <Button variant="contained" startIcon={<VisibilityIcon />} onClick={() => loadReport()}>
           View Results
         </Button>
         <Button
           variant="contained"
           startIcon={<RefreshIcon />}
-          onClick={() => {
-            axios.post("/refresh").then(() => {
-              loadReport();
-            }).catch(err => {
-              console.error("Refresh failed", err);
-            });
-          }}
+          onClick={() => startJob(axios.post(`${API_BASE_URL}/refresh`))}
         >
           Refresh
         </Button>
@@ -363,6 +431,15 @@ function App() {
         </Button>
       </Stack>
 
+      {job && (
+        <Box sx={{ mb: 3 }}>
+          <Typography variant="body2" gutterBottom>
+            Scanning… {job.done}/{job.total} files, {job.count} issue(s) so far
+          </Typography>
+          <LinearProgress variant="determinate" value={job.total ? (100 * job.done) / job.total : 0} />
+        </Box>
+      )}
+
       <SeverityChart issues={filteredIssues} />
       <Filters filters={filters} setFilters={setFilters} owaspOptions={owaspOptions} cweOptions={cweOptions} />
 
@@ -1,12 +1,22 @@
-from .core.scanner import scan_file, filter_issues, sort_issues
-from .core.reporters import generate_json_report, generate_html_report
+__version__ = "0.1.0"
+
+from .core.scanner import scan_file, scan_files, scan_sources, filter_issues, sort_issues
+from .core.rules import RuleSet
+from .core.cache import ResultCache
+from .core.reporters import generate_json_report, generate_jsonl_report, generate_html_report
 from .core.severity import normalize_severity, severity_worse_or_equal, sort_by_severity
 
 __all__ = [
+    "__version__",
     "scan_file",
+    "scan_files",
+    "scan_sources",
+    "RuleSet",
+    "ResultCache",
     "filter_issues",
     "sort_issues",
     "generate_json_report",
+    "generate_jsonl_report",
     "generate_html_report",
     "normalize_severity",
     "severity_worse_or_equal",
@@ -1,123 +1,587 @@
 import argparse
+import json
 import os
+import queue
 import sys
+import threading
 
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
-from secure_code_analyzer.core.scanner import scan_file
+from werkzeug.utils import secure_filename
+from secure_code_analyzer.core.scanner import scan_files, summarize_files
+from secure_code_analyzer.core.budget import (
+    Budget, DEFAULT_FILE_SECONDS, DEFAULT_STAGE_SECONDS, DEFAULT_MEMORY_MB,
+)
+from secure_code_analyzer.core.profile import ScanTimings, prometheus_lines
+from secure_code_analyzer.core.rules import RuleSet, REGEX_ENGINES, DEFAULT_REGEX_ENGINE
+from secure_code_analyzer.core.cache import ResultCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_BYTES
+from secure_code_analyzer.core.crossfile import flow_issues, linked_files, sink_context
+from secure_code_analyzer.core.baseline import Baseline, BaselineWriter, fingerprint_root
+from secure_code_analyzer.core.jobs import JobManager, QueueFull, DEFAULT_MAX_JOBS, DEFAULT_MAX_QUEUED
+from secure_code_analyzer.core.gitdiff import GitError, collect_changed_files, on_changed_lines
+from secure_code_analyzer.core.walker import FileWalker, DEFAULT_MAX_FILE_BYTES
+from secure_code_analyzer.core.watch import (
+    WATCH_BACKENDS, DEFAULT_WATCH_BACKEND, DEFAULT_DEBOUNCE, DEFAULT_POLL_INTERVAL, LiveScan, WatchUnavailable,
+    open_watcher,
+)
+from secure_code_analyzer.core.shard import (
+    SHARD_MODES, DEFAULT_SHARD_MODE, ShardMerge, ShardWriter, parse_shard, path_shard, shard_path, size_shards,
+)
 from secure_code_analyzer.core.reporters import (
     generate_json_report,
     generate_html_report,
+    generate_jsonl_report,
+    iter_jsonl,
 )
 
 # Default reports directory
 REPORTS_DIR = os.path.abspath("reports")
+# Seconds between comments on an idle /events stream, so proxies keep it open
+SSE_KEEPALIVE = 15
+
+
+def warn_missing(path):
+    print(f"[WARNING] {path} does not exist, skipping.")
+
+
+def print_issue(issue):
+    print(f"  [{issue['severity']}] {issue['file']}:{issue['line']} - {issue['message']}")
+
+
+def print_file_issues(file, issues):
+    if issues:
+        print(f"\nFound {len(issues)} issues in {file}:")
+        for issue in issues:
+            print_issue(issue)
+    else:
+        print(f"\nNo issues found in {file}")
+
 
+def print_crossfile_issues(issues):
+    if issues:
+        print(f"\nFound {len(issues)} cross-file taint issues:")
+        for issue in issues:
+            print_issue(issue)
 
-def collect_files(paths):
+
+def build_walker(paths, args=None):
+    """FileWalker over `paths` with the --exclude/--max-file-size-kb/... options of `args`."""
+    if args is None:
+        return FileWalker(paths, on_missing=warn_missing)
+    return FileWalker(
+        paths,
+        exclude=args.exclude or (),
+        max_file_bytes=args.max_file_size_kb * 1024,
+        include_minified=args.include_minified,
+        default_excludes=not args.no_default_excludes,
+        on_missing=warn_missing,
+    )
+
+
+def collect_files(paths, args=None):
     """
     Collect all .js and .php files from given paths.
     Supports both individual files and directories.
     """
-    files = []
-    for path in paths:
-        if os.path.isfile(path):
-            if path.endswith((".js", ".php")):
-                files.append(path)
-        elif os.path.isdir(path):
-            for root, _, filenames in os.walk(path):
-                for fname in filenames:
-                    if fname.endswith((".js", ".php")):
-                        files.append(os.path.join(root, fname))
-        else:
-            print(f"[WARNING] {path} does not exist, skipping.")
-    return files
+    return list(build_walker(paths, args))
+
+
+def build_cache(args):
+    """Result cache selected by --cache-dir/--cache-size-mb, or None with --no-cache."""
+    if args.no_cache:
+        return None
+    return ResultCache(args.cache_dir, max_bytes=args.cache_size_mb * 1024 * 1024)
+
+
+def build_budget(args):
+    """Per-file budget from --file-budget/--stage-budget/--memory-budget."""
+    return Budget(args.file_budget, args.stage_budget, args.memory_budget)
+
+
+def load_baseline(args):
+    """The --baseline index (exits if it cannot be read), or None."""
+    if not args.baseline:
+        return None
+    try:
+        return Baseline(args.baseline)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+def against_baseline(issues, baseline=None, writer=None):
+    """
+    `issues` as a list, each also recorded by `writer` (a BaselineWriter)
+    if given; with a `baseline`, only those it lacks.
+    """
+    if writer is not None:
+        issues = list(issues)
+        for issue in issues:
+            writer.add(issue)
+    if baseline is None:
+        return list(issues)
+    return [issue for issue in issues if baseline.is_new(issue)]
+
+
+def iter_scan(files_to_scan, jobs=1, ruleset=None, cache=None, changes=None, cross_file=False,
+              project=None, budget=None, timings=None, profile=False, baseline=None, write_baseline=None):
+    """
+    Scan the given files (any iterable; files are scanned as it yields
+    them), printing per-file results, and yield their issues one at a time.
+    With jobs > 1 files are scanned in parallel; output order is unchanged.
+    Files unchanged since a previous scan are served from `cache`. With
+    `changes` ({file: changed line ranges}) only findings on changed lines
+    are kept. With `cross_file`, taint flows between the scanned files
+    follow, linked from the taint summaries their scans produced; given a
+    wider `project` (the files includes and imports may reach), the
+    project files that include, import or are included by a scanned file
+    are summarised too, and flows through them that pass a scanned file
+    are reported. Files are scanned within `budget`;
+    `timings` (a ScanTimings) collects per-stage times and, with `profile`,
+    per-rule times. Every issue is recorded by `write_baseline` (a
+    BaselineWriter) if given; with a `baseline` only new issues are printed
+    and yielded.
+    """
+    scanned = []
+    summaries = {} if cross_file else None
+    for file, issues in scan_files(files_to_scan, jobs=jobs, ruleset=ruleset, cache=cache, budget=budget,
+                                   timings=timings, profile=profile, summaries=summaries):
+        if cross_file:
+            scanned.append(file)
+        if changes is not None:
+            issues = [i for i in issues if on_changed_lines(i, changes.get(file))]
+        issues = against_baseline(issues, baseline, write_baseline)
+        print_file_issues(file, issues)
+        yield from issues
+
+    if cross_file and scanned:
+        only = None
+        if project is not None:
+            only = scanned
+            summaries.update(summarize_files(linked_files(summaries, project, scanned), jobs, ruleset, cache))
+        issues = flow_issues(summaries, ruleset, only)
+        issues = against_baseline(issues, baseline, write_baseline)
+        print_crossfile_issues(issues)
+        yield from issues
 
 
-def run_scan(files_to_scan):
+def run_scan(files_to_scan, jobs=1, ruleset=None, cache=None, changes=None, cross_file=False,
+             project=None, budget=None, timings=None, profile=False):
     """Run scan on given files and return list of issues."""
-    all_issues = []
-    for file in files_to_scan:
-        try:
-            issues = scan_file(file)
-            if issues:
-                print(f"\nFound {len(issues)} issues in {file}:")
-                for issue in issues:
-                    print(
-                        f"  [{issue['severity']}] {issue['file']}:{issue['line']} - {issue['message']}"
-                    )
-                all_issues.extend(issues)
-            else:
-                print(f"\nNo issues found in {file}")
-        except Exception as e:
-            print(f"\n[ERROR] Could not scan {file}: {e}")
-            all_issues.append(
-                {
-                    "severity": "LOW",
-                    "file": file,
-                    "line": 0,
-                    "message": f"Error reading file: {e}",
-                }
-            )
-    return all_issues
+    return list(iter_scan(files_to_scan, jobs=jobs, ruleset=ruleset, cache=cache, changes=changes,
+                          cross_file=cross_file, project=project, budget=budget, timings=timings,
+                          profile=profile))
 
 
 def cli_mode(args):
     """Run in classic CLI mode."""
-    files_to_scan = collect_files(args.targets)
-    if not files_to_scan:
+    changes = None
+    project = None
+    walker = build_walker(args.targets or ["."], args)
+    if args.since or args.changed_only:
+        ref = args.since or "HEAD"
+        try:
+            files_to_scan, changes = collect_changed_files(args.targets or ["."], ref)
+        except GitError as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        files_to_scan = [f for f in files_to_scan if walker.admit(f)]
+        if not files_to_scan:
+            print(f"✅ No .js or .php files changed since {ref}.")
+            return
+        if not args.changed_only:
+            changes = None
+        if not args.no_cross_file:
+            project = list(walker)
+    elif not args.targets:
+        print("❌ No .js or .php files found to scan.")
+        sys.exit(1)
+    else:
+        # Scanning starts with the first file the walk finds.
+        files_to_scan = walker
+
+    if args.shard:
+        shard_mode(args, walker)
+        return
+
+    ruleset = RuleSet(regex_engine=args.regex_engine)
+    cache = build_cache(args)
+    timings = ScanTimings()
+    baseline = load_baseline(args)
+    writer = BaselineWriter(args.write_baseline) if args.write_baseline else None
+    issues = iter_scan(files_to_scan, jobs=args.jobs, ruleset=ruleset, cache=cache, changes=changes,
+                       cross_file=not args.no_cross_file, project=project, budget=build_budget(args),
+                       timings=timings, profile=args.profile, baseline=baseline, write_baseline=writer)
+
+    # Findings are streamed to disk as JSON Lines, never held in memory;
+    # the JSON and HTML reports are then rendered from that file.
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    jsonl_path = os.path.join(REPORTS_DIR, "report.jsonl")
+    spool_path = jsonl_path + ".tmp"
+    total = generate_jsonl_report(issues, spool_path)
+    scanned = walker.yielded if files_to_scan is walker else len(files_to_scan)
+    if not scanned:
+        os.remove(spool_path)
+        if writer is not None:
+            writer.discard()
         print("❌ No .js or .php files found to scan.")
         sys.exit(1)
 
-    all_issues = run_scan(files_to_scan)
+    cache_line = None
+    if cache is not None:
+        cache.evict()
+        cache.close()
+        cache_line = f"Cache: {cache.hits} hit(s), {cache.misses} miss(es) ({cache.cache_dir})"
+    complete_scan(jsonl_path, total, scanned, walker.skipped, timings, args.profile, cache_line, baseline, writer)
+
+
+def complete_scan(jsonl_path, total, scanned, skipped, timings, profile=False, cache_line=None, baseline=None,
+                  writer=None):
+    """
+    Print the summary of a finished scan whose issues were spooled to
+    `jsonl_path` + ".tmp", then keep the spool as the JSON Lines report and
+    render the JSON and HTML reports from it (if anything was found). With
+    a `baseline` the issues were only the new ones: the baseline findings
+    no longer found are printed and saved to reports/fixed.jsonl. `writer`,
+    the BaselineWriter the scan's issues were recorded by, is closed after
+    that, so it may replace the baseline file.
+    """
+    spool_path = jsonl_path + ".tmp"
+    if baseline is not None:
+        fixed_path = os.path.join(REPORTS_DIR, "fixed.jsonl")
+
+        def fixed():
+            for issue in baseline.fixed():
+                if not fixed.count:
+                    print("\nFixed since the baseline:")
+                fixed.count += 1
+                print_issue(issue)
+                yield issue
+        fixed.count = 0
+        generate_jsonl_report(fixed(), fixed_path)
+    if writer is not None:
+        writer.close()
 
     print("\n=== SCAN COMPLETE ===")
-    print(f"Total Issues Found: {len(all_issues)} across {len(files_to_scan)} files")
+    if baseline is None:
+        print(f"Total Issues Found: {total} across {scanned} files")
+    else:
+        print(f"New Issues Found: {total} across {scanned} files")
+        print(f"Baseline: {baseline.matched} known issue(s) not reported, {fixed.count} fixed ({baseline.path})")
+        if len(baseline) and not baseline.matched and baseline.root != fingerprint_root():
+            print(f"[WARNING] No issue matched the baseline, written in {baseline.root}; outside a git work "
+                  f"tree files are fingerprinted relative to the working directory ({fingerprint_root()})")
+    if skipped:
+        skipped = ", ".join(f"{count} {reason}" for reason, count in sorted(skipped.items()))
+        print(f"Skipped: {skipped}")
+    if cache_line:
+        print(cache_line)
+    for line in timings.summary_lines():
+        print(line)
+    if profile:
+        for line in timings.profile_lines():
+            print(line)
+        profile_path = os.path.join(REPORTS_DIR, "profile.json")
+        timings.save(profile_path)
+        print(f"[+] Profile saved to {profile_path}")
+    if writer is not None:
+        print(f"[+] Baseline of {len(writer.digests)} issue(s) saved to {writer.out_path}")
+    if baseline is not None and fixed.count:
+        print(f"[+] Fixed issues saved to {fixed_path}")
 
-    if all_issues:
-        # Save reports
-        os.makedirs(REPORTS_DIR, exist_ok=True)
-        json_path = os.path.join(REPORTS_DIR, "report.json")
-        html_path = os.path.join(REPORTS_DIR, "report.html")
-        generate_json_report(all_issues, json_path)
-        generate_html_report(all_issues, html_path)
-        print(f"[+] JSON report saved to {json_path}")
-        print(f"[+] HTML report saved to {html_path}")
+    if not total:
+        os.remove(spool_path)
+        return
 
+    # Save reports
+    os.replace(spool_path, jsonl_path)
+    json_path = os.path.join(REPORTS_DIR, "report.json")
+    html_path = os.path.join(REPORTS_DIR, "report.html")
+    generate_json_report(iter_jsonl(jsonl_path), json_path)
+    generate_html_report(iter_jsonl(jsonl_path), html_path)
+    print(f"[+] JSON Lines report saved to {jsonl_path}")
+    print(f"[+] JSON report saved to {json_path}")
+    print(f"[+] HTML report saved to {html_path}")
 
-def serve_mode():
-    """Run Flask server for frontend integration."""
+
+def shard_mode(args, walker):
+    """
+    Scan this machine's share (--shard I/N) of the files the walk finds and
+    write the partial results to reports/shard-I-of-N.jsonl, for `merge`.
+    """
+    index, count = args.shard
+    ruleset = RuleSet(regex_engine=args.regex_engine)
+    cache = build_cache(args)
+    timings = ScanTimings()
+    cross_file = not args.no_cross_file
+    positions = {}
+
+    def assigned():
+        if args.shard_by == "size":
+            paths = list(walker)
+            owners = size_shards(paths, count)
+            mine = ((n, path) for n, path in enumerate(paths) if owners[path] == index)
+        else:
+            mine = ((n, path) for n, path in enumerate(walker) if path_shard(path, count) == index)
+        for n, path in mine:
+            positions[path] = n
+            yield path
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    out_path = shard_path(REPORTS_DIR, index, count)
+    total = scanned = 0
+    with ShardWriter(out_path, index, count, ruleset.digest, args.shard_by, cross_file) as shard:
+        summaries = {} if cross_file else None
+        for file, issues in scan_files(assigned(), jobs=args.jobs, ruleset=ruleset, cache=cache,
+                                       budget=build_budget(args), timings=timings, profile=args.profile,
+                                       summaries=summaries):
+            print_file_issues(file, issues)
+            summary = summaries.get(file) if cross_file else None
+            shard.add(positions[file], file, issues, summary, sink_context(file, summary) if summary else None)
+            total += len(issues)
+            scanned += 1
+        cache_stats = None
+        if cache is not None:
+            cache.evict()
+            cache.close()
+            cache_stats = {"hits": cache.hits, "misses": cache.misses, "dir": cache.cache_dir}
+        shard.finish({"files": scanned, "issues": total, "skipped": walker.skipped, "cache": cache_stats,
+                      "timings": timings.to_dict()})
+    if not walker.yielded:
+        os.remove(out_path)
+        print("❌ No .js or .php files found to scan.")
+        sys.exit(1)
+
+    print(f"\n=== SHARD {index}/{count} COMPLETE ===")
+    print(f"Issues Found: {total} across {scanned} of {walker.yielded} files")
+    for line in timings.summary_lines():
+        print(line)
+    if args.profile:
+        for line in timings.profile_lines():
+            print(line)
+    print(f"[+] Shard results saved to {out_path}")
+
+
+def merge_mode(argv):
+    """`merge SHARD...`: the reports of a --shard scan, identical to a scan on one machine."""
+    parser = argparse.ArgumentParser(
+        prog="secure_code_analyzer merge",
+        description="Merge the results of the N shards of a --shard I/N scan into the usual reports",
+    )
+    parser.add_argument("shards", nargs="+", help="The shard-I-of-N.jsonl files of all N shards")
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Also print the shards' per-rule times and save reports/profile.json",
+    )
+    add_baseline_options(parser)
+    args = parser.parse_args(argv)
+
+    try:
+        shards = ShardMerge(args.shards)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    ruleset = RuleSet()
+    if ruleset.digest != shards.rules:
+        print("❌ The shards were scanned with other rules than this rule pack.")
+        sys.exit(1)
+    baseline = load_baseline(args)
+    writer = BaselineWriter(args.write_baseline) if args.write_baseline else None
+
+    def issues():
+        summaries, sinks = {}, {}
+        for record in shards.files():
+            found = against_baseline(record["issues"], baseline, writer)
+            print_file_issues(record["file"], found)
+            yield from found
+            if record.get("summary"):
+                summaries[record["file"]] = record["summary"]
+                sinks[record["file"]] = {int(line): tuple(context) for line, context in record["sinks"].items()}
+        if shards.cross_file and summaries:
+            found = against_baseline(flow_issues(summaries, ruleset, sinks=sinks), baseline, writer)
+            print_crossfile_issues(found)
+            yield from found
+
+    os.makedirs(REPORTS_DIR, exist_ok=True)
+    jsonl_path = os.path.join(REPORTS_DIR, "report.jsonl")
+    try:
+        total = generate_jsonl_report(issues(), jsonl_path + ".tmp")
+    except ValueError as e:
+        os.remove(jsonl_path + ".tmp")
+        if writer is not None:
+            writer.discard()
+        print(f"❌ {e}")
+        sys.exit(1)
+
+    timings = ScanTimings()
+    hits = misses = 0
+    for metrics in shards.metrics:
+        timings.merge(metrics["timings"])
+        if metrics.get("cache"):
+            hits += metrics["cache"]["hits"]
+            misses += metrics["cache"]["misses"]
+    first = shards.metrics[0]
+    cache_line = None
+    if first.get("cache"):
+        cache_line = f"Cache: {hits} hit(s), {misses} miss(es) ({first['cache']['dir']})"
+    # Every shard walks all the files, so each counts the same skipped ones.
+    complete_scan(jsonl_path, total, sum(m["files"] for m in shards.metrics), first["skipped"], timings,
+                  args.profile, cache_line, baseline, writer)
+
+
+def sse_event(event, data, event_id=None):
+    """One server-sent event carrying `data` as JSON."""
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def live_events(live, keepalive=SSE_KEEPALIVE):
+    """
+    The /events stream of a LiveScan: a "snapshot" event, then a "delta"
+    event per rescan that changed issues; a client too slow to keep up gets
+    a fresh snapshot instead of the deltas it missed.
+    """
+    subscriber = live.subscribe()
+    try:
+        version, files = live.snapshot()
+        yield sse_event("snapshot", {"version": version, "files": files}, version)
+        while True:
+            try:
+                delta = subscriber.get(timeout=keepalive)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            if delta is None:
+                subscriber = live.subscribe()
+                version, files = live.snapshot()
+                yield sse_event("snapshot", {"version": version, "files": files}, version)
+            elif delta["version"] > version:     # not already in the snapshot
+                yield sse_event("delta", delta, delta["version"])
+    finally:
+        live.unsubscribe(subscriber)
+
+
+def watch_loop(live, watcher):
+    """Scan everything, then rescan the files touched in each burst of changes until the watcher stops."""
+    live.start()
+    print(f"[watch] {len(live.files)} file(s) scanned, {live.count()} issue(s)")
+    for touched in watcher.batches():
+        try:
+            rescanned, removed, delta = live.apply(touched)
+        except Exception as e:
+            print(f"[watch] Rescan failed: {e}")
+            continue
+        if rescanned or removed:
+            changed = len(delta["files"]) if delta else 0
+            print(f"[watch] {len(rescanned)} file(s) rescanned, {len(removed)} removed; "
+                  f"issues changed in {changed} file(s), {live.count()} in all")
+    watcher.close()
+
+
+def start_watch(args):
+    """The LiveScan of the --watch paths, kept current by a background thread."""
+    def new_walker():
+        return build_walker(args.watch, args)
+
+    live = LiveScan(
+        new_walker,
+        ruleset=RuleSet(regex_engine=args.regex_engine),
+        cache=build_cache(args),
+        jobs=args.jobs,
+        budget=build_budget(args),
+        cross_file=not args.no_cross_file,
+    )
+    try:
+        watcher = open_watcher(args.watch, new_walker, args.watch_backend, args.watch_debounce,
+                               args.poll_interval, new_walker().excludes)
+    except WatchUnavailable as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"👀 Watching {', '.join(args.watch)} ({watcher.backend})")
+    threading.Thread(target=watch_loop, args=(live, watcher), name="sca-watch", daemon=True).start()
+    return live
+
+
+def create_app(args, live=None):
+    """
+    Flask app for frontend integration; scans run as background jobs. With
+    a `live` LiveScan (--watch), /events streams its issues as they change.
+    """
     app = Flask(__name__)
     CORS(app)
+    jobs = JobManager(
+        os.path.join(REPORTS_DIR, "jobs"),
+        max_jobs=args.max_jobs,
+        max_queued=args.max_queued,
+        scan_jobs=max(1, args.jobs // args.max_jobs),
+        ruleset=RuleSet(regex_engine=args.regex_engine),
+        cache=build_cache(args),
+        cross_file=not args.no_cross_file,
+        budget=build_budget(args),
+        profile=args.profile,
+    )
+
+    def job_status(job):
+        status = job.to_dict(offset=request.args.get("offset", 0, type=int))
+        status["reports"] = {
+            fmt: f"/reports/jobs/{job.id}/{os.path.basename(path)}"
+            for fmt, path in status["reports"].items()
+        }
+        return status
+
+    def start_job(filepaths, sources=None):
+        try:
+            job = jobs.submit(filepaths, sources)
+        except QueueFull as e:
+            return jsonify({"error": f"Server busy: {e}"}), 429, {"Retry-After": "30"}
+        status = job_status(job)
+        status["status_url"] = f"/jobs/{job.id}"
+        return jsonify(status), 202, {"Location": status["status_url"]}
 
     @app.route("/scan", methods=["POST"])
     def scan_endpoint():
         """
-        Upload and scan files via API.
-        Expects files in multipart form-data.
+        Upload files and start a background scan via API.
+        Expects files in multipart form-data; returns a job id to poll.
+        The uploads are scanned from memory, nothing is written to disk.
         """
         if "files" not in request.files:
             return jsonify({"error": "No files uploaded"}), 400
 
-        uploaded_files = request.files.getlist("files")
-        filepaths = []
+        sources = {}
+        for f in request.files.getlist("files"):
+            name = secure_filename(f.filename or "")
+            if name:
+                sources[name] = f.read()
 
-        os.makedirs("uploads", exist_ok=True)
-        for f in uploaded_files:
-            path = os.path.join("uploads", f.filename)
-            f.save(path)
-            filepaths.append(path)
+        return start_job(list(sources), sources)
 
-        issues = run_scan(filepaths)
+    @app.route("/jobs/<job_id>", methods=["GET"])
+    def job_endpoint(job_id):
+        """Progress (files done/total), issues found so far and, once done, report URLs."""
+        job = jobs.get(job_id)
+        if job is None:
+            return jsonify({"error": "Unknown job"}), 404
+        return jsonify(job_status(job))
 
-        # Save reports for frontend
-        os.makedirs(REPORTS_DIR, exist_ok=True)
-        json_path = os.path.join(REPORTS_DIR, "report.json")
-        html_path = os.path.join(REPORTS_DIR, "report.html")
-        generate_json_report(issues, json_path)
-        generate_html_report(issues, html_path)
+    @app.route("/metrics", methods=["GET"])
+    def metrics_endpoint():
+        """Scan counters and timings in the Prometheus text format."""
+        gauges = {"sca_jobs": ("Remembered scan jobs by status.", "status", jobs.status_counts())}
+        if jobs.cache is not None:
+            gauges["sca_cache_lookups"] = ("Result cache lookups since start.", "result",
+                                           {"hit": jobs.cache.hits, "miss": jobs.cache.misses})
+        body = "\n".join(prometheus_lines(jobs.timings, gauges)) + "\n"
+        return Response(body, mimetype="text/plain; version=0.0.4")
 
-        return jsonify({"issues": issues, "count": len(issues)})
+    @app.route("/events", methods=["GET"])
+    def events_endpoint():
+        """Server-sent events: the watched files' issues, then the files whose issues changed."""
+        if live is None:
+            return jsonify({"error": "Not watching any files (start the server with --watch PATH)"}), 404
+        return Response(live_events(live), mimetype="text/event-stream",
+                        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
 
     @app.route("/reports/<path:filename>", methods=["GET"])
     def serve_reports(filename):
@@ -126,29 +590,50 @@ def serve_mode():
 
     @app.route("/refresh", methods=["POST"])
     def refresh_scan():
-        """Re-run scan on last uploaded files."""
+        """Re-run the scan of the last upload (or of an uploads/ folder) in the background."""
+        if jobs.last_sources is not None:
+            return start_job(list(jobs.last_sources), jobs.last_sources)
         upload_dir = "uploads"
         if not os.path.exists(upload_dir):
             return jsonify({"error": "No uploaded files to rescan"}), 400
 
-        filepaths = [
-            os.path.join(upload_dir, f) for f in os.listdir(upload_dir)
-        ]
-        issues = run_scan(filepaths)
+        return start_job(collect_files([upload_dir]))
 
-        # Save updated reports
-        json_path = os.path.join(REPORTS_DIR, "report.json")
-        html_path = os.path.join(REPORTS_DIR, "report.html")
-        generate_json_report(issues, json_path)
-        generate_html_report(issues, html_path)
+    app.config["JOBS"] = jobs
+    app.config["LIVE"] = live
+    return app
 
-        return jsonify({"issues": issues, "count": len(issues)})
 
+def serve_mode(args):
+    """Run Flask server for frontend integration."""
+    live = start_watch(args) if args.watch else None
+    app = create_app(args, live)
     port = int(os.environ.get("PORT", 5000))
     print(f"🚀 Secure Code Analyzer server running at http://0.0.0.0:{port}")
     app.run(host="0.0.0.0", port=port, debug=False)
 
 
+def add_baseline_options(parser):
+    parser.add_argument(
+        "--baseline",
+        metavar="FILE",
+        help="Only report issues this baseline (from --write-baseline) lacks; "
+             "the ones it has that are gone are saved to reports/fixed.jsonl",
+    )
+    parser.add_argument(
+        "--write-baseline",
+        metavar="FILE",
+        help="Save every issue of this scan as a baseline index for a later --baseline",
+    )
+
+
+def shard_spec(value):
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
 def main():
     parser = argparse.ArgumentParser(description="Secure Code Analyzer CLI + Server")
     parser.add_argument(
@@ -161,11 +646,199 @@ def main():
         action="store_true",
         help="Run as server instead of CLI mode",
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Number of files to scan in parallel (default: CPU count, 1 = serial)",
+    )
+
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=DEFAULT_MAX_JOBS,
+        help="Server mode: scans allowed to run at once (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--max-queued",
+        type=int,
+        default=DEFAULT_MAX_QUEUED,
+        help="Server mode: scans allowed to wait before /scan answers 429 (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--watch",
+        metavar="PATH",
+        action="append",
+        help="Server mode (implied): keep the issues of the files under PATH current as they change "
+             "and push them to the frontend on /events (repeatable)",
+    )
+    parser.add_argument(
+        "--watch-backend",
+        choices=WATCH_BACKENDS,
+        default=DEFAULT_WATCH_BACKEND,
+        help="Notice changes with inotify, or by walking the files every --poll-interval; "
+             "auto falls back to polling without inotify (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--watch-debounce",
+        type=float,
+        default=DEFAULT_DEBOUNCE,
+        metavar="SECONDS",
+        help="Rescan once no change came for this long, so a burst of saves is one rescan (default: %(default)s)",
+    )
+    parser.add_argument(
+        "--poll-interval",
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        metavar="SECONDS",
+        help="Seconds between walks when polling for changes (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="Only scan files changed since the merge base of REF and HEAD (local git)",
+    )
+    parser.add_argument(
+        "--changed-only",
+        action="store_true",
+        help="Only report findings on changed lines (implies --since HEAD if --since is not given)",
+    )
+
+    parser.add_argument(
+        "--exclude",
+        metavar="PATTERN",
+        action="append",
+        help="Skip paths matching this .gitignore-style pattern (repeatable); "
+             ".gitignore and .scaignore files are honoured too",
+    )
+    parser.add_argument(
+        "--no-default-excludes",
+        action="store_true",
+        help="Also walk node_modules, vendor, .git, dist, build and similar directories",
+    )
+    parser.add_argument(
+        "--max-file-size-kb",
+        type=int,
+        default=DEFAULT_MAX_FILE_BYTES // 1024,
+        help="Skip files larger than this (default: %(default)s, 0 = no limit)",
+    )
+    parser.add_argument(
+        "--include-minified",
+        action="store_true",
+        help="Scan minified JavaScript (*.min.js or very long lines) too",
+    )
+
+    parser.add_argument(
+        "--no-cross-file",
+        action="store_true",
+        help="Skip following taint flows across includes, imports and calls between files",
+    )
+
+    parser.add_argument(
+        "--file-budget",
+        type=float,
+        default=DEFAULT_FILE_SECONDS,
+        metavar="SECONDS",
+        help="Wall-clock limit for all detectors on one file (default: %(default)s, 0 = none); "
+             "over-budget files get a BUDGET_EXCEEDED finding and the scan moves on",
+    )
+    parser.add_argument(
+        "--stage-budget",
+        type=float,
+        default=DEFAULT_STAGE_SECONDS,
+        metavar="SECONDS",
+        help="Wall-clock limit for one detector stage (regex, AST) on one file (default: %(default)s, 0 = none)",
+    )
+    parser.add_argument(
+        "--memory-budget",
+        type=int,
+        default=DEFAULT_MEMORY_MB,
+        metavar="MB",
+        help="Memory limit for each regex worker and Node heap (default: %(default)s, 0 = none)",
+    )
+
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Time every rule and detector stage; print the most expensive ones and save "
+             "reports/profile.json (serve mode: per-rule series on /metrics)",
+    )
+
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Scan every file even if its results are cached",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory for the result cache (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--cache-size-mb",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="Evict least recently used cache entries beyond this size (default: %(default)s)",
+    )
+
+    parser.add_argument(
+        "--regex-engine",
+        choices=REGEX_ENGINES,
+        default=DEFAULT_REGEX_ENGINE,
+        help="Match regex/heuristic rules with one combined automaton or one pass per rule",
+    )
+
+    parser.add_argument(
+        "--shard",
+        metavar="I/N",
+        type=shard_spec,
+        help="Scan only the I-th of N shares of the files (1 <= I <= N) into reports/shard-I-of-N.jsonl; "
+             "combine the N results with `merge reports/shard-*-of-N.jsonl`",
+    )
+    parser.add_argument(
+        "--shard-by",
+        choices=SHARD_MODES,
+        default=DEFAULT_SHARD_MODE,
+        help="Assign files to shards by a hash of their path, or balance the shards' bytes (default: %(default)s)",
+    )
+
+    add_baseline_options(parser)
 
-    args = parser.parse_args()
+    argv = sys.argv[1:]
+    if argv[:1] == ["merge"]:
+        merge_mode(argv[1:])
+        return
+    args = parser.parse_args(argv)
+    if args.shard and (args.since or args.changed_only or args.serve or args.watch):
+        parser.error("--shard cannot be combined with --since, --changed-only, --serve or --watch")
+    for path in args.watch or ():
+        if not os.path.exists(path):
+            parser.error(f"--watch: {path} does not exist")
+    if args.watch_debounce < 0:
+        parser.error("--watch-debounce must not be negative")
+    if args.poll_interval <= 0:
+        parser.error("--poll-interval must be positive")
+    if args.shard and (args.baseline or args.write_baseline):
+        parser.error("give --baseline and --write-baseline to `merge` when scanning with --shard")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    if args.max_jobs < 1:
+        parser.error("--max-jobs must be at least 1")
+    if args.max_queued < 0:
+        parser.error("--max-queued must not be negative")
+    if args.cache_size_mb < 1:
+        parser.error("--cache-size-mb must be at least 1")
+    if args.max_file_size_kb < 0:
+        parser.error("--max-file-size-kb must not be negative")
+    for flag in ("file_budget", "stage_budget", "memory_budget"):
+        if getattr(args, flag) < 0:
+            parser.error(f"--{flag.replace('_', '-')} must not be negative")
 
-    if args.serve:
-        serve_mode()
+    if args.serve or args.watch:
+        serve_mode(args)
     else:
         cli_mode(args)
 
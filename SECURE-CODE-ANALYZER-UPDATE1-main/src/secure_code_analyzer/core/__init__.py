@@ -1,5 +1,7 @@
-from .scanner import scan_file
+from .scanner import scan_file, scan_files, scan_sources
+from .rules import RuleSet
+from .cache import ResultCache
 from .utils import filter_issues, sort_issues
-from .reporters import generate_json_report, generate_html_report
+from .reporters import generate_json_report, generate_jsonl_report, generate_html_report
 
-__all__ = ["scan_file", "filter_issues", "sort_issues", "generate_json_report", "generate_html_report"]
+__all__ = ["scan_file", "scan_files", "scan_sources", "RuleSet", "ResultCache", "filter_issues", "sort_issues", "generate_json_report", "generate_jsonl_report", "generate_html_report"]
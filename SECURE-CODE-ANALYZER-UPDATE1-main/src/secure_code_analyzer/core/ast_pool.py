@@ -0,0 +1,247 @@
+import atexit
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+
+# ========================
+# Pool Settings
+# ========================
+DEFAULT_TIMEOUT = 60          # seconds to wait for one worker response
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+
+
+# ========================
+# Single Node Worker
+# ========================
+class NodeWorker:
+    """
+    A long-lived `node <runner> --serve` process speaking newline-delimited JSON.
+    The process is (re)started lazily, so a crash or a timeout only costs the
+    request that hit it; the next request gets a fresh worker. `memory_mb`
+    caps the V8 heap (--max-old-space-size).
+    """
+
+    def __init__(self, runner, timeout=DEFAULT_TIMEOUT, memory_mb=None):
+        self.runner = runner
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.proc = None
+        self.restarts = 0
+        self._lines = None
+        self._ids = itertools.count(1)
+
+    def _start(self):
+        heap = [f"--max-old-space-size={self.memory_mb}"] if self.memory_mb else []
+        self.proc = subprocess.Popen(
+            ["node", *heap, self.runner, "--serve"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+        )
+        self._lines = queue.Queue()
+        reader = threading.Thread(
+            target=self._read_stdout, args=(self.proc.stdout, self._lines), daemon=True
+        )
+        reader.start()
+
+    @staticmethod
+    def _read_stdout(stream, lines):
+        for line in iter(stream.readline, b""):
+            lines.put(line)
+        lines.put(None)  # EOF: the worker exited
+
+    def _alive(self):
+        return self.proc is not None and self.proc.poll() is None
+
+    def _restart(self):
+        self.close()
+        self.restarts += 1
+
+    def request(self, code, groups, options=None, timeout=None):
+        """
+        Send one file with all its rule groups; return the decoded response.
+        `options` is passed through to the runner (e.g. {"taintBudgetMs": 500}).
+        `timeout` overrides the worker's for this request. Running out of
+        time or heap sets "budget" ("time" / "memory") in the error response.
+        """
+        if not self._alive():
+            self._start()
+        req_id, line = self._frame(code, groups, options)
+        try:
+            self.proc.stdin.write(line)
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError) as e:
+            self._restart()
+            return {"error": f"AST worker crashed: {e}", "retryable": True}
+        return self._receive(req_id, self.timeout if timeout is None else timeout)
+
+    def request_many(self, requests):
+        """
+        request() for several files, [(code, groups, options, timeout)], in one
+        pipelined round trip: a writer thread sends every file while responses
+        are read, so the worker goes from one file to the next without waiting
+        for us. Each timeout runs from the previous response. If the worker
+        dies, the files after the one that killed it are sent again one at a
+        time. Returns [(response, seconds)] in request order.
+        """
+        if not self._alive():
+            self._start()
+        frames = [self._frame(code, groups, options) for code, groups, options, _ in requests]
+        stdin = self.proc.stdin
+
+        def send():
+            try:
+                for _, line in frames:
+                    stdin.write(line)
+                stdin.flush()
+            except (BrokenPipeError, OSError, ValueError):
+                pass    # the worker died or was killed; its reader reports it
+
+        threading.Thread(target=send, daemon=True).start()
+        results = []
+        for index, ((req_id, _), (_, _, _, timeout)) in enumerate(zip(frames, requests)):
+            started = time.perf_counter()
+            response = self._receive(req_id, self.timeout if timeout is None else timeout)
+            results.append((response, time.perf_counter() - started))
+            if response.get("retryable"):
+                for code, groups, options, timeout in requests[index + 1:]:
+                    started = time.perf_counter()
+                    response = self.request(code, groups, options, timeout)
+                    results.append((response, time.perf_counter() - started))
+                break
+        return results
+
+    def _frame(self, code, groups, options):
+        req_id = next(self._ids)
+        payload = {"id": req_id, "code": code, "groups": groups}
+        if options:
+            payload["options"] = options
+        return req_id, (json.dumps(payload) + "\n").encode("utf-8")
+
+    def _receive(self, req_id, timeout):
+        while True:
+            try:
+                raw = self._lines.get(timeout=timeout)
+            except queue.Empty:
+                self._restart()
+                return {"error": f"AST worker timed out after {timeout:g}s", "retryable": True,
+                        "budget": "time"}
+            if raw is None:
+                try:
+                    status = self.proc.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    status = None
+                self._restart()
+                # V8 aborts (SIGABRT) when the heap limit is hit.
+                if self.memory_mb and status in (-6, 134):
+                    return {"error": f"AST worker ran out of memory (over {self.memory_mb} MB)",
+                            "retryable": True, "budget": "memory"}
+                return {"error": "AST worker exited unexpectedly", "retryable": True}
+            try:
+                response = json.loads(raw.decode("utf-8"))
+            except ValueError:
+                continue  # stray output, keep waiting for our frame
+            if response.get("id") == req_id:
+                return response
+
+    def close(self):
+        if self.proc is None:
+            return
+        try:
+            self.proc.stdin.close()
+        except OSError:
+            pass
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc = None
+
+
+# ========================
+# Worker Pool
+# ========================
+class NodeWorkerPool:
+    """Bounded set of NodeWorkers for one runner script, safe to share between threads."""
+
+    def __init__(self, runner, size=DEFAULT_POOL_SIZE, timeout=DEFAULT_TIMEOUT, memory_mb=None):
+        self.runner = runner
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.pid = os.getpid()
+        self._idle = queue.LifoQueue()
+        self._workers = []
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._workers) < self.size:
+                worker = NodeWorker(self.runner, self.timeout, self.memory_mb)
+                self._workers.append(worker)
+                return worker
+        return self._idle.get()
+
+    def run(self, code, groups, options=None, timeout=None):
+        """
+        Evaluate every rule group in `groups` ({name: rules}) on `code` in one
+        round trip. Returns {"results": {name: findings}} or {"error": msg};
+        a group that failed on its own comes back as {name: {"error": msg}}.
+        Worker crashes and timeouts also set "retryable": the same input may
+        succeed on the next attempt. Functions whose taint analysis hit the
+        time cap are listed under "truncated" ({name: [{unit, line}]}).
+        """
+        worker = self._acquire()
+        try:
+            return worker.request(code, groups, options, timeout)
+        finally:
+            self._idle.put(worker)
+
+    def run_many(self, requests):
+        """run() for several files in one pipelined round trip on one worker; see NodeWorker.request_many."""
+        worker = self._acquire()
+        try:
+            return worker.request_many(requests)
+        finally:
+            self._idle.put(worker)
+
+    def close(self):
+        with self._lock:
+            for worker in self._workers:
+                worker.close()
+            self._workers = []
+            self._idle = queue.LifoQueue()
+
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def get_pool(runner, memory_mb=None):
+    """Return the per-process pool for `runner` (and heap cap), creating it on first use."""
+    key = (runner, memory_mb)
+    with _POOLS_LOCK:
+        pool = _POOLS.get(key)
+        # A forked child must not reuse the parent's pipes.
+        if pool is None or pool.pid != os.getpid():
+            pool = NodeWorkerPool(runner, memory_mb=memory_mb)
+            _POOLS[key] = pool
+        return pool
+
+
+def shutdown_pools():
+    with _POOLS_LOCK:
+        for pool in _POOLS.values():
+            if pool.pid == os.getpid():
+                pool.close()
+        _POOLS.clear()
+
+
+atexit.register(shutdown_pools)
@@ -0,0 +1,258 @@
+import functools
+import hashlib
+import json
+import os
+import re
+import struct
+import sys
+import zlib
+from array import array
+
+# ========================
+# Fingerprints
+# ========================
+# Line numbers move with every edit above a finding, so a finding is known
+# across scans by a fingerprint of what does not: its rule, its file
+# (relative to the root of its git work tree, else to the working
+# directory, with "/"), its line's code without whitespace (reformatting it
+# does not count) and the name of the function it is in. Two findings alike
+# in all four (the same call twice in one function) share a fingerprint;
+# baselines count them.
+@functools.lru_cache(maxsize=4096)
+def work_tree(directory):
+    """The nearest of `directory` (absolute) and its parents with a .git entry, or None."""
+    while not os.path.exists(os.path.join(directory, ".git")):
+        parent = os.path.dirname(directory)
+        if parent == directory:
+            return None
+        directory = parent
+    return directory
+
+
+def fingerprint_root(path="."):
+    """The directory fingerprints of files at `path` are relative to: its work tree, or the working directory."""
+    path = os.path.abspath(path)
+    return work_tree(path if os.path.isdir(path) else os.path.dirname(path)) or os.getcwd()
+
+
+@functools.lru_cache(maxsize=4096)
+def _path_key(path, cwd):
+    try:
+        path = os.path.relpath(path, work_tree(os.path.dirname(path)) or cwd)
+    except ValueError:      # another drive
+        pass
+    return path.replace(os.sep, "/")
+
+
+def path_key(path):
+    """
+    The file name a fingerprint is taken of, so that `cd repo && sca .` and
+    `sca repo` agree: relative to fingerprint_root(), with "/".
+    """
+    cwd = os.getcwd()
+    return _path_key(os.path.normpath(os.path.join(cwd, path)), cwd)
+
+
+def fingerprint(rule_id, path, snippet, function=""):
+    """16 hex digits identifying a finding across edits that do not touch its line."""
+    key = "\0".join((rule_id, path_key(path), "".join(snippet.split()), function))
+    return hashlib.blake2b(key.encode("utf-8", "surrogatepass"), digest_size=8).hexdigest()
+
+
+def issue_fingerprint(issue):
+    """The fingerprint of an issue dict: its own, or one taken now for issues from older reports."""
+    return issue.get("fingerprint") or fingerprint(issue.get("id", ""), issue.get("file", ""),
+                                                   issue.get("snippet", ""), issue.get("function", ""))
+
+
+# ========================
+# Suppression Comments
+# ========================
+# `// sca-ignore` at the end of a line drops the findings on it,
+# `// sca-ignore-next-line` on a line of its own those on the line below;
+# `: RULE-ID, ...` limits either to those rules. "#", "/*" and "<!--"
+# comments work as well.
+SUPPRESS_MARKER = "sca-ignore"
+_SUPPRESS = re.compile(r"(?://|#|/\*|<!--)\s*sca-ignore(-next-line)?\b(?:\s*:\s*([\w.-]+(?:\s*,\s*[\w.-]+)*))?")
+
+
+def _suppresses(text, rule_id, next_line):
+    for m in _SUPPRESS.finditer(text):
+        if bool(m.group(1)) == next_line and (not m.group(2) or rule_id in re.split(r"\s*,\s*", m.group(2))):
+            return True
+    return False
+
+
+def is_suppressed(rule_id, snippet, previous=""):
+    """Whether a suppression comment on the finding's line (`snippet`) or the one before drops it."""
+    return (SUPPRESS_MARKER in snippet and _suppresses(snippet, rule_id, False)) or \
+        (SUPPRESS_MARKER in previous and _suppresses(previous, rule_id, True))
+
+
+# ========================
+# Baseline Index
+# ========================
+# A baseline is the findings of an earlier scan, stored for matching rather
+# than reading: a header with the fingerprint root it was written in, the
+# 8-byte fingerprints of all N findings as one array (loaded in a single
+# read), then the findings themselves as JSON Lines, zlib-compressed, in
+# the same order; they are only decompressed to list the fixed ones.
+#   "SCABASE2" | N (uint64 LE) | root length (uint32 LE) | root (UTF-8)
+#   | N x fingerprint (uint64 LE) | zlib(JSON Lines)
+MAGIC = b"SCABASE2"
+_HEADER = struct.Struct("<8sQI")
+_COMPRESS_EVERY = 1 << 20     # characters of JSON Lines handed to zlib at a time
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def _little_endian(digests):
+    if sys.byteorder == "big":
+        digests.byteswap()
+    return digests
+
+
+class BaselineWriter:
+    """
+    Writes the issues add()ed to it as a baseline at `out_path` on close();
+    until then they are spooled to a ".tmp" file next to it. `root` is the
+    fingerprint root recorded (default: the working directory's).
+    """
+
+    def __init__(self, out_path, root=None):
+        self.out_path = out_path
+        self.root = root or fingerprint_root()
+        self.digests = array("Q")
+        self._spool = open(out_path + ".tmp", "wb")
+        self._zlib = zlib.compressobj(1)
+        self._pending = []
+        self._pending_size = 0
+
+    def add(self, issue):
+        self.digests.append(int(issue_fingerprint(issue), 16))
+        line = _encode(issue)
+        self._pending.append(line)
+        self._pending_size += len(line)
+        if self._pending_size >= _COMPRESS_EVERY:
+            self._compress()
+
+    def _compress(self):
+        if self._pending:
+            data = "\n".join(self._pending) + "\n"
+            self._spool.write(self._zlib.compress(data.encode("utf-8", "surrogatepass")))
+            self._pending, self._pending_size = [], 0
+
+    def close(self):
+        self._compress()
+        self._spool.write(self._zlib.flush())
+        self._spool.close()
+        with open(self.out_path, "wb") as f, open(self.out_path + ".tmp", "rb") as spool:
+            root = self.root.encode("utf-8", "surrogateescape")
+            f.write(_HEADER.pack(MAGIC, len(self.digests), len(root)))
+            f.write(root)
+            f.write(_little_endian(self.digests).tobytes())
+            while True:
+                chunk = spool.read(1 << 20)
+                if not chunk:
+                    break
+                f.write(chunk)
+        os.remove(self.out_path + ".tmp")
+
+    def discard(self):
+        """Close without writing the baseline."""
+        self._spool.close()
+        os.remove(self.out_path + ".tmp")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def write_baseline(issues, out_path):
+    """Write `issues` (any iterable of issue dicts) as a baseline; returns how many."""
+    with BaselineWriter(out_path) as writer:
+        for issue in issues:
+            writer.add(issue)
+    return len(writer.digests)
+
+
+class Baseline:
+    """
+    A baseline loaded for matching. is_new() tells, one current finding at a
+    time, whether the baseline lacks it (each baseline finding matches one
+    current finding); fixed() then yields the baseline findings that went
+    unmatched. `root` is the fingerprint root it was written in.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+            if len(header) < _HEADER.size or header[:len(MAGIC)] != MAGIC:
+                raise ValueError(f"{path}: not a baseline file (write one with --write-baseline)")
+            _, count, root_size = _HEADER.unpack(header)
+            self.root = f.read(root_size).decode("utf-8", "surrogateescape")
+            digests = array("Q")
+            digests.frombytes(f.read(count * digests.itemsize))
+            if len(digests) != count:
+                raise ValueError(f"{path}: baseline file is truncated")
+            self._records_at = f.tell()
+        self.digests = _little_endian(digests)
+        # fingerprint -> unmatched rows; an int while there is one, a list for repeated fingerprints
+        rows = {}
+        for row, digest in enumerate(self.digests):
+            seen = rows.setdefault(digest, row)
+            if seen != row:
+                if isinstance(seen, int):
+                    rows[digest] = [seen, row]
+                else:
+                    seen.append(row)
+        self._rows = rows
+        self.matched = 0
+
+    def __len__(self):
+        return len(self.digests)
+
+    def is_new(self, issue):
+        """True unless an unmatched baseline finding has the issue's fingerprint (which it then matches)."""
+        digest = int(issue_fingerprint(issue), 16)
+        rows = self._rows.get(digest)
+        if rows is None:
+            return True
+        if isinstance(rows, int) or len(rows) == 1:
+            del self._rows[digest]
+        else:
+            rows.pop()
+        self.matched += 1
+        return False
+
+    def new(self, issues):
+        """The issues the baseline lacks, as a generator."""
+        return (issue for issue in issues if self.is_new(issue))
+
+    def fixed(self):
+        """The baseline findings no current finding matched, in baseline order."""
+        unmatched = set()
+        for rows in self._rows.values():
+            if isinstance(rows, int):
+                unmatched.add(rows)
+            else:
+                unmatched.update(rows)
+        if not unmatched:
+            return
+        decompress = zlib.decompressobj()
+        row, rest = 0, b""
+        with open(self.path, "rb") as f:
+            f.seek(self._records_at)
+            while True:
+                chunk = f.read(1 << 20)
+                data = rest + (decompress.decompress(chunk) if chunk else decompress.flush())
+                lines = data.split(b"\n")
+                rest = lines.pop()
+                for line in lines:
+                    if row in unmatched:
+                        yield json.loads(line)
+                    row += 1
+                if not chunk:
+                    break
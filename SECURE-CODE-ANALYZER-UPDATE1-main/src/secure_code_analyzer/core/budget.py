@@ -0,0 +1,64 @@
+# ========================
+# Budget Settings
+# ========================
+DEFAULT_FILE_SECONDS = 300    # wall clock for all detector stages of one file
+DEFAULT_STAGE_SECONDS = 60    # wall clock for one stage (regex, ast)
+DEFAULT_MEMORY_MB = 2048      # per detector process (regex worker, Node heap)
+
+
+class Budget:
+    """
+    Limits for scanning one file: `file_seconds` across its detector stages,
+    `stage_seconds` per stage and `memory_mb` for each process running a
+    stage. 0 or None turns a limit off. With any limit set, the regex stage
+    runs in a worker process that can be killed (see regex_worker.py).
+    """
+
+    def __init__(self, file_seconds=DEFAULT_FILE_SECONDS, stage_seconds=DEFAULT_STAGE_SECONDS,
+                 memory_mb=DEFAULT_MEMORY_MB):
+        self.file_seconds = file_seconds or None
+        self.stage_seconds = stage_seconds or None
+        self.memory_mb = memory_mb or None
+
+    @property
+    def enabled(self):
+        return bool(self.file_seconds or self.stage_seconds or self.memory_mb)
+
+    def timeout(self, elapsed):
+        """Seconds the next stage may take after `elapsed` seconds on the file (None = no limit)."""
+        limits = [self.stage_seconds] if self.stage_seconds else []
+        if self.file_seconds:
+            limits.append(max(0.0, self.file_seconds - elapsed))
+        return min(limits) if limits else None
+
+    def __repr__(self):
+        return (f"Budget(file_seconds={self.file_seconds}, stage_seconds={self.stage_seconds}, "
+                f"memory_mb={self.memory_mb})")
+
+
+class BudgetExceeded(Exception):
+    """A detector stage ran out of time or memory; `stage` names it."""
+
+    def __init__(self, stage, reason):
+        super().__init__(f"{stage} stage {reason}")
+        self.stage = stage
+        self.reason = reason
+
+
+def budget_issue(file_path, stage, reason):
+    """The BUDGET_EXCEEDED finding for a file whose `stage` was cut short."""
+    return {
+        "id": "BUDGET_EXCEEDED",
+        "file": file_path,
+        "line": 0,
+        "severity": "LOW",
+        "category": "Resource",
+        "message": f"Scan budget exceeded in the {stage} stage ({reason}); findings for this file may be incomplete.",
+        "suggestion": "Exclude the file if it is generated or minified, or raise --file-budget / "
+                      "--stage-budget / --memory-budget.",
+        "detected_by": "System",
+        "owasp": "",
+        "cwe": "",
+        "snippet": "",
+        "stage": stage,
+    }
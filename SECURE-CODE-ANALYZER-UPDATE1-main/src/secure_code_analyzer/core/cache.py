@@ -0,0 +1,223 @@
+import functools
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+
+from .. import __version__
+
+# ========================
+# Cache Settings
+# ========================
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "secure-code-analyzer")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+CACHE_FILE = "results.sqlite3"
+EVICT_EVERY = 256             # writes between size checks
+EVICT_TO = 0.9                # evict down to this fraction of max_bytes
+RESULTS_FORMAT = 3            # bump when cached results change shape, or the Python stages change them
+# The Node scripts of the AST stages; editing one changes results as much as a rule change does.
+RUNNER_SCRIPTS = ("js_ast_runner.js", "php_ast_runner.js", "taint_engine.js")
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    key       TEXT PRIMARY KEY,
+    issues    BLOB NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used);
+CREATE TABLE IF NOT EXISTS summaries (
+    key       TEXT PRIMARY KEY,
+    summary   BLOB NOT NULL,
+    size      INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+"""
+_TABLES = (("results", "issues"), ("summaries", "summary"))
+
+
+@functools.lru_cache(maxsize=None)
+def runners_digest(root=PROJECT_ROOT):
+    """Hash of the RUNNER_SCRIPTS in `root`, read once per process."""
+    h = hashlib.sha256()
+    for name in RUNNER_SCRIPTS:
+        try:
+            with open(os.path.join(root, name), "rb") as f:
+                h.update(f.read())
+        except OSError:
+            h.update(b"-")  # its stage then fails, and failed stages are not cached
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def cache_key(content, rules_digest, version=__version__, runners=None):
+    """
+    Key for one file's results: its bytes, the rule pack, the analyzer
+    version, the results format and the AST runners (`runners`, default
+    runners_digest()).
+    """
+    h = hashlib.sha256()
+    h.update(f"{version}/{RESULTS_FORMAT}/{runners or runners_digest()}".encode("utf-8") + b"\0")
+    h.update((rules_digest or "").encode("utf-8") + b"\0")
+    h.update(content)
+    return h.hexdigest()
+
+
+# ========================
+# Result Cache
+# ========================
+class ResultCache:
+    """
+    On-disk store of per-file issue lists, and of the per-file taint
+    summaries of the cross-file pass, in a single SQLite file, evicted
+    least-recently-used first once it grows past `max_bytes`. A broken or
+    locked database never fails a scan: lookups miss and writes are dropped.
+
+    The cache can be handed to worker processes; each process opens its own
+    connection on first use. `hits` and `misses` count this process' lookups.
+    """
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.path = os.path.join(cache_dir, CACHE_FILE)
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.update(_conn=None, _pid=None, _lock=None, hits=0, misses=0, _writes=0)
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _db(self):
+        # A forked child must not reuse the parent's connection.
+        if self._conn is None or self._pid != os.getpid():
+            os.makedirs(self.cache_dir, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn, self._pid = conn, os.getpid()
+        return self._conn
+
+    def get(self, key):
+        """Return the cached issue list for `key`, or None on a miss."""
+        with self._lock:
+            issues = self._load("results", "issues", key)
+            if issues is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return issues
+
+    def put(self, key, issues):
+        """Store the issue list for `key`."""
+        self._store("results", "issues", key, issues)
+
+    def get_summary(self, key):
+        """Return the cached taint summary for `key`, or None; not counted as a hit or miss."""
+        with self._lock:
+            return self._load("summaries", "summary", key)
+
+    def put_summary(self, key, summary):
+        self._store("summaries", "summary", key, summary)
+
+    def _load(self, table, column, key):
+        try:
+            db = self._db()
+            row = db.execute(f"SELECT {column} FROM {table} WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            db.execute(f"UPDATE {table} SET last_used = ? WHERE key = ?", (time.time(), key))
+            return json.loads(zlib.decompress(row[0]).decode("utf-8"))
+        except (sqlite3.Error, OSError, ValueError, zlib.error):
+            return None
+
+    def _store(self, table, column, key, value):
+        blob = zlib.compress(json.dumps(value).encode("utf-8"))
+        with self._lock:
+            try:
+                self._db().execute(
+                    f"INSERT OR REPLACE INTO {table} (key, {column}, size, last_used) VALUES (?, ?, ?, ?)",
+                    (key, blob, len(blob), time.time()),
+                )
+            except (sqlite3.Error, OSError):
+                return
+            self._writes += 1
+            check = self._writes % EVICT_EVERY == 0
+        if check:
+            self.evict()
+
+    def evict(self):
+        """Drop least-recently-used entries until the cache fits; return how many went."""
+        with self._lock:
+            try:
+                db = self._db()
+                total = self._total(db)
+                if total <= self.max_bytes:
+                    return 0
+                target = int(self.max_bytes * EVICT_TO)
+                doomed = {table: [] for table, _ in _TABLES}
+                rows = db.execute(
+                    "SELECT 'results', key, size, last_used FROM results "
+                    "UNION ALL SELECT 'summaries', key, size, last_used FROM summaries ORDER BY 4"
+                )
+                for table, key, size, _ in rows:
+                    if total <= target:
+                        break
+                    doomed[table].append((key,))
+                    total -= size
+                for table, keys in doomed.items():
+                    db.executemany(f"DELETE FROM {table} WHERE key = ?", keys)
+                return sum(len(keys) for keys in doomed.values())
+            except (sqlite3.Error, OSError):
+                return 0
+
+    @staticmethod
+    def _total(db):
+        return sum(
+            db.execute(f"SELECT COALESCE(SUM(size), 0) FROM {table}").fetchone()[0]
+            for table, _ in _TABLES
+        )
+
+    def size(self):
+        """Bytes of (compressed) issue and summary data currently stored."""
+        with self._lock:
+            try:
+                return self._total(self._db())
+            except (sqlite3.Error, OSError):
+                return 0
+
+    def clear(self):
+        with self._lock:
+            try:
+                for table, _ in _TABLES:
+                    self._db().execute(f"DELETE FROM {table}")
+            except (sqlite3.Error, OSError):
+                pass
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+            self._pid = None
+
+    def __len__(self):
+        with self._lock:
+            try:
+                return self._db().execute("SELECT COUNT(*) FROM results").fetchone()[0]
+            except (sqlite3.Error, OSError):
+                return 0
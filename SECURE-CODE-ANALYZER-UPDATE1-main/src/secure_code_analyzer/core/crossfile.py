@@ -0,0 +1,259 @@
+import os
+
+from .baseline import is_suppressed
+from .cache import cache_key
+from .detectors import DEFAULT_RULESET, make_finding, run_ast_groups, runner_for
+from .findings import FindingBatch, merge_findings
+from .lexer import FunctionIndex, mask
+from .lines import LineIndex
+from .rules import language_for
+from .source import SourceFile
+
+# ========================
+# Cross-file Taint
+# ========================
+# The taint analysis of one file leaves some flows open: a sink reached by a
+# parameter, a variable the file reads before assigning it (set by whoever
+# includes it), the result of a call to a function defined in another file.
+# The runners export them as a compact per-file summary (TaintAnalysis.summary()
+# in taint_engine.js), cached by content hash next to the file's issues.
+# This pass links the summaries along PHP includes, JS require()s of relative
+# modules and calls by function name, and reports the sinks that a source in
+# another file reaches. A summary depends on its own file only, so after an
+# edit just the edited files are summarised again; linking works on the
+# summaries, no file is re-parsed.
+MAX_PASSES = 64
+
+
+def load_summary(path, ruleset=None, cache=None, data=None):
+    """
+    The file's taint summary: cached if its content was seen before, else
+    from the runner. `data` (bytes or str) is the content of an in-memory
+    source; `path` is then only its virtual name.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    lang = language_for(path)
+    rules = ruleset.get(lang, "taint-ast") if lang else []
+    if not rules:
+        return None
+    try:
+        source = SourceFile(path) if data is None else SourceFile.from_bytes(data)
+    except OSError:
+        return None
+
+    with source:
+        key = cache_key(source.data, ruleset.digest)
+        summary = cache.get_summary(key) if cache is not None else None
+        if summary is not None:
+            return summary
+        code = source.text()
+    response = run_ast_groups(runner_for(lang), code, {"taint-ast": rules}, {"summary": True})
+    if response.get("retryable"):
+        return None
+    summary = response.get("summaries", {}).get("taint-ast", {})
+    if cache is not None and not response.get("truncated"):
+        cache.put_summary(key, summary)
+    return summary
+
+
+def resolve_include(path, target, known):
+    """The file of `known` (absolute paths) that an include of `target` in `path` names, or None."""
+    if target.startswith("__DIR__"):
+        target = os.path.dirname(path) + target[len("__DIR__"):]
+    elif not os.path.isabs(target):
+        target = os.path.join(os.path.dirname(path), target)
+    target = os.path.normpath(target)
+    return target if target in known else None
+
+
+def resolve_module(path, spec, known):
+    """The file of `known` (absolute paths) that a require() of the relative module `spec` in `path` loads, or None."""
+    base = os.path.normpath(os.path.join(os.path.dirname(path), spec))
+    for candidate in (base, base + ".js", os.path.join(base, "index.js")):
+        if candidate in known:
+            return candidate
+    return None
+
+
+def linked_files(summaries, project, scanned):
+    """
+    The files of `project` (paths) outside `scanned` that a flow may pass
+    between and a file of `summaries` ({path: summary}) in one step: those
+    its includes and require()s name, and those whose text names it (by
+    file name without extension, as in `include 'db.php'` or
+    `require('./db')`), which may include or import it. In project order.
+    """
+    scanned = {os.path.abspath(path) for path in scanned}
+    rest = {os.path.abspath(path): path for path in project}
+    rest = {path: name for path, name in rest.items() if path not in scanned}
+    linked = set()
+    for path, summary in summaries.items():
+        path = os.path.abspath(path)
+        for flows in (summary or {}).get("units", {}).values():
+            for include in flows.get("includes", []):
+                linked.add(resolve_include(path, include["path"], rest))
+            for call in flows.get("calls", []):
+                if "#" in call["callee"]:
+                    linked.add(resolve_module(path, call["callee"].rsplit("#", 1)[0], rest))
+    stems = {os.path.splitext(os.path.basename(path))[0].encode("utf-8", "surrogateescape")
+             for path in summaries}
+    for path in rest:
+        if path in linked or not stems:
+            continue
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            continue
+        if any(stem in data for stem in stems):
+            linked.add(path)
+    return [name for path, name in rest.items() if path in linked]
+
+
+class Project:
+    """
+    Summaries of a set of files ({path: summary}), linked into one flow graph.
+    Values are sets of (source, path of the file the source was read in).
+    """
+
+    def __init__(self, summaries):
+        self.summaries = {os.path.abspath(p): s for p, s in summaries.items() if s}
+        self.functions = {}
+        for path, summary in self.summaries.items():
+            for name in summary.get("functions", []):
+                self.functions.setdefault(name, []).append((path, name))
+
+    def _units(self):
+        for path, summary in self.summaries.items():
+            for unit, flows in summary.get("units", {}).items():
+                yield path, unit, flows
+
+    def callees(self, path, callee):
+        """(path, unit) of the functions a call leaving `path` may reach."""
+        if "#" in callee:
+            spec, name = callee.rsplit("#", 1)
+            target = resolve_module(path, spec, self.summaries)
+            unit = target and self.summaries[target].get("exports", {}).get(name)
+            return [(target, unit)] if unit else []
+        return self.functions.get(callee, [])
+
+    def _edges(self):
+        """(node, path, unit, value): `value`, seen from `unit` of `path`, flows into `node`."""
+        edges = []
+        for path, unit, flows in self._units():
+            for call in flows.get("calls", []):
+                for target, callee in self.callees(path, call["callee"]):
+                    for i, arg in enumerate(call["args"]):
+                        edges.append(((target, callee, f"param:{i}"), path, unit, arg))
+                    ret = self.summaries[target].get("units", {}).get(callee, {}).get("ret")
+                    if ret:
+                        edges.append(((path, "call:" + call["key"]), target, callee, ret))
+            for include in flows.get("includes", []):
+                target = resolve_include(path, include["path"], self.summaries)
+                if target:
+                    for name, value in include["scope"].items():
+                        edges.append(((target, "global:" + name), path, unit, value))
+        return edges
+
+    @staticmethod
+    def _value(nodes, path, unit, value):
+        out = {(src, path) for src in value.get("sources", ())}
+        for key in value.get("inputs", ()):
+            if key == "*":
+                # Past the runner's input limit: any input of this file.
+                for node, values in nodes.items():
+                    if node[0] == path:
+                        out |= values
+            else:
+                out |= nodes.get((path, unit, key) if key.startswith("param:") else (path, key), frozenset())
+        return out
+
+    def flows(self):
+        """Yield (path, line, rule index, values) for each sink an input of its file reaches."""
+        nodes = {}
+        edges = self._edges()
+        for _ in range(MAX_PASSES):
+            changed = False
+            for node, path, unit, value in edges:
+                values = self._value(nodes, path, unit, value)
+                if not values <= nodes.get(node, set()):
+                    nodes[node] = nodes.get(node, set()) | values
+                    changed = True
+            if not changed:
+                break
+
+        for path, unit, flows in self._units():
+            for sink in flows.get("sinks", []):
+                # Sources of this file reaching the sink were reported by the file's own scan.
+                values = self._value(nodes, path, unit, {"inputs": sink["value"].get("inputs", ())})
+                for index in sink["rules"]:
+                    yield path, sink["line"], index, values
+
+
+def sink_lines(summary):
+    """The lines of the sinks in a taint summary, where cross-file findings can be reported."""
+    return sorted({sink["line"] for flows in (summary or {}).get("units", {}).values()
+                   for sink in flows.get("sinks", [])})
+
+
+def sink_context(path, summary, data=None):
+    """
+    {line: (snippet, enclosing function, snippet of the line before)} of the
+    sink lines of the file at `path` (or with content `data`): what a
+    cross-file finding there is reported, fingerprinted and suppressed by.
+    """
+    lines = sink_lines(summary)
+    if not lines:
+        return {}
+    with SourceFile(path) if data is None else SourceFile.from_bytes(data) as source:
+        text = source.text()
+    index = LineIndex(text)
+    lang = language_for(path)
+    functions = FunctionIndex(mask(text, lang), lang, index)
+    return {line: (index.snippet(line), functions.function_at(line), index.snippet(line - 1)) for line in lines}
+
+
+def flow_issues(summaries, ruleset=None, only=None, sinks=None, sources=None):
+    """
+    Issues for taint flows between the files of `summaries` ({path:
+    summary}, in scan order), as "AST(Taint)" findings at the sink. With
+    `only` (a set of paths), flows are kept only if the sink or a source is
+    in one of those files. The sink lines' sink_context() comes from
+    `sinks` ({path: {line: context}}) where given, else from `sources`
+    ({path: bytes or str}) or the file.
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    given = {os.path.abspath(path): path for path, summary in summaries.items() if summary}
+    only = None if only is None else {os.path.abspath(p) for p in only}
+    sinks = dict(sinks or {})
+    sources = sources or {}
+
+    issues = []
+    for path, line, index, values in Project(summaries).flows():
+        rule = ruleset.get(language_for(path), "taint-ast")[index]
+        origins = {origin for src, origin in values if src in rule.get("sources", ())}
+        if not origins or (only is not None and not (origins | {path}) & only):
+            continue
+        name = given[path]
+        if name not in sinks:
+            sinks[name] = sink_context(name, summaries[name], sources.get(name))
+        snippet, function, previous = sinks[name].get(line, ("", "", ""))
+        if not is_suppressed(rule["id"], snippet, previous):
+            issues.append(make_finding(rule, name, line, snippet, "AST(Taint)", function))
+    return FindingBatch(merge_findings(issues))
+
+
+def crossfile_issues(file_paths, ruleset=None, cache=None, only=None, sources=None):
+    """
+    flow_issues() of the summaries of `file_paths`, loaded by load_summary().
+    Paths found in `sources` ({virtual path: bytes or str}) are read from
+    there instead of the disk.
+    """
+    sources = sources or {}
+    ruleset = ruleset or DEFAULT_RULESET
+    summaries = {}
+    for path in file_paths:
+        summary = load_summary(path, ruleset, cache, sources.get(path))
+        if summary:
+            summaries[path] = summary
+    return flow_issues(summaries, ruleset, only, sources=sources)
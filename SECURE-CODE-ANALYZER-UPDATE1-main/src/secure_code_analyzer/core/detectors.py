@@ -1,19 +1,26 @@
-import re
 import json
 import os
 import subprocess
+import time
+
+from .ast_pool import get_pool
+from .baseline import SUPPRESS_MARKER, is_suppressed
+from .budget import BudgetExceeded, budget_issue
+from .findings import (  # noqa: F401  (normalize_* and dedupe_issues are re-exported)
+    Finding, FindingBatch, dedupe_issues, merge_findings, normalize_category, normalize_cwe, normalize_owasp,
+    rule_info,
+)
+from .lexer import FunctionIndex, mask
+from .lines import LineIndex
+from .rules import RULES_PATH, RuleSet, language_for
+from .regex_worker import regex_stage
+from .source import SourceFile
 
 # ========================
 # Load rules from rules.json
 # ========================
-RULES_PATH = os.path.join(
-    os.path.dirname(os.path.dirname(__file__)),
-    "rules",
-    "rules.json"
-)
-
-with open(RULES_PATH, "r", encoding="utf-8") as f:
-    RULES = json.load(f)
+DEFAULT_RULESET = RuleSet(RULES_PATH)
+RULES = DEFAULT_RULESET.rules  # raw rule list, kept for callers that read it directly
 
 # ========================
 # AST Runner Paths
@@ -45,178 +52,260 @@ def run_node_ast_runner(runner, code, ast_rules):
     except Exception as e:
         return {"error": str(e)}
 
+def run_ast_groups(runner, code, groups, options=None, timeout=None, memory_mb=None):
+    """
+    Evaluate several AST rule groups ({"ast": [...], "taint-ast": [...]}) in a
+    single round trip to a pooled Node worker; the source is parsed once.
+    """
+    return get_pool(runner, memory_mb).run(code, groups, options, timeout)
+
+
+def run_ast_batch(runner, requests, memory_mb=None):
+    """
+    run_ast_groups() for several files, [(code, groups, options, timeout)],
+    pipelined through one worker; returns [(response, seconds)] in order.
+    """
+    return get_pool(runner, memory_mb).run_many(requests)
+
+
+def runner_for(lang):
+    return JS_AST_RUNNER if lang == "javascript" else PHP_AST_RUNNER
+
 # ========================
-# Normalization Helpers
+# Findings
 # ========================
-def normalize_owasp(tag_str):
-    tags = [t.strip() for t in tag_str.split(",") if t.strip()]
-    norm_tags = set()
-    for t in tags:
-        t = t.replace(" ", "").replace("–", "-").replace("—", "-")
-        if ":" in t:
-            m = re.match(r"A(\d+):?(\d{4})?-?(.*)", t, flags=re.I)
-            if m:
-                num, year, rest = m.groups()
-                num = num.zfill(2)
-                year = year if year else "2021"
-                rest = rest if rest else ""
-                rest = rest.lstrip("-")
-                norm = f"A{num}:{year}"
-                if rest:
-                    norm += f"-{rest}"
-                norm_tags.add(norm)
-            else:
-                norm_tags.add(t)
-        else:
-            norm_tags.add(t)
-    return norm_tags
-
-def normalize_cwe(tag_str):
-    tags = [t.strip().upper() for t in tag_str.split(",") if t.strip()]
-    norm_tags = set()
-    for t in tags:
-        if t.startswith("CWE"):
-            m = re.match(r"CWE-?(\d+)", t)
-            if m:
-                norm_tags.add(f"CWE-{int(m.group(1))}")
-            else:
-                norm_tags.add(t)
-        else:
-            norm_tags.add(t)
-    return norm_tags
+def make_finding(rule, file_path, line_no, snippet, detected_by, function=""):
+    return Finding(rule_info(rule), file_path, line_no, snippet, detected_by, function=function)
+
+
+def make_issue(rule, file_path, line_no, snippet, detected_by):
+    return make_finding(rule, file_path, line_no, snippet, detected_by).as_dict()
 
-def normalize_category(cat):
-    return cat.strip().title() if cat else cat
+
+def place_findings(findings, text, lang, lines):
+    """
+    Drop the findings a suppression comment covers (see baseline.py) and
+    set the enclosing function of the rest; `lines` is the LineIndex of
+    `text` (str, bytes or mmap).
+    """
+    marker = SUPPRESS_MARKER if isinstance(text, str) else SUPPRESS_MARKER.encode("ascii")
+    if text.find(marker) != -1:
+        findings = [f for f in findings if not is_suppressed(f.rule.id, f.snippet, lines.snippet(f.line - 1))]
+    if findings:
+        functions = FunctionIndex(mask(text, lang), lang, lines)
+        for finding in findings:
+            finding.function = functions.function_at(finding.line)
+    return findings
 
 # ========================
 # Rule-based detector
 # ========================
-def run_detectors(code, file_path):
+def run_detectors(code, file_path, ruleset=None, errors=None, summary=None, budget=None, timings=None,
+                  profile=None):
+    """
+    Run every detector for the file's language over `code`, a str or an open
+    SourceFile (regex rules then scan its bytes; the text is decoded only
+    for the AST runners and the reported lines). Stage failures
+    that drop findings (an AST worker error, a rule group that threw) are
+    appended to `errors`, if given, as {"stage", "error", "retryable"} dicts.
+    A `summary` dict is filled with the file's open taint flows for the
+    cross-file pass (see crossfile.py). Rules whose literals the file lacks
+    are skipped (see prefilter.py), and a stage with none left with them;
+    without AST rules to run there is no AST round trip. The taint rules
+    always run when a `summary` is asked for: files without sources or
+    sinks still pass values between other files.
+    With a Budget, a stage that runs out of time or memory is cut short: the
+    findings of the other stages are kept and a BUDGET_EXCEEDED issue is
+    added. A `timings` dict receives the seconds spent per stage.
+    A `profile` dict turns on per-rule profiling and receives the bytes
+    scanned, {"stages": {stage: seconds}} for the finer stages (regex,
+    heuristic, parse, ast, context-ast, taint-ast, ast-overhead) and {"rules": {id:
+    [stage, seconds, matches]}}; regex rules then run one at a time.
+    Returns a FindingBatch, which reads as a list of issue dicts.
+    """
+    steps = detector_steps(code, file_path, ruleset, errors, summary, budget, timings, profile)
+    try:
+        runner, code, groups, options, timeout, memory_mb = next(steps)
+    except StopIteration as done:
+        return done.value
+    started = time.perf_counter()
+    response = run_ast_groups(runner, code, groups, options, timeout, memory_mb)
+    return resume_detectors(steps, response, time.perf_counter() - started)
+
+
+def detector_steps(code, file_path, ruleset=None, errors=None, summary=None, budget=None, timings=None,
+                   profile=None):
+    """
+    run_detectors() as a generator, for callers that batch the AST round
+    trips of many files: it yields the file's one AST request, (runner,
+    code, groups, options, timeout, memory_mb), if it has one, expects
+    (response, seconds) back through resume_detectors() and returns the
+    FindingBatch.
+    """
     issues = []
+    ruleset = ruleset or DEFAULT_RULESET
+    started = time.perf_counter()
+    budget = budget if budget is not None and budget.enabled else None
+    over_budget = []
+    timings = {} if timings is None else timings
 
-    lang = "javascript" if file_path.endswith(".js") else "php" if file_path.endswith(".php") else None
+    def cut_short(stage, reason):
+        over_budget.append(budget_issue(file_path, stage, reason))
+        if errors is not None:
+            errors.append({"stage": stage, "error": f"budget exceeded: {reason}", "retryable": True})
+
+    lang = language_for(file_path)
     if not lang:
-        return issues
-
-    regex_rules       = [r for r in RULES if r["language"] == lang and r["type"] == "regex"]
-    heuristic_rules   = [r for r in RULES if r["language"] == lang and r["type"] == "heuristic"]
-    ast_rules         = [r for r in RULES if r["language"] == lang and r["type"] == "ast"]
-    context_ast_rules = [r for r in RULES if r["language"] == lang and r["type"] == "context-ast"]
-    taint_ast_rules   = [r for r in RULES if r["language"] == lang and r["type"] == "taint-ast"]
-
-    def make_issue(rule, line_no, snippet, detected_by):
-        return {
-            "id": rule["id"],
-            "file": file_path,
-            "line": line_no,
-            "severity": rule["severity"].upper(),
-            "category": normalize_category(rule["category"]),
-            "message": rule["message"],
-            "suggestion": rule["suggestion"],
-            "owasp": ",".join(sorted(normalize_owasp(rule.get("owasp", "")))),
-            "cwe": ",".join(sorted(normalize_cwe(rule.get("cwe", "")))),
-            "snippet": snippet,
-            "detected_by": detected_by
-        }
-
-    # --- Regex ---
-    for rule in regex_rules:
-        for match in re.finditer(rule["pattern"], code, flags=re.IGNORECASE):
-            line_no = code[:match.start()].count("\n") + 1
-            issues.append(make_issue(rule, line_no, code.splitlines()[line_no - 1].strip(), "Regex"))
-
-    # --- Heuristic ---
-    for rule in heuristic_rules:
-        for match in re.finditer(rule["pattern"], code, flags=re.IGNORECASE):
-            line_no = code[:match.start()].count("\n") + 1
-            issues.append(make_issue(rule, line_no, code.splitlines()[line_no - 1].strip(), "Heuristic"))
-
-    # --- AST ---
-    if ast_rules:
-        runner = JS_AST_RUNNER if lang == "javascript" else PHP_AST_RUNNER
-        result = run_node_ast_runner(runner, code, ast_rules)
-        if "error" not in result:
-            for rule in ast_rules:
-                for line_no in result.get(rule["id"], []):
-                    issues.append(make_issue(rule, line_no, code.splitlines()[line_no - 1].strip(), "AST"))
-
-    # --- Context-AST ---
-    if context_ast_rules:
-        runner = JS_AST_RUNNER if lang == "javascript" else PHP_AST_RUNNER
-        result = run_node_ast_runner(runner, code, context_ast_rules)
-        if "error" not in result:
-            for rule in context_ast_rules:
-                for line_no in result.get(rule["id"], []):
-                    issues.append(make_issue(rule, line_no, code.splitlines()[line_no - 1].strip(), "Context-AST"))
-
-    # --- Taint-AST ---
-    if taint_ast_rules:
-        runner = JS_AST_RUNNER if lang == "javascript" else PHP_AST_RUNNER
-        result = run_node_ast_runner(runner, code, taint_ast_rules)
-        if "error" not in result:
-            for rule in taint_ast_rules:
-                for line_no in result.get(rule["id"], []):
-                    issues.append(make_issue(rule, line_no, code.splitlines()[line_no - 1].strip(), "AST(Taint)"))
-
-    # --- Deduplication & Priority ---
-    deduped = {}
-    sev_order = {"CRITICAL": 4, "HIGH": 3, "MEDIUM": 2, "LOW": 1}
-
-    for issue in issues:
-        key = (issue["file"], issue["line"], issue["snippet"])
-        existing = deduped.get(key)
-
-        if not existing:
-            deduped[key] = issue
+        return FindingBatch()
+
+    ast_rules         = ruleset.get(lang, "ast")
+    context_ast_rules = ruleset.get(lang, "context-ast")
+    taint_ast_rules   = ruleset.get(lang, "taint-ast")
+
+    if isinstance(code, SourceFile):
+        source = code
+        text = source.view() if ruleset.scans_bytes(lang) else source.text()
+        lines = LineIndex(text, source.decode)
+    else:
+        source, text = None, code
+        lines = LineIndex(code)
+    candidates = ruleset.candidates(lang, text)
+    pattern_rules = ruleset.pattern_rules(lang)
+
+    if profile is not None:
+        profile["bytes"] = len(source.data) if source is not None else len(code.encode("utf-8"))
+        stage_stats = profile.setdefault("stages", {})
+        rule_stats = profile.setdefault("rules", {})
+
+        def note(rule, stage, seconds, matches):
+            stats = rule_stats.setdefault(rule["id"], [stage, 0.0, 0])
+            stats[1] += seconds
+            stats[2] += matches
+
+    # --- Regex / Heuristic ---
+    all_starts, seconds = [], [] if profile is not None else None
+    try:
+        if not any(rule in candidates for rule, _ in pattern_rules):
+            pass    # none of their literals is in the file
+        elif budget is None:
+            all_starts = ruleset.pattern_starts(lang, text, seconds, candidates)
+        else:
+            # In a child process that can be killed; it reads the file itself.
+            # In-memory sources have no path: their bytes are sent instead.
+            path = source.path if source is not None else None
+            own = text if path is None else None
+            all_starts, seconds = regex_stage(ruleset, lang, path, own, budget.timeout(0), budget.memory_mb,
+                                              profile is not None)
+    except BudgetExceeded as e:
+        cut_short(e.stage, e.reason)
+    except RuntimeError as e:
+        if errors is not None:
+            errors.append({"stage": "regex", "error": str(e), "retryable": True})
+    for (rule, rule_type), starts in zip(pattern_rules, all_starts):
+        detected_by = "Regex" if rule_type == "regex" else "Heuristic"
+        for start in starts:
+            line_no = lines.line_of(start)
+            issues.append(make_finding(rule, file_path, line_no, lines.snippet(line_no), detected_by))
+    timings["regex"] = time.perf_counter() - started
+    if profile is not None:
+        for (rule, rule_type), starts, spent in zip(pattern_rules, all_starts, seconds or ()):
+            note(rule, rule_type, spent, len(starts))
+            stage_stats[rule_type] = stage_stats.get(rule_type, 0.0) + spent
+
+    # --- AST / Context-AST / Taint-AST (one worker round trip) ---
+    ast_groups = [
+        ("ast", candidates.select(ast_rules), "AST"),
+        ("context-ast", candidates.select(context_ast_rules), "Context-AST"),
+        # All taint rules or none: the summary refers to them by index.
+        ("taint-ast", taint_ast_rules if summary is not None or any(rule in candidates for rule in taint_ast_rules)
+         else [], "AST(Taint)"),
+    ]
+    ast_groups = [g for g in ast_groups if g[1]]
+    timeout = budget.timeout(time.perf_counter() - started) if budget else None
+    if ast_groups and timeout is not None and timeout <= 0:
+        cut_short("ast", f"file budget of {budget.file_seconds:g}s used up")
+    elif ast_groups:
+        options = {}
+        if summary is not None:
+            options["summary"] = True
+        if profile is not None:
+            options["profile"] = True
+        if source is not None:
+            code = source.text()
+        response, timings["ast"] = yield (runner_for(lang), code, {name: rules for name, rules, _ in ast_groups},
+                                          options or None, timeout, budget.memory_mb if budget else None)
+        if profile is not None and "profile" in response:
+            # Runner times are in ms; the rest of the round trip is worker start-up, JSON and pipes.
+            spent = response["profile"]
+            runner_ms = spent["parse"] + sum(spent["groups"].values())
+            stage_stats["parse"] = stage_stats.get("parse", 0.0) + spent["parse"] / 1000
+            stage_stats["ast-overhead"] = stage_stats.get("ast-overhead", 0.0) + max(0.0, timings["ast"] - runner_ms / 1000)
+            for name, rules, _ in ast_groups:
+                stage_stats[name] = stage_stats.get(name, 0.0) + spent["groups"].get(name, 0.0) / 1000
+                result = response.get("results", {}).get(name, {})
+                for rule in rules:
+                    note(rule, name, spent["rules"].get(rule["id"], 0.0) / 1000, len(result.get(rule["id"], ())))
+        if response.get("budget"):
+            cut_short("ast", response["error"])
+        elif "error" in response:
+            if errors is not None:
+                errors.append({"stage": "ast", "error": response["error"],
+                               "retryable": bool(response.get("retryable"))})
         else:
-            if sev_order[issue["severity"]] > sev_order[existing["severity"]]:
-                merged = issue
-            else:
-                merged = existing
-
-            # Merge OWASP & CWE
-            merged["owasp"] = ",".join(sorted(normalize_owasp(existing.get("owasp", "")) |
-                                              normalize_owasp(issue.get("owasp", ""))))
-            merged["cwe"]   = ",".join(sorted(normalize_cwe(existing.get("cwe", "")) |
-                                              normalize_cwe(issue.get("cwe", ""))))
-
-            # Priority for detector type
-            detected_set = set(existing["detected_by"].split("+")) | set(issue["detected_by"].split("+"))
-            if "Context-AST" in detected_set:
-                merged["detected_by"] = "Context-AST"
-            elif "AST" in detected_set:
-                merged["detected_by"] = "AST"
-            elif "Heuristic" in detected_set:
-                merged["detected_by"] = "Heuristic"
-            else:
-                merged["detected_by"] = "Regex"
-
-            if "AST(Taint)" in detected_set and "AST(Taint)" not in merged["detected_by"]:
-                merged["detected_by"] += "+AST(Taint)"
-
-            deduped[key] = merged
-
-    return list(deduped.values())
+            # Functions whose taint analysis hit the per-function time cap:
+            # the findings are partial and depend on load, so don't cache them.
+            for name, cut in response.get("truncated", {}).items():
+                if errors is not None:
+                    errors.append({"stage": name, "retryable": True,
+                                   "error": f"taint analysis time cap hit in {len(cut)} function(s)"})
+            if summary is not None:
+                summary.update(response.get("summaries", {}).get("taint-ast", {}))
+            for name, rules, detected_by in ast_groups:
+                result = response["results"].get(name, {})
+                if "error" in result:
+                    if errors is not None:
+                        errors.append({"stage": name, "error": result["error"], "retryable": False})
+                    continue
+                for rule in rules:
+                    for line_no in result.get(rule["id"], []):
+                        issues.append(make_finding(rule, file_path, line_no, lines.snippet(line_no), detected_by))
+
+    found = place_findings(merge_findings(issues), text, lang, lines)
+    return FindingBatch(found + [Finding.from_dict(i) for i in over_budget])
+
+
+def resume_detectors(steps, response, seconds):
+    """Answer the AST request of detector_steps() `steps`; returns its FindingBatch."""
+    try:
+        steps.send((response, seconds))
+    except StopIteration as done:
+        return done.value
+    raise RuntimeError("detectors asked for a second AST round trip")
+
 
 # ========================
 # Main
 # ========================
-def detect_issues(file_path):
+def file_error_issue(file_path, error):
+    return {
+        "id": "FILE-ERROR",
+        "file": file_path,
+        "line": 0,
+        "severity": "LOW",
+        "category": "I/O",
+        "message": f"Error reading file: {error}",
+        "suggestion": "Check file path and permissions.",
+        "detected_by": "System",
+        "owasp": "",
+        "cwe": "",
+        "snippet": ""
+    }
+
+
+def detect_issues(file_path, ruleset=None, errors=None, summary=None, budget=None, timings=None, profile=None):
     try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            code = f.read()
+        source = SourceFile(file_path)
     except Exception as e:
-        return [{
-            "id": "FILE-ERROR",
-            "file": file_path,
-            "line": 0,
-            "severity": "LOW",
-            "category": "I/O",
-            "message": f"Error reading file: {e}",
-            "suggestion": "Check file path and permissions.",
-            "detected_by": "System",
-            "owasp": "",
-            "cwe": "",
-            "snippet": ""
-        }]
-    return run_detectors(code, file_path)
+        return FindingBatch.of([file_error_issue(file_path, e)])
+    with source:
+        return run_detectors(source, file_path, ruleset, errors, summary, budget, timings, profile)
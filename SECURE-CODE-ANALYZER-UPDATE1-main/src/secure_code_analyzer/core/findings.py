@@ -0,0 +1,428 @@
+import re
+import sys
+import threading
+from array import array
+
+from .baseline import fingerprint
+from .severity import SEVERITY_LEVELS
+
+# ========================
+# Tag Interning
+# ========================
+# OWASP/CWE mappings arrive as comma-joined strings ("A03:2021 – Injection,
+# A03:2021-Injection"). Each distinct string is normalised once; every
+# normalised tag gets a bit, so a finding's tags are an int and merging two
+# findings is an OR. Canonical strings are cached per bitset, so findings
+# with the same tags share one string object.
+OWASP_TAG = re.compile(r"A(\d+):?(\d{4})?-?(.*)", flags=re.I)
+CWE_TAG = re.compile(r"CWE-?(\d+)")
+
+
+def _owasp_tag(tag):
+    tag = tag.replace(" ", "").replace("–", "-").replace("—", "-")
+    m = OWASP_TAG.match(tag) if ":" in tag else None
+    if not m:
+        return tag
+    num, year, rest = m.groups()
+    norm = f"A{num.zfill(2)}:{year or '2021'}"
+    rest = (rest or "").lstrip("-")
+    return f"{norm}-{rest}" if rest else norm
+
+
+def _cwe_tag(tag):
+    tag = tag.upper()
+    m = CWE_TAG.match(tag) if tag.startswith("CWE") else None
+    return f"CWE-{int(m.group(1))}" if m else tag
+
+
+class TagTable:
+    """Interned tags of one kind; a set of tags is an int with one bit per tag."""
+
+    def __init__(self, normalize_tag):
+        self._normalize_tag = normalize_tag
+        self.tags = []            # bit -> tag
+        self._ids = {}            # tag -> bit
+        self._bits = {}           # raw comma-joined string -> bitset
+        self._strings = {0: ""}   # bitset -> canonical comma-joined string
+        self._lock = threading.Lock()
+
+    def bits(self, value):
+        """Bitset of the tags in a comma-joined string."""
+        cached = self._bits.get(value)
+        if cached is not None:
+            return cached
+        with self._lock:
+            bits = 0
+            for raw in (value or "").split(","):
+                raw = raw.strip()
+                if not raw:
+                    continue
+                tag = self._normalize_tag(raw)
+                bit = self._ids.get(tag)
+                if bit is None:
+                    bit = self._ids[tag] = len(self.tags)
+                    self.tags.append(sys.intern(tag))
+                bits |= 1 << bit
+            self._bits[value] = bits
+        return bits
+
+    def tag_list(self, bits):
+        """The tags of a bitset, in bit order."""
+        tags = []
+        bit = 0
+        while bits:
+            if bits & 1:
+                tags.append(self.tags[bit])
+            bits >>= 1
+            bit += 1
+        return tags
+
+    def string(self, bits):
+        """Canonical comma-joined string (sorted tags) for a bitset."""
+        cached = self._strings.get(bits)
+        if cached is None:
+            cached = self._strings[bits] = ",".join(sorted(self.tag_list(bits)))
+        return cached
+
+    def normalize(self, value):
+        return self.string(self.bits(value))
+
+
+OWASP = TagTable(_owasp_tag)
+CWE = TagTable(_cwe_tag)
+
+
+def normalize_owasp(tag_str):
+    return set(OWASP.tag_list(OWASP.bits(tag_str)))
+
+
+def normalize_cwe(tag_str):
+    return set(CWE.tag_list(CWE.bits(tag_str)))
+
+
+def normalize_category(cat):
+    return cat.strip().title() if cat else cat
+
+
+# ========================
+# Detectors & Severity
+# ========================
+REGEX, HEURISTIC, AST, CONTEXT_AST, TAINT = (1 << i for i in range(5))
+DETECTOR_BITS = {"Regex": REGEX, "Heuristic": HEURISTIC, "AST": AST, "Context-AST": CONTEXT_AST,
+                 "AST(Taint)": TAINT}
+_DETECTED_BY = {}    # detected_by string -> bitset
+
+# Upper-case severity -> rank; anything unknown ranks as INFO.
+SEVERITY_RANK = {name.upper(): level["rank"] for name, level in SEVERITY_LEVELS.items()}
+
+
+def detector_bits(detected_by):
+    bits = _DETECTED_BY.get(detected_by)
+    if bits is None:
+        bits = 0
+        for name in detected_by.split("+"):
+            bits |= DETECTOR_BITS.get(name, 0)
+        _DETECTED_BY[detected_by] = bits
+    return bits
+
+
+def detected_by_string(bits):
+    """The strongest detector that matched, plus '+AST(Taint)' if taint analysis did too."""
+    if bits & CONTEXT_AST:
+        name = "Context-AST"
+    elif bits & AST:
+        name = "AST"
+    elif bits & HEURISTIC:
+        name = "Heuristic"
+    else:
+        name = "Regex"
+    return name + "+AST(Taint)" if bits & TAINT else name
+
+
+# ========================
+# Findings
+# ========================
+ISSUE_KEYS = ("id", "file", "line", "severity", "category", "message", "suggestion", "owasp", "cwe",
+              "snippet", "detected_by", "function", "fingerprint")
+
+
+class RuleInfo:
+    """
+    What every finding of one rule shares. Instances are interned: a rule
+    table holds one per distinct rule, and findings point at it.
+    """
+
+    __slots__ = ("id", "severity", "category", "message", "suggestion", "owasp", "cwe", "rank")
+
+    def __init__(self, id, severity, category, message, suggestion, owasp, cwe):
+        self.id = id
+        self.severity = severity
+        self.category = category
+        self.message = message
+        self.suggestion = suggestion
+        self.owasp = owasp
+        self.cwe = cwe
+        self.rank = SEVERITY_RANK.get((severity or "").upper(), 0)
+
+    def fields(self):
+        return (self.id, self.severity, self.category, self.message, self.suggestion, self.owasp, self.cwe)
+
+    def __reduce__(self):
+        # Unpickled in another process, a RuleInfo joins that process's table.
+        return (rule_info_of, self.fields())
+
+
+_INFOS = {}     # fields -> RuleInfo
+_RULES = {}     # id(rule dict) -> (rule, RuleInfo); holding the rule keeps its id from being reused
+
+
+def rule_info_of(*fields):
+    info = _INFOS.get(fields)
+    if info is None:
+        info = _INFOS.setdefault(fields, RuleInfo(*fields))
+    return info
+
+
+def rule_info(rule):
+    """The interned RuleInfo of a rule from rules.json, normalised on first use (RuleSet does it on load)."""
+    entry = _RULES.get(id(rule))
+    if entry is not None:
+        return entry[1]
+    info = rule_info_of(rule["id"], rule["severity"].upper(), normalize_category(rule["category"]),
+                        rule["message"], rule["suggestion"], OWASP.normalize(rule.get("owasp", "")),
+                        CWE.normalize(rule.get("cwe", "")))
+    _RULES[id(rule)] = (rule, info)
+    return info
+
+
+class Finding:
+    """
+    One issue: its rule's shared RuleInfo plus where it was found, down to
+    the enclosing `function` ("" outside one). `owasp` and `cwe` are None
+    unless a merge widened the rule's own; `extra` holds keys beyond
+    ISSUE_KEYS (such as the budget stage). Its issue dict carries a
+    fingerprint (see baseline.py) that stays put when the line moves.
+    """
+
+    __slots__ = ("rule", "file", "line", "snippet", "detected_by", "owasp", "cwe", "extra", "function")
+
+    def __init__(self, rule, file, line, snippet, detected_by, owasp=None, cwe=None, extra=None, function=""):
+        self.rule = rule
+        self.file = file
+        self.line = line
+        self.snippet = snippet
+        self.detected_by = detected_by
+        self.owasp = owasp
+        self.cwe = cwe
+        self.extra = extra
+        self.function = function
+
+    @classmethod
+    def from_dict(cls, issue):
+        info = rule_info_of(*(issue.get(key, "") for key in ("id", "severity", "category", "message",
+                                                              "suggestion", "owasp", "cwe")))
+        extra = {key: value for key, value in issue.items() if key not in ISSUE_KEYS} or None
+        return cls(info, issue.get("file", ""), issue.get("line", 0), issue.get("snippet", ""),
+                   issue.get("detected_by", ""), extra=extra, function=issue.get("function", ""))
+
+    def as_dict(self):
+        rule = self.rule
+        issue = {
+            "id": rule.id,
+            "file": self.file,
+            "line": self.line,
+            "severity": rule.severity,
+            "category": rule.category,
+            "message": rule.message,
+            "suggestion": rule.suggestion,
+            "owasp": rule.owasp if self.owasp is None else self.owasp,
+            "cwe": rule.cwe if self.cwe is None else self.cwe,
+            "snippet": self.snippet,
+            "detected_by": self.detected_by,
+            "function": self.function,
+            "fingerprint": fingerprint(rule.id, self.file, self.snippet, self.function),
+        }
+        if self.extra:
+            issue.update(self.extra)
+        return issue
+
+
+def as_finding(issue):
+    return issue if isinstance(issue, Finding) else Finding.from_dict(issue)
+
+
+# ========================
+# Merge
+# ========================
+def merge_findings(findings):
+    """
+    One Finding per (file, line, snippet): the most severe, with the OWASP/CWE
+    tags of all of them and the strongest detector. One pass; tags are only
+    looked up for keys that collide.
+    """
+    merged = {}    # key -> winning Finding
+    tags = {}      # key -> [owasp bits, cwe bits, detector bits], for keys that collided
+    for finding in findings:
+        key = (finding.file, finding.line, finding.snippet)
+        existing = merged.get(key)
+        if existing is None:
+            merged[key] = finding
+            continue
+        bits = tags.get(key)
+        if bits is None:
+            bits = tags[key] = [OWASP.bits(_owasp(existing)), CWE.bits(_cwe(existing)),
+                                detector_bits(existing.detected_by)]
+        bits[0] |= OWASP.bits(_owasp(finding))
+        bits[1] |= CWE.bits(_cwe(finding))
+        bits[2] |= detector_bits(finding.detected_by)
+        if finding.rule.rank > existing.rule.rank:
+            merged[key] = finding
+
+    for key, (owasp, cwe, detectors) in tags.items():
+        finding = merged[key]
+        finding.owasp = OWASP.string(owasp)
+        finding.cwe = CWE.string(cwe)
+        finding.detected_by = detected_by_string(detectors)
+    return list(merged.values())
+
+
+def _owasp(finding):
+    return finding.rule.owasp if finding.owasp is None else finding.owasp
+
+
+def _cwe(finding):
+    return finding.rule.cwe if finding.cwe is None else finding.cwe
+
+
+def dedupe_issues(issues):
+    """merge_findings() for issue dicts."""
+    return [finding.as_dict() for finding in merge_findings(Finding.from_dict(i) for i in issues)]
+
+
+# ========================
+# Columnar Batches
+# ========================
+class FindingBatch:
+    """
+    Findings in columns: rule and file tables plus one array entry per
+    finding, so the strings a rule's findings share are stored, pickled and
+    cached once. This is what scans pass between processes and to the
+    cache. It also reads as a sequence of issue dicts, built on access, for
+    code written against the dict API.
+    """
+
+    __slots__ = ("rules", "files", "rule_ids", "file_ids", "lines", "snippets", "detected_by", "owasp",
+                 "cwe", "functions", "extras", "_rule_index", "_file_index")
+
+    def __init__(self, findings=()):
+        self.rules = []
+        self.files = []
+        self.rule_ids = array("I")
+        self.file_ids = array("I")
+        self.lines = array("q")
+        self.snippets = []
+        self.detected_by = []
+        self.owasp = []        # None = the rule's own
+        self.cwe = []
+        self.functions = []
+        self.extras = {}       # row -> extra keys
+        self._rule_index = {}
+        self._file_index = {}
+        for finding in findings:
+            self.append(finding)
+
+    @classmethod
+    def of(cls, issues):
+        """`issues` (a FindingBatch, or Findings / issue dicts) as a FindingBatch."""
+        return issues if isinstance(issues, cls) else cls(as_finding(i) for i in issues)
+
+    def append(self, finding):
+        rule_id = self._rule_index.get(finding.rule)
+        if rule_id is None:
+            rule_id = self._rule_index[finding.rule] = len(self.rules)
+            self.rules.append(finding.rule)
+        file_id = self._file_index.get(finding.file)
+        if file_id is None:
+            file_id = self._file_index[finding.file] = len(self.files)
+            self.files.append(finding.file)
+        if finding.extra:
+            self.extras[len(self.snippets)] = finding.extra
+        self.rule_ids.append(rule_id)
+        self.file_ids.append(file_id)
+        self.lines.append(finding.line)
+        self.snippets.append(finding.snippet)
+        self.detected_by.append(finding.detected_by)
+        self.owasp.append(finding.owasp)
+        self.cwe.append(finding.cwe)
+        self.functions.append(finding.function)
+
+    def relabel(self, file_path):
+        """Attribute every finding to `file_path` (a cached result reused for another copy of a file)."""
+        self.files = [file_path] * len(self.files)
+        self._file_index = {file_path: 0} if self.files else {}
+
+    def finding(self, row):
+        return Finding(self.rules[self.rule_ids[row]], self.files[self.file_ids[row]], self.lines[row],
+                       self.snippets[row], self.detected_by[row], self.owasp[row], self.cwe[row],
+                       self.extras.get(row), self.functions[row])
+
+    def findings(self):
+        return [self.finding(row) for row in range(len(self))]
+
+    # --- JSON form, for the result cache ---
+    def to_json(self):
+        return {
+            "rules": [rule.fields() for rule in self.rules],
+            "files": self.files,
+            "rows": [self.rule_ids.tolist(), self.file_ids.tolist(), self.lines.tolist(), self.snippets,
+                     self.detected_by, self.owasp, self.cwe, self.functions],
+            "extras": {str(row): extra for row, extra in self.extras.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data):
+        batch = cls()
+        batch.rules = [rule_info_of(*fields) for fields in data["rules"]]
+        batch.files = list(data["files"])
+        rule_ids, file_ids, lines, snippets, detected_by, owasp, cwe, functions = data["rows"]
+        batch.rule_ids = array("I", rule_ids)
+        batch.file_ids = array("I", file_ids)
+        batch.lines = array("q", lines)
+        batch.snippets = snippets
+        batch.detected_by = [sys.intern(label) for label in detected_by]
+        batch.owasp = owasp
+        batch.cwe = cwe
+        batch.functions = [sys.intern(name) for name in functions]
+        batch.extras = {int(row): extra for row, extra in data["extras"].items()}
+        batch._rule_index = {rule: i for i, rule in enumerate(batch.rules)}
+        batch._file_index = {path: i for i, path in enumerate(batch.files)}
+        return batch
+
+    def __getstate__(self):
+        return self.to_json()
+
+    def __setstate__(self, state):
+        batch = self.from_json(state)
+        for name in self.__slots__:
+            setattr(self, name, getattr(batch, name))
+
+    # --- read-only sequence of issue dicts ---
+    def __len__(self):
+        return len(self.snippets)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self.finding(row).as_dict() for row in range(len(self))[index]]
+        return self.finding(range(len(self))[index]).as_dict()
+
+    def __iter__(self):
+        for row in range(len(self)):
+            yield self.finding(row).as_dict()
+
+    def __eq__(self, other):
+        if isinstance(other, (FindingBatch, list, tuple)):
+            return len(self) == len(other) and list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self):
+        return f"FindingBatch({len(self)} findings, {len(self.rules)} rules, {len(self.files)} files)"
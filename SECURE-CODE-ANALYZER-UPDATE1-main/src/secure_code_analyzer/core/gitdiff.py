@@ -0,0 +1,154 @@
+import os
+import re
+import subprocess
+
+from .rules import language_for
+
+# ========================
+# Git Plumbing
+# ========================
+_HUNK = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,(\d+))? @@")
+_ESCAPES = {"a": "\a", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "\\": "\\", '"': '"'}
+
+
+class GitError(RuntimeError):
+    pass
+
+
+def _git(args, cwd):
+    try:
+        proc = subprocess.run(
+            ["git", "-c", "core.quotePath=false", *args],
+            cwd=cwd, capture_output=True, check=False,
+        )
+    except FileNotFoundError as e:
+        raise GitError("git is not installed") from e
+    if proc.returncode != 0:
+        message = proc.stderr.decode("utf-8", "replace").strip()
+        raise GitError(f"git {' '.join(args)} failed: {message}")
+    return proc.stdout.decode("utf-8", "surrogateescape")
+
+
+def git_root(path):
+    """Top-level directory of the work tree containing `path`."""
+    cwd = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+    return _git(["rev-parse", "--show-toplevel"], cwd).strip()
+
+
+def merge_base(root, ref):
+    """Commit where HEAD forked from `ref` (the commit a pull request is diffed against)."""
+    return _git(["merge-base", ref, "HEAD"], root).strip()
+
+
+def _unquote(path):
+    # git C-quotes names with control characters or a double quote
+    if not (path.startswith('"') and path.endswith('"')):
+        return path
+    body, out, i = path[1:-1], bytearray(), 0
+    while i < len(body):
+        ch = body[i]
+        if ch == "\\" and i + 1 < len(body):
+            nxt = body[i + 1]
+            if nxt in "01234567":
+                out.append(int(body[i + 1:i + 4], 8))
+                i += 4
+                continue
+            out += _ESCAPES.get(nxt, nxt).encode("utf-8", "surrogateescape")
+            i += 2
+            continue
+        out += ch.encode("utf-8", "surrogateescape")
+        i += 1
+    return out.decode("utf-8", "surrogateescape")
+
+
+def parse_diff(diff_text):
+    """
+    {path: [(first, last), ...]} of added/modified line ranges in the new
+    version of each file, from `git diff -U0` output. Paths are repo-relative.
+    """
+    ranges = {}
+    current, in_header, previous = None, False, ""
+    for line in diff_text.splitlines():
+        if line.startswith("diff --git "):
+            current, in_header = None, True
+        elif in_header and line.startswith("+++ ") and previous.startswith("--- "):
+            # Only here: past the header, "+++ " starts an added line that began with "++ ".
+            in_header = False
+            target = _unquote(line[4:].rstrip("\t"))
+            current = None if target == "/dev/null" else target[2:] if target.startswith("b/") else target
+            if current is not None:
+                ranges.setdefault(current, [])
+        previous = line
+        if current is None:
+            continue
+        m = _HUNK.match(line)
+        if m:
+            start = int(m.group(1))
+            count = 1 if m.group(2) is None else int(m.group(2))
+            if count:
+                ranges[current].append((start, start + count - 1))
+    return ranges
+
+
+def changed_ranges(root, ref):
+    """
+    Files under `root` changed since the merge base of `ref` and HEAD,
+    including uncommitted and untracked files: {abs path: ranges}. `ranges`
+    lists changed line ranges, or is None when the whole file is new.
+    Deleted files are not included.
+    """
+    base = merge_base(root, ref)
+    diff = _git(["diff", "-U0", "--no-color", "--no-ext-diff", "--src-prefix=a/", "--dst-prefix=b/",
+                 "--diff-filter=d", base, "--"], root)
+    changes = {}
+    for rel, ranges in parse_diff(diff).items():
+        changes[os.path.join(root, rel)] = ranges
+
+    added = _git(["diff", "--name-only", "-z", "--diff-filter=A", base, "--"], root)
+    untracked = _git(["ls-files", "--others", "--exclude-standard", "-z"], root)
+    for rel in (added + untracked).split("\0"):
+        if rel:
+            changes[os.path.join(root, rel)] = None
+    return changes
+
+
+# ========================
+# Changed-file Selection
+# ========================
+def _within(path, target):
+    return path == target or path.startswith(target.rstrip(os.sep) + os.sep)
+
+
+def collect_changed_files(targets, ref):
+    """
+    Scannable files under `targets` changed since `ref`, as
+    (files, {file: ranges}). Paths are relative to the working directory
+    when they are inside it.
+    """
+    files, changes = [], {}
+    by_root = {}
+    for target in targets:
+        if not os.path.exists(target):
+            print(f"[WARNING] {target} does not exist, skipping.")
+            continue
+        root = os.path.realpath(git_root(target))
+        if root not in by_root:
+            by_root[root] = changed_ranges(root, ref)
+        target = os.path.realpath(target)
+        for path, ranges in sorted(by_root[root].items()):
+            if not _within(path, target) or not language_for(path) or not os.path.isfile(path):
+                continue
+            rel = os.path.relpath(path)
+            shown = path if rel.startswith(os.pardir) else rel
+            if shown not in changes:
+                files.append(shown)
+                changes[shown] = ranges
+    return files, changes
+
+
+def on_changed_lines(issue, ranges):
+    """True if `issue` falls in one of `ranges` (None = the whole file changed)."""
+    if ranges is None or not issue.get("line"):
+        return True
+    line = issue["line"]
+    return any(first <= line <= last for first, last in ranges)
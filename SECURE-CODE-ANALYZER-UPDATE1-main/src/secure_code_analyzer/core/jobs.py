@@ -0,0 +1,188 @@
+import collections
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from .crossfile import flow_issues
+from .profile import ScanTimings
+from .scanner import scan_files, scan_sources
+from .reporters import JsonLinesWriter, generate_json_report, generate_html_report, iter_jsonl
+
+# ========================
+# Job Settings
+# ========================
+DEFAULT_MAX_JOBS = 2          # scans running at once
+DEFAULT_MAX_QUEUED = 16       # scans waiting for a slot
+DEFAULT_KEEP_JOBS = 100       # finished jobs remembered for polling
+
+
+class QueueFull(Exception):
+    pass
+
+
+# ========================
+# Scan Job
+# ========================
+class ScanJob:
+    """
+    One background scan: its files, progress, findings so far and reports.
+    With `sources` ({virtual path: bytes}) the files are scanned from memory;
+    the buffers are let go once the scan is over.
+    """
+
+    def __init__(self, files, reports_root, sources=None):
+        self.id = uuid.uuid4().hex
+        self.sources = sources
+        self.files = list(sources if sources is not None else files)
+        self.report_dir = os.path.join(reports_root, self.id)
+        self.status = "queued"
+        self.done = 0
+        self.issues = []
+        self.reports = {}
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self._lock = threading.Lock()
+
+    def to_dict(self, offset=0):
+        """Status for polling; `issues` holds the findings from index `offset` on."""
+        with self._lock:
+            return {
+                "id": self.id,
+                "status": self.status,
+                "total": len(self.files),
+                "done": self.done,
+                "count": len(self.issues),
+                "offset": offset,
+                "issues": self.issues[offset:],
+                "reports": dict(self.reports),
+                "error": self.error,
+                "created": self.created,
+                "started": self.started,
+                "finished": self.finished,
+            }
+
+
+# ========================
+# Job Manager
+# ========================
+class JobManager:
+    """
+    Runs ScanJobs on a bounded thread pool. At most `max_jobs` scans run at
+    once and at most `max_queued` wait; submit() raises QueueFull beyond
+    that. Each job writes report.jsonl/json/html into its own directory
+    under `reports_root`. With `cross_file`, taint flows between a job's
+    files are reported after its per-file issues. Files are scanned within
+    `budget` (a budget.Budget). Every job adds its stage timings (and, with
+    `profile`, per-rule timings) to the shared `timings`, a ScanTimings.
+    The sources of the last in-memory job are kept as `last_sources` so
+    that it can be run again.
+    """
+
+    def __init__(self, reports_root, max_jobs=DEFAULT_MAX_JOBS, max_queued=DEFAULT_MAX_QUEUED,
+                 keep=DEFAULT_KEEP_JOBS, scan_jobs=1, ruleset=None, cache=None, cross_file=True,
+                 budget=None, timings=None, profile=False):
+        self.reports_root = reports_root
+        self.max_jobs = max(1, max_jobs)
+        self.max_queued = max(0, max_queued)
+        self.keep = keep
+        self.scan_jobs = scan_jobs
+        self.ruleset = ruleset
+        self.cache = cache
+        self.cross_file = cross_file
+        self.budget = budget
+        self.timings = timings if timings is not None else ScanTimings()
+        self.profile = profile
+        self.last_sources = None
+        self._jobs = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_jobs, thread_name_prefix="scan-job")
+
+    def submit(self, files, sources=None):
+        """
+        Queue a scan of `files`, or of the in-memory `sources` ({virtual
+        path: bytes}), and return its job; raises QueueFull when saturated.
+        """
+        with self._lock:
+            pending = sum(1 for j in self._jobs.values() if j.status in ("queued", "running"))
+            if pending >= self.max_jobs + self.max_queued:
+                raise QueueFull(f"{pending} scan(s) already running or queued")
+            job = ScanJob(files, self.reports_root, sources)
+            if sources is not None:
+                self.last_sources = sources
+            self._jobs[job.id] = job
+            self._forget_old()
+        self._executor.submit(self._run, job)
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def latest(self):
+        with self._lock:
+            return next(reversed(self._jobs.values()), None)
+
+    def status_counts(self):
+        """{status: number of remembered jobs}, every status listed."""
+        counts = dict.fromkeys(("queued", "running", "done", "failed"), 0)
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    def _forget_old(self):
+        finished = [j.id for j in self._jobs.values() if j.status in ("done", "failed")]
+        for job_id in finished[:max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def _run(self, job):
+        with job._lock:
+            job.status = "running"
+            job.started = time.time()
+        try:
+            os.makedirs(job.report_dir, exist_ok=True)
+            jsonl_path = os.path.join(job.report_dir, "report.jsonl")
+            with JsonLinesWriter(jsonl_path) as writer:
+                summaries = {} if self.cross_file else None
+                options = dict(ruleset=self.ruleset, cache=self.cache, budget=self.budget,
+                               timings=self.timings, profile=self.profile, summaries=summaries)
+                if job.sources is not None:
+                    results = scan_sources(job.sources.items(), **options)
+                else:
+                    results = scan_files(job.files, jobs=self.scan_jobs, **options)
+                for _, issues in results:
+                    issues = list(issues)    # dicts, built once from the batch
+                    for issue in issues:
+                        writer.write(issue)
+                    with job._lock:
+                        job.issues.extend(issues)
+                        job.done += 1
+                if self.cross_file:
+                    issues = flow_issues(summaries, self.ruleset, sources=job.sources)
+                    for issue in issues:
+                        writer.write(issue)
+                    with job._lock:
+                        job.issues.extend(issues)
+
+            json_path = os.path.join(job.report_dir, "report.json")
+            html_path = os.path.join(job.report_dir, "report.html")
+            generate_json_report(iter_jsonl(jsonl_path), json_path)
+            generate_html_report(iter_jsonl(jsonl_path), html_path)
+            with job._lock:
+                job.reports = {"jsonl": jsonl_path, "json": json_path, "html": html_path}
+                job.status = "done"
+        except Exception as e:
+            with job._lock:
+                job.error = str(e)
+                job.status = "failed"
+        finally:
+            with job._lock:
+                job.finished = time.time()
+                job.sources = None
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
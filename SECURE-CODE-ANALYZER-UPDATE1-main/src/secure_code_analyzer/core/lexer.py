@@ -0,0 +1,382 @@
+import re
+from bisect import bisect_right
+
+# ========================
+# Masked View
+# ========================
+# mask() returns a file with the contents of its comments and of its string,
+# template and regex literals blanked out by spaces; in a PHP file also the
+# inline HTML around the <?php ... ?> blocks. Newlines stay and nothing
+# moves, so an offset or line number in the masked view is one in the file.
+# Delimiters (quotes, slashes, "${" ... "}") and the code of interpolations
+# stay too. Each lexer makes one left-to-right pass, jumping by regex search
+# from one character that can change its state to the next: linear time.
+TEXT_VIEWS = ("raw", "masked")
+
+_NOT_NEWLINE = re.compile(r"[^\r\n]")
+_LINE_END = re.compile(r"[\r\n]")
+
+_JS_TOP = re.compile(r"[/'\"`]")
+_JS_NESTED = re.compile(r"[/'\"`{}]")    # inside a "${...}": braces count
+_JS_STRINGS = {quote: re.compile(rf"(?:[^{quote}\\\r\n]+|\\[\s\S])*") for quote in "'\""}
+_JS_TEMPLATE = re.compile(r"\\[\s\S]|`|\$\{")
+_JS_REGEX = re.compile(r"(?:[^/\\\[\r\n]+|\\[^\r\n]|\[(?:[^\]\\\r\n]+|\\[^\r\n])*\])*")
+# After these words a "/" starts a regex literal, after any other a division.
+_JS_BEFORE_EXPRESSION = frozenset({
+    "await", "case", "delete", "do", "else", "in", "instanceof", "new", "of",
+    "return", "throw", "typeof", "void", "yield",
+})
+
+_PHP_OPEN = re.compile(r"<\?(?:php(?=\s|$)|=|(?=\s))", re.IGNORECASE)
+_PHP_TOP = re.compile(r"['\"`#/]|<<<|\?>")
+_PHP_NESTED = re.compile(r"['\"`#/{}]|<<<|\?>")
+_PHP_COMMENT_END = re.compile(r"[\r\n]|\?>")
+_PHP_SINGLE = re.compile(r"(?:[^'\\]+|\\[\s\S])*")
+_PHP_DOUBLE = re.compile(r"\\[\s\S]|\"|\{\$|\$\{")
+_PHP_BACKTICK = re.compile(r"\\[\s\S]|`|\{\$|\$\{")
+_PHP_LABEL = r"[A-Za-z_\x80-\uffff][A-Za-z0-9_\x80-\uffff]*"
+_PHP_HEREDOC = re.compile(rf"<<<[ \t]*(['\"]?)({_PHP_LABEL})\1\r?\n")
+
+
+def _closing_label(label):
+    """The line that ends a heredoc/nowdoc: its label, maybe indented (PHP 7.3+)."""
+    return rf"(?m:^[ \t]*{re.escape(label)}(?![A-Za-z0-9_\x80-\uffff]))"
+
+
+class _Lexer:
+    """The state of one pass: `spans` to blank, the interpolations we are in and the brace depth."""
+
+    def __init__(self, text):
+        self.text = text
+        self.spans = []
+        self.stack = []    # (depth before its "{", body pattern to resume) per open interpolation
+        self.depth = 0
+
+    def body(self, pos, pattern):
+        """
+        Blank a string body from `pos` up to its closing match of `pattern` or
+        an interpolation: (position after that, True if an interpolation opened).
+        """
+        text = self.text
+        start = pos
+        while True:
+            m = pattern.search(text, pos)
+            if m is None:
+                self.spans.append((start, len(text)))
+                return len(text), False
+            token = m.group()
+            if token[0] == "\\":
+                pos = m.end()
+                continue
+            self.spans.append((start, m.start()))
+            if token == "${" or token == "{$":
+                self.stack.append((self.depth, pattern))
+                self.depth += 1
+                return m.start() + (2 if token == "${" else 1), True
+            return m.end(), False
+
+    def close_brace(self, pos):
+        """A "}" at `pos` in code: (position, True) resuming the string it ends an interpolation of."""
+        self.depth -= 1
+        if self.stack and self.depth == self.stack[-1][0]:
+            _, pattern = self.stack.pop()
+            pos, opened = self.body(pos + 1, pattern)
+            return pos, not opened
+        return pos + 1, False
+
+
+def _js_regex_allowed(text, start, end, allowed):
+    """Whether a "/" after the code text[start:end] starts a regex literal; `allowed` if it is blank."""
+    j = end - 1
+    while j >= start and text[j] in " \t\r\n":
+        j -= 1
+    if j < start:
+        return allowed
+    c = text[j]
+    if c.isalnum() or c in "_$":
+        k = j
+        while k >= start and (text[k].isalnum() or text[k] in "_$"):
+            k -= 1
+        return text[k + 1:j + 1] in _JS_BEFORE_EXPRESSION
+    if c in ")]":
+        return False
+    if c in "+-" and j > start and text[j - 1] == c:
+        return False    # a++ / b
+    return True
+
+
+def js_spans(text):
+    """The (start, end) ranges of a JavaScript file to blank out."""
+    lex = _Lexer(text)
+    spans = lex.spans
+    pos = 0
+    regex_ok = True
+    if text.startswith("#!"):
+        m = _LINE_END.search(text)
+        pos = m.start() if m else len(text)
+        spans.append((0, pos))
+    while True:
+        m = (_JS_NESTED if lex.stack else _JS_TOP).search(text, pos)
+        if m is None:
+            return spans
+        i = m.start()
+        c = text[i]
+        if i > pos:
+            regex_ok = _js_regex_allowed(text, pos, i, regex_ok)
+        if c == "{":
+            lex.depth += 1
+            pos, regex_ok = i + 1, True
+        elif c == "}":
+            pos, closed = lex.close_brace(i)
+            regex_ok = not closed
+        elif c == "`":
+            pos, regex_ok = lex.body(i + 1, _JS_TEMPLATE)
+        elif c != "/":
+            end = _JS_STRINGS[c].match(text, i + 1).end()
+            spans.append((i + 1, end))
+            pos = end + 1 if text.startswith(c, end) else end
+            regex_ok = False
+        elif text.startswith("/", i + 1):
+            m = _LINE_END.search(text, i)
+            pos = m.start() if m else len(text)
+            spans.append((i, pos))
+        elif text.startswith("*", i + 1):
+            end = text.find("*/", i + 2)
+            pos = len(text) if end < 0 else end + 2
+            spans.append((i, pos))
+        elif regex_ok and text.startswith("/", end := _JS_REGEX.match(text, i + 1).end()):
+            spans.append((i + 1, end))
+            pos, regex_ok = end + 1, False
+        else:
+            pos, regex_ok = i + 1, True    # division, or no closing "/" on the line
+
+
+def _php_code(lex, pos):
+    """Lex PHP code from `pos` up to and including its "?>": the position after that."""
+    text, spans = lex.text, lex.spans
+    while True:
+        m = (_PHP_NESTED if lex.stack else _PHP_TOP).search(text, pos)
+        if m is None:
+            return len(text)
+        i = m.start()
+        token = m.group()
+        if token == "?>":
+            lex.stack.clear()
+            return m.end()
+        if token == "{":
+            lex.depth += 1
+            pos = i + 1
+        elif token == "}":
+            pos, _ = lex.close_brace(i)
+        elif token == "'":
+            end = _PHP_SINGLE.match(text, i + 1).end()
+            spans.append((i + 1, end))
+            pos = end + 1
+        elif token == '"':
+            pos, _ = lex.body(i + 1, _PHP_DOUBLE)
+        elif token == "`":
+            pos, _ = lex.body(i + 1, _PHP_BACKTICK)
+        elif token == "<<<":
+            heredoc = _PHP_HEREDOC.match(text, i)
+            if heredoc is None:
+                pos = i + 3
+            elif heredoc.group(1) == "'":    # nowdoc: no interpolation
+                end = re.compile(_closing_label(heredoc.group(2))).search(text, heredoc.end())
+                pos = end.start() if end else len(text)
+                spans.append((heredoc.end(), pos))
+            else:
+                closing = re.compile(rf"\\[\s\S]|\{{\$|\$\{{|{_closing_label(heredoc.group(2))}")
+                pos, _ = lex.body(heredoc.end(), closing)
+        elif token == "#" and text.startswith("[", i + 1):
+            pos = i + 1    # a PHP 8 attribute
+        elif token == "#" or text.startswith("/", i + 1):
+            end = _PHP_COMMENT_END.search(text, i)
+            pos = end.start() if end else len(text)
+            spans.append((i, pos))
+        elif text.startswith("*", i + 1):
+            end = text.find("*/", i + 2)
+            pos = len(text) if end < 0 else end + 2
+            spans.append((i, pos))
+        else:
+            pos = i + 1
+
+
+def php_spans(text):
+    """The (start, end) ranges of a PHP file to blank out, inline HTML included."""
+    lex = _Lexer(text)
+    pos = 0
+    while pos < len(text):
+        m = _PHP_OPEN.search(text, pos)
+        if m is None:
+            lex.spans.append((pos, len(text)))
+            break
+        lex.spans.append((pos, m.start()))
+        lex.depth = 0
+        pos = _php_code(lex, m.end())
+    return lex.spans
+
+
+LEXERS = {
+    "javascript": js_spans,
+    "php": php_spans,
+}
+
+
+def blank(text, spans):
+    """`text` with every (start, end) range of `spans` (in order) spaced out but for its line ends."""
+    pieces = []
+    last = 0
+    for start, end in spans:
+        if end <= start:
+            continue
+        pieces.append(text[last:start])
+        part = text[start:end]
+        if "\n" in part or "\r" in part:
+            pieces.append(_NOT_NEWLINE.sub(" ", part))
+        else:
+            pieces.append(" " * (end - start))
+        last = end
+    pieces.append(text[last:])
+    return "".join(pieces)
+
+
+def mask(text, language):
+    """
+    The masked view of `text` (str, bytes or mmap; bytes stay bytes, of the
+    same length) for `language`; unchanged for a language without a lexer.
+    """
+    spans_of = LEXERS.get(language)
+    if spans_of is None:
+        return text
+    if isinstance(text, str):
+        return blank(text, spans_of(text))
+    # Every byte is one latin-1 character and the syntax is ASCII, so the
+    # offsets of any encoding carry over.
+    raw = bytes(text).decode("latin-1")
+    return blank(raw, spans_of(raw)).encode("latin-1")
+
+
+# ========================
+# Enclosing Functions
+# ========================
+# Findings are told apart across edits by the function they are in (see
+# baseline.py). The masked view has no braces in comments or strings, so a
+# function's body is found by counting them. A function is named by its
+# declaration or by what it is assigned to (`const f = (a) => {`,
+# `$f = function () {`, `f: function`); anonymous callbacks count as part
+# of the function around them. Headers and braces are found in separate
+# regex passes, each a fast scan for its literal.
+#
+# A header ends at the "(" of its parameter list, or at the "{" of an
+# arrow function's body; group 1 is the declared name, if any.
+_JS_HEADERS = (
+    r"function\b\s*\*?\s*([\w$]*)\s*\(",
+    r"=>\s*\{",
+    r"^[ \t]*(?:(?:static|async|get|set)\s+)*(?!(?:if|for|while|switch|catch|function|return|with)\b)"
+    r"([A-Za-z_$][\w$]*)\s*\((?=[^()]*\)\s*\{)",
+)
+_PHP_HEADERS = (
+    r"function\b\s*&?\s*(\w*)\s*\(",
+)
+_NAME_CHAR = re.compile(r"[\w$]")
+# What a header is assigned to, matched against its line up to it.
+_JS_ASSIGNED = r"([\w$]+)\s*[:=]\s*(?:async\b\s*)?(?:\([^()]*\)|[\w$]+)?\s*\Z"
+_PHP_ASSIGNED = r"\$(\w+)\s*=\s*(?:static\s+)?\Z"
+_LOOKBACK = 200
+# After a header's parameter list: what may come before the body's "{".
+_JS_BODY = r"\s*\{"
+_PHP_BODY = r"\s*(?:use\s*\([^()]*\)\s*)?(?::\s*[?\w\\|&]+\s*)?\{"
+_FUNCTION_SYNTAX = {
+    "javascript": (_JS_HEADERS, _JS_ASSIGNED, _JS_BODY),
+    "php": (_PHP_HEADERS, _PHP_ASSIGNED, _PHP_BODY),
+}
+_compiled_syntax = {}
+
+
+def _syntax(language, binary):
+    """([headers], assigned, body, parens, braces) regexes for a str or a bytes masked view."""
+    key = (language, binary)
+    compiled = _compiled_syntax.get(key)
+    if compiled is None:
+        headers, assigned, body = _FUNCTION_SYNTAX[language]
+        patterns = (*headers, assigned, body, r"[()]", r"[{}]")
+        if binary:
+            patterns = tuple(p.encode("ascii") for p in patterns)
+        patterns = [re.compile(p, re.M) for p in patterns]
+        compiled = _compiled_syntax[key] = (patterns[:len(headers)], *patterns[len(headers):])
+    return compiled
+
+
+def _bodies(masked, headers, assigned, body, parens):
+    """{offset of a named function's "{": (offset of its header, name)}."""
+    binary = not isinstance(masked, str)
+    open_paren, newline = (b"(", b"\n") if binary else ("(", "\n")
+    named = {}
+    for header in headers:
+        for m in header.finditer(masked):
+            start = m.start()
+            if start and _NAME_CHAR.match(chr(masked[start - 1]) if binary else masked[start - 1]):
+                continue    # "function" ends a longer name
+            name = m.group(1) if m.lastindex else None
+            if not name:
+                line_start = max(masked.rfind(newline, 0, start) + 1, start - _LOOKBACK)
+                before = assigned.search(masked, line_start, start)
+                if before is None:
+                    continue
+                name = before.group(1)
+            if not isinstance(name, str):
+                name = name.decode("latin-1")
+            if masked[m.end() - 1:m.end()] != open_paren:     # an arrow function's "{"
+                named[m.end() - 1] = (m.start(), name)
+                continue
+            # Past the parameter list, which may hold braces of its own.
+            depth = 1
+            for paren in parens.finditer(masked, m.end()):
+                depth += 1 if paren.group() == open_paren else -1
+                if not depth:
+                    brace = body.match(masked, paren.end())
+                    if brace is not None:
+                        named[brace.end() - 1] = (m.start(), name)
+                    break
+    return named
+
+
+def function_spans(masked, language):
+    """[(start, end, name)] of the named functions in a masked view, header to closing brace."""
+    if language not in _FUNCTION_SYNTAX:
+        return []
+    headers, assigned, body, parens, braces = _syntax(language, not isinstance(masked, str))
+    named = _bodies(masked, headers, assigned, body, parens)
+    if not named:
+        return []
+    open_brace = "{" if isinstance(masked, str) else b"{"
+    stack = []      # per open brace: (header offset, name) if it opens a named function's body
+    spans = []
+    for m in braces.finditer(masked):
+        if m.group() == open_brace:
+            stack.append(named.get(m.start()))
+        elif stack:
+            opened = stack.pop()
+            if opened is not None:
+                spans.append((opened[0], m.end(), opened[1]))
+    spans.sort()
+    return spans
+
+
+class FunctionIndex:
+    """The innermost named function around a line of one file."""
+
+    __slots__ = ("starts", "spans")
+
+    def __init__(self, masked, language, lines):
+        # (first line, last line, name) in order of first line; inner functions after outer ones.
+        self.spans = [(lines.line_of(start), lines.line_of(end - 1), name)
+                      for start, end, name in function_spans(masked, language)]
+        self.starts = [span[0] for span in self.spans]
+
+    def function_at(self, line_no):
+        """Name of the innermost named function containing line `line_no`, or ""."""
+        for first, last, name in reversed(self.spans[:bisect_right(self.starts, line_no)]):
+            if last >= line_no:
+                return name
+        return ""
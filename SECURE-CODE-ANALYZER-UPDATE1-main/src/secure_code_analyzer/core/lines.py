@@ -0,0 +1,47 @@
+from bisect import bisect_right
+
+
+class LineIndex:
+    """
+    Offset-to-line lookup for one source file, built once and shared by every
+    detector pass. Lines are split on "\\n" only, the same way line numbers are
+    counted, so a match offset and its snippet always agree. `text` may also
+    be bytes or an mmap (offsets are then byte offsets); snippets are decoded
+    with `decode`, UTF-8 by default.
+    """
+
+    __slots__ = ("text", "starts", "decode")
+
+    def __init__(self, text, decode=None):
+        self.text = text
+        self.decode = decode
+        newline = "\n" if isinstance(text, str) else b"\n"
+        starts = [0]
+        find = text.find
+        pos = find(newline)
+        while pos != -1:
+            starts.append(pos + 1)
+            pos = find(newline, pos + 1)
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def line_of(self, offset):
+        """1-based line number containing character `offset`."""
+        return bisect_right(self.starts, offset)
+
+    def line_text(self, line_no):
+        """Text of 1-based line `line_no` without its newline ("" if out of range)."""
+        if line_no < 1 or line_no > len(self.starts):
+            return self.text[:0]
+        start = self.starts[line_no - 1]
+        end = self.starts[line_no] - 1 if line_no < len(self.starts) else len(self.text)
+        return self.text[start:end]
+
+    def snippet(self, line_no):
+        """Stripped line text, as shown in reports."""
+        line = self.line_text(line_no)
+        if not isinstance(line, str):
+            line = self.decode(line) if self.decode else str(line, "utf-8", "replace")
+        return line.strip()
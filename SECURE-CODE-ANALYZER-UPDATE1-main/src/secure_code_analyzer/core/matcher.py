@@ -0,0 +1,228 @@
+import re
+
+try:  # Python 3.11+
+    from re import _parser as sre_parse, _constants as sre_constants
+except ImportError:  # pragma: no cover - older interpreters
+    import sre_parse
+    import sre_constants
+
+# Patterns that cannot be dropped into a larger alternation unchanged:
+# numbered/named backreferences, their own named groups, global inline flags.
+_UNSAFE = re.compile(r"\\[1-9]|\(\?P[<=]|\(\?[aiLmsux]+\)")
+
+_C = sre_constants
+_CATEGORIES = {
+    _C.CATEGORY_DIGIT: r"\d", _C.CATEGORY_NOT_DIGIT: r"\D",
+    _C.CATEGORY_SPACE: r"\s", _C.CATEGORY_NOT_SPACE: r"\S",
+    _C.CATEGORY_WORD: r"\w", _C.CATEGORY_NOT_WORD: r"\W",
+}
+_REPEATS = tuple(
+    getattr(_C, name) for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT") if hasattr(_C, name)
+)
+_ZERO_WIDTH = (_C.AT, _C.ASSERT, _C.ASSERT_NOT)
+
+
+def combinable(pattern):
+    """True if `pattern` keeps its meaning when embedded in a combined regex."""
+    return not _UNSAFE.search(pattern)
+
+
+def _char_item(code):
+    # Guards are compiled case-insensitively, so fold to one case to share groups.
+    char = chr(code)
+    lower = char.lower()
+    return re.escape(lower if len(lower) == 1 else char)
+
+
+def _class_items(op, av):
+    """Character-class items (as regex source) for a LITERAL or IN node."""
+    if op is _C.LITERAL:
+        return {_char_item(av)}
+    items = set()
+    for item_op, item_av in av:
+        if item_op is _C.LITERAL:
+            items.add(_char_item(item_av))
+        elif item_op is _C.RANGE:
+            items.add(f"{re.escape(chr(item_av[0]))}-{re.escape(chr(item_av[1]))}")
+        elif item_op is _C.CATEGORY and item_av in _CATEGORIES:
+            items.add(_CATEGORIES[item_av])
+        else:  # NEGATE and friends: no useful bound
+            return None
+    return items
+
+
+def _first(seq):
+    """(items, nullable) for the characters a parsed sequence can start with; items None = any."""
+    items = set()
+    for op, av in seq:
+        if op in (_C.LITERAL, _C.IN):
+            found = _class_items(op, av)
+            return (None, False) if found is None else (items | found, False)
+        if op in _ZERO_WIDTH:
+            continue  # anchors and lookarounds consume nothing
+        if op is _C.SUBPATTERN:
+            found, nullable = _first(av[-1])
+        elif op is _C.BRANCH:
+            found, nullable = set(), False
+            for alt in av[1]:
+                alt_items, alt_nullable = _first(alt)
+                if alt_items is None:
+                    return None, False
+                found |= alt_items
+                nullable = nullable or alt_nullable
+        elif op in _REPEATS:
+            found, nullable = _first(av[2])
+            nullable = nullable or av[0] == 0
+        else:
+            return None, False
+        if found is None:
+            return None, False
+        items |= found
+        if not nullable:
+            return items, False
+    return items, True
+
+
+def first_chars(pattern):
+    """
+    Class items (e.g. {"e", "\\s", "a-z"}) covering every character a match of
+    `pattern` can start with, or None if that is unbounded or it can match "".
+    """
+    try:
+        items, nullable = _first(sre_parse.parse(pattern))
+    except (re.error, TypeError, IndexError):
+        return None
+    return None if items is None or nullable else items
+
+
+def _required(seq):
+    """The best literal set for a parsed sequence: every match contains one of its strings (None: no set)."""
+    best = None
+    run = []
+
+    def consider(found):
+        nonlocal best
+        if found and (best is None or min(map(len, found)) > min(map(len, best))):
+            best = found
+
+    for op, av in seq:
+        if op is _C.LITERAL:
+            run.append(chr(av))
+            continue
+        consider({"".join(run)} if run else None)
+        run = []
+        if op is _C.SUBPATTERN:
+            consider(_required(av[-1]))
+        elif op is _C.BRANCH:
+            alternatives = [_required(alt) for alt in av[1]]
+            if all(alternatives):
+                consider(set().union(*alternatives))
+        elif op in _REPEATS and av[0] >= 1:
+            consider(_required(av[2]))
+        # Classes, anchors, lookarounds, optional parts: the literal run ends here.
+    consider({"".join(run)} if run else None)
+    return best
+
+
+def required_literals(pattern, min_length=3):
+    """
+    Literal strings (e.g. {"eval"}) one of which every match of `pattern`
+    contains, or None if there is no such set of strings at least
+    `min_length` characters long. Compare case-insensitively: the rules are
+    compiled with re.IGNORECASE.
+    """
+    try:
+        found = _required(sre_parse.parse(pattern))
+    except (re.error, TypeError, IndexError):
+        return None
+    if not found or min(map(len, found)) < min_length:
+        return None
+    return found
+
+
+class CombinedMatcher:
+    """
+    All regex/heuristic patterns of one language behind a single automaton.
+
+    Patterns are grouped by the characters they can start with; the combined
+    regex skips any offset no pattern can start at and only tries the group
+    whose guard character is present, so the text is searched once, left to
+    right, for the next offset where *any* pattern matches. At that offset a
+    probe of optional lookaheads reports which patterns match there and how
+    far. Every pattern keeps its own cursor, so the result is exactly what a
+    separate `finditer` per pattern returns: the same non-overlapping matches
+    in the same order. Patterns that are unsafe to embed, or that can start
+    anywhere, run on their own. With `binary`, the (str) patterns are
+    compiled to scan bytes-like text (bytes, mmap) instead.
+    """
+
+    def __init__(self, patterns, flags=re.IGNORECASE, binary=False):
+        def compile(source):
+            return re.compile(source.encode("utf-8") if binary else source, flags)
+
+        self.patterns = list(patterns)          # compiled, in rule order
+        self.combined_idx = []                  # positions handled by the automaton
+        self.standalone_idx = []                # positions scanned with finditer
+        dispatch = {}                           # guard class item -> pattern positions
+        for i, pattern in enumerate(self.patterns):
+            items = first_chars(pattern.pattern) if combinable(pattern.pattern) else None
+            if binary and not pattern.pattern.isascii():
+                items = None    # guard classes are per character, bytes are not
+            if items is None:
+                self.standalone_idx.append(i)
+                continue
+            self.combined_idx.append(i)
+            for item in items:
+                dispatch.setdefault(item, []).append(i)
+
+        self.search = None
+        self.probe = None
+        self.groups = []
+        if self.combined_idx:
+            def alt(i):
+                return f"(?:{self.patterns[i].pattern})"
+
+            branches = "|".join(
+                f"(?=[{item}])(?:{'|'.join(alt(i) for i in members)})"
+                for item, members in sorted(dispatch.items())
+            )
+            guard = "".join(sorted(dispatch))
+            self.search = compile(f"(?=[{guard}])(?:{branches})").search
+
+            names = {i: f"r{i}" for i in self.combined_idx}
+            probe = compile(
+                "".join(f"(?:(?=(?P<{names[i]}>{self.patterns[i].pattern})))?" for i in self.combined_idx)
+            )
+            self.probe = probe.match
+            self.groups = [probe.groupindex[names[i]] for i in self.combined_idx]
+        if binary:
+            self.patterns = [compile(pattern.pattern) for pattern in self.patterns]
+
+    def scan(self, text):
+        """Return one list of match start offsets per pattern, in pattern order."""
+        starts = [[] for _ in self.patterns]
+
+        for i in self.standalone_idx:
+            starts[i] = [m.start() for m in self.patterns[i].finditer(text)]
+
+        if not self.combined_idx:
+            return starts
+
+        search, probe = self.search, self.probe
+        slots = list(zip(self.combined_idx, self.groups))
+        cursors = [0] * len(self.patterns)
+        pos = 0
+        end_of_text = len(text)
+        while pos <= end_of_text:
+            m = search(text, pos)
+            if m is None:
+                break
+            p = m.start()
+            regs = probe(text, p).regs
+            for i, group in slots:
+                s, e = regs[group]
+                if s >= 0 and cursors[i] <= p:
+                    starts[i].append(p)
+                    cursors[i] = e
+            pos = p + 1
+        return starts
@@ -0,0 +1,160 @@
+import re
+
+from .matcher import required_literals
+
+# ========================
+# Rule Anchors
+# ========================
+# Most files contain none of the names the rules look for. A rule's anchors
+# are clauses of literals: it can only fire on a file that contains, in any
+# case, one literal of every clause. No clauses: it may fire anywhere; an
+# empty clause: it never fires. Anchors follow what the detectors compare:
+# the required literals of a regex, the callee/object names and argument
+# sources of an AST rule (js_ast_runner.js, php_ast_runner.js), and for a
+# taint rule the last segment of a source and of a sink name, which every
+# spelling of the name (aliases, require() members) still contains.
+ALWAYS = ()
+NEVER = (frozenset(),)
+JS_CALLS = ("CallExpression", "NewExpression")
+PHP_INCLUDES = ("include", "require")
+STRING_QUOTES = ["'", '"']
+
+# Spellings under which a name matched by an AST runner is not in the text
+# as written: JS identifier escapes (\u0065val is eval) and the Kelvin sign,
+# which the PHP runner lower-cases to "k". Files with one run every AST rule.
+ESCAPES = {"javascript": "\\u", "php": "\u212a"}
+
+
+def _truthy(value):
+    """JavaScript truthiness of a rule field, as the runners test it."""
+    return value not in (None, False, 0, "")
+
+
+def _clause(values):
+    """The literals of `values`, lower-cased, or None if one cannot anchor (not a non-empty ASCII string)."""
+    literals = set()
+    for value in values:
+        if not isinstance(value, str) or not value or not value.isascii():
+            return None
+        literals.add(value.lower())
+    return frozenset(literals)
+
+
+def _last_name(name):
+    """"exec" for "child_process.exec", "query" for "pdo->query", "_GET" for "$_GET"."""
+    return re.split(r"\.|->", name)[-1].lstrip("$") if isinstance(name, str) else name
+
+
+def _ast_anchors(rule):
+    if rule["language"] == "php":
+        if rule["nodeType"] == "include":
+            return (_clause(PHP_INCLUDES),)
+        if rule["nodeType"] != "call" or not _truthy(rule.get("calleeName")) or fails_group(rule):
+            return NEVER
+        clause = _clause([rule["calleeName"]])
+        return (clause,) if clause is not None else ALWAYS
+
+    if rule["nodeType"] == "AssignmentExpression":
+        names = [rule.get("calleeName")]
+    elif rule["nodeType"] in JS_CALLS:
+        names = [rule.get("calleeName"), rule.get("objectName")]
+        if _truthy(rule.get("argIsString")):
+            names += STRING_QUOTES    # any call with a string literal first argument
+        sources = rule.get("sources") or []
+        clause = _clause(sources)
+        if clause is None:
+            return ALWAYS
+        names += sources
+    else:
+        return NEVER
+    # Names that are not strings never equal a node's name.
+    names = [name for name in names if isinstance(name, str) and name]
+    clause = _clause(names)
+    if clause is None:
+        return ALWAYS
+    return (clause,) if clause else NEVER
+
+
+def fails_group(rule):
+    """
+    True for a PHP call rule whose calleeName is not a string (e.g. a list):
+    the runner throws on it at the first named call, failing its group. It
+    never fires, but goes wherever its group goes so that stays so.
+    """
+    return (rule["language"] == "php" and rule["type"] in ("ast", "context-ast")
+            and rule["nodeType"] == "call" and _truthy(rule.get("calleeName"))
+            and not isinstance(rule["calleeName"], str))
+
+
+def rule_anchors(rule):
+    """The anchor clauses of one validated rule (see above)."""
+    if rule["type"] in ("regex", "heuristic"):
+        literals = required_literals(rule["pattern"])
+        clause = _clause(literals) if literals else None
+        return (clause,) if clause else ALWAYS
+    if rule["type"] == "taint-ast":
+        clauses = (_clause(map(_last_name, rule["sources"])), _clause(map(_last_name, rule["sinks"])))
+        return tuple(clause for clause in clauses if clause is not None)
+    return _ast_anchors(rule)
+
+
+# ========================
+# Prefilter
+# ========================
+class Candidates:
+    """The rules that may fire on one file; `rule in candidates` tests one. `None` lets every rule through."""
+
+    __slots__ = ("_ids",)
+
+    def __init__(self, ids=None):
+        self._ids = ids
+
+    def __contains__(self, rule):
+        return self._ids is None or id(rule) in self._ids
+
+    def select(self, rules):
+        """The AST rules of a group to run: none if none may fire, else those and the ones that fail it."""
+        if not any(rule in self for rule in rules):
+            return []
+        return [rule for rule in rules if rule in self or fails_group(rule)]
+
+
+class Prefilter:
+    """
+    The anchors of one language's rules. candidates() looks for all their
+    literals in a file at once and returns the rules that may fire on it.
+    """
+
+    def __init__(self, language, rules):
+        self.escape = ESCAPES.get(language)
+        self.anchors = [(rule, rule_anchors(rule)) for rule in rules]
+        self.literals = sorted({literal for _, clauses in self.anchors for clause in clauses for literal in clause})
+        self._binary = [literal.encode("ascii") for literal in self.literals]
+
+    def present(self, text):
+        """
+        (literals found in `text`, whether it holds an escape) for str, bytes
+        or mmap text. Matching follows re.IGNORECASE on that same text, so a
+        rule compiled from the literal cannot match where it is not found.
+        """
+        if not isinstance(text, str):
+            folded = bytes(text).lower()    # ASCII-only, like bytes patterns
+            escape = self.escape.encode("utf-8") if self.escape else None
+            return ({literal for literal, raw in zip(self.literals, self._binary) if raw in folded},
+                    escape is not None and escape in folded)
+        escaped = self.escape is not None and self.escape in text
+        if text.isascii():
+            folded = text.lower()
+            return {literal for literal in self.literals if literal in folded}, escaped
+        # Unicode case folding ("ſ" matches "s"): let the regex engine decide.
+        return {literal for literal in self.literals
+                if re.search(re.escape(literal), text, re.IGNORECASE)}, escaped
+
+    def candidates(self, text):
+        """The Candidates of a file whose regex view is `text`."""
+        present, escaped = self.present(text)
+        return Candidates({
+            id(rule) for rule, clauses in self.anchors
+            if (escaped and rule["type"] not in ("regex", "heuristic"))
+            or all(clause & present for clause in clauses)
+        })
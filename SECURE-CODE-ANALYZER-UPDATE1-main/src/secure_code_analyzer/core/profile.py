@@ -0,0 +1,215 @@
+import heapq
+import json
+import threading
+
+# ========================
+# Profile Settings
+# ========================
+DEFAULT_SLOWEST = 10          # files kept by ScanTimings
+DEFAULT_TOP_RULES = 20        # rules in the --profile table
+# Upper bounds (seconds) of the per-file scan time histogram.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+
+
+# ========================
+# Scan Timings
+# ========================
+class ScanTimings:
+    """
+    Time spent scanning, summed over a scan (or, in serve mode, over the
+    server's lifetime): seconds per stage, the `keep` slowest files with
+    their per-stage times and a per-file latency histogram. add() takes what
+    run_detectors() records for one file: its `timings`, and its `profile`
+    when rules are profiled, which adds per-rule seconds, match counts and
+    bytes scanned. Safe to share between threads.
+    """
+
+    def __init__(self, keep=DEFAULT_SLOWEST):
+        self.keep = keep
+        self.files = 0
+        self.bytes = 0
+        self.seconds = 0.0
+        self.stages = {}
+        self.detectors = {}    # profiled stages: {stage: seconds}
+        self.rules = {}        # profiled rules: {id: {"stage", "seconds", "matches", "files", "bytes"}}
+        self.buckets = [0] * len(LATENCY_BUCKETS)
+        self._slowest = []     # min-heap of (total, order, path, stages)
+        self._lock = threading.Lock()
+
+    def add(self, file_path, stages, profile=None):
+        if not stages:
+            return
+        total = sum(stages.values())
+        with self._lock:
+            self.files += 1
+            self.seconds += total
+            for stage, seconds in stages.items():
+                self.stages[stage] = self.stages.get(stage, 0.0) + seconds
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if total <= bound:
+                    self.buckets[i] += 1
+                    break
+            entry = (total, self.files, file_path, dict(stages))
+            if len(self._slowest) < self.keep:
+                heapq.heappush(self._slowest, entry)
+            elif entry[0] > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+            if profile:
+                self._add_profile(profile)
+
+    def _add_profile(self, profile):
+        size = profile.get("bytes", 0)
+        self.bytes += size
+        for stage, seconds in profile.get("stages", {}).items():
+            self.detectors[stage] = self.detectors.get(stage, 0.0) + seconds
+        for rule_id, (stage, seconds, matches) in profile.get("rules", {}).items():
+            stats = self.rules.setdefault(
+                rule_id, {"stage": stage, "seconds": 0.0, "matches": 0, "files": 0, "bytes": 0})
+            stats["seconds"] += seconds
+            stats["matches"] += matches
+            stats["files"] += 1
+            stats["bytes"] += size
+
+    def merge(self, data):
+        """Add what another ScanTimings collected, given as its to_dict() (e.g. one shard's of a scan)."""
+        with self._lock:
+            for entry in data.get("slowest", []):
+                item = (entry["seconds"], self.files + len(self._slowest) + 1, entry["file"], entry["stages"])
+                if len(self._slowest) < self.keep:
+                    heapq.heappush(self._slowest, item)
+                elif item[0] > self._slowest[0][0]:
+                    heapq.heapreplace(self._slowest, item)
+            self.files += data.get("files", 0)
+            self.bytes += data.get("bytes", 0)
+            self.seconds += data.get("seconds", 0.0)
+            for totals, other in ((self.stages, data.get("stages", {})), (self.detectors, data.get("detectors", {}))):
+                for stage, seconds in other.items():
+                    totals[stage] = totals.get(stage, 0.0) + seconds
+            for rule_id, other in data.get("rules", {}).items():
+                stats = self.rules.setdefault(
+                    rule_id, {"stage": other["stage"], "seconds": 0.0, "matches": 0, "files": 0, "bytes": 0})
+                for field in ("seconds", "matches", "files", "bytes"):
+                    stats[field] += other[field]
+            for i, count in enumerate(data.get("buckets", [])):
+                self.buckets[i] += count
+
+    def slowest(self):
+        """[(path, total seconds, {stage: seconds})], slowest first."""
+        with self._lock:
+            entries = sorted(self._slowest, reverse=True)
+        return [(path, total, stages) for total, _, path, stages in entries]
+
+    def top_rules(self, limit=DEFAULT_TOP_RULES):
+        """[(rule id, stats)] by time spent, most expensive first."""
+        with self._lock:
+            ranked = sorted(self.rules.items(), key=lambda item: -item[1]["seconds"])
+        return [(rule_id, dict(stats)) for rule_id, stats in ranked[:limit]]
+
+    def summary_lines(self):
+        """Human-readable summary, as the CLI prints it."""
+        if not self.files:
+            return []
+        stages = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in
+                           sorted(self.stages.items(), key=lambda item: -item[1]))
+        lines = [f"Time by stage: {stages}", "Slowest files:"]
+        for path, total, per_stage in self.slowest():
+            detail = ", ".join(f"{stage} {seconds:.2f}s" for stage, seconds in per_stage.items())
+            lines.append(f"  {total:7.2f}s  {path} ({detail})")
+        return lines
+
+    def profile_lines(self, limit=DEFAULT_TOP_RULES):
+        """The --profile table: time per detector stage, then the most expensive rules."""
+        if not self.detectors:
+            return []
+        spent = sum(self.detectors.values()) or 1.0
+        lines = ["", "=== PROFILE ===", f"{'stage':<14} {'seconds':>9} {'share':>7}"]
+        for stage, seconds in sorted(self.detectors.items(), key=lambda item: -item[1]):
+            lines.append(f"{stage:<14} {seconds:9.3f} {seconds / spent:7.1%}")
+        lines.append("")
+        lines.append(f"{'rule':<32} {'stage':<12} {'seconds':>9} {'matches':>8} {'files':>6} {'MB/s':>8}")
+        for rule_id, stats in self.top_rules(limit):
+            rate = stats["bytes"] / 1024 / 1024 / stats["seconds"] if stats["seconds"] else 0.0
+            lines.append(f"{rule_id:<32} {stats['stage']:<12} {stats['seconds']:9.3f} "
+                         f"{stats['matches']:8} {stats['files']:6} {rate:8.1f}")
+        return lines
+
+    def to_dict(self):
+        """Everything collected, for profile.json."""
+        with self._lock:
+            data = {
+                "files": self.files,
+                "bytes": self.bytes,
+                "seconds": self.seconds,
+                "stages": dict(self.stages),
+                "detectors": dict(self.detectors),
+                "rules": {rule_id: dict(stats) for rule_id, stats in self.rules.items()},
+                "buckets": list(self.buckets),
+            }
+        data["slowest"] = [{"file": path, "seconds": total, "stages": stages}
+                           for path, total, stages in self.slowest()]
+        return data
+
+    def save(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# ========================
+# Prometheus Exposition
+# ========================
+def _label(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def prometheus_lines(timings, gauges=None):
+    """
+    `timings` in the Prometheus text format (version 0.0.4), plus `gauges`
+    ({name: (help, label name, {label value: value})}) such as job counts.
+    """
+    data = timings.to_dict()
+    with timings._lock:
+        buckets = list(timings.buckets)
+    lines = [
+        "# HELP sca_files_scanned_total Files scanned (cache hits excluded).",
+        "# TYPE sca_files_scanned_total counter",
+        f"sca_files_scanned_total {data['files']}",
+        "# HELP sca_bytes_scanned_total Bytes of source scanned with rule profiling on.",
+        "# TYPE sca_bytes_scanned_total counter",
+        f"sca_bytes_scanned_total {data['bytes']}",
+        "# HELP sca_stage_seconds_total Seconds spent per detector stage.",
+        "# TYPE sca_stage_seconds_total counter",
+    ]
+    for stage, seconds in sorted(data["stages"].items()):
+        lines.append(f'sca_stage_seconds_total{{stage="{_label(stage)}"}} {seconds:.6f}')
+    if data["detectors"]:
+        lines += ["# HELP sca_detector_seconds_total Seconds per detector with rule profiling on.",
+                  "# TYPE sca_detector_seconds_total counter"]
+        for stage, seconds in sorted(data["detectors"].items()):
+            lines.append(f'sca_detector_seconds_total{{detector="{_label(stage)}"}} {seconds:.6f}')
+
+    lines += ["# HELP sca_file_scan_seconds Time to scan one file.",
+              "# TYPE sca_file_scan_seconds histogram"]
+    cumulative = 0
+    for bound, count in zip(LATENCY_BUCKETS, buckets):
+        cumulative += count
+        lines.append(f'sca_file_scan_seconds_bucket{{le="{bound}"}} {cumulative}')
+    lines.append(f'sca_file_scan_seconds_bucket{{le="+Inf"}} {data["files"]}')
+    lines.append(f"sca_file_scan_seconds_sum {data['seconds']:.6f}")
+    lines.append(f"sca_file_scan_seconds_count {data['files']}")
+
+    if data["rules"]:
+        lines += ["# HELP sca_rule_seconds_total Seconds spent evaluating each rule.",
+                  "# TYPE sca_rule_seconds_total counter"]
+        for rule_id, stats in sorted(data["rules"].items()):
+            lines.append(f'sca_rule_seconds_total{{rule="{_label(rule_id)}",stage="{_label(stats["stage"])}"}} '
+                         f'{stats["seconds"]:.6f}')
+        lines += ["# HELP sca_rule_matches_total Raw matches per rule, before deduplication.",
+                  "# TYPE sca_rule_matches_total counter"]
+        for rule_id, stats in sorted(data["rules"].items()):
+            lines.append(f'sca_rule_matches_total{{rule="{_label(rule_id)}"}} {stats["matches"]}')
+
+    for name, (help_text, label, values) in (gauges or {}).items():
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        for key, value in sorted(values.items()):
+            lines.append(f'{name}{{{label}="{_label(key)}"}} {value}')
+    return lines
@@ -0,0 +1,139 @@
+import atexit
+import multiprocessing
+import os
+import threading
+
+from .budget import BudgetExceeded
+from .rules import RuleSet
+from .source import SourceFile
+
+# ========================
+# Killable Regex Worker
+# ========================
+# Python cannot interrupt a regex that backtracks catastrophically, so under
+# a budget the regex stage runs in a child process, like the AST stage runs
+# in Node: on a timeout the child is killed and the next file gets a fresh
+# one. The child memory-maps the file itself; only match offsets come back.
+
+
+def _limit_memory(memory_mb):
+    """Let this process's heap grow by at most `memory_mb` MiB, where the platform allows it."""
+    try:
+        import resource
+        with open("/proc/self/status") as f:
+            used = next(int(line.split()[1]) * 1024 for line in f if line.startswith("VmData:"))
+        limit = used + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_DATA, (limit, limit))
+    except (ImportError, OSError, ValueError, StopIteration):
+        pass
+
+
+def _serve(conn, rules_path, regex_engine, memory_mb):
+    ruleset = RuleSet(rules_path, regex_engine)
+    if memory_mb:
+        _limit_memory(memory_mb)
+    while True:
+        try:
+            language, path, text, profile = conn.recv()
+        except (EOFError, OSError):
+            return
+        seconds = [] if profile else None
+        try:
+            if text is None:
+                with SourceFile(path) as source:
+                    view = source.view() if ruleset.scans_bytes(language) else source.text()
+                    reply = ("ok", (ruleset.pattern_starts(language, view, seconds), seconds))
+            else:
+                reply = ("ok", (ruleset.pattern_starts(language, text, seconds), seconds))
+        except MemoryError:
+            conn.send(("memory", None))
+            return    # heap state is unknown after a MemoryError: start over
+        except Exception as e:
+            reply = ("error", str(e))
+        conn.send(reply)
+
+
+class RegexWorker:
+    """
+    A child process evaluating one rule set's regex/heuristic rules. The
+    process is (re)started lazily and killed when a request runs out of time
+    or memory, raising BudgetExceeded.
+    """
+
+    def __init__(self, ruleset, memory_mb=None):
+        self.key = (ruleset.path, ruleset.regex_engine, ruleset.digest)
+        self.memory_mb = memory_mb
+        self.proc = None
+        self.conn = None
+        self.restarts = 0
+
+    def _start(self):
+        self.conn, child = multiprocessing.Pipe()
+        self.proc = multiprocessing.Process(
+            target=_serve, args=(child, self.key[0], self.key[1], self.memory_mb), daemon=True,
+        )
+        self.proc.start()
+        child.close()
+
+    def pattern_starts(self, language, path=None, text=None, timeout=None, profile=False):
+        """
+        RuleSet.pattern_starts() for the file at `path` (scanned the way
+        run_detectors() scans a SourceFile) or for `text`, as (starts,
+        seconds per rule if `profile` else None).
+        """
+        if self.proc is None or not self.proc.is_alive():
+            self._start()
+        try:
+            self.conn.send((language, path, text, profile))
+            ready = self.conn.poll(timeout)
+            status, value = self.conn.recv() if ready else ("timeout", None)
+        except (EOFError, OSError) as e:
+            status, value = "crashed", e
+        if status == "ok":
+            return value
+        self.close()
+        self.restarts += 1
+        if status == "timeout":
+            raise BudgetExceeded("regex", f"over {timeout:g}s")
+        if status == "memory":
+            raise BudgetExceeded("regex", f"over {self.memory_mb} MB")
+        raise RuntimeError(f"regex worker failed: {value}")
+
+    def close(self):
+        if self.proc is None:
+            return
+        self.conn.close()
+        if self.proc.is_alive():
+            self.proc.kill()
+        self.proc.join()
+        self.proc = None
+        self.conn = None
+
+
+_WORKERS = {}
+_WORKERS_LOCK = threading.Lock()
+
+
+def regex_stage(ruleset, language, path=None, text=None, timeout=None, memory_mb=None, profile=False):
+    """pattern_starts() in this process's RegexWorker for `ruleset`, started on first use."""
+    key = (ruleset.path, ruleset.regex_engine, ruleset.digest, memory_mb, os.getpid())
+    with _WORKERS_LOCK:
+        idle = _WORKERS.setdefault(key, [])
+        worker = idle.pop() if idle else RegexWorker(ruleset, memory_mb)
+    try:
+        return worker.pattern_starts(language, path, text, timeout, profile)
+    finally:
+        with _WORKERS_LOCK:
+            _WORKERS.setdefault(key, []).append(worker)
+
+
+def shutdown_workers():
+    with _WORKERS_LOCK:
+        for key, idle in _WORKERS.items():
+            if key[-1] == os.getpid():
+                for worker in idle:
+                    worker.close()
+        _WORKERS.clear()
+
+
+atexit.register(shutdown_workers)
@@ -1,9 +1,14 @@
 import os
 import json
 import re
+import hashlib
+import shutil
+import tempfile
 from datetime import datetime
 from html import escape
 
+from .findings import CWE, OWASP
+
 # ========================
 # Severity Colors
 # ========================
@@ -31,9 +36,89 @@ def save_report_to_backend_and_frontend(content: str, backend_path: str, filenam
     print(f"[+] Report also saved to frontend: {frontend_path}")
 
 
+def publish_report(backend_path: str, filename: str):
+    """Copy a report already written to `backend_path` into the frontend folder."""
+    print(f"[+] Report saved to backend: {backend_path}")
+    frontend_path = os.path.join(FRONTEND_REPORTS_DIR, filename)
+    os.makedirs(os.path.dirname(frontend_path), exist_ok=True)
+    shutil.copyfile(backend_path, frontend_path)
+    print(f"[+] Report also saved to frontend: {frontend_path}")
+
+
+def _open_report(out_path):
+    os.makedirs(os.path.dirname(os.path.abspath(out_path)), exist_ok=True)
+    return open(out_path, "w", encoding="utf-8")
+
+
+# ========================
+# JSON / JSON Lines
+# ========================
+
+def write_json_array(issues, f):
+    """
+    Write `issues` (any iterable) to `f` one element at a time. The output is
+    byte-identical to json.dump(list(issues), f, indent=2).
+    """
+    count = 0
+    for issue in issues:
+        item = json.dumps(issue, indent=2).replace("\n", "\n  ")
+        f.write(("[\n  " if count == 0 else ",\n  ") + item)
+        count += 1
+    f.write("\n]" if count else "[]")
+    return count
+
+
 def generate_json_report(issues, out_path):
-    content = json.dumps(issues, indent=2)
-    save_report_to_backend_and_frontend(content, out_path, "report.json")
+    """Stream `issues` into a JSON array report; returns the number written."""
+    with _open_report(out_path) as f:
+        count = write_json_array(issues, f)
+    publish_report(out_path, "report.json")
+    return count
+
+
+class JsonLinesWriter:
+    """Append issues to a JSON Lines file, one object per line, as they arrive."""
+
+    def __init__(self, out_path):
+        self.path = out_path
+        self.count = 0
+        self._f = _open_report(out_path)
+
+    def write(self, issue):
+        self._f.write(json.dumps(issue, ensure_ascii=False))
+        self._f.write("\n")
+        self.count += 1
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def generate_jsonl_report(issues, out_path):
+    """Write `issues` (any iterable) as JSON Lines; returns the number written."""
+    with JsonLinesWriter(out_path) as writer:
+        for issue in issues:
+            writer.write(issue)
+    return writer.count
+
+
+def iter_jsonl(path):
+    """Yield the issues of a JSON Lines report one at a time."""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+# ========================
+# HTML
+# ========================
+HTML_CHUNK_ROWS = 500
 
 
 def _sev_class(sev):
@@ -54,99 +139,54 @@ def dedup_text(text):
     return "; ".join(dict.fromkeys(parts))
 
 
-def generate_html_report(issues, out_path):
-    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
-
-    # --- Deduplicate issues ---
-    unique_keys = set()
-    deduped_issues = []
-    for i in issues:
-        key = (
-            i.get("file", ""),
-            i.get("line", 0),
-            i.get("severity", "").upper(),
-            dedup_text(i.get("message", "")),
-            dedup_text(i.get("suggestion", "")),
-        )
-        if key not in unique_keys:
-            unique_keys.add(key)
-            deduped_issues.append(i)
-
-    # --- OWASP normalization & dedup ---
-    owasp_tags = set()
-    for i in deduped_issues:
-        tags = i.get("owasp", "").split(",")
-        for t in tags:
-            if t.strip():
-                t = t.strip().replace(" ", "").replace("–", "-").replace("—", "-")
-                m = re.match(r"A(\d+):?(\d{4})?-?(.*)", t, flags=re.I)
-                if m:
-                    num, year, rest = m.groups()
-                    num = num.zfill(2)
-                    year = year if year else "2021"
-                    rest = (rest or "").lstrip("-")
-                    norm = f"A{num}:{year}"
-                    if rest:
-                        norm += f"-{rest}"
-                    owasp_tags.add(norm)
-                else:
-                    owasp_tags.add(t)
-
-    def sort_owasp(tag):
-        m = re.match(r"A(\d+):(\d{4})(?:-(.*))?", tag)
-        if m:
-            num, year, rest = m.groups()
-            return (int(num), year, rest or "")
-        return (999, "9999", tag)
-
-    owasp_sorted = sorted(owasp_tags, key=sort_owasp)
-    owasp_opts = "".join([f"<option value='{t}'>{t}</option>" for t in owasp_sorted])
-
-    # --- CWE normalization & dedup ---
-    cwe_tags = set()
-    for i in deduped_issues:
-        tags = i.get("cwe", "").split(",")
-        for t in tags:
-            if t.strip():
-                t = t.strip().upper()
-                m = re.match(r"CWE-?(\d+)", t)
-                if m:
-                    cwe_tags.add(f"CWE-{int(m.group(1))}")
-                else:
-                    cwe_tags.add(t)
-
-    cwe_opts = "".join([f"<option value='{t}'>{t}</option>" for t in sorted(cwe_tags)])
-
-    # --- Render issues into rows ---
-    rows = []
-    for i in deduped_issues:
-        sev = escape(i.get("severity", ""))
-        file = escape(i.get("file", ""))
-        line = i.get("line", 0)
-        category = escape(i.get("category", ""))
-        message = escape(dedup_text(i.get("message", "")))
-        suggestion = escape(dedup_text(i.get("suggestion", "")))
-        snippet = escape(i.get("snippet", ""))
-        detected_by = escape(i.get("detected_by", ""))
-        rule_id = escape(i.get("id") or i.get("rule", "-"))
-        owasp = escape(i.get("owasp", ""))
-        cwe = escape(i.get("cwe", ""))
-
-        extra_tags = []
-        if owasp:
-            for tag in sorted(set(owasp.split(","))):
-                if tag.strip():
-                    extra_tags.append(f"<span class='tag owasp'>{escape(tag)}</span>")
-        if cwe:
-            for tag in sorted(set(cwe.split(","))):
-                if tag.strip():
-                    extra_tags.append(f"<span class='tag cwe'>{escape(tag)}</span>")
-
-        rule_cell = rule_id
-        if extra_tags:
-            rule_cell += "<br>" + " ".join(extra_tags)
-
-        rows.append(f"""
+def _sort_owasp(tag):
+    m = re.match(r"A(\d+):(\d{4})(?:-(.*))?", tag)
+    if m:
+        num, year, rest = m.groups()
+        return (int(num), year, rest or "")
+    return (999, "9999", tag)
+
+
+def _dedup_key(i):
+    key = (
+        i.get("file", ""),
+        i.get("line", 0),
+        i.get("severity", "").upper(),
+        dedup_text(i.get("message", "")),
+        dedup_text(i.get("suggestion", "")),
+    )
+    # 16-byte digests keep the seen-set small on very large scans
+    return hashlib.blake2b(repr(key).encode("utf-8"), digest_size=16).digest()
+
+
+def _render_row(i):
+    sev = escape(i.get("severity", ""))
+    file = escape(i.get("file", ""))
+    line = i.get("line", 0)
+    category = escape(i.get("category", ""))
+    message = escape(dedup_text(i.get("message", "")))
+    suggestion = escape(dedup_text(i.get("suggestion", "")))
+    snippet = escape(i.get("snippet", ""))
+    detected_by = escape(i.get("detected_by", ""))
+    rule_id = escape(i.get("id") or i.get("rule", "-"))
+    owasp = escape(i.get("owasp", ""))
+    cwe = escape(i.get("cwe", ""))
+
+    extra_tags = []
+    if owasp:
+        for tag in sorted(set(owasp.split(","))):
+            if tag.strip():
+                extra_tags.append(f"<span class='tag owasp'>{escape(tag)}</span>")
+    if cwe:
+        for tag in sorted(set(cwe.split(","))):
+            if tag.strip():
+                extra_tags.append(f"<span class='tag cwe'>{escape(tag)}</span>")
+
+    rule_cell = rule_id
+    if extra_tags:
+        rule_cell += "<br>" + " ".join(extra_tags)
+
+    return f"""
           <tr class="{_sev_class(sev)}">
             <td>{file}</td>
             <td style="text-align:right">{line}</td>
@@ -158,13 +198,11 @@ def generate_html_report(issues, out_path):
             <td>{suggestion}</td>
             <td>{detected_by}</td>
           </tr>
-        """)
+        """
 
-    json_content = json.dumps(deduped_issues, indent=2)
-    json_content_js = json_content.replace("\\", "\\\\").replace("`", "\\`")
 
-    # --- Final HTML ---
-    html = f"""<!DOCTYPE html>
+def _html_head(now, owasp_opts, cwe_opts, json_href):
+    return f"""<!DOCTYPE html>
 <html lang="en">
 <head>
 <meta charset="utf-8">
@@ -221,8 +259,12 @@ function downloadContent(filename, content, type) {{
   document.body.removeChild(link);
 }}
 function downloadJSON() {{
-  const content = `{json_content_js}`;
-  downloadContent("report.json", content, "application/json");
+  const link = document.createElement('a');
+  link.href = {json.dumps(json_href)};
+  link.download = "report.json";
+  document.body.appendChild(link);
+  link.click();
+  document.body.removeChild(link);
 }}
 function downloadHTML() {{
   const content = document.documentElement.outerHTML;
@@ -276,11 +318,51 @@ function downloadHTML() {{
     </tr>
   </thead>
   <tbody id="tbody">
-    {''.join(rows)}
+    """
+
+
+_HTML_TAIL = """
   </tbody>
 </table>
 </body>
 </html>
 """
 
-    save_report_to_backend_and_frontend(html, out_path, "report.html")
+
+def generate_html_report(issues, out_path, json_href="report.json"):
+    """
+    Stream `issues` (any iterable) into the HTML report. Rows are rendered
+    in chunks to a temporary file while the filter options are collected,
+    then copied after the page header; the JSON download links to
+    `json_href` instead of embedding a copy of the findings.
+    """
+    now = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S UTC")
+    seen = set()
+    owasp_bits = cwe_bits = 0
+
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as rows:
+        chunk = []
+        for i in issues:
+            key = _dedup_key(i)
+            if key in seen:
+                continue
+            seen.add(key)
+            owasp_bits |= OWASP.bits(i.get("owasp", ""))
+            cwe_bits |= CWE.bits(i.get("cwe", ""))
+            chunk.append(_render_row(i))
+            if len(chunk) >= HTML_CHUNK_ROWS:
+                rows.write("".join(chunk))
+                chunk = []
+        rows.write("".join(chunk))
+        rows.seek(0)
+
+        owasp_tags = sorted(OWASP.tag_list(owasp_bits), key=_sort_owasp)
+        owasp_opts = "".join([f"<option value='{t}'>{t}</option>" for t in owasp_tags])
+        cwe_opts = "".join([f"<option value='{t}'>{t}</option>" for t in sorted(CWE.tag_list(cwe_bits))])
+        with _open_report(out_path) as f:
+            f.write(_html_head(now, owasp_opts, cwe_opts, json_href))
+            shutil.copyfileobj(rows, f)
+            f.write(_HTML_TAIL)
+
+    publish_report(out_path, "report.html")
+    return len(seen)
@@ -0,0 +1,247 @@
+import hashlib
+import json
+import os
+import re
+import time
+
+from .findings import rule_info
+from .lexer import TEXT_VIEWS, mask
+from .matcher import CombinedMatcher
+from .prefilter import Candidates, Prefilter
+
+# ========================
+# Rule Schema
+# ========================
+RULES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(__file__)),
+    "rules",
+    "rules.json"
+)
+
+LANGUAGE_EXTENSIONS = {
+    ".js": "javascript",
+    ".php": "php",
+}
+
+RULE_TYPES = ("regex", "heuristic", "ast", "context-ast", "taint-ast")
+PATTERN_TYPES = ("regex", "heuristic")
+
+# "combined": one automaton per language; "per-rule": one finditer per rule.
+REGEX_ENGINES = ("combined", "per-rule")
+DEFAULT_REGEX_ENGINE = "combined"
+
+REQUIRED_FIELDS = ("id", "language", "type", "severity", "category", "message", "suggestion")
+TYPE_FIELDS = {
+    "regex": ("pattern",),
+    "heuristic": ("pattern",),
+    "ast": ("nodeType",),
+    "context-ast": ("nodeType",),
+    "taint-ast": ("sources", "sinks"),
+}
+
+
+def language_for(file_path):
+    """Return the rule language for a file path, or None if it is not scanned."""
+    return LANGUAGE_EXTENSIONS.get(os.path.splitext(file_path)[1])
+
+
+def validate_rule(rule, index):
+    """Raise ValueError if `rule` does not follow the rules.json schema."""
+    if not isinstance(rule, dict):
+        raise ValueError(f"rule #{index}: expected an object, got {type(rule).__name__}")
+    label = f"rule #{index} ({rule.get('id', '?')})"
+
+    missing = [f for f in REQUIRED_FIELDS if not rule.get(f)]
+    if missing:
+        raise ValueError(f"{label}: missing field(s) {', '.join(missing)}")
+    if rule["language"] not in LANGUAGE_EXTENSIONS.values():
+        raise ValueError(f"{label}: unknown language {rule['language']!r}")
+    if rule["type"] not in RULE_TYPES:
+        raise ValueError(f"{label}: unknown type {rule['type']!r}")
+
+    missing = [f for f in TYPE_FIELDS[rule["type"]] if not rule.get(f)]
+    if missing:
+        raise ValueError(f"{label}: {rule['type']} rule needs {', '.join(missing)}")
+    for field in ("sources", "sinks"):
+        if field in rule and not isinstance(rule[field], list):
+            raise ValueError(f"{label}: {field} must be a list")
+    if rule.get("text", "raw") not in TEXT_VIEWS:
+        raise ValueError(f"{label}: text must be one of {', '.join(TEXT_VIEWS)}")
+
+
+# ========================
+# Rule Set
+# ========================
+class RuleSet:
+    """
+    Rules from a rules.json file, validated, grouped by (language, type) and
+    with every regex/heuristic pattern compiled once. Build it once and pass
+    it to the scanner; call reload() to pick up an updated rule pack.
+    `digest` is the SHA-256 of the loaded rule file. With `prefilter`,
+    candidates() rules out the rules whose literals a file lacks. A pattern
+    rule with "text": "masked" runs on the file's masked view (lexer.py),
+    which has its comments and literals blanked out; the others on the file.
+    """
+
+    def __init__(self, path=RULES_PATH, regex_engine=DEFAULT_REGEX_ENGINE, prefilter=True):
+        if regex_engine not in REGEX_ENGINES:
+            raise ValueError(f"unknown regex engine {regex_engine!r}")
+        self.path = path
+        self.regex_engine = regex_engine
+        self.prefilter = prefilter
+        self.rules = []
+        self.digest = None
+        self._groups = {}
+        self._compiled = {}
+        self._matchers = {}
+        self._binary = {}
+        self._prefilters = {}
+        self.reload()
+
+    def reload(self):
+        """Re-read and re-validate the rule file; the old rules stay active on error."""
+        with open(self.path, "rb") as f:
+            raw = f.read()
+        rules = json.loads(raw.decode("utf-8"))
+        if not isinstance(rules, list):
+            raise ValueError(f"{self.path}: expected a list of rules")
+
+        groups = {}
+        compiled = {}
+        for index, rule in enumerate(rules):
+            validate_rule(rule, index)
+            rule_info(rule)    # interned once; findings of the rule share it
+            key = (rule["language"], rule["type"])
+            groups.setdefault(key, []).append(rule)
+            if rule["type"] in PATTERN_TYPES:
+                try:
+                    pattern = re.compile(rule["pattern"], flags=re.IGNORECASE)
+                except re.error as e:
+                    raise ValueError(f"rule #{index} ({rule['id']}): bad pattern: {e}") from e
+                compiled.setdefault(key, []).append((rule, pattern))
+
+        matchers = {}
+        for language in LANGUAGE_EXTENSIONS.values():
+            entries = [
+                (rule, rule_type, pattern)
+                for rule_type in PATTERN_TYPES
+                for rule, pattern in compiled.get((language, rule_type), [])
+            ]
+            if entries:
+                matchers[language] = (entries, self._view_matchers(entries))
+
+        self.rules, self._groups, self._compiled = rules, groups, compiled
+        self.digest = hashlib.sha256(raw).hexdigest()
+        self._matchers = matchers
+        self._binary = {}
+        self._prefilters = {
+            language: Prefilter(language, [rule for rule in rules if rule["language"] == language])
+            for language in LANGUAGE_EXTENSIONS.values()
+        }
+        return self
+
+    def get(self, language, rule_type):
+        """Rules of one type for one language, in rules.json order."""
+        return self._groups.get((language, rule_type), [])
+
+    def compiled(self, language, rule_type):
+        """(rule, compiled pattern) pairs for a regex/heuristic group."""
+        return self._compiled.get((language, rule_type), [])
+
+    def pattern_hits(self, language, text):
+        """
+        Yield (rule, rule_type, match start offsets) for every regex and
+        heuristic rule of `language`: regex rules first, each in rules.json
+        order. Both engines produce identical results. `text` may be bytes
+        or an mmap if scans_bytes(language); offsets are then byte offsets.
+        """
+        entries, _ = self._matchers.get(language, ([], ()))
+        for (rule, rule_type, _), starts in zip(entries, self.pattern_starts(language, text)):
+            yield rule, rule_type, starts
+
+    def candidates(self, language, text):
+        """
+        The rules of `language` that may fire on a file whose regex view is
+        `text` (see prefilter.py), as a Candidates; all of them without the
+        prefilter.
+        """
+        if not self.prefilter or language not in self._prefilters:
+            return Candidates()
+        return self._prefilters[language].candidates(text)
+
+    def pattern_starts(self, language, text, seconds=None, candidates=None):
+        """
+        pattern_hits() without the rules: one list of start offsets per rule.
+        The masked view of `text` is built once, if a masked rule is to run.
+        Given a `seconds` list, each rule is matched on its own and the time
+        it took appended, for profiling. Rules not in `candidates` are
+        not matched when that saves work (they cannot match).
+        """
+        entries, views = self._matchers.get(language, ([], ()))
+        if not isinstance(text, str):
+            entries, views = self._binary_matcher(language)
+        all_starts = [[] for _ in entries]
+        spent = [0.0 for _ in entries]
+        for view, positions, matcher in views:
+            active = [i for i in positions if candidates is None or entries[i][0] in candidates]
+            if not active:
+                continue
+            subject = text if view == "raw" else mask(text, language)
+            if seconds is not None:
+                for i in active:
+                    start = time.perf_counter()
+                    all_starts[i] = [m.start() for m in entries[i][2].finditer(subject)]
+                    spent[i] = time.perf_counter() - start
+            elif matcher is not None:
+                for i, starts in zip(positions, matcher.scan(subject)):
+                    all_starts[i] = starts
+            else:
+                for i in active:
+                    all_starts[i] = [m.start() for m in entries[i][2].finditer(subject)]
+        if seconds is not None:
+            seconds.extend(spent)
+        return all_starts
+
+    def pattern_rules(self, language):
+        """(rule, rule_type) in pattern_hits() order."""
+        entries, _ = self._matchers.get(language, ([], ()))
+        return [(rule, rule_type) for rule, rule_type, _ in entries]
+
+    def scans_bytes(self, language):
+        """True if every pattern of `language` also compiles to scan raw bytes."""
+        return self._binary_matcher(language) is not None
+
+    def _view_matchers(self, entries, binary=False):
+        """
+        (view, positions in `entries`, matcher) for each text view some of
+        the entries run on; the matcher is None for the per-rule engine.
+        """
+        views = []
+        for view in TEXT_VIEWS:
+            positions = [i for i, (rule, _, _) in enumerate(entries) if rule.get("text", "raw") == view]
+            if positions:
+                matcher = None
+                if self.regex_engine == "combined":
+                    matcher = CombinedMatcher((entries[i][2] for i in positions), binary=binary)
+                views.append((view, positions, matcher))
+        return views
+
+    def _binary_matcher(self, language):
+        """pattern_hits() entries and view matchers for bytes-like text, compiled on first use."""
+        if language not in self._binary:
+            entries, _ = self._matchers.get(language, ([], ()))
+            try:
+                binary = [
+                    (rule, rule_type, re.compile(pattern.pattern.encode("utf-8"), flags=re.IGNORECASE))
+                    for rule, rule_type, pattern in entries
+                ]
+                self._binary[language] = (binary, self._view_matchers(entries, binary=True))
+            except re.error:    # e.g. \u escapes, which bytes patterns lack
+                self._binary[language] = None
+        return self._binary[language]
+
+    def __len__(self):
+        return len(self.rules)
+
+    def __iter__(self):
+        return iter(self.rules)
@@ -1,23 +1,376 @@
+import collections
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 from .severity import normalize_severity, severity_worse_or_equal, sort_by_severity
-from .detectors import detect_issues
+from .detectors import (
+    detect_issues, detector_steps, file_error_issue, resume_detectors, run_ast_batch, run_detectors, DEFAULT_RULESET,
+)
+from .findings import FindingBatch
+from .rules import RuleSet
+from .cache import cache_key
+from .crossfile import load_summary
+from .source import SourceFile
+from .walker import iter_files
+
 
+def scan_error_issue(file_path, error):
+    return {
+        "id": "SCAN_ERROR",
+        "file": file_path,
+        "line": 0,
+        "severity": "LOW",
+        "category": "Scanner",
+        "message": f"Error scanning file: {error}",
+        "suggestion": "Re-run the scan; report the error if it persists.",
+        "owasp": "",
+        "cwe": "",
+        "snippet": "",
+        "detected_by": "System",
+    }
 
-def scan_file(file_path):
+
+def scan_file(file_path, ruleset=None, cache=None, budget=None, timings=None, profile=None):
     """
     Scan a file for security issues using regex + AST detectors.
     Always returns a list of issues (possibly empty).
+    With a ResultCache, a file whose content and rule pack were seen before
+    is not scanned again; its cached issues are labelled with `file_path`.
+    A scanned file's taint summary is cached alongside for the cross-file pass.
+    `budget`, `timings` and `profile` are passed on to run_detectors().
+    """
+    return list(scan_batch(file_path, ruleset, cache, budget, timings, profile))
+
+
+def scan_batch(file_path, ruleset=None, cache=None, budget=None, timings=None, profile=None, summary=None):
+    """
+    scan_file() as a FindingBatch, the compact form scans pass around. A
+    `summary` dict is filled with the file's taint summary from the same
+    scan (or the cache), so the cross-file pass need not run it again.
+    """
+    try:
+        if cache is None:
+            return FindingBatch.of(detect_issues(file_path, ruleset, summary=summary, budget=budget,
+                                                 timings=timings, profile=profile))
+        return _scan_cached(file_path, ruleset or DEFAULT_RULESET, cache, budget, timings, profile, summary)
+    except Exception as e:
+        return FindingBatch.of([scan_error_issue(file_path, e)])
+
+
+def _scan_cached(file_path, ruleset, cache, budget=None, timings=None, profile=None, wanted=None):
+    try:
+        source = SourceFile(file_path)
+    except OSError as e:
+        return FindingBatch.of([file_error_issue(file_path, e)])
+
+    with source:
+        key = cache_key(source.data, ruleset.digest)
+        cached = cache.get(key)
+        cached_summary = cache.get_summary(key) if cached is not None and wanted is not None else None
+        # A hit is only of use without its summary if none is wanted.
+        if cached is not None and (wanted is None or cached_summary is not None):
+            if cached_summary:
+                wanted.update(cached_summary)
+            # Entries written before batches were cached are issue lists.
+            batch = FindingBatch.of(cached) if isinstance(cached, list) else FindingBatch.from_json(cached)
+            batch.relabel(file_path)
+            return batch
+
+        errors, summary = [], {}
+        batch = FindingBatch.of(run_detectors(source, file_path, ruleset, errors, summary, budget, timings,
+                                              profile))
+    if wanted is not None:
+        wanted.update(summary)
+    # A crashed or timed-out AST worker is not a property of the file.
+    if not any(e["retryable"] for e in errors):
+        cache.put(key, batch.to_json())
+        cache.put_summary(key, summary)
+    return batch
+
+
+# ========================
+# Parallel scanning
+# ========================
+_worker_ruleset = None
+_worker_cache = None
+_worker_budget = None
+_worker_profile = False
+_worker_summaries = False
+
+
+def _init_worker(rules_path, regex_engine, cache=None, budget=None, profile=False, prefilter=True,
+                 summaries=False):
+    """Load and compile the rule set once per worker process."""
+    global _worker_ruleset, _worker_cache, _worker_budget, _worker_profile, _worker_summaries
+    if (rules_path, regex_engine, prefilter) == (DEFAULT_RULESET.path, DEFAULT_RULESET.regex_engine,
+                                                 DEFAULT_RULESET.prefilter):
+        _worker_ruleset = DEFAULT_RULESET
+    else:
+        _worker_ruleset = RuleSet(rules_path, regex_engine, prefilter)
+    _worker_cache = cache
+    _worker_budget = budget
+    _worker_profile = profile
+    _worker_summaries = summaries
+
+
+def _scan_in_worker(file_path):
+    """
+    Scan one file; also return the cache hits/misses it caused, its stage
+    timings, profile and (if asked for) taint summary.
+    """
+    cache, timings = _worker_cache, {}
+    profile = {} if _worker_profile else None
+    summary = {} if _worker_summaries else None
+    hits, misses = (cache.hits, cache.misses) if cache is not None else (0, 0)
+    issues = scan_batch(file_path, _worker_ruleset, cache, _worker_budget, timings, profile, summary)
+    if cache is None:
+        return issues, 0, 0, timings, profile, summary
+    return issues, cache.hits - hits, cache.misses - misses, timings, profile, summary
+
+
+def _summarize_in_worker(file_path):
+    try:
+        return load_summary(file_path, _worker_ruleset, _worker_cache)
+    except Exception:
+        return None
+
+
+def summarize_files(file_paths, jobs=1, ruleset=None, cache=None):
+    """
+    {file_path: taint summary} of files the cross-file pass needs but the
+    scan did not cover, from the cache or one taint-only AST round trip
+    each, spread over `jobs` processes. Files without a summary are left out.
     """
+    ruleset = ruleset or DEFAULT_RULESET
+    file_paths = list(file_paths)
+    summaries = {}
+    if jobs > 1 and len(file_paths) > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=min(jobs, len(file_paths)), initializer=_init_worker,
+            initargs=(ruleset.path, ruleset.regex_engine, cache, None, False, ruleset.prefilter),
+        )
+        try:
+            for path, summary in zip(file_paths, executor.map(_summarize_in_worker, file_paths, chunksize=4)):
+                summaries[path] = summary
+        except BrokenProcessPool:
+            pass    # the files not summarised yet are done below, in this process
+        finally:
+            executor.shutdown(wait=True)
+    for path in file_paths[len(summaries):]:
+        summaries[path] = load_summary(path, ruleset, cache)
+    return {path: summary for path, summary in summaries.items() if summary}
+
+
+def scan_files(file_paths, jobs=1, ruleset=None, cache=None, budget=None, timings=None, profile=False,
+               summaries=None):
+    """
+    Scan `file_paths` and yield (file_path, issues) in input order; `issues`
+    is a FindingBatch (a sequence of issue dicts) so workers send columns,
+    not one dict per finding.
+
+    With jobs > 1 the files are spread over a process pool; at most a few
+    files per worker are in flight, so results stream back as soon as the
+    next file in order is done. A worker that dies takes down only the files
+    it was holding: they are retried once on a fresh pool and then reported
+    as SCAN_ERROR issues. Cache hits and misses in the workers are added to
+    `cache.hits` / `cache.misses`. Every file is scanned within `budget`
+    (a budget.Budget); a ScanTimings passed as `timings` collects how long
+    each file spent in each stage and, with `profile`, in each rule. A
+    `summaries` dict receives {file_path: taint summary} from the same scans
+    (a file that failed to scan has none).
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    if not jobs or jobs <= 1:
+        for path in file_paths:
+            stages, record = {}, {} if profile else None
+            summary = {} if summaries is not None else None
+            issues = scan_batch(path, ruleset, cache, budget, stages, record, summary)
+            if timings is not None:
+                timings.add(path, stages, record)
+            if summary:
+                summaries[path] = summary
+            yield path, issues
+        return
+
+    def new_executor():
+        return ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker,
+            initargs=(ruleset.path, ruleset.regex_engine, cache, budget, profile, ruleset.prefilter,
+                      summaries is not None),
+        )
+
+    window = jobs * 4
+    pending = collections.deque()   # (path, future, attempt) in input order
+    executor = new_executor()
+    try:
+        paths = iter(file_paths)
+        exhausted = False
+        while True:
+            while not exhausted and len(pending) < window:
+                try:
+                    path = next(paths)
+                except StopIteration:
+                    exhausted = True
+                    break
+                pending.append((path, executor.submit(_scan_in_worker, path), 1))
+            if not pending:
+                break
+
+            path, future, attempt = pending.popleft()
+            if isinstance(future, BaseException):
+                yield path, FindingBatch.of([scan_error_issue(path, future)])
+                continue
+            try:
+                issues, hits, misses, stages, record, summary = future.result()
+            except BrokenProcessPool as e:
+                # Keep finished results, resubmit the rest to a fresh pool once.
+                inflight = [(path, future, attempt)] + list(pending)
+                pending.clear()
+                _shutdown(executor, inflight)
+                executor = new_executor()
+                for p, f, a in inflight:
+                    if not isinstance(f, BaseException) and f.done() and not f.cancelled() \
+                            and f.exception() is None:
+                        pending.append((p, f, a))
+                    elif a > 1:
+                        pending.append((p, e, a))
+                    else:
+                        pending.append((p, executor.submit(_scan_in_worker, p), a + 1))
+                continue
+            except Exception as e:
+                issues = FindingBatch.of([scan_error_issue(path, e)])
+            else:
+                if cache is not None:
+                    cache.hits += hits
+                    cache.misses += misses
+                if timings is not None:
+                    timings.add(path, stages, record)
+                if summary:
+                    summaries[path] = summary
+            yield path, issues
+    finally:
+        _shutdown(executor, pending)
+
+
+# ========================
+# In-memory sources
+# ========================
+DEFAULT_BATCH_FILES = 16    # sources whose AST requests share one round trip
+
+
+class _SourceScan:
+    """One in-memory source of a scan_sources() chunk, from its AST request to its issues."""
+
+    def __init__(self, path, profile):
+        self.path = path
+        self.key = None
+        self.steps = None
+        self.request = None
+        self.batch = None
+        self.fresh = False      # scanned now, not read from the cache
+        self.errors = []
+        self.summary = {}
+        self.stages = {}
+        self.record = {} if profile else None
+
+
+def scan_sources(sources, ruleset=None, cache=None, budget=None, timings=None, profile=False,
+                 batch_files=DEFAULT_BATCH_FILES, summaries=None):
+    """
+    Scan in-memory sources, an iterable of (virtual_path, bytes or str), with
+    the full pipeline and no temporary files; yield (virtual_path, issues) in
+    input order, `issues` a FindingBatch. The language comes from the
+    virtual path. Sources are taken `batch_files` at a time and the AST
+    requests of a chunk go to the Node workers in one pipelined round trip
+    per runner. `cache`, `budget`, `timings`, `profile` and `summaries`
+    work as for scan_files().
+    """
+    ruleset = ruleset or DEFAULT_RULESET
+    sources = iter(sources)
+    while True:
+        chunk = list(itertools.islice(sources, max(1, batch_files)))
+        if not chunk:
+            return
+        scans = [_start_scan(path, data, ruleset, cache, budget, profile, summaries is not None)
+                 for path, data in chunk]
+
+        requests = {}   # (runner, memory_mb): [(scan, (code, groups, options, timeout))]
+        for scan in scans:
+            if scan.batch is None:
+                runner, code, groups, options, timeout, memory_mb = scan.request
+                requests.setdefault((runner, memory_mb), []).append((scan, (code, groups, options, timeout)))
+        for (runner, memory_mb), pending in requests.items():
+            try:
+                responses = run_ast_batch(runner, [request for _, request in pending], memory_mb)
+            except Exception as e:
+                responses = [({"error": f"AST worker failed: {e}", "retryable": True}, 0.0)] * len(pending)
+            for (scan, _), (response, seconds) in zip(pending, responses):
+                try:
+                    scan.batch = resume_detectors(scan.steps, response, seconds)
+                    scan.fresh = True
+                except Exception as e:
+                    scan.batch = FindingBatch.of([scan_error_issue(scan.path, e)])
+
+        for scan in scans:
+            # A crashed or timed-out AST worker is not a property of the file.
+            if cache is not None and scan.fresh and not any(e["retryable"] for e in scan.errors):
+                cache.put(scan.key, scan.batch.to_json())
+                cache.put_summary(scan.key, scan.summary)
+            if timings is not None:
+                timings.add(scan.path, scan.stages, scan.record)
+            if summaries is not None and scan.summary:
+                summaries[scan.path] = scan.summary
+            yield scan.path, scan.batch
+
+
+def _start_scan(path, data, ruleset, cache, budget, profile, summary=False):
+    """
+    A _SourceScan with its issues, if the cache has them (and, with
+    `summary`, the taint summary) or no AST stage runs, else its AST request.
+    """
+    scan = _SourceScan(path, profile)
     try:
-        issues = detect_issues(file_path)
+        source = SourceFile.from_bytes(data)
+        if cache is not None:
+            scan.key = cache_key(source.data, ruleset.digest)
+            cached = cache.get(scan.key)
+            cached_summary = cache.get_summary(scan.key) if cached is not None and summary else None
+            # A hit is only of use without its summary if none is wanted.
+            if cached is not None and (not summary or cached_summary is not None):
+                scan.summary.update(cached_summary or {})
+                scan.batch = FindingBatch.of(cached) if isinstance(cached, list) else FindingBatch.from_json(cached)
+                scan.batch.relabel(path)
+                return scan
+        steps = detector_steps(source, path, ruleset, scan.errors, scan.summary, budget, scan.stages,
+                               scan.record)
+        try:
+            scan.request = next(steps)
+        except StopIteration as done:
+            scan.batch, scan.fresh = done.value, True
+        else:
+            scan.steps = steps
     except Exception as e:
-        return [{
-            "file": file_path,
-            "line": 0,
-            "severity": "LOW",
-            "message": f"Error scanning file: {e}",
-            "id": "SCAN_ERROR"
-        }]
-    return issues
+        scan.batch = FindingBatch.of([scan_error_issue(path, e)])
+    return scan
+
+
+def scan_paths(paths, jobs=1, ruleset=None, cache=None, budget=None, **walk_options):
+    """
+    Walk `paths` (files or directories; see walker.FileWalker for
+    `walk_options`) and yield the issues of every source file found. Files
+    are scanned as the walk finds them.
+    """
+    for _, issues in scan_files(iter_files(paths, **walk_options), jobs=jobs, ruleset=ruleset, cache=cache,
+                                budget=budget):
+        yield from issues
+
+
+def _shutdown(executor, pending):
+    for _, future, _ in pending:
+        if not isinstance(future, BaseException):
+            future.cancel()
+    executor.shutdown(wait=True)
 
 
 def filter_issues(issues, min_severity="low"):
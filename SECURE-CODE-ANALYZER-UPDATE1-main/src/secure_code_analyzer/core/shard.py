@@ -0,0 +1,150 @@
+import hashlib
+import heapq
+import json
+import os
+
+# ========================
+# Shard Assignment
+# ========================
+# A scan too large for one machine is split into N shards. Every shard walks
+# the same targets and scans the files assigned to it: stably by the hash of
+# their path relative to the working directory ("path", so every checkout
+# agrees), or so that the shards get about as many bytes each ("size").
+SHARD_MODES = ("path", "size")
+DEFAULT_SHARD_MODE = "path"
+
+
+def parse_shard(spec):
+    """(i, n) for "i/n" with 1 <= i <= n; ValueError otherwise."""
+    try:
+        index, count = (int(part) for part in spec.split("/"))
+    except ValueError:
+        raise ValueError(f"expected I/N, got {spec!r}") from None
+    if not 1 <= index <= count:
+        raise ValueError(f"shard {index} is not one of 1..{count}")
+    return index, count
+
+
+def shard_key(path):
+    """The name a file is assigned by: its path relative to the working directory, with "/"."""
+    return os.path.relpath(path).replace(os.sep, "/")
+
+
+def path_shard(path, count):
+    """The shard (1..count) of the file at `path`, by the hash of its shard_key()."""
+    digest = hashlib.sha1(shard_key(path).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "big") % count + 1
+
+
+def size_shards(paths, count):
+    """{path: shard}: the largest files first, each to the shard with the fewest bytes so far."""
+    def size(path):
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
+
+    loads = [(0, shard) for shard in range(1, count + 1)]
+    owners = {}
+    for negative, _, path in sorted((-size(path), shard_key(path), path) for path in paths):
+        load, shard = loads[0]
+        owners[path] = shard
+        heapq.heapreplace(loads, (load - negative, shard))
+    return owners
+
+
+# ========================
+# Shard Results
+# ========================
+# A shard's partial results are JSON Lines: a header naming the shard and
+# the scan, one record per scanned file with its position in the walk, its
+# issues and (for the cross-file pass) its taint summary with the
+# sink_context() of its sink lines, then the shard's metrics. A shard that did not finish
+# has no metrics line and is refused by ShardMerge.
+def shard_path(directory, index, count):
+    return os.path.join(directory, f"shard-{index}-of-{count}.jsonl")
+
+
+class ShardWriter:
+    """Writes one shard's results to `out_path`; finish() with its metrics, then close()."""
+
+    def __init__(self, out_path, index, count, rules_digest, mode=DEFAULT_SHARD_MODE, cross_file=True):
+        self._f = open(out_path, "w", encoding="utf-8")
+        self._write({"shard": index, "of": count, "rules": rules_digest, "mode": mode, "cross_file": cross_file})
+
+    def _write(self, record):
+        self._f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def add(self, position, path, issues, summary=None, sinks=None):
+        record = {"position": position, "file": path, "issues": list(issues)}
+        if summary:
+            record["summary"] = summary
+            record["sinks"] = {str(line): context for line, context in (sinks or {}).items()}
+        self._write(record)
+
+    def finish(self, metrics):
+        self._write({"metrics": metrics})
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardMerge:
+    """
+    The result files of the N shards of one scan, checked to be all of
+    them. files() yields their file records in walk order; `metrics` (one
+    per shard) is complete once files() has been read to its end.
+    """
+
+    SCAN_FIELDS = ("of", "rules", "mode", "cross_file")
+
+    def __init__(self, paths):
+        headers = {}
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                line = f.readline()
+            try:
+                header = json.loads(line)
+            except ValueError:
+                header = None
+            if not isinstance(header, dict) or not 1 <= header.get("shard", 0) <= header.get("of", 0):
+                raise ValueError(f"{path}: not a shard result file")
+            if header["shard"] in headers:
+                raise ValueError(f"{path}: shard {header['shard']} given twice")
+            headers[header["shard"]] = (path, header)
+
+        first = next(iter(headers.values()))[1]
+        for path, header in headers.values():
+            for field in self.SCAN_FIELDS:
+                if header.get(field) != first.get(field):
+                    raise ValueError(f"{path}: not a shard of the same scan ({field} differs)")
+        missing = sorted(set(range(1, first["of"] + 1)) - set(headers))
+        if missing:
+            raise ValueError(f"missing shard(s) {', '.join(map(str, missing))} of {first['of']}")
+
+        self.count = first["of"]
+        self.rules = first["rules"]
+        self.cross_file = first["cross_file"]
+        self.paths = [headers[index][0] for index in range(1, self.count + 1)]
+        self.metrics = []
+
+    def _records(self, path):
+        with open(path, encoding="utf-8") as f:
+            f.readline()
+            for line in f:
+                record = json.loads(line)
+                if "metrics" in record:
+                    self.metrics.append(record["metrics"])
+                    return
+                yield record
+        raise ValueError(f"{path}: the shard did not finish (no metrics)")
+
+    def files(self):
+        """{"position", "file", "issues"[, "summary", "sinks"]} of every scanned file, in walk order."""
+        return heapq.merge(*(self._records(path) for path in self.paths), key=lambda record: record["position"])
@@ -0,0 +1,117 @@
+import mmap
+import os
+import re
+
+# ========================
+# Source Loading
+# ========================
+# Tried in order; latin-1 maps every byte, so decoding never fails and a
+# legacy-encoded file is scanned instead of reported as a FILE-ERROR.
+ENCODINGS = ("utf-8", "cp1252", "latin-1")
+MMAP_MIN_BYTES = 1024 * 1024
+LONE_CR = re.compile(rb"\r(?!\n)")
+# Bytes patterns know only ASCII letters, digits and spaces (\w, \b, \s,
+# IGNORECASE); str ones also count non-ASCII ones, and \x1c-\x1f as \s.
+STR_ONLY_SPACES = (b"\x1c", b"\x1d", b"\x1e", b"\x1f")
+ASCII_CHECK_BYTES = 1 << 20
+
+
+def matches_as_bytes(data):
+    """True if patterns find the same in `data` (bytes or mmap) as bytes as in its decoded text."""
+    for start in range(0, len(data), ASCII_CHECK_BYTES):
+        if not data[start:start + ASCII_CHECK_BYTES].isascii():
+            return False
+    return all(data.find(space) == -1 for space in STR_ONLY_SPACES)
+
+
+def decode(data, encodings=ENCODINGS):
+    """(text, encoding) for `data` in the first of `encodings` it is valid in."""
+    for encoding in encodings[:-1]:
+        try:
+            return str(data, encoding), encoding
+        except UnicodeDecodeError:
+            continue
+    return str(data, encodings[-1], "replace"), encodings[-1]
+
+
+class SourceFile:
+    """
+    The bytes of one source file, memory-mapped read-only from
+    MMAP_MIN_BYTES up and read into memory below that. Regex rules run over
+    `data` directly; text is decoded on demand, the whole file by text()
+    for the AST runners and single lines by decode() for snippets. Use it
+    as a context manager, or close() it, to release the mapping.
+    """
+
+    def __init__(self, path, mmap_min_bytes=None):
+        if mmap_min_bytes is None:
+            mmap_min_bytes = MMAP_MIN_BYTES
+        self.path = path
+        self.encoding = None
+        self._text = None
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self.data = None
+            if size and size >= mmap_min_bytes:
+                try:
+                    self.data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    pass    # pipes, special files: read them instead
+            if self.data is None:
+                self.data = f.read()
+
+    @classmethod
+    def from_bytes(cls, data):
+        """A SourceFile over content already in memory (str is UTF-8 encoded); its `path` is None."""
+        source = cls.__new__(cls)
+        source.path = None
+        source.encoding = None
+        source._text = None
+        source.data = data.encode("utf-8") if isinstance(data, str) else bytes(data)
+        return source
+
+    @property
+    def mapped(self):
+        return isinstance(self.data, mmap.mmap)
+
+    def text(self):
+        """
+        The decoded file with "\\r\\n" and "\\r" line ends turned into "\\n",
+        as text-mode open() returns it; sets `encoding`.
+        """
+        if self._text is None:
+            text, self.encoding = decode(self.data)
+            if "\r" in text:
+                text = text.replace("\r\n", "\n").replace("\r", "\n")
+            self._text = text
+        return self._text
+
+    def decode(self, raw):
+        """One slice of `data` as text, in the file's encoding once text() has found it."""
+        if self.encoding:
+            return str(raw, self.encoding, "replace")
+        return decode(raw)[0]
+
+    def view(self):
+        """
+        What the regex rules scan: `data`, unless a lone "\\r" ends some line
+        (classic Mac files), which only the normalised text() counts right,
+        or it has non-ASCII bytes, which bytes patterns would match otherwise
+        than the same code as str.
+        """
+        if not matches_as_bytes(self.data):
+            return self.text()
+        if self.data.find(b"\r") != -1 and LONE_CR.search(self.data):
+            return self.text()
+        return self.data
+
+    def close(self):
+        if self.mapped:
+            self.data.close()
+        self._text = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
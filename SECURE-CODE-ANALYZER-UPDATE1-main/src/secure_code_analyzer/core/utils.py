@@ -1,17 +1,11 @@
-import re
+from .lexer import mask
 
 def strip_comments_and_strings(text, language):
     """
-    Remove comments and string literals to reduce false positives for pattern rules.
-    Very naive but effective for demo purposes.
+    Blank out comments and string literals to reduce false positives for pattern rules.
+    Offsets and line numbers are kept; see lexer.mask().
     """
-    if language in ("javascript", "php"):
-        text = re.sub(r'/\*.*?\*/', ' ', text, flags=re.S)
-        text = re.sub(r'//.*', ' ', text)
-        if language == "php":
-            text = re.sub(r'#.*', ' ', text)
-    text = re.sub(r"(\'(?:\\.|[^\\'])*\'|\"(?:\\.|[^\\\"])*\"|`(?:\\.|[^\\`])*`)", '""', text)
-    return text
+    return mask(text, language)
 
 
 def filter_issues(issues, severity=None):
@@ -0,0 +1,251 @@
+import collections
+import os
+import re
+
+# ========================
+# Walker Settings
+# ========================
+SOURCE_EXTENSIONS = (".js", ".php")
+IGNORE_FILES = (".gitignore", ".scaignore")
+# Dependency, VCS and build output directories, skipped wherever they occur.
+DEFAULT_EXCLUDES = frozenset({
+    "node_modules", "bower_components", "jspm_packages", "vendor", ".git", ".hg", ".svn",
+    "dist", "build", "coverage", ".next", ".nuxt", ".cache", "__pycache__",
+})
+DEFAULT_MAX_FILE_BYTES = 2 * 1024 * 1024
+MINIFIED_SNIFF_BYTES = 32 * 1024
+MINIFIED_LINE_LENGTH = 500    # average characters per line of a minified bundle
+
+
+# ========================
+# Ignore Patterns
+# ========================
+IgnoreRule = collections.namedtuple("IgnoreRule", "regex negate dir_only")
+
+
+def compile_pattern(pattern):
+    """
+    One .gitignore-style line as an IgnoreRule matched against paths relative
+    to the ignore file's directory, or None for blanks and comments.
+    """
+    pattern = pattern.rstrip("\n").rstrip()
+    if not pattern or pattern.startswith("#"):
+        return None
+    negate = pattern.startswith("!")
+    if negate:
+        pattern = pattern[1:]
+    if pattern.startswith("\\"):
+        pattern = pattern[1:]
+    dir_only = pattern.endswith("/")
+    pattern = pattern.rstrip("/")
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    if not pattern:
+        return None
+
+    out, i = [], 0
+    while i < len(pattern):
+        if pattern.startswith("**/", i):
+            out.append("(?:.*/)?")
+            i += 3
+        elif pattern.startswith("**", i):
+            out.append(".*")
+            i += 2
+        elif pattern[i] == "*":
+            out.append("[^/]*")
+            i += 1
+        elif pattern[i] == "?":
+            out.append("[^/]")
+            i += 1
+        elif pattern[i] == "[" and "]" in pattern[i + 2:]:
+            end = pattern.index("]", i + 2)
+            members = pattern[i + 1:end]
+            if members.startswith("!"):
+                members = "^" + members[1:]
+            out.append("[" + members.replace("\\", "\\\\") + "]")
+            i = end + 1
+        else:
+            out.append(re.escape(pattern[i]))
+            i += 1
+    regex = ("" if anchored else "(?:.*/)?") + "".join(out)
+    return IgnoreRule(re.compile(regex, re.S), negate, dir_only)
+
+
+def read_ignore_file(path):
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return [rule for rule in map(compile_pattern, f) if rule]
+    except OSError:
+        return []
+
+
+def is_ignored(rules, path, is_dir):
+    """
+    Whether `path` is ignored by `rules`, a list of (base directory, [IgnoreRule])
+    from the outermost ignore file in; the last matching pattern wins.
+    """
+    ignored = False
+    for base, patterns in rules:
+        rel = os.path.relpath(path, base).replace(os.sep, "/")
+        for rule in patterns:
+            if rule.dir_only and not is_dir:
+                continue
+            if rule.regex.fullmatch(rel):
+                ignored = not rule.negate
+    return ignored
+
+
+def looks_minified(path):
+    """A .min.js file, or JavaScript whose first lines average MINIFIED_LINE_LENGTH+ characters."""
+    if not path.endswith(".js"):
+        return False
+    if path.endswith(".min.js"):
+        return True
+    try:
+        with open(path, "rb") as f:
+            head = f.read(MINIFIED_SNIFF_BYTES)
+    except OSError:
+        return False
+    return len(head) >= 4096 and len(head) / (head.count(b"\n") + 1) >= MINIFIED_LINE_LENGTH
+
+
+# ========================
+# File Walker
+# ========================
+class FileWalker:
+    """
+    Lazily yields the .js/.php files under `paths`, depth first in name
+    order, so scanning starts before the walk ends and memory is bounded by
+    the directory depth, not the repository size. Skipped:
+    - DEFAULT_EXCLUDES directories (unless `default_excludes` is False) and
+      paths matched by .gitignore / .scaignore files met on the way or by
+      the extra `exclude` patterns (relative to each given directory);
+    - files over `max_file_bytes` and, unless `include_minified`, minified
+      JavaScript;
+    - directories reached again through a symlink loop.
+    Files given directly are only subject to the size and minified checks.
+    `skipped` counts the skipped files and directories by reason; missing
+    paths are passed to `on_missing`.
+    """
+
+    def __init__(self, paths, exclude=(), max_file_bytes=DEFAULT_MAX_FILE_BYTES,
+                 include_minified=False, default_excludes=True, on_missing=None):
+        self.paths = list(paths)
+        self.extra = [rule for rule in map(compile_pattern, exclude) if rule]
+        self.max_file_bytes = max_file_bytes
+        self.include_minified = include_minified
+        self.excludes = DEFAULT_EXCLUDES if default_excludes else frozenset()
+        self.on_missing = on_missing
+        self.skipped = collections.Counter()
+        self.yielded = 0
+
+    def __iter__(self):
+        for path in self.paths:
+            if os.path.isfile(path):
+                if path.endswith(SOURCE_EXTENSIONS) and self.admit(path):
+                    self.yielded += 1
+                    yield path
+            elif os.path.isdir(path):
+                rules = [(path, self.extra)] if self.extra else []
+                yield from self._walk(path, rules, set())
+            elif self.on_missing:
+                self.on_missing(path)
+
+    def admit(self, path, size=None):
+        """Size and minified checks for one file; counts the skip if it fails."""
+        try:
+            size = os.path.getsize(path) if size is None else size
+        except OSError:
+            self.skipped["unreadable"] += 1
+            return False
+        if self.max_file_bytes and size > self.max_file_bytes:
+            self.skipped["too large"] += 1
+            return False
+        if not self.include_minified and looks_minified(path):
+            self.skipped["minified"] += 1
+            return False
+        return True
+
+    def wants(self, path):
+        """
+        Whether a walk now would yield the file at `path`: the same checks
+        along its directories only, for a file that changed since the walk.
+        """
+        if not path.endswith(SOURCE_EXTENSIONS) or not os.path.isfile(path):
+            return False
+        path = os.path.abspath(path)
+        for root in self.paths:
+            root = os.path.abspath(root)
+            if path == root:
+                return self.admit(path)
+            if not os.path.isdir(root) or not path.startswith(root.rstrip(os.sep) + os.sep):
+                continue
+            rules = [(root, self.extra)] if self.extra else []
+            directory = root
+            for name in os.path.relpath(path, root).split(os.sep):
+                local = [r for f in IGNORE_FILES for r in read_ignore_file(os.path.join(directory, f))]
+                if local:
+                    rules = rules + [(directory, local)]
+                child = os.path.join(directory, name)
+                if child == path:
+                    return not (rules and is_ignored(rules, path, False)) and self.admit(path)
+                if name in self.excludes or (rules and is_ignored(rules, child, True)):
+                    return False
+                directory = child
+        return False
+
+    def _walk(self, directory, rules, ancestors):
+        try:
+            st = os.stat(directory)
+        except OSError:
+            self.skipped["unreadable"] += 1
+            return
+        identity = (st.st_dev, st.st_ino)
+        if identity in ancestors:
+            self.skipped["symlink loop"] += 1
+            return
+        ancestors.add(identity)
+        try:
+            local = [r for name in IGNORE_FILES for r in read_ignore_file(os.path.join(directory, name))]
+            if local:
+                rules = rules + [(directory, local)]
+            try:
+                with os.scandir(directory) as it:
+                    entries = sorted(it, key=lambda e: e.name)
+            except OSError:
+                self.skipped["unreadable"] += 1
+                return
+
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    continue
+                if is_dir:
+                    if entry.name in self.excludes:
+                        self.skipped["excluded"] += 1
+                    elif rules and is_ignored(rules, entry.path, True):
+                        self.skipped["ignored"] += 1
+                    else:
+                        yield from self._walk(entry.path, rules, ancestors)
+                    continue
+                if not entry.name.endswith(SOURCE_EXTENSIONS):
+                    continue
+                if rules and is_ignored(rules, entry.path, False):
+                    self.skipped["ignored"] += 1
+                    continue
+                try:
+                    size = entry.stat().st_size
+                except OSError:
+                    self.skipped["unreadable"] += 1
+                    continue
+                if self.admit(entry.path, size):
+                    self.yielded += 1
+                    yield entry.path
+        finally:
+            ancestors.discard(identity)
+
+
+def iter_files(paths, **options):
+    """Generator over the source files under `paths`; see FileWalker for `options`."""
+    return iter(FileWalker(paths, **options))
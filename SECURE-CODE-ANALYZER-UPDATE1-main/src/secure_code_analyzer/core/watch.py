@@ -0,0 +1,356 @@
+import ctypes
+import ctypes.util
+import errno
+import os
+import queue
+import select
+import struct
+import threading
+import time
+
+from .crossfile import flow_issues
+from .scanner import scan_files
+from .walker import DEFAULT_EXCLUDES, SOURCE_EXTENSIONS
+
+# ========================
+# Watch Settings
+# ========================
+WATCH_BACKENDS = ("auto", "inotify", "poll")
+DEFAULT_WATCH_BACKEND = "auto"
+DEFAULT_DEBOUNCE = 0.2        # seconds without events that end a burst
+MAX_DEBOUNCE = 2.0            # seconds a burst may last before it is handed on anyway
+DEFAULT_POLL_INTERVAL = 1.0   # seconds between walks of the polling watcher
+STOP_CHECK = 0.5              # seconds an idle watcher waits before looking at stop()
+SUBSCRIBER_QUEUE = 256        # deltas a client may fall behind before it is made to start over
+
+
+class WatchUnavailable(Exception):
+    pass
+
+
+# ========================
+# Change Watchers
+# ========================
+class Watcher:
+    """
+    Change events under `roots`, in bursts: batches() yields the set of
+    absolute paths touched in a burst once no event came for `debounce`
+    seconds (or the burst has lasted MAX_DEBOUNCE), until stop(). A path
+    may be a file or a directory and may no longer exist.
+    """
+
+    def __init__(self, roots, debounce=DEFAULT_DEBOUNCE):
+        self.roots = [os.path.abspath(root) for root in roots]
+        self.debounce = debounce
+        self._stopped = threading.Event()
+
+    def _events(self, timeout):
+        """Paths touched within `timeout` seconds; empty if none were."""
+        raise NotImplementedError
+
+    def batches(self):
+        pending, first, last = set(), 0.0, 0.0
+        while not self._stopped.is_set():
+            timeout = STOP_CHECK
+            if pending:
+                due = min(last + self.debounce, first + MAX_DEBOUNCE)
+                timeout = due - time.monotonic()
+                if timeout <= 0:
+                    yield pending
+                    pending = set()
+                    continue
+            touched = self._events(timeout)
+            if touched:
+                last = time.monotonic()
+                if not pending:
+                    first = last
+                pending |= touched
+
+    def stop(self):
+        self._stopped.set()
+
+    def close(self):
+        pass
+
+
+# inotify(7) event bits
+IN_MODIFY, IN_CLOSE_WRITE = 0x2, 0x8
+IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x40, 0x80, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF = 0x400, 0x800
+IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x4000, 0x8000, 0x40000000
+_WATCH_MASK = (IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+               | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT = struct.Struct("iIII")    # wd, mask, cookie, len; then the name, NUL-padded to len
+
+
+class InotifyWatcher(Watcher):
+    """
+    Linux inotify through libc: one watch per directory under the roots
+    (`excludes` directories aside), added as directories appear. Raises
+    WatchUnavailable where there is no inotify or too few watches are left.
+    """
+
+    backend = "inotify"
+
+    def __init__(self, roots, debounce=DEFAULT_DEBOUNCE, excludes=DEFAULT_EXCLUDES):
+        super().__init__(roots, debounce)
+        self.excludes = excludes
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+            libc.inotify_init1.argtypes = [ctypes.c_int]
+            libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        except (OSError, AttributeError, TypeError):
+            raise WatchUnavailable("inotify is not available on this system") from None
+        self._libc = libc
+        self._fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            raise WatchUnavailable(f"inotify_init1: {os.strerror(ctypes.get_errno())}")
+        self._dirs = {}     # watch descriptor -> directory
+        try:
+            for root in self.roots:
+                self._watch_tree(root if os.path.isdir(root) else os.path.dirname(root))
+        except WatchUnavailable:
+            self.close()
+            raise
+
+    def _watch_tree(self, top):
+        for directory, subdirs, _ in os.walk(top):
+            subdirs[:] = [name for name in subdirs if name not in self.excludes]
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = directory
+            elif ctypes.get_errno() == errno.ENOSPC:
+                raise WatchUnavailable("out of inotify watches (see fs.inotify.max_user_watches)")
+
+    def _events(self, timeout):
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return set()
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        touched = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT.unpack_from(data, offset)
+            name = data[offset + _EVENT.size:offset + _EVENT.size + length].rstrip(b"\0")
+            offset += _EVENT.size + length
+            if mask & IN_Q_OVERFLOW:        # events were lost: everything may have changed
+                touched.update(self.roots)
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                del self._dirs[wd]
+                continue
+            path = os.path.join(directory, os.fsdecode(name)) if name else directory
+            touched.add(path)
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and os.path.basename(path) not in self.excludes:
+                try:
+                    self._watch_tree(path)
+                except WatchUnavailable:
+                    pass    # its files are still rescanned now, just not watched
+        return touched
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+class PollingWatcher(Watcher):
+    """
+    Walks the files (`walk()` yields their paths) every `interval` seconds
+    and reports those that appeared, went or changed size or mtime.
+    """
+
+    backend = "poll"
+
+    def __init__(self, roots, walk, debounce=DEFAULT_DEBOUNCE, interval=DEFAULT_POLL_INTERVAL):
+        super().__init__(roots, debounce)
+        self.walk = walk
+        self.interval = interval
+        self._seen = self._snapshot()
+        self._polled = time.monotonic()
+
+    def _snapshot(self):
+        seen = {}
+        for path in self.walk():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            seen[os.path.abspath(path)] = (st.st_mtime_ns, st.st_size)
+        return seen
+
+    def _events(self, timeout):
+        wait = self._polled + self.interval - time.monotonic()
+        if wait > timeout:
+            self._stopped.wait(timeout)
+            return set()
+        if wait > 0 and self._stopped.wait(wait):
+            return set()
+        current = self._snapshot()
+        self._polled = time.monotonic()
+        touched = {path for path in current.keys() | self._seen.keys() if current.get(path) != self._seen.get(path)}
+        self._seen = current
+        return touched
+
+
+def open_watcher(roots, walk, backend=DEFAULT_WATCH_BACKEND, debounce=DEFAULT_DEBOUNCE,
+                 interval=DEFAULT_POLL_INTERVAL, excludes=DEFAULT_EXCLUDES):
+    """An InotifyWatcher if `backend` allows and the system has inotify, else a PollingWatcher."""
+    if backend != "poll":
+        try:
+            return InotifyWatcher(roots, debounce, excludes)
+        except WatchUnavailable:
+            if backend == "inotify":
+                raise
+    return PollingWatcher(roots, walk, debounce, interval)
+
+
+# ========================
+# Live Results
+# ========================
+class LiveScan:
+    """
+    The issues of the files a FileWalker finds (`new_walker()` makes one),
+    held in memory by file and kept current: apply() rescans only the files
+    among the paths a Watcher reported, re-links the cross-file flows from
+    the files' taint summaries and publishes the files whose issues
+    changed to every subscriber as {"version", "files": {file: issues}}; an
+    empty list means the file has no issues left or is gone.
+    """
+
+    def __init__(self, new_walker, ruleset=None, cache=None, jobs=1, budget=None, cross_file=True, timings=None):
+        self.new_walker = new_walker
+        self.ruleset = ruleset
+        self.cache = cache
+        self.jobs = jobs
+        self.budget = budget
+        self.cross_file = cross_file
+        self.timings = timings
+        self.version = 0
+        self.files = {}         # file -> its own issues
+        self.flows = {}         # file -> the cross-file issues at its sinks
+        self._summaries = {}    # file -> taint summary
+        self._paths = {}        # absolute path -> file, as the walker names it
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def _issues_of(self, file):
+        return self.files.get(file, []) + self.flows.get(file, [])
+
+    def count(self):
+        with self._lock:
+            return sum(len(issues) for issues in self.files.values()) + \
+                sum(len(issues) for issues in self.flows.values())
+
+    def snapshot(self):
+        """(version, {file: issues}) of every file with issues."""
+        with self._lock:
+            files = {file: self._issues_of(file) for file in self.files.keys() | self.flows.keys()}
+            return self.version, {file: issues for file, issues in files.items() if issues}
+
+    # --- updates ---
+    def start(self):
+        """Scan every file the walk finds; returns the published delta."""
+        return self._update(list(self.new_walker()), ())
+
+    def apply(self, touched):
+        """
+        Rescan the files among `touched` paths (files or directories, those
+        under a directory included) that the walk would find, and drop the
+        known ones it no longer would; returns (rescanned, removed, delta).
+        """
+        walker = self.new_walker()
+        candidates = set()
+        for path in map(os.path.abspath, touched):
+            candidates.add(path)
+            if path in self._paths:
+                continue
+            # A directory: the files known under it (it may be gone) and those in it now.
+            prefix = path.rstrip(os.sep) + os.sep
+            candidates.update(known for known in self._paths if known.startswith(prefix))
+            for directory, _, names in os.walk(path):
+                candidates.update(os.path.join(directory, name) for name in names
+                                  if name.endswith(SOURCE_EXTENSIONS))
+        rescan, removed = [], []
+        for path in sorted(candidates):
+            if walker.wants(path):
+                rescan.append(self._paths.get(path) or self._name(walker, path))
+            elif path in self._paths:
+                removed.append(self._paths[path])
+        delta = self._update(rescan, removed) if rescan or removed else None
+        return rescan, removed, delta
+
+    @staticmethod
+    def _name(walker, path):
+        """`path` (absolute) under the walker's paths, named the way the walk names files."""
+        for root in walker.paths:
+            absolute = os.path.abspath(root)
+            if path == absolute:
+                return root
+            if path.startswith(absolute.rstrip(os.sep) + os.sep):
+                return os.path.join(root, os.path.relpath(path, absolute))
+        return path
+
+    def _update(self, rescan, removed):
+        found, summaries = {}, {} if self.cross_file else None
+        jobs = self.jobs if len(rescan) > 1 else 1    # no process pool for one saved file
+        for file, issues in scan_files(rescan, jobs=jobs, ruleset=self.ruleset, cache=self.cache,
+                                       budget=self.budget, timings=self.timings, summaries=summaries):
+            found[file] = list(issues)
+
+        with self._lock:
+            before = {file: self._issues_of(file) for file in set(found) | set(removed) | set(self.flows)}
+            for file in removed:
+                self.files.pop(file, None)
+                self._summaries.pop(file, None)
+                self._paths.pop(os.path.abspath(file), None)
+            for file, issues in found.items():
+                self.files[file] = issues
+                self._summaries[file] = summaries.get(file) if summaries is not None else None
+                self._paths[os.path.abspath(file)] = file
+            if self.cross_file:
+                flows = {}
+                linked = {file: summary for file, summary in self._summaries.items() if summary}
+                for issue in (flow_issues(linked, self.ruleset) if linked else ()):
+                    flows.setdefault(issue["file"], []).append(issue)
+                self.flows = flows
+            changed = {}
+            for file in before.keys() | self.flows.keys():
+                issues = self._issues_of(file)
+                if issues != before.get(file, []):
+                    changed[file] = issues
+            if not changed:
+                return None
+            self.version += 1
+            delta = {"version": self.version, "files": changed}
+            self._publish(delta)
+        return delta
+
+    # --- subscribers ---
+    def subscribe(self):
+        """A queue that receives every delta from now on; None in it means: start over from a snapshot."""
+        subscriber = queue.Queue(SUBSCRIBER_QUEUE)
+        with self._lock:
+            self._subscribers.append(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            if subscriber in self._subscribers:
+                self._subscribers.remove(subscriber)
+
+    def _publish(self, delta):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait(delta)
+            except queue.Full:
+                # Too far behind: it gets a fresh snapshot instead of the backlog.
+                self._subscribers.remove(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
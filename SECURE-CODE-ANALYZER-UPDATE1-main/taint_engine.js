@@ -0,0 +1,428 @@
+// taint_engine.js
+// Language-neutral core of the taint analysis shared by js_ast_runner.js and
+// php_ast_runner.js.
+//
+// A taint value is one 31-bit integer: bits 0-7 are source families (one
+// per distinct source string of the taint rules, e.g. "$_GET" or
+// "req.query"), bits 8-30 stand for the inputs of the function being
+// analysed: "param:<i>", a global it reads ("global:<name>") or the result
+// of a call this file cannot resolve ("call:<key>"). Each runner walks one
+// function ("unit") at a time in source order, keeping the value reaching
+// each variable in an Env: a reassignment replaces it, branches are merged
+// and loops iterate to a fixed point. A unit's summary records which inputs
+// reach its return value, its sinks and its outgoing calls, so call sites in
+// other units apply it without re-walking the callee; callers are
+// re-analysed when a summary changes. Every taint rule is then matched
+// against the same sink events: one pass for all rules, not one walk per rule.
+//
+// Summaries whose inputs are left open are exported per file (summary()) so
+// flows through includes and imports can be resolved without re-parsing.
+
+const SOURCE_BITS = 8;
+const SOURCE_MASK = (1 << SOURCE_BITS) - 1;
+const INPUT_SHIFT = 8;
+const MAX_INPUTS = 23;            // the last bit is shared by any further inputs,
+const MAX_SHARED = 32;            // and stands for "any input" ("*") past this many
+const DEFAULT_BUDGET_MS = 2000;   // per function, per round
+const MAX_ROUNDS = 6;             // analyses per unit, on average
+const MAX_LOOP_PASSES = 8;
+
+class BudgetExceeded extends Error {}
+
+// Wall-clock cap for analysing one unit; tick() is cheap and called per node.
+class Budget {
+  constructor(ms) {
+    this.deadline = Date.now() + ms;
+    this.ticks = 0;
+  }
+
+  tick() {
+    if ((++this.ticks & 255) === 0 && Date.now() > this.deadline) {
+      throw new BudgetExceeded();
+    }
+  }
+}
+
+// Variable name -> taint bits reaching the current program point. Branches
+// and loops are handled in place: while a region is marked, every change
+// logs the variable's previous value, so merging paths costs the number of
+// variables the region touched rather than a copy of the whole map.
+class Env {
+  constructor(vars) {
+    this.vars = vars || new Map();
+    this.trail = [];
+    this.marks = 0;
+  }
+
+  get(name) {
+    return this.vars.get(name) || 0;
+  }
+
+  set(name, bits) {
+    const old = this.get(name);
+    if (old === bits) return;
+    if (this.marks) this.trail.push(name, old);
+    if (bits) this.vars.set(name, bits);
+    else this.vars.delete(name);
+  }
+
+  add(name, bits) {
+    this.set(name, this.get(name) | bits);
+  }
+
+  mark() {
+    this.marks++;
+    return this.trail.length;
+  }
+
+  // Stop recording at `mark`; returns each variable changed since with its
+  // value at the mark.
+  release(mark) {
+    const before = new Map();
+    for (let i = mark; i < this.trail.length; i += 2) {
+      if (!before.has(this.trail[i])) before.set(this.trail[i], this.trail[i + 1]);
+    }
+    if (--this.marks === 0) this.trail.length = 0;
+    return before;
+  }
+
+  // Like release(), but also roll the changes back; returns the values the
+  // changed variables had before the rollback.
+  undo(mark) {
+    const before = this.release(mark);
+    const after = new Map();
+    for (const [name, bits] of before) {
+      after.set(name, this.get(name));
+      if (bits) this.vars.set(name, bits);
+      else this.vars.delete(name);
+    }
+    return after;
+  }
+
+  // `body` may or may not run.
+  maybe(body) {
+    const mark = this.mark();
+    body();
+    for (const [name, bits] of this.release(mark)) this.add(name, bits);
+  }
+
+  // Exactly one of `first` and `second` runs.
+  either(first, second) {
+    let mark = this.mark();
+    first();
+    const taken = this.undo(mark);
+    mark = this.mark();
+    second();
+    for (const [name, bits] of this.release(mark)) if (!taken.has(name)) this.add(name, bits);
+    for (const [name, bits] of taken) this.add(name, bits);
+  }
+
+  // `body` runs any number of times: iterate until no variable gains bits.
+  loop(body) {
+    for (let pass = 0; pass < MAX_LOOP_PASSES; pass++) {
+      const mark = this.mark();
+      body();
+      let grew = false;
+      for (const [name, bits] of this.release(mark)) {
+        if ((this.get(name) | bits) !== bits) grew = true;
+        this.add(name, bits);
+      }
+      if (!grew) return;
+    }
+  }
+}
+
+// Input keys (see above) whose bits are set in `bits` of a unit summary.
+function inputKeys(summary, bits) {
+  const keys = [];
+  for (let i = 0; i < summary.inputs.length; i++) {
+    if (bits & (1 << (INPUT_SHIFT + i))) keys.push(...summary.inputs[i]);
+  }
+  return keys;
+}
+
+// Source families and sink sets of all taint rules of one request.
+class TaintRules {
+  constructor(rules, normalizeSink = s => s) {
+    this.rules = rules.filter(rule => rule.type === "taint-ast");
+    this.families = new Map();
+    this.masks = [];
+    this.sinks = [];
+    for (const rule of this.rules) {
+      let mask = 0;
+      for (const src of rule.sources || []) {
+        if (!this.families.has(src) && this.families.size < SOURCE_BITS) {
+          this.families.set(src, 1 << this.families.size);
+        }
+        mask |= this.families.get(src) || 0;
+      }
+      this.masks.push(mask);
+      this.sinks.push(new Set((rule.sinks || []).map(normalizeSink)));
+    }
+  }
+
+  // Bits of the families whose source string satisfies `test`.
+  sourceBits(test) {
+    let bits = 0;
+    for (const [src, bit] of this.families) if (test(src)) bits |= bit;
+    return bits;
+  }
+
+  get sinkNames() {
+    const names = new Set();
+    for (const sinks of this.sinks) for (const name of sinks) names.add(name);
+    return names;
+  }
+}
+
+// Drives the per-unit analysis to a fixed point and collects findings.
+// Every unit is analysed once; a unit is analysed again only when the
+// summary of a unit it calls has changed since. `lift(key)` gives the
+// caller-side value of a callee input other than a parameter (a runner
+// returns undefined to keep it as an input of the caller too).
+class TaintAnalysis {
+  constructor(taintRules, { budgetMs = DEFAULT_BUDGET_MS, matchSink, lift } = {}) {
+    this.rules = taintRules;
+    this.budgetMs = budgetMs;
+    this.matchSink = matchSink || ((sinks, names) => names.some(name => sinks.has(name)));
+    this.lift = lift || (() => undefined);
+    this.summaries = new Map();
+    this.callers = new Map();
+    this.findings = new Map();
+    this.result = {};
+    this.cut = new Map();
+    this.budget = null;
+    this._unit = null;
+    this._summary = null;
+  }
+
+  get truncated() {
+    return [...this.cut.values()];
+  }
+
+  // units: [{key, line, analyze()}]; analyze() walks the unit and calls
+  // sink(), call() and returns() on this object.
+  run(units) {
+    for (const unit of units) this.summaries.set(unit.key, null);
+    const byKey = new Map(units.map(unit => [unit.key, unit]));
+    const queue = [...units];
+    const queued = new Set(units.map(unit => unit.key));
+    let budget = units.length * MAX_ROUNDS;
+    while (queue.length && budget-- > 0) {
+      const unit = queue.shift();
+      queued.delete(unit.key);
+      const summary = this._analyze(unit);
+      const previous = this.summaries.get(unit.key);
+      if (previous && summaryKey(previous) === summaryKey(summary)) continue;
+      this.summaries.set(unit.key, summary);
+      for (const caller of this.callers.get(unit.key) || []) {
+        if (!queued.has(caller) && byKey.has(caller)) {
+          queued.add(caller);
+          queue.push(byKey.get(caller));
+        }
+      }
+    }
+
+    const merged = new Map();
+    for (const found of this.findings.values()) {
+      for (const [id, lines] of found) {
+        if (!merged.has(id)) merged.set(id, new Set());
+        for (const line of lines) merged.get(id).add(line);
+      }
+    }
+    this.result = {};
+    for (const [id, lines] of merged) this.result[id] = [...lines].sort((a, b) => a - b);
+    return this.result;
+  }
+
+  _analyze(unit) {
+    const summary = {
+      ret: 0, sinks: new Map(), calls: new Map(), includes: new Map(), inputs: [], index: new Map(),
+    };
+    this._unit = unit;
+    this._summary = summary;
+    this.findings.set(unit.key, new Map());
+    this.cut.delete(unit.key);
+    this.budget = new Budget(this.budgetMs);
+    try {
+      unit.analyze();
+    } catch (err) {
+      if (!(err instanceof BudgetExceeded)) throw err;
+      // Give up on this function: assume every input reaches its result.
+      this.cut.set(unit.key, { unit: unit.key, line: unit.line || 0 });
+      summary.ret = summary.inputs.reduce((bits, _, i) => bits | (1 << (INPUT_SHIFT + i)), 0);
+      summary.sinks = new Map();
+    }
+    return summary;
+  }
+
+  tick() {
+    this.budget.tick();
+  }
+
+  // Bit standing for input `key` of the current unit.
+  input(key) {
+    const summary = this._summary;
+    let i = summary.index.get(key);
+    if (i === undefined) {
+      i = Math.min(summary.inputs.length, MAX_INPUTS - 1);
+      if (i === summary.inputs.length) summary.inputs.push([]);
+      const shared = summary.inputs[i];
+      if (shared.length >= MAX_SHARED) summary.inputs[i] = ["*"];
+      else if (shared[0] !== "*") shared.push(key);
+      summary.index.set(key, i);
+    }
+    return 1 << (INPUT_SHIFT + i);
+  }
+
+  param(index) {
+    return this.input(`param:${index}`);
+  }
+
+  // A value reaches a sink call named `names` (all spellings of the callee).
+  sink(names, bits, line) {
+    if (!bits) return;
+    const labels = bits & SOURCE_MASK;
+    if (labels) {
+      const found = this.findings.get(this._unit.key);
+      this.rules.rules.forEach((rule, i) => {
+        if (labels & this.rules.masks[i] && this.matchSink(this.rules.sinks[i], names)) {
+          if (!found.has(rule.id)) found.set(rule.id, new Set());
+          found.get(rule.id).add(line);
+        }
+      });
+    }
+    const inputs = bits & ~SOURCE_MASK;
+    if (inputs) {
+      const key = `${line}\u0000${names.join("\u0000")}`;
+      const entry = this._summary.sinks.get(key) || { names, line, params: 0 };
+      entry.params |= inputs;
+      this._summary.sinks.set(key, entry);
+    }
+  }
+
+  returns(bits) {
+    this._summary.ret |= bits;
+  }
+
+  // Value of a call this file cannot resolve (`key` is unique per call
+  // site); the arguments are kept for the project-wide pass.
+  external(key, callee, line, args) {
+    const calls = this._summary.calls;
+    if (!calls.has(key)) calls.set(key, { callee, line, args: [] });
+    const entry = calls.get(key);
+    args.forEach((bits, i) => { entry.args[i] = (entry.args[i] || 0) | bits; });
+    return this.input(`call:${key}`);
+  }
+
+  // An include of `path` at `line`, seeing the variables in `scope`.
+  include(path, line, scope) {
+    const key = `${line}\u0000${path}`;
+    const includes = this._summary.includes;
+    if (!includes.has(key)) includes.set(key, { path, line, scope: new Map() });
+    const entry = includes.get(key).scope;
+    for (const [name, bits] of scope) entry.set(name, (entry.get(name) || 0) | bits);
+  }
+
+  // Value of a call to the unit `key` with argument values `args`. Sinks
+  // and outgoing calls the callee's inputs reach are reported with the
+  // caller's values. A callee not analysed yet contributes nothing for now;
+  // the caller is queued again once its summary is known.
+  call(key, args) {
+    if (!this.callers.has(key)) this.callers.set(key, new Set());
+    this.callers.get(key).add(this._unit.key);
+    const summary = this.summaries.get(key);
+    if (!summary) return 0;
+    const through = bits => {
+      let out = bits & SOURCE_MASK;
+      for (const input of inputKeys(summary, bits)) {
+        if (input.startsWith("param:")) {
+          out |= args[Number(input.slice(6))] || 0;
+        } else {
+          const lifted = this.lift(input);
+          out |= lifted === undefined ? this.input(input) : lifted;
+        }
+      }
+      return out;
+    };
+    for (const entry of summary.sinks.values()) {
+      this.sink(entry.names, through(entry.params), entry.line);
+    }
+    for (const [callKey, entry] of summary.calls) {
+      this.external(callKey, entry.callee, entry.line, entry.args.map(through));
+    }
+    return through(summary.ret);
+  }
+
+  // Open flows of the analysed units, for the project-wide pass:
+  // {unit: {ret?, sinks?, calls?, includes?}} with every value written as
+  // {sources?: [source], inputs?: [input key]}. Only sinks that open inputs
+  // reach, and only rules not already reported on that line, are kept.
+  summary() {
+    const names = [...this.rules.families.keys()];
+    const units = {};
+    for (const [unitKey, summary] of this.summaries) {
+      if (!summary) continue;
+      const referenced = new Set();
+      const value = bits => {
+        const out = {};
+        const sources = names.filter((_, i) => bits & (1 << i));
+        const inputs = inputKeys(summary, bits);
+        if (sources.length) out.sources = sources;
+        if (inputs.length) out.inputs = inputs;
+        for (const input of inputs) {
+          if (input.startsWith("call:")) referenced.add(input.slice(5));
+          if (input === "*") referenced.add(input);   // any call of this unit
+        }
+        return out;
+      };
+      const unit = {};
+      if (summary.ret) unit.ret = value(summary.ret);
+      const sinks = [];
+      for (const entry of summary.sinks.values()) {
+        const rules = [];
+        this.rules.rules.forEach((rule, i) => {
+          if (this.matchSink(this.rules.sinks[i], entry.names) &&
+              !(this.result[rule.id] || []).includes(entry.line)) rules.push(i);
+        });
+        if (rules.length) sinks.push({ line: entry.line, rules, value: value(entry.params) });
+      }
+      if (sinks.length) unit.sinks = sinks;
+      const includes = [...summary.includes.values()].map(entry => {
+        const scope = {};
+        for (const [name, bits] of entry.scope) scope[name] = value(bits);
+        return { path: entry.path, line: entry.line, scope };
+      });
+      if (includes.length) unit.includes = includes;
+      const calls = [];
+      for (const [key, entry] of summary.calls) {
+        const args = Array.from(entry.args, bits => value(bits || 0));
+        calls.push({ key, callee: entry.callee, line: entry.line, args });
+      }
+      const open = calls.filter(c => referenced.has(c.key) || referenced.has("*") ||
+                                     c.args.some(a => Object.keys(a).length));
+      if (open.length) unit.calls = open;
+      if (Object.keys(unit).length) units[unitKey] = unit;
+    }
+    return units;
+  }
+}
+
+// Equal keys mean equal summaries. Input bits are compared as allocated:
+// a different allocation order only costs callers one more analysis.
+function summaryKey(summary) {
+  const sinks = [...summary.sinks.entries()].map(([k, v]) => `${k}=${v.params}`).sort();
+  const calls = [...summary.calls.entries()].map(([k, v]) => `${k}=${v.args.join(",")}`).sort();
+  const inputs = summary.inputs.map(keys => keys.join(" "));
+  return `${summary.ret}|${sinks.join(";")}|${calls.join(";")}|${inputs.join(";")}`;
+}
+
+module.exports = {
+  Budget,
+  BudgetExceeded,
+  DEFAULT_BUDGET_MS,
+  Env,
+  SOURCE_MASK,
+  TaintAnalysis,
+  TaintRules,
+};
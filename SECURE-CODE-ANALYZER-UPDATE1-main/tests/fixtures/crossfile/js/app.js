@@ -0,0 +1,5 @@
+const lib = require("./lib");
+const { render } = require("./view");
+const q = req.query.q;
+lib.run(q);
+render(lib.read());
@@ -0,0 +1,4 @@
+const cp = require("child_process");
+function run(cmd) { cp.exec("ls " + cmd); }
+exports.run = run;
+exports.read = function () { return document.cookie; };
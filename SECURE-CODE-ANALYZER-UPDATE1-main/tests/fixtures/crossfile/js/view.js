@@ -0,0 +1 @@
+module.exports = { render(html) { document.body.innerHTML = html; } };
@@ -0,0 +1,3 @@
+<?php
+$conn = mysqli_connect("h", "u", "p");
+mysqli_query($conn, "SELECT * FROM t WHERE id = " . $id);
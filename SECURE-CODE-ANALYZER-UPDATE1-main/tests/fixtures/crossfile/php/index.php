@@ -0,0 +1,8 @@
+<?php
+require_once __DIR__ . '/lib.php';
+$id = $_GET['id'];
+$name = trim($_POST['name']);
+include 'db.php';
+run_query($conn, $name);
+system(get_input());
+log_it("static");
@@ -0,0 +1,8 @@
+<?php
+function run_query($conn, $v) {
+    return mysqli_query($conn, "SELECT * FROM u WHERE name = '$v'");
+}
+function get_input() {
+    global $source;
+    return $_GET['cmd'] . $source;
+}
@@ -0,0 +1,19 @@
+<?php
+function run($x) {
+    $y = strtoupper($x);
+    return system($y);
+}
+class Db {
+    public function find($id) {
+        $rows = mysqli_query($this->conn, "SELECT * FROM t WHERE id = $id");
+        return unserialize($rows);
+    }
+}
+setcookie("session", $token);
+$data = unserialize(base64_decode($_COOKIE['state']));
+$body = file_get_contents("http://example.com/?u={$_GET['u']}");
+$h = curl_exec($ch);
+move_uploaded_file($_FILES['up']['tmp_name'], "/var/www/$_FILES[up]");
+preg_replace('/x/e', $_GET['r'], $subject);
+$out = array_map(function ($v) { return exec("echo $v"); }, $list);
+eval($code);
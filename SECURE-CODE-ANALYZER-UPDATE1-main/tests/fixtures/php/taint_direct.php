@@ -0,0 +1,12 @@
+<?php
+// Direct superglobal reads (no string interpolation).
+$id = $_GET['id'];
+$name = $_POST["name"];
+system($id);
+exec($_REQUEST['cmd']);
+$f = fopen($_GET['path'], 'r');
+file_put_contents($name, "data");
+unlink($_COOKIE['old']);
+popen($_GET['p'], 'r');
+$obj->query($_GET['q']);
+$pdo->exec("DROP " . $_POST['t']);
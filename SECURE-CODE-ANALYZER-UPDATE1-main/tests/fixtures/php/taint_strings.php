@@ -0,0 +1,17 @@
+<?php
+// Superglobals interpolated into strings.
+$cmd = "ls {$_GET['dir']}";
+system($cmd);
+$q = "SELECT * FROM users WHERE id = $_POST[id]";
+mysqli_query($conn, $q);
+$copy = $q;
+mysql_query($copy);
+$sql = <<<SQL
+DELETE FROM t WHERE name = '{$_REQUEST["name"]}'
+SQL;
+pg_query($sql);
+exec("ping " . "$_COOKIE[host]");
+shell_exec('echo $_GET');
+passthru("cat /tmp/" . $_GET['f']);
+eval("return $_SERVER[QUERY_STRING];");
+header("Location: $_GET[next]");
@@ -0,0 +1,37 @@
+// Sources into command, filesystem, HTTP, eval and DOM sinks. "expect:"
+// lists every taint rule that should fire on the line; lines without it
+// must stay clean.
+const cp = require("child_process");
+const { execSync } = require("child_process");
+const fs = require("fs");
+const axios = require("axios");
+
+app.get("/run", (req, res) => {
+  const cmd = req.query.cmd;
+  cp.exec("sh -c " + cmd); // expect: JS-CMD-TAINT
+  execSync(`tar xf ${req.body.archive}`); // expect: JS-CMD-TAINT
+  fs.readFile("/srv/" + req.query.path, () => {}); // expect: JS-FS-TAINT
+  fs.writeFileSync(req.body.name, "data"); // expect: JS-FS-TAINT
+  axios.get(req.query.url); // expect: JS-HTTP-TAINT
+  const id = parseInt(req.query.id, 10);
+  fs.readFileSync("/srv/" + id);
+  cp.exec("uptime");
+  res.send("ok");
+});
+
+eval(window.location.search.slice(1)); // expect: JS-EVAL-TAINT
+setTimeout("track('" + document.cookie + "')", 10); // expect: JS-EVAL-TAINT
+fetch("/log?c=" + document.cookie); // expect: JS-HTTP-TAINT
+new Function(req.body.code); // expect: JS-EVAL-TAINT
+eval(userInput); // expect: JS-EVAL-TAINT
+eval("1 + 1");
+
+const frag = location.hash.substring(1);
+document.getElementById("out").innerHTML = frag; // expect: JS-DOM-XSS-TAINT
+el.innerHTML = "<b>" + window.location.hash + "</b>"; // expect: JS-DOM-XSS-TAINT JS-INNERHTML-TAINT
+document.write(document.cookie); // expect: JS-DOM-XSS-TAINT
+el.innerHTML = escapeHtml(userInput);
+el.textContent = userInput;
+let msg = userInput;
+msg = "hello";
+el.innerHTML = msg;
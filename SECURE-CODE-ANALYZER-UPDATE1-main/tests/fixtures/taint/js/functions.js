@@ -0,0 +1,37 @@
+// Flow through functions, branches and loops.
+function render(target, html) {
+  target.innerHTML = html; // expect: JS-DOM-XSS-TAINT JS-INNERHTML-TAINT
+}
+const wrap = s => "<p>" + s + "</p>";
+render(el, wrap(req.query.msg));
+render(el, "static");
+
+function runLater(code) {
+  setInterval(code, 1000); // expect: JS-EVAL-TAINT
+}
+runLater(req.body.job);
+
+function label(value) {
+  return "static label";
+}
+eval(label(req.query.x));
+
+let q = "";
+for (const part of req.query.parts) {
+  q += part;
+}
+http.get("http://internal/" + q); // expect: JS-HTTP-TAINT
+
+let mode = "safe";
+if (flag) {
+  mode = document.cookie;
+}
+eval(mode); // expect: JS-EVAL-TAINT
+
+let prev = "a";
+let next = "b";
+while (more()) {
+  prev = next;
+  next = req.query.step;
+}
+eval(prev); // expect: JS-EVAL-TAINT
@@ -0,0 +1,22 @@
+<?php
+// Command execution sinks. "expect:" lists every taint rule that should
+// fire on the line; lines without it must stay clean.
+$dir = $_GET['dir'];
+system("ls " . $dir); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-SYSTEM-TAINT
+exec($_POST['cmd'], $out); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-EXEC-TAINT
+$h = $_REQUEST['host'];
+echo shell_exec("ping -c1 $h"); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-SHELL-EXEC-TAINT
+passthru("cat " . $_COOKIE['file']); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT
+$p = popen("grep " . $_GET['q'], "r"); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-POPEN-TAINT
+$ua = $_SERVER['HTTP_USER_AGENT'];
+system($ua); // expect: PHP-EVAL-TAINT
+$whois = `whois {$_GET['domain']}`; // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-SHELL-EXEC-TAINT
+
+$safe = escapeshellarg($_GET['dir']);
+system("ls " . $safe);
+$n = (int) $_GET['n'];
+exec("sleep $n");
+system('echo $_GET');
+$dir = "/tmp";
+system("ls " . $dir);
+passthru("uptime");
@@ -0,0 +1,62 @@
+<?php
+// Flow through functions, methods, closures, branches, loops and
+// reassignment.
+function run_cmd($c) {
+    system($c); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-SYSTEM-TAINT
+}
+function quote($v) {
+    return "'" . $v . "'";
+}
+function constant_name($v) {
+    return "fixed";
+}
+run_cmd(quote($_GET['a']));
+run_cmd(constant_name($_GET['b']));
+run_cmd("uptime");
+
+$x = $_POST['x'];
+$x = "static";
+exec($x);
+
+if ($debug) {
+    $target = $_GET['t'];
+} else {
+    $target = "localhost";
+}
+exec("ping " . $target); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-EXEC-TAINT
+
+$parts = [];
+foreach ($_POST['files'] as $f) {
+    $parts[] = $f;
+}
+$list = implode(" ", $parts);
+shell_exec("rm " . $list); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-SHELL-EXEC-TAINT
+
+$a = "start";
+$b = "";
+while ($i++ < 3) {
+    $b = $a;
+    $a = $_REQUEST['loop'];
+}
+passthru($b); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-PASSTHRU-TAINT
+
+class Repo {
+    private $pdo;
+
+    function find($name) {
+        return $this->pdo->query("SELECT * FROM t WHERE n = '$name'"); // expect: PHP-SQL-TAINT
+    }
+
+    function count() {
+        return $this->pdo->query("SELECT COUNT(*) FROM t");
+    }
+}
+$repo->find($_GET['name']);
+
+$raw = $_GET['q'];
+$fn = function () use ($raw) {
+    popen($raw, "r"); // expect: PHP-EVAL-TAINT PHP-CMD-TAINT PHP-POPEN-TAINT
+};
+$other = function () use ($x) {
+    popen($x, "r");
+};
@@ -0,0 +1,27 @@
+<?php
+// SQL, include, filesystem, header and eval sinks.
+$id = $_GET['id'];
+$sql = "SELECT * FROM users WHERE id = " . $id;
+mysqli_query($conn, $sql); // expect: PHP-SQL-TAINT
+mysql_query("DELETE FROM t WHERE k = '$_POST[k]'"); // expect: PHP-SQL-TAINT
+$pdo->query("SELECT * FROM t WHERE name = '{$_REQUEST['name']}'"); // expect: PHP-SQL-TAINT
+$db->exec("UPDATE t SET v = " . $_COOKIE['v']); // expect: PHP-SQL-TAINT
+$clean = mysqli_real_escape_string($conn, $_GET['name']);
+mysqli_query($conn, "SELECT * FROM t WHERE name = '$clean'");
+mysqli_query($conn, "SELECT * FROM t WHERE id = " . intval($_GET['id']));
+
+include $_GET['page'] . ".php"; // expect: PHP-FILE-TAINT PHP-INCLUDE-TAINT
+require_once "modules/{$_POST['mod']}.php"; // expect: PHP-FILE-TAINT PHP-INCLUDE-TAINT
+include "header.php";
+
+$fh = fopen($_GET['log'], "a"); // expect: PHP-FS-TAINT
+echo file_get_contents("/data/" . $_REQUEST['f']); // expect: PHP-FS-TAINT
+file_put_contents($_POST['name'], "x"); // expect: PHP-FS-TAINT
+unlink("/tmp/" . $_COOKIE['tmp']); // expect: PHP-FS-TAINT
+unlink("/tmp/cache.lock");
+
+header("Location: " . $_GET['next']); // expect: PHP-HEADER-TAINT
+header("Content-Type: text/html");
+
+eval("return " . $_POST['expr'] . ";"); // expect: PHP-EVAL-TAINT
+eval('$x = 1;');
@@ -0,0 +1,49 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import detectors
+from src.secure_code_analyzer.core.ast_pool import NodeWorkerPool
+
+PHP_CODE = "<?php\n$cmd = $_GET['cmd'];\nsystem($cmd);\n"
+RULES = [r for r in detectors.RULES if r["language"] == "php"]
+
+
+def _groups():
+    return {g: [r for r in RULES if r["type"] == g] for g in ("ast", "context-ast", "taint-ast")}
+
+
+def test_pool_round_trip_matches_one_shot_runner():
+    pool = NodeWorkerPool(detectors.PHP_AST_RUNNER, size=1)
+    try:
+        response = pool.run(PHP_CODE, _groups())
+    finally:
+        pool.close()
+    for group, rules in _groups().items():
+        assert response["results"][group] == detectors.run_node_ast_runner(
+            detectors.PHP_AST_RUNNER, PHP_CODE, rules
+        )
+
+
+def test_pool_restarts_crashed_worker():
+    pool = NodeWorkerPool(detectors.PHP_AST_RUNNER, size=1)
+    try:
+        first = pool.run(PHP_CODE, _groups())
+        worker = pool._workers[0]
+        worker.proc.kill()
+        worker.proc.wait()
+        second = pool.run(PHP_CODE, _groups())
+    finally:
+        pool.close()
+    assert second["results"] == first["results"]
+
+
+def test_pool_times_out_and_recovers():
+    pool = NodeWorkerPool(detectors.PHP_AST_RUNNER, size=1, timeout=0.001)
+    try:
+        assert "error" in pool.run(PHP_CODE * 200, _groups())
+        pool._workers[0].timeout = 30
+        assert "results" in pool.run(PHP_CODE, _groups())
+        assert pool._workers[0].restarts >= 1
+    finally:
+        pool.close()
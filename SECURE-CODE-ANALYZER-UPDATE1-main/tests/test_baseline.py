@@ -0,0 +1,110 @@
+import json, os, pathlib, shutil, subprocess, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.baseline import Baseline, fingerprint, is_suppressed, write_baseline
+from src.secure_code_analyzer.core.detectors import run_detectors
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+
+JS = """const x = 1;
+function handler(req) {
+  eval(req.query.a);
+  const run = (q) => {
+    eval(q);
+  };
+}
+"""
+
+
+def by_line(issues):
+    return {i["line"]: i for i in issues if i["id"] == "JS-EVAL-001"}
+
+
+def test_fingerprints_survive_moved_lines_but_not_other_code():
+    before = by_line(run_detectors(JS, "src/app.js"))
+    after = by_line(run_detectors("// a new first line\n" + JS.replace("eval(q)", "eval(  q )"), "src/app.js"))
+    assert {i["function"] for i in before.values()} == {"handler", "run"}
+    assert [i["fingerprint"] for i in before.values()] == [i["fingerprint"] for i in after.values()]
+    assert [i["line"] for i in before.values()] != [i["line"] for i in after.values()]
+
+    key = ("JS-EVAL-001", "src/app.js", "eval(q);", "run")
+    assert fingerprint(*key) == fingerprint("JS-EVAL-001", "./src/../src/app.js", "eval(q);", "run")
+    assert fingerprint(*key) == fingerprint("JS-EVAL-001", os.path.abspath("src/app.js"), "eval(q);", "run")
+    for changed in range(4):
+        other = list(key)
+        other[changed] += "x"
+        assert fingerprint(*other) != fingerprint(*key)
+
+
+def test_fingerprints_are_relative_to_the_work_tree(tmp_path, monkeypatch):
+    repo = tmp_path / "repo"
+    (repo / ".git").mkdir(parents=True)
+    (repo / "src").mkdir()
+    key = ("JS-EVAL-001", "eval(q);", "run")
+    monkeypatch.chdir(repo)
+    inside = fingerprint(key[0], "src/app.js", *key[1:])
+    monkeypatch.chdir(repo / "src")
+    assert fingerprint(key[0], "app.js", *key[1:]) == inside
+    monkeypatch.chdir(tmp_path)
+    assert fingerprint(key[0], "repo/src/app.js", *key[1:]) == inside
+    assert fingerprint(key[0], "other/app.js", *key[1:]) != fingerprint(key[0], "app.js", *key[1:])
+
+    monkeypatch.chdir(repo / "src")
+    write_baseline([], str(tmp_path / "baseline.idx"))
+    assert Baseline(str(tmp_path / "baseline.idx")).root == str(repo)
+
+
+def test_suppression_comments():
+    assert is_suppressed("JS-EVAL-001", "eval(x); // sca-ignore")
+    assert is_suppressed("JS-EVAL-001", "eval(x);", "// sca-ignore-next-line: JS-EVAL-001, OTHER")
+    assert not is_suppressed("JS-EVAL-001", "eval(x);", "// sca-ignore-next-line: OTHER")
+    assert not is_suppressed("JS-EVAL-001", "eval(x);", "eval(y); // sca-ignore")
+    assert not is_suppressed("JS-EVAL-001", "eval('sca-ignore');")
+
+    code = "<?php\nsystem($_GET['a']); # sca-ignore\n/* sca-ignore-next-line */\nsystem($_GET['b']);\nsystem($_GET['c']);\n"
+    assert {i["line"] for i in run_detectors(code, "a.php")} == {5}
+
+
+def test_baseline_matches_each_finding_once(tmp_path):
+    def issue(rule, line, snippet):
+        return {"id": rule, "file": "a.js", "line": line, "snippet": snippet, "function": "f"}
+
+    old = [issue("R1", 1, "eval(a)"), issue("R1", 2, "eval(a)"), issue("R2", 3, "exec(b)"), issue("R3", 4, "x")]
+    path = str(tmp_path / "baseline.idx")
+    assert write_baseline(old, path) == 4
+
+    baseline = Baseline(path)
+    current = [issue("R1", 10, "eval(a)"), issue("R1", 11, "eval(a)"), issue("R1", 12, "eval(a)"),
+               issue("R2", 13, "exec( b )")]
+    assert [i["line"] for i in baseline.new(current)] == [12]
+    assert baseline.matched == 3
+    assert list(baseline.fixed()) == [old[3]]
+
+    (tmp_path / "report.json").write_text(json.dumps(old), encoding="utf-8")
+    with pytest.raises(ValueError, match="not a baseline"):
+        Baseline(str(tmp_path / "report.json"))
+
+
+def test_cli_reports_only_new_and_fixed_findings(tmp_path):
+    pytest.importorskip("flask")
+    shutil.copytree(REPO / "samples" / "js", tmp_path / "src")
+    env = dict(os.environ, PYTHONPATH=str(REPO / "src"))
+
+    def cli(*args):
+        subprocess.run([sys.executable, "-m", "secure_code_analyzer.cli", "src", "--no-cache", "-j", "1", *args],
+                       cwd=tmp_path, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
+        return [json.loads(line) for line in (tmp_path / "reports" / "report.jsonl").read_text().splitlines()]
+
+    first = cli("--write-baseline", "baseline.idx")
+    app = tmp_path / "src" / "app.js"
+    code = app.read_text(encoding="utf-8")
+    app.write_text("// moved\n" + code.replace("eval(req.query.code);", "run(1);") + "\neval(process.argv[2]);\n",
+                   encoding="utf-8")
+    new = cli("--baseline", "baseline.idx")
+
+    assert [(i["id"], i["snippet"]) for i in new] == [("JS-EVAL-001", "eval(process.argv[2]);")]
+    fixed = [json.loads(line) for line in (tmp_path / "reports" / "fixed.jsonl").read_text().splitlines()]
+    assert {i["fingerprint"] for i in fixed} == {i["fingerprint"] for i in first if "eval(req" in i["snippet"]}
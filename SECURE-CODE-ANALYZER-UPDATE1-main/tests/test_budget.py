@@ -0,0 +1,66 @@
+import json, pathlib, sys, time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import detectors
+from src.secure_code_analyzer.core.budget import Budget
+from src.secure_code_analyzer.core.profile import ScanTimings
+from src.secure_code_analyzer.core.cache import ResultCache
+from src.secure_code_analyzer.core.detectors import detect_issues
+from src.secure_code_analyzer.core.rules import RuleSet
+from src.secure_code_analyzer.core.scanner import scan_file, scan_files
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+def rule(rule_id, pattern):
+    return {"id": rule_id, "language": "javascript", "type": "regex", "pattern": pattern,
+            "severity": "high", "category": "test", "message": "m", "suggestion": "s"}
+
+
+def test_backtracking_regex_is_cut_and_other_rules_kept(tmp_path):
+    rules = tmp_path / "rules.json"
+    rules.write_text(json.dumps([rule("SLOW", r"(a+)+b"), rule("FAST", r"eval\(")]))
+    source = tmp_path / "slow.js"
+    source.write_text("eval(x);\n" + "a" * 40 + "\n")
+
+    start = time.perf_counter()
+    issues = detect_issues(str(source), RuleSet(str(rules)), budget=Budget(stage_seconds=1))
+    assert time.perf_counter() - start < 30
+    assert [(i["id"], i.get("stage")) for i in issues if i["id"] == "BUDGET_EXCEEDED"] == [
+        ("BUDGET_EXCEEDED", "regex")]
+
+    # The regex worker was replaced: the next file scans normally.
+    source.write_text("eval(x);\n")
+    assert [i["id"] for i in detect_issues(str(source), RuleSet(str(rules)), budget=Budget())] == ["FAST"]
+
+
+def test_ast_timeout_keeps_regex_findings_and_is_not_cached(tmp_path, monkeypatch):
+    response = {"error": "AST worker timed out after 1s", "retryable": True, "budget": "time"}
+    monkeypatch.setattr(detectors, "run_ast_groups", lambda *a: response)
+    cache = ResultCache(str(tmp_path / "cache"))
+    php = next(p for p in SAMPLES if p.endswith(".php"))
+    issues = scan_file(php, cache=cache, budget=Budget(stage_seconds=1))
+    assert issues[-1]["id"] == "BUDGET_EXCEEDED" and issues[-1]["stage"] == "ast"
+    assert any(i["detected_by"] in ("Regex", "Heuristic") for i in issues)
+    assert len(cache) == 0
+
+
+def test_budgeted_scan_matches_unbudgeted_scan():
+    timings = ScanTimings(keep=3)
+    budgeted = list(scan_files(SAMPLES, budget=Budget(), timings=timings))
+    assert budgeted == list(scan_files(SAMPLES))
+    assert timings.files == len(SAMPLES)
+    assert set(timings.stages) == {"regex", "ast"}
+    slowest = timings.slowest()
+    assert len(slowest) == 3
+    assert [total for _, total, _ in slowest] == sorted((t for _, t, _ in slowest), reverse=True)
+
+
+def test_budget_timeout_uses_the_tighter_limit():
+    budget = Budget(file_seconds=10, stage_seconds=4)
+    assert budget.timeout(0) == 4
+    assert budget.timeout(8) == 2
+    assert budget.timeout(12) == 0
+    assert Budget(0, 0, 0).timeout(5) is None and not Budget(0, 0, 0).enabled
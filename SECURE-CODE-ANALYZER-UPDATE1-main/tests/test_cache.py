@@ -0,0 +1,97 @@
+import pathlib, shutil, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import scanner
+from src.secure_code_analyzer.core.cache import RUNNER_SCRIPTS, ResultCache, cache_key, runners_digest
+from src.secure_code_analyzer.core.rules import RuleSet, RULES_PATH
+from src.secure_code_analyzer.core.scanner import scan_file, scan_files
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLE = REPO / "samples" / "js" / "app.js"
+
+
+def test_rescan_hits_cache_and_relabels_path(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"))
+    first = scan_file(str(SAMPLE), cache=cache)
+    assert (cache.hits, cache.misses) == (0, 1)
+
+    copy = tmp_path / "copy.js"
+    shutil.copy(SAMPLE, copy)
+    second = scan_file(str(copy), cache=cache)
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert second and all(issue["file"] == str(copy) for issue in second)
+    assert [dict(i, file="", fingerprint="") for i in second] == [dict(i, file="", fingerprint="") for i in first]
+    assert first == scan_file(str(SAMPLE))
+
+
+def test_content_or_rules_change_misses(tmp_path):
+    target = tmp_path / "a.js"
+    target.write_text("eval(userInput);\n")
+    cache = ResultCache(str(tmp_path / "cache"))
+    scan_file(str(target), cache=cache)
+
+    target.write_text("eval(userInput);\ndocument.write(x);\n")
+    scan_file(str(target), cache=cache)
+    assert cache.misses == 2
+
+    rules = tmp_path / "rules.json"
+    rules.write_text(pathlib.Path(RULES_PATH).read_text() + "\n")
+    scan_file(str(target), RuleSet(str(rules)), cache=cache)
+    assert (cache.hits, cache.misses) == (0, 3)
+
+
+def test_runner_change_misses(tmp_path):
+    for copy in ("same", "changed"):
+        (tmp_path / copy).mkdir()
+        for name in RUNNER_SCRIPTS:
+            shutil.copy(REPO / name, tmp_path / copy / name)
+    with open(tmp_path / "changed" / "taint_engine.js", "a") as f:
+        f.write("\n// changed\n")
+    assert runners_digest(str(tmp_path / "same")) == runners_digest()
+    changed = runners_digest(str(tmp_path / "changed"))
+    assert changed != runners_digest()
+    assert cache_key(b"eval(x);", "rules", runners=changed) != cache_key(b"eval(x);", "rules")
+
+
+def test_lru_eviction_keeps_recent_entries(tmp_path):
+    cache = ResultCache(str(tmp_path / "cache"), max_bytes=2000)
+    payload = [{"snippet": cache_key(str(i).encode(), "")} for i in range(8)]
+    keys = [cache_key(str(i).encode(), "rules") for i in range(10)]
+    for key in keys:
+        cache.put(key, payload)
+    cache.get(keys[0])                  # touch the oldest entry
+    assert cache.evict() > 0
+    assert cache.size() <= 2000
+    assert cache.get(keys[0]) == payload
+    assert cache.get(keys[1]) is None
+
+
+def test_retryable_errors_are_not_cached(tmp_path, monkeypatch):
+    def flaky(code, file_path, ruleset=None, errors=None, summary=None, budget=None, timings=None,
+              profile=None):
+        errors.append({"stage": "ast", "error": "AST worker timed out", "retryable": True})
+        return []
+
+    monkeypatch.setattr(scanner, "run_detectors", flaky)
+    cache = ResultCache(str(tmp_path / "cache"))
+    assert scan_file(str(SAMPLE), cache=cache) == []
+    assert len(cache) == 0
+
+
+def test_parallel_scan_uses_cache(tmp_path):
+    files = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+    cache = ResultCache(str(tmp_path / "cache"))
+    cold = list(scan_files(files, jobs=2, cache=cache))
+    assert (cache.hits, cache.misses) == (0, len(files))
+    warm = list(scan_files(files, jobs=2, cache=cache))
+    assert cache.hits == len(files)
+    assert warm == cold == list(scan_files(files))
+
+
+def test_broken_database_does_not_fail_scan(tmp_path):
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    (cache_dir / "results.sqlite3").write_text("not a database")
+    cache = ResultCache(str(cache_dir))
+    assert scan_file(str(SAMPLE), cache=cache) == scan_file(str(SAMPLE))
@@ -0,0 +1,92 @@
+import pathlib, shutil, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import crossfile
+from src.secure_code_analyzer.core.cache import ResultCache
+from src.secure_code_analyzer.core.crossfile import crossfile_issues
+from src.secure_code_analyzer.core.scanner import scan_file
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+FIXTURES = REPO / "tests" / "fixtures" / "crossfile"
+
+
+def project(tmp_path, lang):
+    shutil.copytree(FIXTURES / lang, tmp_path / lang)
+    return sorted(str(p) for p in (tmp_path / lang).iterdir())
+
+
+def found(issues):
+    return {(pathlib.Path(i["file"]).name, i["line"], i["id"]) for i in issues}
+
+
+def test_php_flows_through_includes_and_calls(tmp_path):
+    files = project(tmp_path, "php")
+    assert found(crossfile_issues(files)) == {
+        ("db.php", 3, "PHP-SQL-TAINT"),      # $id set by the including index.php
+        ("lib.php", 3, "PHP-SQL-TAINT"),     # run_query() called with $_POST from index.php
+        ("index.php", 7, "PHP-EVAL-TAINT"),  # get_input() in lib.php returns $_GET
+    }
+    # None of these is visible to the per-file scan.
+    assert not found(i for f in files for i in scan_file(f)) & found(crossfile_issues(files))
+
+
+def test_js_flows_through_relative_requires(tmp_path):
+    files = project(tmp_path, "js")
+    assert found(crossfile_issues(files)) == {
+        ("lib.js", 2, "JS-CMD-TAINT"),       # lib.run(req.query.q)
+        ("view.js", 1, "JS-DOM-XSS-TAINT"),  # render(lib.read()), read() returns document.cookie
+    }
+
+
+def test_only_keeps_flows_through_given_files(tmp_path):
+    files = project(tmp_path, "php")
+    db = [f for f in files if f.endswith("db.php")]
+    lib = [f for f in files if f.endswith("lib.php")]
+    assert found(crossfile_issues(files, only=db)) == {("db.php", 3, "PHP-SQL-TAINT")}
+    assert {name for name, _, _ in found(crossfile_issues(files, only=lib))} == {"lib.php", "index.php"}
+
+
+def test_summaries_come_from_scan_cache_and_only_edits_are_resummarised(tmp_path, monkeypatch):
+    files = project(tmp_path, "php")
+    cache = ResultCache(str(tmp_path / "cache"))
+    for f in files:
+        scan_file(f, cache=cache)
+
+    calls = []
+    run = crossfile.run_ast_groups
+    monkeypatch.setattr(crossfile, "run_ast_groups", lambda *a: calls.append(a) or run(*a))
+    first = crossfile_issues(files, cache=cache)
+    assert calls == []
+
+    db = next(f for f in files if f.endswith("db.php"))
+    with open(db, "a", encoding="utf-8") as f:
+        f.write("mysqli_query($conn, $name);\n")
+    second = crossfile_issues(files, cache=cache)
+    assert len(calls) == 1
+    assert found(second) == found(first) | {("db.php", 4, "PHP-SQL-TAINT")}
+
+
+def test_linked_files_are_one_include_or_import_away(tmp_path):
+    files = project(tmp_path, "php")
+    db, index, lib = (next(f for f in files if f.endswith(name)) for name in ("db.php", "index.php", "lib.php"))
+    summaries = {index: crossfile.load_summary(index)}
+    assert crossfile.linked_files(summaries, files, [index]) == [db, lib]   # included by index.php
+    summaries = {db: crossfile.load_summary(db)}
+    assert crossfile.linked_files(summaries, files, [db]) == [index]        # includes db.php
+
+
+def test_changed_file_scan_summarises_only_linked_files(tmp_path, monkeypatch):
+    from secure_code_analyzer import cli
+    from secure_code_analyzer.core import crossfile, detectors   # the modules cli uses
+
+    files = project(tmp_path, "php")
+    db = [f for f in files if f.endswith("db.php")]
+    calls = []
+    for module in (detectors, crossfile):
+        run = module.run_ast_groups
+        monkeypatch.setattr(module, "run_ast_groups", lambda *a, run=run: calls.append(a[0]) or run(*a))
+
+    issues = list(cli.iter_scan(db, cross_file=True, project=files))
+    assert len(calls) == 2   # the scan of db.php and the summary of index.php, which includes it
+    assert ("db.php", 3, "PHP-SQL-TAINT") in found(issues)
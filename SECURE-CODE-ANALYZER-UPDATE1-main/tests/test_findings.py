@@ -0,0 +1,89 @@
+import json, pathlib, pickle, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core.baseline import fingerprint
+from src.secure_code_analyzer.core.detectors import make_finding
+from src.secure_code_analyzer.core.findings import (
+    CWE, OWASP, Finding, FindingBatch, dedupe_issues, detected_by_string, detector_bits,
+)
+from src.secure_code_analyzer.core.scanner import scan_file, scan_files, scan_sources
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+def issue(severity, detected_by, owasp="", cwe="", line=1, rule_id="R"):
+    return {"id": rule_id, "file": "a.php", "line": line, "severity": severity, "category": "C",
+            "message": "m", "suggestion": "s", "owasp": owasp, "cwe": cwe, "snippet": "x", "detected_by": detected_by}
+
+
+def test_tags_are_normalised_once_and_shared():
+    assert OWASP.normalize("A3:2021 – Injection, A03:2021-Injection") == "A03:2021-Injection"
+    assert CWE.normalize("cwe79, CWE-079,CWE-89") == "CWE-79,CWE-89"
+    assert OWASP.bits("A03:2021-Injection") == OWASP.bits("A3:2021 - Injection")
+    assert OWASP.normalize("A01:2021,A05:2021") is OWASP.normalize("A05:2021, A01:2021")
+    assert OWASP.normalize("") == "" and OWASP.bits(None) == 0
+
+
+def test_merge_keeps_most_severe_with_all_tags_and_strongest_detector():
+    merged = dedupe_issues([
+        issue("LOW", "Regex", "A03:2021-Injection", "CWE-89", rule_id="LOW"),
+        issue("CRITICAL", "Heuristic+AST(Taint)", "A01:2021", rule_id="CRIT"),
+        issue("HIGH", "Context-AST", cwe="cwe-79", rule_id="HIGH"),
+        issue("MEDIUM", "Regex", line=2),
+    ])
+    assert [(i["id"], i["line"]) for i in merged] == [("CRIT", 1), ("R", 2)]
+    assert merged[0]["owasp"] == "A01:2021,A03:2021-Injection"
+    assert merged[0]["cwe"] == "CWE-79,CWE-89"
+    assert merged[0]["detected_by"] == "Context-AST+AST(Taint)"
+    assert merged[1]["detected_by"] == "Regex"
+
+
+def test_merge_accepts_info_and_unknown_severities():
+    merged = dedupe_issues([issue("INFO", "Regex"), issue("info", "AST"), issue("weird", "Heuristic"),
+                            issue("low", "Regex")])
+    assert len(merged) == 1 and merged[0]["severity"] == "low" and merged[0]["detected_by"] == "AST"
+
+
+def test_detector_bits_round_trip():
+    for name in ("Regex", "Heuristic", "AST", "Context-AST", "AST+AST(Taint)", "Regex+AST(Taint)"):
+        assert detected_by_string(detector_bits(name)) == name
+    assert detected_by_string(detector_bits("AST(Taint)")) == "Regex+AST(Taint)"
+
+
+def test_batch_round_trips_and_reads_as_issue_dicts():
+    rule = {"id": "R1", "severity": "high", "category": " xss ", "message": "m", "suggestion": "s",
+            "owasp": "A3:2021 - Injection", "cwe": "cwe79"}
+    findings = [make_finding(rule, f"f{n % 2}.js", n, f"line {n}", "AST") for n in range(5)]
+    findings.append(Finding.from_dict(issue("LOW", "System", rule_id="BUDGET_EXCEEDED") | {"stage": "ast"}))
+    batch = FindingBatch(findings)
+    expected = [f.as_dict() for f in findings]
+
+    assert len(batch.rules) == 2 and batch.files == ["f0.js", "f1.js", "a.php"]
+    assert batch == expected and batch[-1]["stage"] == "ast" and batch[1:3] == expected[1:3]
+    assert expected[0]["severity"] == "HIGH" and expected[0]["category"] == "Xss"
+    assert expected[0]["owasp"] == "A03:2021-Injection" and expected[0]["cwe"] == "CWE-79"
+    for copy in (pickle.loads(pickle.dumps(batch)), FindingBatch.from_json(json.loads(json.dumps(batch.to_json())))):
+        assert copy == expected and copy.rules[0] is batch.rules[0]
+
+    batch.relabel("copy.js")
+    assert {i["file"] for i in batch} == {"copy.js"}
+
+
+def test_scan_files_yields_batches_equal_to_scan_file():
+    sample = next(p for p in SAMPLES if p.endswith(".php"))
+    (path, batch), = scan_files([sample])
+    assert isinstance(batch, FindingBatch) and batch == scan_file(sample) and len(batch) > 0
+
+
+def test_scan_sources_matches_scan_file_without_touching_disk():
+    sources = [(f"virtual/{n}-{pathlib.Path(p).name}", pathlib.Path(p).read_bytes()) for n, p in enumerate(SAMPLES)]
+    sources[0] = (sources[0][0], sources[0][1].decode("utf-8"))    # str works too
+    results = list(scan_sources(sources, batch_files=3))
+
+    assert [path for path, _ in results] == [path for path, _ in sources]
+    for (path, batch), sample in zip(results, SAMPLES):
+        assert isinstance(batch, FindingBatch)
+        assert batch == [dict(i, file=path, fingerprint=fingerprint(i["id"], path, i["snippet"], i["function"]))
+                         for i in scan_file(sample)]
@@ -0,0 +1,88 @@
+import os, pathlib, subprocess, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.gitdiff import (
+    GitError, changed_ranges, collect_changed_files, on_changed_lines, parse_diff,
+)
+
+
+def git(repo, *args):
+    subprocess.run(
+        ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args],
+        cwd=repo, check=True, capture_output=True,
+    )
+
+
+@pytest.fixture
+def repo(tmp_path):
+    git(tmp_path, "init", "-q", "-b", "main")
+    (tmp_path / "src").mkdir()
+    (tmp_path / "src" / "a.js").write_text("let a = 1;\nlet b = 2;\nlet c = 3;\n")
+    (tmp_path / "src" / "gone.php").write_text("<?php echo 1;\n")
+    (tmp_path / "README.md").write_text("docs\n")
+    git(tmp_path, "add", "-A")
+    git(tmp_path, "commit", "-q", "-m", "base")
+    git(tmp_path, "checkout", "-q", "-b", "feature")
+    return tmp_path
+
+
+def test_parse_diff_ranges():
+    diff = (
+        "diff --git a/x.js b/x.js\n--- a/x.js\n+++ b/x.js\n"
+        "@@ -1 +1 @@\n-a\n+b\n@@ -5,0 +6,3 @@\n+c\n+d\n+e\n@@ -9,2 +11,0 @@\n-f\n-g\n"
+        "--- a/y.js\n+++ /dev/null\n@@ -1 +0,0 @@\n-h\n"
+    )
+    assert parse_diff(diff) == {"x.js": [(1, 1), (6, 8)]}
+    added = "diff --git a/x.js b/x.js\n--- a/x.js\n+++ b/x.js\n@@ -1,0 +2 @@\n+++ y\n@@ -3,0 +5 @@\n+z\n"
+    assert parse_diff(added) == {"x.js": [(2, 2), (5, 5)]}
+
+
+def test_added_plus_lines_and_prefix_settings(repo):
+    (repo / "src" / "a.js").write_text("let a = 1;\n++ y\nlet b = 2;\nlet c = 3;\neval(x);\n")
+    (repo / "src" / "b.js").write_text("let b = 1;\n")
+    root = os.path.realpath(repo)
+    expected = {os.path.join(root, "src", "a.js"): [(2, 2), (5, 5)], os.path.join(root, "src", "b.js"): None}
+    for setting in ("diff.noprefix=true", "diff.mnemonicPrefix=true"):
+        git(repo, "config", *setting.split("="))
+        assert changed_ranges(root, "main") == expected
+        git(repo, "config", "--unset", setting.split("=")[0])
+
+
+def test_changed_files_since_merge_base(repo):
+    (repo / "src" / "a.js").write_text("let a = 1;\nlet b = eval(x);\nlet c = 3;\n")
+    (repo / "src" / "new.php").write_text("<?php eval($_GET['x']);\n")
+    (repo / "README.md").write_text("more docs\n")
+    git(repo, "rm", "-q", "src/gone.php")
+    git(repo, "add", "-A")
+    git(repo, "commit", "-q", "-m", "change")
+    (repo / "src" / "untracked.js").write_text("eval(y);\n")
+
+    root = os.path.realpath(repo)
+    changes = changed_ranges(root, "main")
+    assert changes[os.path.join(root, "src", "a.js")] == [(2, 2)]
+    assert changes[os.path.join(root, "src", "new.php")] is None
+    assert changes[os.path.join(root, "src", "untracked.js")] is None
+    assert os.path.join(root, "src", "gone.php") not in changes
+
+    files, ranges = collect_changed_files([str(repo / "src")], "main")
+    assert sorted(os.path.basename(f) for f in files) == ["a.js", "new.php", "untracked.js"]
+    a_js = next(f for f in files if f.endswith("a.js"))
+    assert on_changed_lines({"line": 2}, ranges[a_js])
+    assert not on_changed_lines({"line": 3}, ranges[a_js])
+    assert on_changed_lines({"line": 0}, ranges[a_js])
+
+
+def test_main_moving_ahead_does_not_count(repo):
+    git(repo, "checkout", "-q", "main")
+    (repo / "src" / "a.js").write_text("changed on main\n")
+    git(repo, "commit", "-q", "-am", "main moves")
+    git(repo, "checkout", "-q", "feature")
+    assert changed_ranges(os.path.realpath(repo), "main") == {}
+
+
+def test_unknown_ref_raises(repo):
+    with pytest.raises(GitError):
+        changed_ranges(str(repo), "no-such-branch")
@@ -0,0 +1,141 @@
+import argparse, io, json, os, pathlib, sys, threading, time
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core import jobs as jobs_module, reporters
+from src.secure_code_analyzer.core.jobs import JobManager, QueueFull
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+@pytest.fixture(autouse=True)
+def frontend_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporters, "FRONTEND_REPORTS_DIR", str(tmp_path / "frontend"))
+
+
+def wait_for(job, timeout=30):
+    deadline = time.time() + timeout
+    while job.status in ("queued", "running"):
+        assert time.time() < deadline, "job did not finish"
+        time.sleep(0.02)
+
+
+def test_job_reports_progress_and_writes_own_reports(tmp_path):
+    manager = JobManager(str(tmp_path / "jobs"))
+    first = manager.submit(SAMPLES)
+    second = manager.submit(SAMPLES[:2])
+    wait_for(first)
+    wait_for(second)
+
+    status = first.to_dict()
+    assert status["status"] == "done"
+    assert status["done"] == status["total"] == len(SAMPLES)
+    assert status["count"] == len(status["issues"]) > 0
+    assert first.to_dict(offset=5)["issues"] == status["issues"][5:]
+
+    assert first.report_dir != second.report_dir
+    report = json.loads(pathlib.Path(status["reports"]["json"]).read_text(encoding="utf-8"))
+    assert report == status["issues"]
+    assert os.path.dirname(second.reports["json"]) == second.report_dir
+    manager.shutdown()
+
+
+def test_queue_cap_rejects_extra_jobs(tmp_path, monkeypatch):
+    release = threading.Event()
+
+    def blocked_scan(files, **kwargs):
+        release.wait(10)
+        for path in files:
+            yield path, []
+
+    monkeypatch.setattr(jobs_module, "scan_files", blocked_scan)
+    manager = JobManager(str(tmp_path / "jobs"), max_jobs=1, max_queued=1)
+    running = manager.submit(["a.js"])
+    queued = manager.submit(["b.js"])
+    with pytest.raises(QueueFull):
+        manager.submit(["c.js"])
+
+    release.set()
+    wait_for(running)
+    wait_for(queued)
+    assert manager.submit(["d.js"]) is not None
+    manager.shutdown()
+
+
+def test_failed_job_reports_error(tmp_path, monkeypatch):
+    def broken_scan(files, **kwargs):
+        raise RuntimeError("boom")
+        yield
+
+    monkeypatch.setattr(jobs_module, "scan_files", broken_scan)
+    manager = JobManager(str(tmp_path / "jobs"))
+    job = manager.submit(["a.js"])
+    wait_for(job)
+    assert job.to_dict()["status"] == "failed"
+    assert job.error == "boom"
+    manager.shutdown()
+
+
+def test_job_parses_each_file_once_for_scan_and_flows(tmp_path, monkeypatch):
+    from src.secure_code_analyzer.core import crossfile, detectors, scanner
+
+    fixtures = REPO / "tests" / "fixtures" / "crossfile" / "php"
+    files = sorted(str(p) for p in fixtures.iterdir())
+    requests = []
+    for module in (detectors, crossfile):
+        run = module.run_ast_groups
+        monkeypatch.setattr(module, "run_ast_groups", lambda *a, run=run: requests.append(a[1]) or run(*a))
+    run_batch = scanner.run_ast_batch
+    monkeypatch.setattr(scanner, "run_ast_batch", lambda runner, batch, *a: requests.extend(batch) or
+                        run_batch(runner, batch, *a))
+
+    manager = JobManager(str(tmp_path / "jobs"))
+    uploads = {os.path.basename(f): pathlib.Path(f).read_bytes() for f in files}
+    for names, sources in ((files, None), (list(uploads), uploads)):
+        requests.clear()
+        job = manager.submit(names, sources)
+        wait_for(job)
+        assert job.status == "done" and len(requests) == len(files)
+        assert ("db.php", 3, "PHP-SQL-TAINT") in {(os.path.basename(i["file"]), i["line"], i["id"])
+                                                  for i in job.issues}
+    manager.shutdown()
+
+
+def test_scan_endpoint_returns_job_id(tmp_path, monkeypatch):
+    cli = pytest.importorskip("src.secure_code_analyzer.cli")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cli, "REPORTS_DIR", str(tmp_path / "reports"))
+    args = argparse.Namespace(max_jobs=1, max_queued=2, jobs=1, regex_engine="combined", no_cache=True,
+                              no_cross_file=False, file_budget=300, stage_budget=60, memory_budget=2048,
+                              profile=False)
+    app = cli.create_app(args)
+    client = app.test_client()
+
+    def finished(job_id):
+        deadline = time.time() + 30
+        while True:
+            status = client.get(f"/jobs/{job_id}").get_json()
+            if status["status"] not in ("queued", "running"):
+                return status
+            assert time.time() < deadline
+            time.sleep(0.05)
+
+    sample = pathlib.Path(SAMPLES[0])
+    res = client.post("/scan", data={"files": (io.BytesIO(sample.read_bytes()), "../../evil.js")},
+                      content_type="multipart/form-data")
+    assert res.status_code == 202
+    status = finished(res.get_json()["id"])
+
+    assert status["status"] == "done" and status["done"] == status["total"] == 1
+    assert not (tmp_path.parent / "evil.js").exists() and not (tmp_path / "uploads").exists()
+    assert {i["file"] for i in status["issues"]} == {"evil.js"}
+    assert client.get(status["reports"]["json"]).get_json() == status["issues"]
+    assert client.get("/jobs/nope").status_code == 404
+    res = client.post("/refresh")
+    assert res.status_code == 202
+    # Let the rescan finish while the report directories are still patched.
+    assert finished(res.get_json()["id"])["status"] == "done"
+    app.config["JOBS"].shutdown()
@@ -0,0 +1,62 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.detectors import run_detectors
+from src.secure_code_analyzer.core.lexer import mask
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(p for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+def masked(code, language):
+    """mask() of `code`, checked to keep every offset and line end."""
+    out = mask(code, language)
+    assert len(out) == len(code)
+    assert [i for i, c in enumerate(out) if c in "\r\n"] == [i for i, c in enumerate(code) if c in "\r\n"]
+    return out
+
+
+@pytest.mark.parametrize("code,expected", [
+    ('a = "eval(x)"; // eval(y)', 'a = "       ";           '),
+    ("s = 'it\\'s'; t = `x${ f('y') + `z${w}` }q`", "s = '     '; t = ` ${ f(' ') + ` ${w}` } `"),
+    ("r = /a['\"]/g; d = x / 2 / y;", "r = /     /g; d = x / 2 / y;"),
+    ("if (/\\//.test(s)) return /[/]x/", "if (/  /.test(s)) return /    /"),
+    ("i++ / 2 / j; a = (b) / c / d", "i++ / 2 / j; a = (b) / c / d"),
+    ("/* eval(\n */ eval(z)", "        \n    eval(z)"),
+    ("#!/usr/bin/env node\nx = '", "                   \nx = '"),
+])
+def test_javascript(code, expected):
+    assert masked(code, "javascript") == expected
+
+
+@pytest.mark.parametrize("code,expected", [
+    ("<p>system()</p><?php system(1); ?><b>x</b>", "               <?php system(1); ?>        "),
+    ("<?php # c ?>eval()<?= $x ?>", "<?php     ?>      <?= $x ?>"),
+    ("<?php #[Attr] $a = 'x\\'y' . \"a {$b[\"k\"]} $c\";", "<?php #[Attr] $a = '    ' . \"  {$b[\" \"]}   \";"),
+    ("<?php $h = <<<EOT\n  a {$o->m('z')}\n  EOT;\n", "<?php $h = <<<EOT\n    {$o->m(' ')}\n  EOT;\n"),
+    ("<?php $n = <<<'X'\n$y {$z}\nX . `ls $d`;", "<?php $n = <<<'X'\n       \nX . `     `;"),
+    ("<?php /* a\n b */ eval($x);", "<?php     \n      eval($x);"),
+])
+def test_php(code, expected):
+    assert masked(code, "php") == expected
+
+
+def test_bytes_keep_byte_offsets():
+    code = "<?php // café\n$s = 'naïve'; system($s);\n"
+    data = mask(code.encode("utf-8"), "php")
+    assert len(data) == len(code.encode("utf-8"))
+    assert data.decode("utf-8").endswith("$s = '      '; system($s);\n")
+
+
+@pytest.mark.parametrize("path", SAMPLES, ids=lambda p: p.name)
+def test_samples_keep_offsets(path):
+    code = path.read_text(encoding="utf-8")
+    masked(code, "php" if path.suffix == ".php" else "javascript")
+
+
+def test_masked_rules_report_code_lines_only():
+    code = "<?php\n// system($a);\n$s = \"eval(1)\";\n\n   system($_GET['c']);\n"
+    assert {i["line"] for i in run_detectors(code, "a.php")} == {5}
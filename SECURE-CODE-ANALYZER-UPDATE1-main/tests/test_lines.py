@@ -0,0 +1,17 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core.lines import LineIndex
+
+
+def test_line_index_matches_newline_counting():
+    code = "a = 1;\r\n  eval(x);  \n\nlast"
+    lines = LineIndex(code)
+    for offset in range(len(code) + 1):
+        assert lines.line_of(offset) == code[:offset].count("\n") + 1
+    assert lines.snippet(2) == "eval(x);"
+    assert lines.line_text(1) == "a = 1;\r"
+    assert lines.line_text(3) == ""
+    assert lines.snippet(4) == "last"
+    assert lines.snippet(0) == lines.snippet(5) == ""
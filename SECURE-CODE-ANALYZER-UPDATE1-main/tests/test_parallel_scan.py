@@ -0,0 +1,20 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core.scanner import scan_files
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+
+
+def _sample_files():
+    return sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+def test_parallel_scan_matches_serial_order_and_results():
+    files = _sample_files() + [str(REPO / "samples" / "missing.php")]
+    serial = list(scan_files(files, jobs=1))
+    parallel = list(scan_files(files, jobs=3))
+    assert [path for path, _ in parallel] == files
+    assert parallel == serial
+    assert serial[-1][1][0]["id"] == "FILE-ERROR"
@@ -0,0 +1,50 @@
+import json, pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.ast_pool import NodeWorker
+from src.secure_code_analyzer.core.rules import RuleSet
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+FIXTURES = REPO / "tests" / "fixtures" / "php"
+
+# expected_ast.json pins the findings for the repo rules: the ast and
+# context-ast groups as the original every-rule-at-every-node walk produced
+# them, the taint groups as the per-function taint engine does.
+EXPECTED = json.loads((FIXTURES / "expected_ast.json").read_text(encoding="utf-8"))
+
+
+def rule_groups():
+    ruleset = RuleSet()
+    groups = {t: ruleset.get("php", t) for t in ("ast", "context-ast", "taint-ast")}
+    # All AST rule types in one group, to pin down cross-type ordering too.
+    groups["mixed"] = [
+        r for r in ruleset
+        if r["language"] == "php" and r["type"] not in ("regex", "heuristic")
+        and not isinstance(r.get("calleeName"), list)
+    ]
+    return groups
+
+
+@pytest.fixture(scope="module")
+def worker():
+    w = NodeWorker(str(REPO / "php_ast_runner.js"))
+    yield w
+    w.close()
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_indexed_runner_matches_previous_results(worker, name):
+    code = (FIXTURES / name).read_text(encoding="utf-8")
+    response = worker.request(code, rule_groups())
+    response.pop("id")
+    assert response == EXPECTED[name]
+
+
+def test_interpolated_superglobal_taints_variable(worker):
+    rules = [{"id": "T", "type": "taint-ast", "sources": ["$_GET"], "sinks": ["System"]}]
+    code = '<?php\n$a = "x $_GET[q]";\n$b = $a;\nsystem($b);\nsystem($c);\n'
+    response = worker.request(code, {"taint-ast": rules})
+    assert response["results"]["taint-ast"] == {"T": [4]}
@@ -0,0 +1,54 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import detectors
+from src.secure_code_analyzer.core.matcher import required_literals
+from src.secure_code_analyzer.core.rules import RuleSet
+from src.secure_code_analyzer.core.source import SourceFile
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+# Spellings the prefilter must not be fooled by: escapes, case, aliases.
+TRICKY = {
+    "escape.js": "\\u0065val(req.query.code);\nsetTimeout(\"tick()\", 10);\n",
+    "alias.js": "const cp = require('child_process');\nconst {query: q} = req;\ncp.exec(req.query.dir);\n",
+    "upper.php": "<?php\nEVAL($_GET['x']);\nSYSTEM($_POST['y']);\nInclude $_GET['page'];\n",
+    "kelvin.php": "<?php\nunlin\u212a($_GET['f']);\n",
+    "clean.php": "<?php\n$total = 0;\nfor ($i = 0; $i < 10; $i++) { $total += $i; }\n",
+}
+
+
+def test_required_literals():
+    assert required_literals(r"\beval\s*\(") == {"eval"}
+    assert required_literals(r"(innerHTML|outerHTML)\s*=") == {"innerHTML", "outerHTML"}
+    assert required_literals(r"set(?:Timeout|Interval)\s*\(") == {"Timeout", "Interval"}
+    assert required_literals(r"[A-Za-z0-9+/]{100,}") is None
+    assert required_literals(r"dl\s*\(") is None     # too short to be worth looking for
+
+
+def test_findings_are_the_same_with_and_without_prefilter():
+    plain, filtered = RuleSet(prefilter=False), RuleSet()
+    inputs = [(path, pathlib.Path(path).read_text(encoding="utf-8")) for path in SAMPLES] + list(TRICKY.items())
+    for path, code in inputs:
+        for summary in (None, {}):
+            expected = detectors.run_detectors(code, path, plain, summary=summary)
+            assert detectors.run_detectors(code, path, filtered, summary=summary) == expected, path
+        # Regex rules then scan the bytes, where only ASCII letters fold.
+        source = SourceFile.from_bytes(code)
+        assert detectors.run_detectors(source, path, filtered) == detectors.run_detectors(source, path, plain), path
+
+
+def test_file_without_anchors_skips_the_ast_round_trip(monkeypatch):
+    calls = []
+    run = detectors.run_ast_groups
+    monkeypatch.setattr(detectors, "run_ast_groups", lambda *a: calls.append(a[2]) or run(*a))
+
+    assert detectors.run_detectors(TRICKY["clean.php"], "clean.php") == []
+    assert calls == []
+    detectors.run_detectors(TRICKY["upper.php"], "upper.php")
+    assert "ast" in calls[-1] and "taint-ast" in calls[-1]
+    # The cross-file pass needs every file's taint summary.
+    detectors.run_detectors(TRICKY["clean.php"], "clean.php", summary={})
+    assert list(calls[-1]) == ["taint-ast"]
@@ -0,0 +1,62 @@
+import argparse, pathlib, sys
+import pytest
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core.profile import LATENCY_BUCKETS, ScanTimings, prometheus_lines
+from src.secure_code_analyzer.core.rules import RuleSet
+from src.secure_code_analyzer.core.scanner import scan_files
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+SAMPLES = sorted(str(p) for p in (REPO / "samples").rglob("*") if p.suffix in (".js", ".php"))
+
+
+def test_profiled_scan_matches_plain_scan_and_times_every_rule():
+    timings = ScanTimings()
+    assert list(scan_files(SAMPLES, timings=timings, profile=True)) == list(scan_files(SAMPLES))
+
+    assert timings.files == len(SAMPLES)
+    assert timings.bytes == sum(pathlib.Path(p).stat().st_size for p in SAMPLES)
+    assert {"regex", "parse", "ast"} <= set(timings.detectors)
+    ruleset = RuleSet()
+    pattern_ids = {rule["id"] for language in ("javascript", "php")
+                   for rule, _ in ruleset.pattern_rules(language)}
+    assert pattern_ids <= set(timings.rules)
+    assert any(stats["stage"] == "ast" for stats in timings.rules.values())
+    assert sum(stats["matches"] for stats in timings.rules.values()) > 0
+
+    table = timings.profile_lines(limit=5)
+    assert "=== PROFILE ===" in table and len([line for line in table if line.startswith(
+        tuple(timings.rules))]) == 5
+
+
+def test_prometheus_histogram_is_cumulative():
+    timings = ScanTimings()
+    timings.add("a.js", {"regex": 0.001})
+    timings.add("b.js", {"regex": 0.2, "ast": 0.1})
+    timings.add("c.js", {"ast": 1000})
+    lines = prometheus_lines(timings, {"sca_jobs": ("Jobs by status.", "status", {"done": 2})})
+
+    assert "sca_files_scanned_total 3" in lines
+    assert 'sca_stage_seconds_total{stage="ast"} 1000.100000' in lines
+    assert f'sca_file_scan_seconds_bucket{{le="{LATENCY_BUCKETS[0]}"}} 1' in lines
+    assert 'sca_file_scan_seconds_bucket{le="0.5"} 2' in lines
+    assert f'sca_file_scan_seconds_bucket{{le="{LATENCY_BUCKETS[-1]}"}} 2' in lines
+    assert 'sca_file_scan_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'sca_jobs{status="done"} 2' in lines
+    assert not any(line.startswith("sca_rule_") for line in lines)
+
+
+def test_metrics_endpoint(tmp_path, monkeypatch):
+    cli = pytest.importorskip("src.secure_code_analyzer.cli")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(cli, "REPORTS_DIR", str(tmp_path / "reports"))
+    args = argparse.Namespace(max_jobs=1, max_queued=2, jobs=1, regex_engine="combined", no_cache=True,
+                              no_cross_file=False, file_budget=300, stage_budget=60, memory_budget=2048,
+                              profile=False)
+    res = cli.create_app(args).test_client().get("/metrics")
+    assert res.status_code == 200
+    assert res.content_type.startswith("text/plain")
+    body = res.get_data(as_text=True)
+    assert "# TYPE sca_file_scan_seconds histogram" in body
+    assert "sca_files_scanned_total 0" in body
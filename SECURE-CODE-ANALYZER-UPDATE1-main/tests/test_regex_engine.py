@@ -0,0 +1,58 @@
+import pathlib, random, re, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.matcher import CombinedMatcher
+from src.secure_code_analyzer.core.rules import RuleSet
+from src.secure_code_analyzer.core.detectors import run_detectors
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+COMBINED = RuleSet(regex_engine="combined")
+PER_RULE = RuleSet(regex_engine="per-rule")
+
+TOKENS = [
+    "eval(", "console.log", "innerHTML = ", "location.search", "document.write(", "md5(",
+    "$_GET['x']", "$_REQUEST", "SELECT ", "system(", "mysqli_query(", "http://", "tmp",
+    "TODO", "token", "'", '"', ";", ")", "(", "\n", " ", "A" * 60, "catch (e) {}",
+    "localStorage.setItem(", "unserialize(", "setTimeout('", "var_dump(", "die(",
+]
+
+
+def _corpus():
+    for path in sorted((REPO / "samples").rglob("*")):
+        if path.suffix in (".js", ".php"):
+            yield path.name, path.read_text(encoding="utf-8")
+    rng = random.Random(1234)
+    for n in range(60):
+        text = "".join(rng.choice(TOKENS) for _ in range(rng.randint(5, 400)))
+        yield f"fuzz{n}{rng.choice(['.js', '.php'])}", text
+
+
+def _hits(ruleset, lang, text):
+    return [(r["id"], t, starts) for r, t, starts in ruleset.pattern_hits(lang, text)]
+
+
+@pytest.mark.parametrize("name,text", list(_corpus()))
+def test_combined_engine_matches_per_rule(name, text):
+    for lang in ("javascript", "php"):
+        assert _hits(COMBINED, lang, text) == _hits(PER_RULE, lang, text)
+
+
+def test_run_detectors_identical_on_samples():
+    for name, text in _corpus():
+        if name.startswith("fuzz"):
+            continue
+        path = ("a.js" if name.endswith(".js") else "a.php")
+        assert run_detectors(text, path, COMBINED) == run_detectors(text, path, PER_RULE)
+
+
+def test_overlapping_empty_and_unsafe_patterns():
+    patterns = [re.compile(p, re.I) for p in (
+        r"ab", r"a+", r"b|", r"(a)\1", r"(?P<x>b)a", r"aba", r"[^a]b", r"\bB\s*a", r"K",
+    )]
+    matcher = CombinedMatcher(patterns)
+    assert matcher.standalone_idx == [2, 3, 4, 6]
+    for text in ("", "ab", "aabab", "ababa", "bbaab", "aaaa", "B  A xb", "\u212a k"):
+        assert matcher.scan(text) == [[m.start() for m in p.finditer(text)] for p in patterns]
@@ -0,0 +1,53 @@
+import io, json, pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core import reporters
+
+ISSUES = [
+    {"id": "JS-EVAL", "file": "a.js", "line": 3, "severity": "CRITICAL", "category": "Injection",
+     "message": "Use of eval().", "suggestion": "Avoid eval.", "owasp": "A03:2021", "cwe": "CWE-95",
+     "snippet": "eval(`x` + \"\\n\")", "detected_by": "Regex"},
+    {"id": "PHP-XSS", "file": "b.php", "line": 8, "severity": "HIGH", "category": "Xss",
+     "message": "Echo <b>unescaped</b>; é", "suggestion": "Escape output", "owasp": "A3",
+     "cwe": "cwe79", "snippet": "echo $_GET['q'];", "detected_by": "AST"},
+]
+
+
+@pytest.fixture(autouse=True)
+def frontend_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(reporters, "FRONTEND_REPORTS_DIR", str(tmp_path / "frontend"))
+
+
+@pytest.mark.parametrize("issues", [ISSUES, ISSUES[:1], []])
+def test_json_array_matches_json_dumps(issues):
+    out = io.StringIO()
+    assert reporters.write_json_array(iter(issues), out) == len(issues)
+    assert out.getvalue() == json.dumps(issues, indent=2)
+
+
+def test_json_report_streams_from_generator(tmp_path):
+    path = tmp_path / "report.json"
+    assert reporters.generate_json_report((i for i in ISSUES), str(path)) == 2
+    assert json.loads(path.read_text(encoding="utf-8")) == ISSUES
+
+
+def test_jsonl_round_trip(tmp_path):
+    path = tmp_path / "report.jsonl"
+    assert reporters.generate_jsonl_report(iter(ISSUES), str(path)) == 2
+    assert len(path.read_text(encoding="utf-8").splitlines()) == 2
+    assert list(reporters.iter_jsonl(str(path))) == ISSUES
+
+
+def test_html_report_dedups_and_links_json(tmp_path):
+    path = tmp_path / "report.html"
+    assert reporters.generate_html_report(iter(ISSUES + ISSUES), str(path)) == 2
+    html = path.read_text(encoding="utf-8")
+    assert html.count("<tr class=") == 2
+    assert 'link.href = "report.json"' in html
+    assert "Avoid eval" in html and "eval(`x`" not in html.split("<tbody")[0]
+    assert "Echo &lt;b&gt;unescaped&lt;/b&gt;" in html
+    assert "<option value='A03:2021'>" in html and "<option value='CWE-79'>" in html
+    assert html.rstrip().endswith("</html>")
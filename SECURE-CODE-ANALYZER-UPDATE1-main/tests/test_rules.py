@@ -0,0 +1,60 @@
+import json, pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.rules import RuleSet
+from src.secure_code_analyzer.core.detectors import run_detectors
+
+RULE = {
+    "id": "JS-TEST-001", "language": "javascript", "type": "regex", "severity": "LOW",
+    "category": "Test", "message": "m", "suggestion": "s", "pattern": r"console\.log",
+}
+
+
+def _write(path, rules):
+    path.write_text(json.dumps(rules), encoding="utf-8")
+    return str(path)
+
+
+def test_ruleset_groups_and_reload(tmp_path):
+    path = _write(tmp_path / "rules.json", [RULE])
+    ruleset = RuleSet(path)
+    assert [r["id"] for r in ruleset.get("javascript", "regex")] == ["JS-TEST-001"]
+    assert run_detectors("console.log(1)", "a.js", ruleset)[0]["id"] == "JS-TEST-001"
+
+    _write(tmp_path / "rules.json", [dict(RULE, id="JS-TEST-002", pattern="alert")])
+    ruleset.reload()
+    assert run_detectors("console.log(1)", "a.js", ruleset) == []
+    assert run_detectors("alert(1)", "a.js", ruleset)[0]["id"] == "JS-TEST-002"
+
+
+def test_ruleset_rejects_bad_rules_and_keeps_old_ones(tmp_path):
+    path = _write(tmp_path / "rules.json", [RULE])
+    ruleset = RuleSet(path)
+    _write(tmp_path / "rules.json", [dict(RULE, pattern="(")])
+    with pytest.raises(ValueError, match="bad pattern"):
+        ruleset.reload()
+    _write(tmp_path / "rules.json", [dict(RULE, type="taint-ast")])
+    with pytest.raises(ValueError, match="sources, sinks"):
+        ruleset.reload()
+    assert [r["id"] for r in ruleset] == ["JS-TEST-001"]
+
+
+def test_masked_rules_skip_comments_and_strings_with_either_engine(tmp_path):
+    path = _write(tmp_path / "rules.json", [
+        dict(RULE, id="RAW"), dict(RULE, id="MASKED", text="masked"),
+    ])
+    code = "// console.log\nvar s = 'console.log';\n/* x\n */ console.log(s);\n"
+    for engine in ("combined", "per-rule"):
+        ruleset = RuleSet(path, regex_engine=engine)
+        for text in (code, code.encode("utf-8")):
+            hits = {r["id"]: starts for r, _, starts in ruleset.pattern_hits("javascript", text)}
+            assert hits == {"RAW": [3, 24, 47], "MASKED": [47]}
+    _write(tmp_path / "rules.json", [dict(RULE, text="masked")])
+    assert [(i["id"], i["line"]) for i in run_detectors(code, "a.js", RuleSet(path))] == [("JS-TEST-001", 4)]
+
+    _write(tmp_path / "rules.json", [dict(RULE, text="code")])
+    with pytest.raises(ValueError, match="text must be one of raw, masked"):
+        RuleSet(path)
@@ -0,0 +1,70 @@
+import json, os, pathlib, shutil, subprocess, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core.profile import ScanTimings
+from src.secure_code_analyzer.core.shard import ShardMerge, ShardWriter, parse_shard, path_shard, size_shards
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_assignment_is_stable_and_covers_every_file(tmp_path):
+    assert parse_shard("2/3") == (2, 3)
+    for spec in ("0/3", "4/3", "3", "a/b"):
+        with pytest.raises(ValueError):
+            parse_shard(spec)
+
+    paths = [f"src/f{n}.js" for n in range(200)]
+    shards = [path_shard(p, 4) for p in paths]
+    assert shards == [path_shard(os.path.abspath(p), 4) for p in paths]
+    assert set(shards) == {1, 2, 3, 4}
+
+    sizes = [50, 40, 30, 20, 20, 10]
+    files = []
+    for n, size in enumerate(sizes):
+        files.append(str(tmp_path / f"f{n}.php"))
+        pathlib.Path(files[-1]).write_bytes(b"x" * size)
+    owners = size_shards(files, 2)
+    load = {shard: sum(s for f, s in zip(files, sizes) if owners[f] == shard) for shard in (1, 2)}
+    assert load == {1: 90, 2: 80}
+
+
+def test_merge_refuses_incomplete_scans(tmp_path):
+    paths = [str(tmp_path / f"shard-{i}-of-2.jsonl") for i in (1, 2)]
+    for i, path in enumerate(paths, 1):
+        with ShardWriter(path, i, 2, "digest") as shard:
+            shard.add(i - 1, f"f{i}.js", [{"id": "R", "line": 1}])
+            if i == 1:
+                shard.finish({"files": 1, "timings": ScanTimings().to_dict()})
+    with pytest.raises(ValueError, match="missing shard"):
+        ShardMerge(paths[:1])
+    merge = ShardMerge(paths)
+    with pytest.raises(ValueError, match="did not finish"):
+        [record["file"] for record in merge.files()]
+
+
+def test_shards_in_separate_processes_merge_to_the_single_node_reports(tmp_path):
+    pytest.importorskip("flask")
+    for name in ("samples", "tests/fixtures/crossfile"):
+        shutil.copytree(REPO / name, tmp_path / "src" / pathlib.Path(name).name)
+    env = dict(os.environ, PYTHONPATH=str(REPO / "src"))
+
+    def cli(workdir, *args):
+        workdir.mkdir(exist_ok=True)
+        return subprocess.Popen([sys.executable, "-m", "secure_code_analyzer.cli", *args], cwd=workdir, env=env,
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    targets = ["../src/samples", "../src/crossfile", "--no-cache", "-j", "1"]
+    runs = [cli(tmp_path / "single", *targets)]
+    runs += [cli(tmp_path / "sharded", *targets, "--shard", f"{i}/3") for i in (1, 2, 3)]
+    assert [run.wait() for run in runs] == [0, 0, 0, 0]
+    shards = sorted(str(p) for p in (tmp_path / "sharded" / "reports").glob("shard-*-of-3.jsonl"))
+    assert cli(tmp_path / "sharded", "merge", *shards).wait() == 0
+
+    single, merged = tmp_path / "single" / "reports", tmp_path / "sharded" / "reports"
+    for name in ("report.jsonl", "report.json"):
+        assert (single / name).read_bytes() == (merged / name).read_bytes()
+    issues = json.loads((merged / "report.json").read_text(encoding="utf-8"))
+    assert any(i["detected_by"] == "AST(Taint)" and i["file"].endswith("db.php") for i in issues)
@@ -0,0 +1,56 @@
+import pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+from src.secure_code_analyzer.core import source as source_module
+from src.secure_code_analyzer.core.detectors import detect_issues, run_detectors
+from src.secure_code_analyzer.core.source import SourceFile, decode
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+
+
+def test_decode_falls_back_to_legacy_encodings():
+    assert decode("é".encode("utf-8")) == ("é", "utf-8")
+    assert decode("€ é".encode("cp1252")) == ("€ é", "cp1252")
+    assert decode(b"\x81\xe9") == ("\x81é", "latin-1")   # 0x81 is undefined in cp1252
+
+
+def test_latin1_php_is_scanned_not_a_file_error(tmp_path):
+    path = tmp_path / "legacy.php"
+    path.write_bytes("<?php\n// Größe\necho $_GET['name'];\n".encode("latin-1"))
+    issues = detect_issues(str(path))
+    assert "FILE-ERROR" not in {i["id"] for i in issues}
+    assert ("PHP-XSS-001", 3, "echo $_GET['name'];") in {(i["id"], i["line"], i["snippet"]) for i in issues}
+
+
+def test_mapped_bytes_and_text_give_the_same_findings(tmp_path, monkeypatch):
+    monkeypatch.setattr(source_module, "MMAP_MIN_BYTES", 1)
+    for path in sorted((REPO / "samples").rglob("*")):
+        if path.suffix not in (".js", ".php"):
+            continue
+        copy = tmp_path / path.name
+        copy.write_bytes(path.read_bytes().replace(b"\n", b"\r\n"))
+        with SourceFile(str(copy)) as source:
+            assert source.mapped
+            mapped = run_detectors(source, str(path))
+        assert mapped == run_detectors(path.read_text(encoding="utf-8"), str(path))
+
+
+def test_classic_mac_line_ends_keep_line_numbers(tmp_path):
+    path = tmp_path / "mac.php"
+    path.write_bytes(b"<?php\r$a = 1;\recho $_GET['x'];\r")
+    with SourceFile(str(path)) as source:
+        assert isinstance(source.view(), str)
+        issues = run_detectors(source, str(path))
+    assert 3 in {i["line"] for i in issues if i["id"] == "PHP-XSS-001"}
+
+
+def test_non_ascii_files_match_like_text(tmp_path):
+    code = "var Éeval = 1; Éeval(2);\nconst ñ = 'x'; eval(ñ);\n"
+    path = tmp_path / "uni.js"
+    path.write_text(code, encoding="utf-8")
+    with SourceFile(str(path)) as source:
+        assert isinstance(source.view(), str)
+        from_file = run_detectors(source, "uni.js")
+    assert from_file == run_detectors(code, "uni.js")
+    assert [i["line"] for i in from_file if i["id"] == "JS-EVAL-001"] == [2]
@@ -0,0 +1,78 @@
+import pathlib, re, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core import detectors
+from src.secure_code_analyzer.core.ast_pool import NodeWorker
+from src.secure_code_analyzer.core.rules import RuleSet
+
+REPO = pathlib.Path(__file__).resolve().parents[1]
+FIXTURES = REPO / "tests" / "fixtures" / "taint"
+RUNNERS = {"php": "php_ast_runner.js", "javascript": "js_ast_runner.js"}
+EXPECT = re.compile(r"//\s*expect:\s*(.+)$")
+
+
+def expected(code):
+    """(line, rule id) pairs from the fixture's `// expect: ID ID` comments."""
+    return {
+        (n, rule_id)
+        for n, line in enumerate(code.splitlines(), 1)
+        for m in [EXPECT.search(line)] if m
+        for rule_id in m.group(1).split()
+    }
+
+
+@pytest.fixture(scope="module")
+def workers():
+    started = {lang: NodeWorker(str(REPO / runner)) for lang, runner in RUNNERS.items()}
+    yield started
+    for w in started.values():
+        w.close()
+
+
+def taint(workers, lang, code, options=None):
+    rules = RuleSet().get(lang, "taint-ast")
+    return workers[lang].request(code, {"taint-ast": rules}, options)
+
+
+@pytest.mark.parametrize("path", sorted(FIXTURES.rglob("*.*")), ids=lambda p: p.name)
+def test_fixture_findings_match_annotations(workers, path):
+    lang = "php" if path.suffix == ".php" else "javascript"
+    code = path.read_text(encoding="utf-8")
+    results = taint(workers, lang, code)["results"]["taint-ast"]
+    found = {(n, rule_id) for rule_id, lines in results.items() for n in lines}
+    want = expected(code)
+    assert not want - found, f"missed (recall): {sorted(want - found)}"
+    assert not found - want, f"spurious (precision): {sorted(found - want)}"
+
+
+def test_reassignment_clears_taint_regardless_of_rule_order(workers):
+    code = "<?php\n$x = $_GET['a'];\nsystem($x);\n$x = 'ls';\nsystem($x);\n"
+    results = taint(workers, "php", code)["results"]["taint-ast"]
+    assert results["PHP-SYSTEM-TAINT"] == [3]
+    assert all(lines == [3] for lines in results.values())
+
+
+def test_parameter_flow_reported_at_callee_sink(workers):
+    code = "function f(a, b) {\n  eval(b);\n}\nf(req.query.x, 'k');\nf('k', req.query.y);\n"
+    results = taint(workers, "javascript", code)["results"]["taint-ast"]
+    assert results == {"JS-EVAL-TAINT": [2]}
+
+
+def test_time_cap_truncates_function(workers):
+    body = "\n".join(f"  $v{i} = $v{i - 1} . $_GET['k'];" for i in range(1, 20000))
+    code = f"<?php\nfunction big($v0) {{\n{body}\n  system($v19999);\n}}\n"
+    response = taint(workers, "php", code, {"taintBudgetMs": 0})
+    assert response["truncated"]["taint-ast"] == [{"unit": "big", "line": 2}]
+    assert "truncated" not in taint(workers, "php", code)
+
+
+def test_truncation_is_a_retryable_error(monkeypatch):
+    response = {"results": {"taint-ast": {}}, "truncated": {"taint-ast": [{"unit": "big", "line": 2}]}}
+    monkeypatch.setattr(detectors, "run_ast_groups", lambda runner, code, groups, options=None, *limits: response)
+    errors = []
+    detectors.run_detectors("<?php\nsystem($_GET['c']);\n", "x.php", errors=errors)
+    assert errors == [{"stage": "taint-ast", "retryable": True,
+                       "error": "taint analysis time cap hit in 1 function(s)"}]
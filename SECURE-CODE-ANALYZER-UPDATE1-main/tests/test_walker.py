@@ -0,0 +1,94 @@
+import os, pathlib, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core import walker
+from src.secure_code_analyzer.core.walker import FileWalker, compile_pattern, iter_files
+
+
+def tree(root, files):
+    for rel, content in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+
+def walked(root, **options):
+    return [os.path.relpath(p, root).replace(os.sep, "/") for p in iter_files([str(root)], **options)]
+
+
+def test_default_excludes_and_extensions(tmp_path):
+    tree(tmp_path, {
+        "app.js": "", "index.php": "", "README.md": "",
+        "node_modules/lib/index.js": "", "vendor/autoload.php": "", ".git/hooks/x.js": "",
+        "src/dist/bundle.js": "", "src/util.js": "",
+    })
+    assert walked(tmp_path) == ["app.js", "index.php", "src/util.js"]
+    assert "vendor/autoload.php" in walked(tmp_path, default_excludes=False)
+
+
+def test_gitignore_and_scaignore(tmp_path):
+    tree(tmp_path, {
+        ".gitignore": "# generated\n*.gen.js\n/tmp/\nlogs\n!keep.gen.js\n",
+        ".scaignore": "fixtures/**/*.php\n",
+        "a.gen.js": "", "keep.gen.js": "", "tmp/a.js": "", "src/tmp/b.js": "", "src/logs/c.js": "",
+        "fixtures/x/y.php": "", "fixtures/z.js": "",
+        "sub/.gitignore": "local.js\n", "sub/local.js": "", "sub/other.js": "", "local.js": "",
+    })
+    assert walked(tmp_path) == [
+        "fixtures/z.js", "keep.gen.js", "local.js", "src/tmp/b.js", "sub/other.js",
+    ]
+    every = sorted(str(p.relative_to(tmp_path)).replace(os.sep, "/") for p in tmp_path.rglob("*") if p.is_file())
+    wants = FileWalker([str(tmp_path)]).wants
+    assert [rel for rel in every if wants(str(tmp_path / rel))] == walked(tmp_path)
+    assert walked(tmp_path, exclude=["src/"]) == ["fixtures/z.js", "keep.gen.js", "local.js", "sub/other.js"]
+
+
+@pytest.mark.parametrize("pattern, path, expected", [
+    ("*.js", "a/b.js", True),
+    ("/b.js", "a/b.js", False),
+    ("a/**/c.js", "a/x/y/c.js", True),
+    ("a/**/c.js", "a/c.js", True),
+    ("**/build", "x/build", True),
+    ("file[0-9].php", "file1.php", True),
+    ("file[!0-9].php", "file1.php", False),
+])
+def test_compile_pattern(pattern, path, expected):
+    assert bool(compile_pattern(pattern).regex.fullmatch(path)) is expected
+
+
+def test_size_cutoff_and_minified_files(tmp_path):
+    tree(tmp_path, {
+        "big.php": "<?php\n" + "x" * 5000, "app.min.js": "a()",
+        "bundle.js": "var a=1;" * 2000, "plain.js": "var a = 1;\n" * 2000,
+    })
+    w = FileWalker([str(tmp_path)], max_file_bytes=4096)
+    assert [os.path.basename(p) for p in w] == []
+    assert w.skipped == {"too large": 3, "minified": 1}
+
+    assert walked(tmp_path) == ["big.php", "plain.js"]
+    assert walked(tmp_path, include_minified=True) == ["app.min.js", "big.php", "bundle.js", "plain.js"]
+
+
+@pytest.mark.skipif(not hasattr(os, "symlink"), reason="needs symlinks")
+def test_symlink_loops_are_cut(tmp_path):
+    tree(tmp_path, {"a/x.js": ""})
+    try:
+        os.symlink(tmp_path, tmp_path / "a" / "loop")
+    except OSError:
+        pytest.skip("cannot create symlinks")
+    w = FileWalker([str(tmp_path)])
+    assert [os.path.relpath(p, tmp_path) for p in w] == [os.path.join("a", "x.js")]
+    assert w.skipped["symlink loop"] == 1
+
+
+def test_walk_is_lazy(tmp_path, monkeypatch):
+    tree(tmp_path, {f"d{i}/f.js": "" for i in range(5)})
+    listed = []
+    scandir = os.scandir
+    monkeypatch.setattr(walker.os, "scandir", lambda path: listed.append(path) or scandir(path))
+    it = iter_files([str(tmp_path)])
+    assert next(it).endswith("f.js")
+    assert len(listed) == 2      # the root and d0 only
@@ -0,0 +1,118 @@
+import json, os, pathlib, shutil, sys
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1]))
+sys.path.insert(0, str(pathlib.Path(__file__).resolve().parents[1] / "src"))
+
+import pytest
+
+from src.secure_code_analyzer.core import crossfile, detectors
+from src.secure_code_analyzer.core.walker import FileWalker
+from src.secure_code_analyzer.core.watch import InotifyWatcher, LiveScan, PollingWatcher, WatchUnavailable
+
+
+def next_batch(watcher, change):
+    """The first batch the watcher yields after `change()`."""
+    batches = watcher.batches()
+    change()
+    try:
+        return next(batches)
+    finally:
+        batches.close()
+
+
+def test_polling_watcher_coalesces_a_burst(tmp_path):
+    (tmp_path / "a.js").write_text("a();\n")
+    (tmp_path / "b.js").write_text("b();\n")
+    watcher = PollingWatcher([str(tmp_path)], lambda: FileWalker([str(tmp_path)]), debounce=0.05, interval=0.05)
+
+    def change():
+        (tmp_path / "a.js").write_text("a(1, 2);\n")
+        (tmp_path / "b.js").unlink()
+        (tmp_path / "c.js").write_text("c();\n")
+
+    assert next_batch(watcher, change) == {str(tmp_path / name) for name in ("a.js", "b.js", "c.js")}
+
+
+def test_inotify_watcher_sees_new_directories(tmp_path):
+    try:
+        watcher = InotifyWatcher([str(tmp_path)], debounce=0.05)
+    except WatchUnavailable as e:
+        pytest.skip(str(e))
+    try:
+        assert next_batch(watcher, lambda: (tmp_path / "lib").mkdir()) == {str(tmp_path / "lib")}
+        touched = next_batch(watcher, lambda: (tmp_path / "lib" / "x.js").write_text("x();\n"))
+        assert touched == {str(tmp_path / "lib" / "x.js")}
+    finally:
+        watcher.close()
+
+
+def test_live_scan_publishes_only_changed_files(tmp_path):
+    (tmp_path / "a.js").write_text("eval(a);\n")
+    (tmp_path / "b.js").write_text("const b = 1;\n")
+    (tmp_path / "lib").mkdir()
+    (tmp_path / "lib" / "c.js").write_text("eval(c);\n")
+    root = str(tmp_path)
+    live = LiveScan(lambda: FileWalker([root]), cross_file=False)
+    live.start()
+    version, files = live.snapshot()
+    assert sorted(files) == [os.path.join(root, "a.js"), os.path.join(root, "lib", "c.js")]
+
+    subscriber = live.subscribe()
+    (tmp_path / "b.js").write_text("eval(b);\n")
+    (tmp_path / "a.js").write_text("eval(a);\n// touched, same issues\n")
+    rescanned, removed, delta = live.apply([str(tmp_path / "a.js"), str(tmp_path / "b.js")])
+    assert len(rescanned) == 2 and removed == []
+    assert delta["version"] == version + 1
+    assert [(f, [i["snippet"] for i in issues]) for f, issues in delta["files"].items()] == \
+        [(os.path.join(root, "b.js"), ["eval(b);"])]
+    assert subscriber.get_nowait() == delta
+
+    (tmp_path / "lib" / "c.js").unlink()
+    (tmp_path / "lib").rmdir()
+    _, removed, delta = live.apply([str(tmp_path / "lib")])
+    assert removed == [os.path.join(root, "lib", "c.js")]
+    assert delta["files"] == {os.path.join(root, "lib", "c.js"): []}
+    assert live.apply([str(tmp_path / "notes.txt")]) == ([], [], None)
+
+
+def test_live_scan_links_flows_from_one_parse_per_file(tmp_path, monkeypatch):
+    root = str(tmp_path / "js")
+    shutil.copytree(pathlib.Path(__file__).resolve().parent / "fixtures" / "crossfile" / "js", root)
+    calls = []
+    for module in (detectors, crossfile):
+        run = module.run_ast_groups
+        monkeypatch.setattr(module, "run_ast_groups", lambda *a, run=run: calls.append(a[0]) or run(*a))
+
+    live = LiveScan(lambda: FileWalker([root]))
+    live.start()
+    assert len(calls) == 3
+    assert {(os.path.basename(f), i["id"]) for f, issues in live.flows.items() for i in issues} == \
+        {("lib.js", "JS-CMD-TAINT"), ("view.js", "JS-DOM-XSS-TAINT")}
+
+    calls.clear()
+    live.apply([os.path.join(root, "view.js")])
+    assert len(calls) == 1
+
+
+def test_events_stream_sends_snapshot_then_deltas(tmp_path):
+    pytest.importorskip("flask")
+    from secure_code_analyzer.cli import live_events
+
+    (tmp_path / "a.js").write_text("const a = 1;\n")
+    root = str(tmp_path)
+    live = LiveScan(lambda: FileWalker([root]), cross_file=False)
+    live.start()
+    stream = live_events(live, keepalive=0.01)
+    snapshot = next(stream)
+    assert snapshot.startswith("id: 0\nevent: snapshot\n")
+
+    assert next(stream) == ": keep-alive\n\n"
+    (tmp_path / "a.js").write_text("eval(a);\n")
+    live.apply([os.path.join(root, "a.js")])
+    event = next(stream)
+    while event.startswith(":"):
+        event = next(stream)
+    head, data = event.rsplit("data: ", 1)
+    assert head == "id: 1\nevent: delta\n"
+    assert list(json.loads(data)["files"]) == [os.path.join(root, "a.js")]
+    stream.close()
+    assert live._subscribers == []